@@ -136,6 +136,12 @@ DEFAULT_THINKING_MODE_THINKDEEP = os.getenv("DEFAULT_THINKING_MODE_THINKDEEP", "
 # processing to use full model context windows (200K-1M+ tokens).
 MCP_PROMPT_SIZE_LIMIT = 50_000  # 50K characters (user input only)
 
+# Streaming progress
+# When the MCP client sends a progressToken, model responses are streamed and the
+# server emits progress notifications while generation runs. This is the minimum
+# interval between notifications so long generations don't flood the transport.
+STREAM_PROGRESS_INTERVAL_SECONDS = 1.0
+
 # Threading configuration
 # Simple Redis-based conversation threading for stateless MCP environment
 # Set REDIS_URL environment variable to connect to your Redis instance
@@ -1,10 +1,14 @@
 """Base model provider interface and data classes."""
 
+import asyncio
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import Any, Optional
 
+from .retry import RetryPolicy, get_retry_policy
+
 
 class ProviderType(Enum):
     """Supported model provider types."""
@@ -149,6 +153,23 @@ class ModelResponse:
         return self.usage.get("total_tokens", 0)
 
 
+@dataclass
+class StreamChunk:
+    """Incremental piece of a streamed model response.
+
+    Providers yield text deltas as they arrive. The final chunk (final=True)
+    carries usage and response metadata such as finish_reason once the
+    stream has completed.
+    """
+
+    content: str = ""
+    usage: dict[str, int] = field(default_factory=dict)
+    metadata: dict[str, Any] = field(default_factory=dict)
+    model_name: Optional[str] = None
+    friendly_name: Optional[str] = None
+    final: bool = False
+
+
 class ModelProvider(ABC):
     """Abstract base class for model providers."""
 
@@ -157,6 +178,11 @@ class ModelProvider(ABC):
         self.api_key = api_key
         self.config = kwargs
 
+    @property
+    def retry_policy(self) -> RetryPolicy:
+        """Retry policy applied to API calls (shared by all providers)."""
+        return get_retry_policy()
+
     @abstractmethod
     def get_capabilities(self, model_name: str) -> ModelCapabilities:
         """Get capabilities for a specific model."""
@@ -187,6 +213,77 @@ class ModelProvider(ABC):
         """
         pass
 
+    async def agenerate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Generate content without blocking the event loop.
+
+        Providers with an async SDK should override this with a native
+        implementation. The default runs generate_content in a worker thread
+        so that providers without async support still don't stall the server.
+
+        Args:
+            prompt: User prompt to send to the model
+            model_name: Name of the model to use
+            system_prompt: Optional system prompt for model behavior
+            temperature: Sampling temperature (0-2)
+            max_output_tokens: Maximum tokens to generate
+            **kwargs: Provider-specific parameters
+
+        Returns:
+            ModelResponse with generated content and metadata
+        """
+        return await asyncio.to_thread(
+            self.generate_content,
+            prompt=prompt,
+            model_name=model_name,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+            **kwargs,
+        )
+
+    async def astream_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> AsyncIterator[StreamChunk]:
+        """Stream generated content as it is produced.
+
+        The default implementation does not stream: it awaits agenerate_content
+        and yields the whole response as a single final chunk. Providers whose
+        API supports streaming should override this.
+
+        Yields:
+            StreamChunk text deltas, ending with a final chunk carrying usage and metadata
+        """
+        response = await self.agenerate_content(
+            prompt=prompt,
+            model_name=model_name,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+            **kwargs,
+        )
+        yield StreamChunk(
+            content=response.content,
+            usage=response.usage,
+            metadata=response.metadata,
+            model_name=response.model_name,
+            friendly_name=response.friendly_name,
+            final=True,
+        )
+
     @abstractmethod
     def count_tokens(self, text: str, model_name: str) -> int:
         """Count tokens for the given text using the specified model's tokenizer."""
@@ -0,0 +1,166 @@
+"""
+Process-wide HTTP connection pool for OpenAI-compatible providers
+
+OpenAI, X.AI, OpenRouter and Custom providers all talk HTTP through httpx.
+Left to itself each SDK client builds a private connection pool, so a session
+that fans out across several models pays a fresh TCP+TLS handshake per
+provider and nobody can tune keep-alive or pool size.
+
+ConnectionManager owns one sync and one async httpx client shared by every
+OpenAI-compatible provider. Per-provider timeouts still apply: each SDK client
+passes its _configure_timeouts() value on every request.
+
+Environment Variables:
+- HTTP_POOL_MAX_CONNECTIONS: Maximum concurrent connections across all hosts (default: 100)
+- HTTP_POOL_MAX_KEEPALIVE: Maximum idle keep-alive connections retained (default: 20)
+- HTTP_POOL_KEEPALIVE_EXPIRY: Seconds an idle connection is kept before closing (default: 30)
+- HTTP_ENABLE_HTTP2: Negotiate HTTP/2 where supported, requires httpx[http2] (default: false)
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Optional
+
+import httpx
+from openai import DefaultAsyncHttpxClient, DefaultHttpxClient
+
+from utils.env import get_env_number
+
+logger = logging.getLogger(__name__)
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _pool_connection_stats(client: Optional[Any]) -> dict[str, int]:
+    """Best-effort connection counts from the client's underlying httpcore pool."""
+    stats = {"connections": 0, "idle": 0}
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    for connection in getattr(pool, "connections", None) or []:
+        try:
+            stats["connections"] += 1
+            if connection.is_idle():
+                stats["idle"] += 1
+        except Exception:
+            continue
+    return stats
+
+
+class ConnectionManager:
+    """Shared httpx clients with configurable pooling for OpenAI-compatible providers."""
+
+    def __init__(self):
+        self.max_connections = int(get_env_number("HTTP_POOL_MAX_CONNECTIONS", 100))
+        self.max_keepalive_connections = int(get_env_number("HTTP_POOL_MAX_KEEPALIVE", 20))
+        self.keepalive_expiry = get_env_number("HTTP_POOL_KEEPALIVE_EXPIRY", 30.0)
+
+        self.http2 = os.getenv("HTTP_ENABLE_HTTP2", "false").lower() == "true"
+        if self.http2 and not _http2_available():
+            logger.warning("HTTP_ENABLE_HTTP2 is set but the 'h2' package is not installed - using HTTP/1.1")
+            self.http2 = False
+
+        self._sync_client: Optional[httpx.Client] = None
+        # The async pool's connections belong to the event loop that opened them
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self._requests = 0
+
+    @property
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def _count_request(self, request: httpx.Request) -> None:
+        self._requests += 1
+
+    async def _count_async_request(self, request: httpx.Request) -> None:
+        self._requests += 1
+
+    def get_sync_client(self) -> httpx.Client:
+        """Get the shared synchronous httpx client."""
+        if self._sync_client is None or self._sync_client.is_closed:
+            self._sync_client = DefaultHttpxClient(
+                limits=self.limits,
+                http2=self.http2,
+                event_hooks={"request": [self._count_request]},
+            )
+            logger.debug(f"Created shared HTTP client (limits={self.limits}, http2={self.http2})")
+        return self._sync_client
+
+    def get_async_client(self) -> httpx.AsyncClient:
+        """
+        Get the shared async httpx client for the running event loop.
+
+        A new client is created if the loop changed, since pooled connections
+        cannot be reused across event loops.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        if (
+            self._async_client is None
+            or self._async_client.is_closed
+            or (loop is not None and self._async_loop is not None and loop is not self._async_loop)
+        ):
+            self._async_client = DefaultAsyncHttpxClient(
+                limits=self.limits,
+                http2=self.http2,
+                event_hooks={"request": [self._count_async_request]},
+            )
+            self._async_loop = loop
+            logger.debug(f"Created shared async HTTP client (limits={self.limits}, http2={self.http2})")
+        elif self._async_loop is None:
+            self._async_loop = loop
+        return self._async_client
+
+    def get_stats(self) -> dict[str, Any]:
+        """
+        Get pool configuration and usage for monitoring.
+
+        Returns:
+            Dict with limits, HTTP/2 flag, request count and live connection counts
+        """
+        return {
+            "max_connections": self.max_connections,
+            "max_keepalive_connections": self.max_keepalive_connections,
+            "keepalive_expiry": self.keepalive_expiry,
+            "http2": self.http2,
+            "requests": self._requests,
+            "sync": _pool_connection_stats(self._sync_client),
+            "async": _pool_connection_stats(self._async_client),
+        }
+
+    def close(self) -> None:
+        """Close the shared sync client. The async client is closed with its event loop."""
+        if self._sync_client is not None:
+            self._sync_client.close()
+            self._sync_client = None
+
+
+# Global instance (singleton pattern)
+_connection_manager: Optional[ConnectionManager] = None
+
+
+def get_connection_manager() -> ConnectionManager:
+    """
+    Get the process-wide connection manager.
+
+    Returns:
+        The singleton ConnectionManager instance
+    """
+    global _connection_manager
+    if _connection_manager is None:
+        _connection_manager = ConnectionManager()
+    return _connection_manager
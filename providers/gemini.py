@@ -1,13 +1,22 @@
 """Gemini model provider implementation."""
 
 import logging
-import time
+from collections.abc import AsyncIterator
 from typing import Optional
 
 from google import genai
 from google.genai import types
 
-from .base import ModelCapabilities, ModelProvider, ModelResponse, ProviderType, RangeTemperatureConstraint
+from .base import (
+    ModelCapabilities,
+    ModelProvider,
+    ModelResponse,
+    ProviderType,
+    RangeTemperatureConstraint,
+    StreamChunk,
+)
+from .gemini_context_cache import CachePlan, ContextCacheHandle, get_context_cache_manager
+from .retry import RetryStats
 
 logger = logging.getLogger(__name__)
 
@@ -87,17 +96,20 @@ class GeminiModelProvider(ModelProvider):
             temperature_constraint=temp_constraint,
         )
 
-    def generate_content(
+    def _build_request(
         self,
         prompt: str,
         model_name: str,
-        system_prompt: Optional[str] = None,
-        temperature: float = 0.7,
-        max_output_tokens: Optional[int] = None,
-        thinking_mode: str = "medium",
-        **kwargs,
-    ) -> ModelResponse:
-        """Generate content using Gemini model."""
+        system_prompt: Optional[str],
+        temperature: float,
+        max_output_tokens: Optional[int],
+        thinking_mode: str,
+    ) -> tuple[str, str, types.GenerateContentConfig, ModelCapabilities]:
+        """Validate parameters and build the generate_content request.
+
+        Returns:
+            Tuple of (resolved_name, full_prompt, generation_config, capabilities)
+        """
         # Validate parameters
         resolved_name = self._resolve_model_name(model_name)
         self.validate_parameters(resolved_name, temperature)
@@ -128,74 +140,209 @@ class GeminiModelProvider(ModelProvider):
                 actual_thinking_budget = int(max_thinking_tokens * self.THINKING_BUDGETS[thinking_mode])
                 generation_config.thinking_config = types.ThinkingConfig(thinking_budget=actual_thinking_budget)
 
-        # Retry logic with exponential backoff
-        max_retries = 2  # Total of 2 attempts (1 initial + 1 retry)
-        base_delay = 1.0  # Start with 1 second delay
+        return resolved_name, full_prompt, generation_config, capabilities
+
+    def _plan_context_cache(
+        self, resolved_name: str, prompt: str, system_prompt: Optional[str], kwargs: dict
+    ) -> Optional[CachePlan]:
+        """Check whether the conversation's file block should be served from a context cache."""
+        return get_context_cache_manager().plan(resolved_name, prompt, system_prompt, kwargs.get("conversation_id"))
+
+    def _apply_context_cache(
+        self,
+        plan: CachePlan,
+        handle: Optional[ContextCacheHandle],
+        full_prompt: str,
+        generation_config: types.GenerateContentConfig,
+    ) -> str:
+        """Point the request at the cached prefix and return the contents still to send."""
+        if handle is None:
+            return full_prompt
+        generation_config.cached_content = handle.name
+        return plan.remainder
+
+    def _build_model_response(
+        self, response, resolved_name: str, thinking_mode: str, capabilities: ModelCapabilities
+    ) -> ModelResponse:
+        """Convert a Gemini response into a ModelResponse."""
+        # Extract usage information if available
+        usage = self._extract_usage(response)
+
+        return ModelResponse(
+            content=response.text,
+            usage=usage,
+            model_name=resolved_name,
+            friendly_name="Gemini",
+            provider=ProviderType.GOOGLE,
+            metadata={
+                "thinking_mode": thinking_mode if capabilities.supports_extended_thinking else None,
+                "finish_reason": (
+                    getattr(response.candidates[0], "finish_reason", "STOP") if response.candidates else "STOP"
+                ),
+            },
+        )
+
+    def generate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        thinking_mode: str = "medium",
+        **kwargs,
+    ) -> ModelResponse:
+        """Generate content using Gemini model."""
+        resolved_name, full_prompt, generation_config, capabilities = self._build_request(
+            prompt, model_name, system_prompt, temperature, max_output_tokens, thinking_mode
+        )
+
+        handle = None
+        plan = self._plan_context_cache(resolved_name, prompt, system_prompt, kwargs)
+        if plan is not None:
+            handle = get_context_cache_manager().ensure(self.client, plan)
+            full_prompt = self._apply_context_cache(plan, handle, full_prompt, generation_config)
+
+        retry_stats = RetryStats()
+        try:
+            response = self.retry_policy.run_sync(
+                lambda: self.client.models.generate_content(
+                    model=resolved_name,
+                    contents=full_prompt,
+                    config=generation_config,
+                ),
+                stats=retry_stats,
+                description=f"Gemini {resolved_name}",
+            )
+        except Exception as e:
+            error_msg = f"Gemini API error for model {resolved_name} after {retry_stats.attempts} attempts: {str(e)}"
+            raise RuntimeError(error_msg) from e
+
+        model_response = self._build_model_response(response, resolved_name, thinking_mode, capabilities)
+        model_response.metadata["retry"] = retry_stats.as_metadata()
+        if handle is not None:
+            model_response.metadata["context_cache"] = handle.name
+        return model_response
+
+    async def agenerate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        thinking_mode: str = "medium",
+        **kwargs,
+    ) -> ModelResponse:
+        """Generate content using the async genai client so the event loop keeps serving requests."""
+        resolved_name, full_prompt, generation_config, capabilities = self._build_request(
+            prompt, model_name, system_prompt, temperature, max_output_tokens, thinking_mode
+        )
+
+        handle = None
+        plan = self._plan_context_cache(resolved_name, prompt, system_prompt, kwargs)
+        if plan is not None:
+            handle = await get_context_cache_manager().aensure(self.client, plan)
+            full_prompt = self._apply_context_cache(plan, handle, full_prompt, generation_config)
 
-        last_exception = None
+        retry_stats = RetryStats()
+        try:
+            response = await self.retry_policy.run(
+                lambda: self.client.aio.models.generate_content(
+                    model=resolved_name,
+                    contents=full_prompt,
+                    config=generation_config,
+                ),
+                stats=retry_stats,
+                description=f"Gemini {resolved_name}",
+            )
+        except Exception as e:
+            error_msg = f"Gemini API error for model {resolved_name} after {retry_stats.attempts} attempts: {str(e)}"
+            raise RuntimeError(error_msg) from e
+
+        model_response = self._build_model_response(response, resolved_name, thinking_mode, capabilities)
+        model_response.metadata["retry"] = retry_stats.as_metadata()
+        if handle is not None:
+            model_response.metadata["context_cache"] = handle.name
+        return model_response
+
+    async def astream_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        thinking_mode: str = "medium",
+        **kwargs,
+    ) -> AsyncIterator[StreamChunk]:
+        """Stream content from the async genai client, yielding text as it arrives.
+
+        Only opening the stream is retried; a failure mid-stream is raised to the caller.
 
-        for attempt in range(max_retries):
-            try:
-                # Generate content
-                response = self.client.models.generate_content(
+        Yields:
+            StreamChunk text deltas, ending with a final chunk carrying usage and metadata
+        """
+        resolved_name, full_prompt, generation_config, capabilities = self._build_request(
+            prompt, model_name, system_prompt, temperature, max_output_tokens, thinking_mode
+        )
+
+        handle = None
+        plan = self._plan_context_cache(resolved_name, prompt, system_prompt, kwargs)
+        if plan is not None:
+            handle = await get_context_cache_manager().aensure(self.client, plan)
+            full_prompt = self._apply_context_cache(plan, handle, full_prompt, generation_config)
+
+        retry_stats = RetryStats()
+        try:
+            stream = await self.retry_policy.run(
+                lambda: self.client.aio.models.generate_content_stream(
                     model=resolved_name,
                     contents=full_prompt,
                     config=generation_config,
-                )
-
-                # Extract usage information if available
-                usage = self._extract_usage(response)
-
-                return ModelResponse(
-                    content=response.text,
-                    usage=usage,
-                    model_name=resolved_name,
-                    friendly_name="Gemini",
-                    provider=ProviderType.GOOGLE,
-                    metadata={
-                        "thinking_mode": thinking_mode if capabilities.supports_extended_thinking else None,
-                        "finish_reason": (
-                            getattr(response.candidates[0], "finish_reason", "STOP") if response.candidates else "STOP"
-                        ),
-                    },
-                )
-
-            except Exception as e:
-                last_exception = e
-
-                # Check if this is a retryable error
-                error_str = str(e).lower()
-                is_retryable = any(
-                    term in error_str
-                    for term in [
-                        "timeout",
-                        "connection",
-                        "network",
-                        "temporary",
-                        "unavailable",
-                        "retry",
-                        "429",
-                        "500",
-                        "502",
-                        "503",
-                        "504",
-                    ]
-                )
-
-                # If this is the last attempt or not retryable, give up
-                if attempt == max_retries - 1 or not is_retryable:
-                    break
-
-                # Calculate delay with exponential backoff
-                delay = base_delay * (2**attempt)
-
-                # Log retry attempt (could add logging here if needed)
-                # For now, just sleep and retry
-                time.sleep(delay)
-
-        # If we get here, all retries failed
-        error_msg = f"Gemini API error for model {resolved_name} after {max_retries} attempts: {str(last_exception)}"
-        raise RuntimeError(error_msg) from last_exception
+                ),
+                stats=retry_stats,
+                description=f"Gemini {resolved_name}",
+            )
+        except Exception as e:
+            error_msg = f"Gemini API error for model {resolved_name} after {retry_stats.attempts} attempts: {str(e)}"
+            raise RuntimeError(error_msg) from e
+
+        usage = {}
+        finish_reason = "STOP"
+        try:
+            async for chunk in stream:
+                # Usage is cumulative; later chunks supersede earlier ones
+                usage_metadata = getattr(chunk, "usage_metadata", None)
+                if usage_metadata is not None and usage_metadata.candidates_token_count is not None:
+                    usage = self._extract_usage(chunk)
+                if chunk.candidates and getattr(chunk.candidates[0], "finish_reason", None):
+                    finish_reason = chunk.candidates[0].finish_reason
+                if chunk.text:
+                    yield StreamChunk(content=chunk.text)
+        except Exception as e:
+            raise RuntimeError(f"Gemini API error for model {resolved_name} while streaming: {str(e)}") from e
+        finally:
+            # Release the connection if the consumer stopped early (e.g. request cancelled)
+            aclose = getattr(stream, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+        metadata = {
+            "thinking_mode": thinking_mode if capabilities.supports_extended_thinking else None,
+            "finish_reason": finish_reason,
+            "retry": retry_stats.as_metadata(),
+        }
+        if handle is not None:
+            metadata["context_cache"] = handle.name
+
+        yield StreamChunk(
+            usage=usage,
+            metadata=metadata,
+            model_name=resolved_name,
+            friendly_name="Gemini",
+            final=True,
+        )
 
     def count_tokens(self, text: str, model_name: str) -> int:
         """Count tokens for the given text using Gemini's tokenizer."""
@@ -270,6 +417,9 @@ class GeminiModelProvider(ModelProvider):
                 usage["input_tokens"] = metadata.prompt_token_count
             if hasattr(metadata, "candidates_token_count"):
                 usage["output_tokens"] = metadata.candidates_token_count
+            # Portion of the input served from a context cache (billed at the cached rate)
+            if isinstance(getattr(metadata, "cached_content_token_count", None), int):
+                usage["cached_tokens"] = metadata.cached_content_token_count
             if "input_tokens" in usage and "output_tokens" in usage:
                 usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
 
@@ -0,0 +1,263 @@
+"""
+Gemini explicit context caching for conversation file sets
+
+Every continuation re-sends the files referenced in the conversation, often
+hundreds of thousands of tokens that are identical from turn to turn. Gemini
+can store such a prefix server-side (cached contents) and bill it at a reduced
+rate on later requests that reference it.
+
+For each conversation thread the stable prefix - the system instruction plus
+the embedded file block (delimited by FILES_SECTION_START/END in
+utils.conversation_memory) - is uploaded once. Later turns send only the rest
+of the prompt together with the cache handle. The handle is:
+
+- reused while the thread's model, system prompt and file block are unchanged
+- extended when it is about to expire, without re-uploading
+- replaced (and the old cache deleted) when the file set or model changes
+
+Prefixes below GEMINI_CONTEXT_CACHE_MIN_TOKENS are sent normally, since
+caching small prompts costs more in storage than it saves. If creating a cache
+fails, the request falls back to sending the full prompt.
+
+Handles are kept for at most GEMINI_CONTEXT_CACHE_MAX_THREADS threads, least
+recently used first out; expired handles are dropped as they are found. A
+dropped handle's cache is left to expire on Google's side.
+
+Environment Variables:
+- GEMINI_CONTEXT_CACHE_ENABLED: Cache conversation file sets (default: true)
+- GEMINI_CONTEXT_CACHE_MIN_TOKENS: Smallest file block worth caching (default: 32768)
+- GEMINI_CONTEXT_CACHE_TTL: Seconds a cache lives on Google's side (default: 3600)
+- GEMINI_CONTEXT_CACHE_MAX_THREADS: Threads whose handles are kept in memory (default: 1000)
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from google.genai import types
+
+from utils.conversation_memory import FILES_SECTION_END, FILES_SECTION_START
+from utils.env import get_env_number
+from utils.token_utils import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Stands in for the file block in prompts that reference a cache
+CACHED_FILES_PLACEHOLDER = (
+    f"{FILES_SECTION_START}\n(The files are provided in the cached context above.)\n{FILES_SECTION_END}"
+)
+
+# Extend a handle this many seconds before it expires
+REFRESH_MARGIN_SECONDS = 60
+
+
+@dataclass
+class CachePlan:
+    """A request split into a cacheable prefix and the per-turn remainder."""
+
+    scope: str
+    model_name: str
+    system_prompt: Optional[str]
+    files_block: str
+    remainder: str
+    content_hash: str
+
+
+@dataclass
+class ContextCacheHandle:
+    """Gemini cached content registered for a thread."""
+
+    name: str
+    model_name: str
+    content_hash: str
+    expires_at: float
+
+
+def split_files_block(prompt: str) -> Optional[tuple[str, str]]:
+    """
+    Separate the embedded conversation file block from a prompt.
+
+    Returns:
+        (files_block, remainder) with the block replaced by a placeholder,
+        or None if the prompt has no file block
+    """
+    start = prompt.find(FILES_SECTION_START)
+    if start == -1:
+        return None
+    end = prompt.find(FILES_SECTION_END, start)
+    if end == -1:
+        return None
+    end += len(FILES_SECTION_END)
+    return prompt[start:end], prompt[:start] + CACHED_FILES_PLACEHOLDER + prompt[end:]
+
+
+class GeminiContextCacheManager:
+    """Tracks one cached-content handle per conversation thread."""
+
+    def __init__(self):
+        self.enabled = os.getenv("GEMINI_CONTEXT_CACHE_ENABLED", "true").lower() == "true"
+        self.min_tokens = int(get_env_number("GEMINI_CONTEXT_CACHE_MIN_TOKENS", 32768))
+        self.ttl = int(get_env_number("GEMINI_CONTEXT_CACHE_TTL", 3600))
+        self.max_threads = int(get_env_number("GEMINI_CONTEXT_CACHE_MAX_THREADS", 1000))
+
+        # thread -> handle; most recently used last
+        self._handles: OrderedDict[str, ContextCacheHandle] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"created": 0, "reused": 0, "extended": 0, "replaced": 0, "failed": 0}
+
+    def plan(
+        self, model_name: str, prompt: str, system_prompt: Optional[str], conversation_id: Optional[str]
+    ) -> Optional[CachePlan]:
+        """
+        Decide whether a request should use a context cache.
+
+        Args:
+            model_name: Resolved Gemini model name
+            prompt: Full prompt as built by the tool
+            system_prompt: System instruction
+            conversation_id: Thread the request continues (None for new conversations)
+
+        Returns:
+            CachePlan, or None if the request should be sent normally
+        """
+        if not self.enabled or not conversation_id:
+            return None
+        split = split_files_block(prompt)
+        if split is None:
+            return None
+        files_block, remainder = split
+        if estimate_tokens(files_block) < self.min_tokens:
+            return None
+
+        digest = hashlib.sha256()
+        for part in (model_name, system_prompt or "", files_block):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return CachePlan(conversation_id, model_name, system_prompt, files_block, remainder, digest.hexdigest())
+
+    def _lookup(self, plan: CachePlan) -> tuple[Optional[ContextCacheHandle], Optional[ContextCacheHandle]]:
+        """Return (usable handle, stale handle to delete) for the plan's thread."""
+        with self._lock:
+            handle = self._handles.get(plan.scope)
+            if handle is None:
+                return None, None
+            if handle.expires_at <= time.time():
+                del self._handles[plan.scope]
+                return None, None  # already gone server-side
+            if handle.content_hash != plan.content_hash:
+                return None, handle
+            self._handles.move_to_end(plan.scope)
+            return handle, None
+
+    def _needs_extension(self, handle: ContextCacheHandle) -> bool:
+        with self._lock:
+            return handle.expires_at - time.time() < REFRESH_MARGIN_SECONDS
+
+    def _extended(self, handle: ContextCacheHandle) -> None:
+        with self._lock:
+            handle.expires_at = time.time() + self.ttl
+            self._stats["extended"] += 1
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self._stats[stat] += 1
+
+    def _create_config(self, plan: CachePlan) -> types.CreateCachedContentConfig:
+        return types.CreateCachedContentConfig(
+            system_instruction=plan.system_prompt or None,
+            contents=[plan.files_block],
+            ttl=f"{self.ttl}s",
+            display_name=f"zen-mcp-{plan.scope}"[:128],
+        )
+
+    def _store(self, plan: CachePlan, cached: Any) -> ContextCacheHandle:
+        now = time.time()
+        handle = ContextCacheHandle(cached.name, plan.model_name, plan.content_hash, now + self.ttl)
+        with self._lock:
+            self._stats["created"] += 1
+            self._handles.pop(plan.scope, None)
+            self._handles[plan.scope] = handle
+            for scope in [scope for scope, other in self._handles.items() if other.expires_at <= now]:
+                del self._handles[scope]
+            while len(self._handles) > self.max_threads:
+                self._handles.popitem(last=False)
+        return handle
+
+    def ensure(self, client, plan: CachePlan) -> Optional[ContextCacheHandle]:
+        """Get a valid handle for the plan, creating or extending it as needed (sync client)."""
+        handle, stale = self._lookup(plan)
+        try:
+            if stale is not None:
+                try:
+                    client.caches.delete(name=stale.name)
+                except Exception as e:
+                    logger.debug(f"Could not delete replaced Gemini cache {stale.name}: {e}")
+                self._count("replaced")
+            if handle is not None:
+                if self._needs_extension(handle):
+                    client.caches.update(name=handle.name, config=types.UpdateCachedContentConfig(ttl=f"{self.ttl}s"))
+                    self._extended(handle)
+                self._count("reused")
+                return handle
+
+            cached = client.caches.create(model=plan.model_name, config=self._create_config(plan))
+            return self._store(plan, cached)
+        except Exception as e:
+            return self._failed(plan, e)
+
+    async def aensure(self, client, plan: CachePlan) -> Optional[ContextCacheHandle]:
+        """Get a valid handle for the plan, creating or extending it as needed (async client)."""
+        handle, stale = self._lookup(plan)
+        try:
+            if stale is not None:
+                try:
+                    await client.aio.caches.delete(name=stale.name)
+                except Exception as e:
+                    logger.debug(f"Could not delete replaced Gemini cache {stale.name}: {e}")
+                self._count("replaced")
+            if handle is not None:
+                if self._needs_extension(handle):
+                    await client.aio.caches.update(
+                        name=handle.name, config=types.UpdateCachedContentConfig(ttl=f"{self.ttl}s")
+                    )
+                    self._extended(handle)
+                self._count("reused")
+                return handle
+
+            cached = await client.aio.caches.create(model=plan.model_name, config=self._create_config(plan))
+            return self._store(plan, cached)
+        except Exception as e:
+            return self._failed(plan, e)
+
+    def _failed(self, plan: CachePlan, error: Exception) -> None:
+        logger.warning(f"Gemini context cache unavailable for thread {plan.scope}, sending full prompt: {error}")
+        with self._lock:
+            self._handles.pop(plan.scope, None)
+            self._stats["failed"] += 1
+        return None
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {"enabled": self.enabled, "threads": len(self._handles), **self._stats}
+
+
+# Global instance (singleton pattern)
+_context_cache_manager: Optional[GeminiContextCacheManager] = None
+
+
+def get_context_cache_manager() -> GeminiContextCacheManager:
+    """
+    Get the global Gemini context cache manager.
+
+    Returns:
+        The singleton GeminiContextCacheManager instance
+    """
+    global _context_cache_manager
+    if _context_cache_manager is None:
+        _context_cache_manager = GeminiContextCacheManager()
+    return _context_cache_manager
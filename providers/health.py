@@ -0,0 +1,267 @@
+"""
+Provider health tracking and circuit breakers
+
+ModelProviderRegistry picks the first provider that accepts a model name, so
+without health tracking every request keeps going to an endpoint that is
+down or exhausted, and each one waits through the full retry budget before
+failing.
+
+ProviderHealthMonitor keeps a circuit breaker per provider type. Every model
+call records its outcome and latency in a rolling window:
+
+- CLOSED: calls flow normally. When at least CIRCUIT_BREAKER_MIN_CALLS recent
+  calls are in the window and the failure rate reaches
+  CIRCUIT_BREAKER_FAILURE_RATE, the breaker opens.
+- OPEN: the provider is skipped. The registry routes to an equivalent model on
+  another configured provider (e.g. Gemini Pro via OpenRouter) or the call
+  fails fast.
+- HALF_OPEN: after CIRCUIT_BREAKER_COOLDOWN seconds a single trial call is let
+  through. Success closes the breaker, failure opens it again.
+
+Only rate-limit and transient errors (see providers.retry.classify_error)
+count as failures; a bad request says nothing about the endpoint's health.
+
+Environment Variables:
+- CIRCUIT_BREAKER_ENABLED: Track provider health and fail over (default: true)
+- CIRCUIT_BREAKER_WINDOW_SIZE: Recent calls kept per provider (default: 20)
+- CIRCUIT_BREAKER_WINDOW_SECONDS: Outcomes older than this are forgotten (default: 300)
+- CIRCUIT_BREAKER_MIN_CALLS: Calls required before the breaker can open (default: 5)
+- CIRCUIT_BREAKER_FAILURE_RATE: Failure rate that opens the breaker (default: 0.5)
+- CIRCUIT_BREAKER_COOLDOWN: Seconds to stay open before a trial call (default: 30)
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Optional
+
+from utils.env import get_env_number
+
+from .base import ProviderType
+from .retry import ErrorCategory, classify_error
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(Enum):
+    """Circuit breaker states."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Rolling-window circuit breaker for one provider."""
+
+    def __init__(
+        self,
+        name: str,
+        window_size: int = 20,
+        window_seconds: float = 300.0,
+        min_calls: int = 5,
+        failure_rate: float = 0.5,
+        cooldown: float = 30.0,
+    ):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.cooldown = cooldown
+
+        # (timestamp, succeeded, latency) per call
+        self._outcomes: deque[tuple[float, bool, float]] = deque(maxlen=window_size)
+        self._state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _prune(self, now: float) -> None:
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            self._outcomes.popleft()
+
+    def _current_state(self, now: float) -> CircuitState:
+        """State as of now; an expired OPEN breaker reads as HALF_OPEN."""
+        if self._state == CircuitState.OPEN and now - self._opened_at >= self.cooldown:
+            self._state = CircuitState.HALF_OPEN
+            self._probe_started = None
+        return self._state
+
+    def _probe_available(self, now: float) -> bool:
+        # A trial call that never reported back (e.g. cancelled) expires after the cooldown
+        return self._probe_started is None or now - self._probe_started >= self.cooldown
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def is_available(self) -> bool:
+        """Whether a call would currently be allowed, without reserving the trial slot."""
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            if state == CircuitState.CLOSED:
+                return True
+            return state == CircuitState.HALF_OPEN and self._probe_available(now)
+
+    def allow_request(self) -> bool:
+        """
+        Admit a call. In HALF_OPEN only one trial call is admitted at a time.
+
+        Returns:
+            bool: True if the call may proceed
+        """
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            if state == CircuitState.CLOSED:
+                return True
+            if state == CircuitState.HALF_OPEN and self._probe_available(now):
+                self._probe_started = now
+                return True
+            return False
+
+    def retry_in(self) -> float:
+        """Seconds until an open breaker admits a trial call (0 if not open)."""
+        with self._lock:
+            if self._current_state(time.monotonic()) != CircuitState.OPEN:
+                return 0.0
+            return max(0.0, self.cooldown - (time.monotonic() - self._opened_at))
+
+    def record_success(self, latency: float) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if self._current_state(now) == CircuitState.HALF_OPEN:
+                logger.info(f"[CIRCUIT] {self.name} recovered, closing circuit")
+                self._state = CircuitState.CLOSED
+                self._probe_started = None
+                self._outcomes.clear()
+            self._outcomes.append((now, True, latency))
+
+    def record_failure(self, latency: float) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._outcomes.append((now, False, latency))
+            state = self._current_state(now)
+            if state == CircuitState.HALF_OPEN:
+                logger.warning(f"[CIRCUIT] {self.name} trial call failed, reopening circuit for {self.cooldown:g}s")
+                self._open(now)
+            elif state == CircuitState.CLOSED:
+                self._prune(now)
+                calls = len(self._outcomes)
+                failures = sum(1 for _, succeeded, _ in self._outcomes if not succeeded)
+                if calls >= self.min_calls and failures / calls >= self.failure_rate:
+                    logger.warning(
+                        f"[CIRCUIT] {self.name} opened after {failures}/{calls} failed calls, "
+                        f"skipping it for {self.cooldown:g}s"
+                    )
+                    self._open(now)
+
+    def _open(self, now: float) -> None:
+        self._state = CircuitState.OPEN
+        self._opened_at = now
+        self._probe_started = None
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get state, rolling failure rate and latency."""
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            state = self._current_state(now)
+            calls = len(self._outcomes)
+            failures = sum(1 for _, succeeded, _ in self._outcomes if not succeeded)
+            latencies = sorted(latency for _, succeeded, latency in self._outcomes if succeeded)
+            return {
+                "state": state.value,
+                "calls": calls,
+                "failures": failures,
+                "failure_rate": round(failures / calls, 3) if calls else 0.0,
+                "avg_latency": round(sum(latencies) / len(latencies), 3) if latencies else None,
+                "max_latency": round(latencies[-1], 3) if latencies else None,
+                "retry_in": (
+                    round(max(0.0, self.cooldown - (now - self._opened_at)), 1) if state == CircuitState.OPEN else 0.0
+                ),
+            }
+
+
+class ProviderHealthMonitor:
+    """Circuit breakers for every provider type, configured from the environment."""
+
+    def __init__(self):
+        self.enabled = os.getenv("CIRCUIT_BREAKER_ENABLED", "true").lower() == "true"
+        self.window_size = int(get_env_number("CIRCUIT_BREAKER_WINDOW_SIZE", 20))
+        self.window_seconds = get_env_number("CIRCUIT_BREAKER_WINDOW_SECONDS", 300.0)
+        self.min_calls = int(get_env_number("CIRCUIT_BREAKER_MIN_CALLS", 5))
+        self.failure_rate = min(1.0, get_env_number("CIRCUIT_BREAKER_FAILURE_RATE", 0.5))
+        self.cooldown = get_env_number("CIRCUIT_BREAKER_COOLDOWN", 30.0)
+        self._breakers: dict[ProviderType, CircuitBreaker] = {}
+
+    def get_breaker(self, provider_type: ProviderType) -> CircuitBreaker:
+        breaker = self._breakers.get(provider_type)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                provider_type.value,
+                window_size=self.window_size,
+                window_seconds=self.window_seconds,
+                min_calls=self.min_calls,
+                failure_rate=self.failure_rate,
+                cooldown=self.cooldown,
+            )
+            self._breakers[provider_type] = breaker
+        return breaker
+
+    def _tracks(self, provider_type: Any) -> bool:
+        return self.enabled and isinstance(provider_type, ProviderType)
+
+    def is_available(self, provider_type: ProviderType) -> bool:
+        """Whether the provider should be routed to (always True when disabled)."""
+        return not self._tracks(provider_type) or self.get_breaker(provider_type).is_available()
+
+    def allow_request(self, provider_type: ProviderType) -> bool:
+        """Admit a call to the provider, taking the trial slot if the breaker is half-open."""
+        return not self._tracks(provider_type) or self.get_breaker(provider_type).allow_request()
+
+    def retry_in(self, provider_type: ProviderType) -> float:
+        return self.get_breaker(provider_type).retry_in()
+
+    def record_success(self, provider_type: ProviderType, latency: float) -> None:
+        if self._tracks(provider_type):
+            self.get_breaker(provider_type).record_success(latency)
+
+    def record_failure(self, provider_type: ProviderType, latency: float, error: Exception) -> None:
+        """
+        Record a failed call. Fatal errors (bad request, auth, unknown model) are ignored.
+
+        Providers wrap SDK errors in RuntimeError, so the chained cause is classified.
+        """
+        if not self._tracks(provider_type):
+            return
+        cause = error.__cause__ if isinstance(error.__cause__, Exception) else error
+        if classify_error(cause) == ErrorCategory.FATAL:
+            return
+        self.get_breaker(provider_type).record_failure(latency)
+
+    def get_stats(self) -> dict[str, dict[str, Any]]:
+        """Get breaker stats for every provider that has handled a call."""
+        return {provider_type.value: breaker.get_stats() for provider_type, breaker in self._breakers.items()}
+
+
+# Global instance (singleton pattern)
+_health_monitor: Optional[ProviderHealthMonitor] = None
+
+
+def get_health_monitor() -> ProviderHealthMonitor:
+    """
+    Get the global provider health monitor.
+
+    Returns:
+        The singleton ProviderHealthMonitor instance
+    """
+    global _health_monitor
+    if _health_monitor is None:
+        _health_monitor = ProviderHealthMonitor()
+    return _health_monitor
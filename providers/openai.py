@@ -1,12 +1,10 @@
 """OpenAI model provider implementation."""
 
 import logging
-from typing import Optional
 
 from .base import (
     FixedTemperatureConstraint,
     ModelCapabilities,
-    ModelResponse,
     ProviderType,
     RangeTemperatureConstraint,
 )
@@ -18,6 +16,8 @@ logger = logging.getLogger(__name__)
 class OpenAIModelProvider(OpenAICompatibleProvider):
     """Official OpenAI API provider (api.openai.com)."""
 
+    SUPPORTS_STREAM_USAGE = True
+
     # Model configurations
     SUPPORTED_MODELS = {
         "o3": {
@@ -113,29 +113,6 @@ class OpenAIModelProvider(OpenAICompatibleProvider):
 
         return True
 
-    def generate_content(
-        self,
-        prompt: str,
-        model_name: str,
-        system_prompt: Optional[str] = None,
-        temperature: float = 0.7,
-        max_output_tokens: Optional[int] = None,
-        **kwargs,
-    ) -> ModelResponse:
-        """Generate content using OpenAI API with proper model name resolution."""
-        # Resolve model alias before making API call
-        resolved_model_name = self._resolve_model_name(model_name)
-
-        # Call parent implementation with resolved model name
-        return super().generate_content(
-            prompt=prompt,
-            model_name=resolved_model_name,
-            system_prompt=system_prompt,
-            temperature=temperature,
-            max_output_tokens=max_output_tokens,
-            **kwargs,
-        )
-
     def supports_thinking_mode(self, model_name: str) -> bool:
         """Check if the model supports extended thinking mode."""
         # Currently no OpenAI models support extended thinking
@@ -4,17 +4,21 @@ import ipaddress
 import logging
 import os
 from abc import abstractmethod
+from collections.abc import AsyncIterator
 from typing import Optional
 from urllib.parse import urlparse
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
 from .base import (
     ModelCapabilities,
     ModelProvider,
     ModelResponse,
     ProviderType,
+    StreamChunk,
 )
+from .connection_pool import get_connection_manager
+from .retry import RetryStats, _get_status_code
 
 
 class OpenAICompatibleProvider(ModelProvider):
@@ -29,6 +33,11 @@ class OpenAICompatibleProvider(ModelProvider):
     DEFAULT_HEADERS = {}
     FRIENDLY_NAME = "OpenAI Compatible"
 
+    # Whether the endpoint accepts stream_options={"include_usage": True}.
+    # Many OpenAI-compatible servers reject unknown parameters, so only
+    # providers known to support it send it.
+    SUPPORTS_STREAM_USAGE = False
+
     def __init__(self, api_key: str, base_url: str = None, **kwargs):
         """Initialize the provider with API key and optional base URL.
 
@@ -39,9 +48,13 @@ class OpenAICompatibleProvider(ModelProvider):
         """
         super().__init__(api_key, **kwargs)
         self._client = None
+        self._async_client = None
+        self._async_http_client = None
         self.base_url = base_url
         self.organization = kwargs.get("organization")
         self.allowed_models = self._parse_allowed_models()
+        # Cleared if the endpoint rejects stream_options despite SUPPORTS_STREAM_USAGE
+        self._stream_usage = self.SUPPORTS_STREAM_USAGE
 
         # Configure timeouts - especially important for custom/local endpoints
         self.timeout_config = self._configure_timeouts(**kwargs)
@@ -195,54 +208,69 @@ class OpenAICompatibleProvider(ModelProvider):
                 raise
             raise ValueError(f"Invalid base URL '{self.base_url}': {str(e)}")
 
-    @property
-    def client(self):
-        """Lazy initialization of OpenAI client with security checks and timeout configuration."""
-        if self._client is None:
-            client_kwargs = {
-                "api_key": self.api_key,
-            }
+    def _get_client_kwargs(self) -> dict:
+        """Build the keyword arguments shared by the sync and async OpenAI clients."""
+        client_kwargs = {
+            "api_key": self.api_key,
+            # Retries are handled by the shared RetryPolicy, not the SDK
+            "max_retries": 0,
+        }
 
-            if self.base_url:
-                client_kwargs["base_url"] = self.base_url
+        if self.base_url:
+            client_kwargs["base_url"] = self.base_url
 
-            if self.organization:
-                client_kwargs["organization"] = self.organization
+        if self.organization:
+            client_kwargs["organization"] = self.organization
 
-            # Add default headers if any
-            if self.DEFAULT_HEADERS:
-                client_kwargs["default_headers"] = self.DEFAULT_HEADERS.copy()
+        # Add default headers if any
+        if self.DEFAULT_HEADERS:
+            client_kwargs["default_headers"] = self.DEFAULT_HEADERS.copy()
 
-            # Add configured timeout settings
-            if hasattr(self, "timeout_config") and self.timeout_config:
-                client_kwargs["timeout"] = self.timeout_config
-                logging.debug(f"OpenAI client initialized with custom timeout: {self.timeout_config}")
+        # Add configured timeout settings
+        if hasattr(self, "timeout_config") and self.timeout_config:
+            client_kwargs["timeout"] = self.timeout_config
+            logging.debug(f"OpenAI client initialized with custom timeout: {self.timeout_config}")
 
-            self._client = OpenAI(**client_kwargs)
+        return client_kwargs
+
+    @property
+    def client(self):
+        """Lazy initialization of OpenAI client with security checks and timeout configuration.
+
+        Uses the process-wide pooled HTTP client so connections are shared across providers.
+        """
+        if self._client is None:
+            http_client = get_connection_manager().get_sync_client()
+            self._client = OpenAI(http_client=http_client, **self._get_client_kwargs())
 
         return self._client
 
-    def generate_content(
+    @property
+    def async_client(self):
+        """Lazy initialization of the AsyncOpenAI client used by agenerate_content.
+
+        Rebuilt when the shared async HTTP client changes (e.g. a new event loop).
+        """
+        http_client = get_connection_manager().get_async_client()
+        if self._async_client is None or self._async_http_client is not http_client:
+            self._async_http_client = http_client
+            self._async_client = AsyncOpenAI(http_client=http_client, **self._get_client_kwargs())
+
+        return self._async_client
+
+    def _build_completion_params(
         self,
         prompt: str,
         model_name: str,
-        system_prompt: Optional[str] = None,
-        temperature: float = 0.7,
-        max_output_tokens: Optional[int] = None,
+        system_prompt: Optional[str],
+        temperature: float,
+        max_output_tokens: Optional[int],
         **kwargs,
-    ) -> ModelResponse:
-        """Generate content using the OpenAI-compatible API.
+    ) -> dict:
+        """Validate the request and build chat completion parameters.
 
-        Args:
-            prompt: User prompt to send to the model
-            model_name: Name of the model to use
-            system_prompt: Optional system prompt for model behavior
-            temperature: Sampling temperature
-            max_output_tokens: Maximum tokens to generate
-            **kwargs: Additional provider-specific parameters
-
-        Returns:
-            ModelResponse with generated content and metadata
+        Raises:
+            ValueError: If the model is not in the allow-list
         """
         # Validate model name against allow-list
         if not self.validate_model_name(model_name):
@@ -270,37 +298,200 @@ class OpenAICompatibleProvider(ModelProvider):
 
         # Add any additional OpenAI-specific parameters
         for key, value in kwargs.items():
-            if key in ["top_p", "frequency_penalty", "presence_penalty", "seed", "stop", "stream"]:
+            if key in ["top_p", "frequency_penalty", "presence_penalty", "seed", "stop"]:
                 completion_params[key] = value
 
+        return completion_params
+
+    def _build_model_response(self, response, model_name: str) -> ModelResponse:
+        """Convert a chat completion into a ModelResponse."""
+        # Extract content and usage
+        content = response.choices[0].message.content
+        usage = self._extract_usage(response)
+
+        return ModelResponse(
+            content=content,
+            usage=usage,
+            model_name=model_name,
+            friendly_name=self.FRIENDLY_NAME,
+            provider=self.get_provider_type(),
+            metadata={
+                "finish_reason": response.choices[0].finish_reason,
+                "model": response.model,  # Actual model used
+                "id": response.id,
+                "created": response.created,
+            },
+        )
+
+    def _resolve_model_name(self, model_name: str) -> str:
+        """Map a model alias to the name sent to the API; subclasses with aliases override this."""
+        return model_name
+
+    def generate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Generate content using the OpenAI-compatible API.
+
+        Args:
+            prompt: User prompt to send to the model
+            model_name: Name of the model to use
+            system_prompt: Optional system prompt for model behavior
+            temperature: Sampling temperature
+            max_output_tokens: Maximum tokens to generate
+            **kwargs: Additional provider-specific parameters
+
+        Returns:
+            ModelResponse with generated content and metadata
+        """
+        model_name = self._resolve_model_name(model_name)
+        completion_params = self._build_completion_params(
+            prompt, model_name, system_prompt, temperature, max_output_tokens, **kwargs
+        )
+
+        retry_stats = RetryStats()
         try:
             # Generate completion
-            response = self.client.chat.completions.create(**completion_params)
-
-            # Extract content and usage
-            content = response.choices[0].message.content
-            usage = self._extract_usage(response)
-
-            return ModelResponse(
-                content=content,
-                usage=usage,
-                model_name=model_name,
-                friendly_name=self.FRIENDLY_NAME,
-                provider=self.get_provider_type(),
-                metadata={
-                    "finish_reason": response.choices[0].finish_reason,
-                    "model": response.model,  # Actual model used
-                    "id": response.id,
-                    "created": response.created,
-                },
+            response = self.retry_policy.run_sync(
+                lambda: self.client.chat.completions.create(**completion_params),
+                stats=retry_stats,
+                description=f"{self.FRIENDLY_NAME} {model_name}",
             )
-
         except Exception as e:
             # Log error and re-raise with more context
             error_msg = f"{self.FRIENDLY_NAME} API error for model {model_name}: {str(e)}"
             logging.error(error_msg)
             raise RuntimeError(error_msg) from e
 
+        model_response = self._build_model_response(response, model_name)
+        model_response.metadata["retry"] = retry_stats.as_metadata()
+        return model_response
+
+    async def agenerate_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> ModelResponse:
+        """Generate content using the OpenAI-compatible API without blocking the event loop.
+
+        Mirrors generate_content but awaits the AsyncOpenAI client.
+
+        Returns:
+            ModelResponse with generated content and metadata
+        """
+        model_name = self._resolve_model_name(model_name)
+        completion_params = self._build_completion_params(
+            prompt, model_name, system_prompt, temperature, max_output_tokens, **kwargs
+        )
+
+        retry_stats = RetryStats()
+        try:
+            response = await self.retry_policy.run(
+                lambda: self.async_client.chat.completions.create(**completion_params),
+                stats=retry_stats,
+                description=f"{self.FRIENDLY_NAME} {model_name}",
+            )
+        except Exception as e:
+            error_msg = f"{self.FRIENDLY_NAME} API error for model {model_name}: {str(e)}"
+            logging.error(error_msg)
+            raise RuntimeError(error_msg) from e
+
+        model_response = self._build_model_response(response, model_name)
+        model_response.metadata["retry"] = retry_stats.as_metadata()
+        return model_response
+
+    async def astream_content(
+        self,
+        prompt: str,
+        model_name: str,
+        system_prompt: Optional[str] = None,
+        temperature: float = 0.7,
+        max_output_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> AsyncIterator[StreamChunk]:
+        """Stream content from the OpenAI-compatible API, yielding text deltas as they arrive.
+
+        Only opening the stream is retried; a failure mid-stream is raised to the caller.
+
+        Yields:
+            StreamChunk text deltas, ending with a final chunk carrying usage and metadata
+        """
+        model_name = self._resolve_model_name(model_name)
+        completion_params = self._build_completion_params(
+            prompt, model_name, system_prompt, temperature, max_output_tokens, **kwargs
+        )
+        completion_params["stream"] = True
+        stream_usage = self._stream_usage
+        if stream_usage:
+            completion_params["stream_options"] = {"include_usage": True}
+
+        retry_stats = RetryStats()
+
+        def open_stream():
+            return self.retry_policy.run(
+                lambda: self.async_client.chat.completions.create(**completion_params),
+                stats=retry_stats,
+                description=f"{self.FRIENDLY_NAME} {model_name}",
+            )
+
+        try:
+            try:
+                stream = await open_stream()
+            except Exception as e:
+                if not stream_usage or _get_status_code(e) != 400:
+                    raise
+                # The endpoint does not accept stream_options; stream without it from now on
+                logging.info(f"{self.FRIENDLY_NAME} rejected stream_options ({e}); retrying without it")
+                self._stream_usage = False
+                completion_params.pop("stream_options")
+                stream = await open_stream()
+        except Exception as e:
+            error_msg = f"{self.FRIENDLY_NAME} API error for model {model_name}: {str(e)}"
+            logging.error(error_msg)
+            raise RuntimeError(error_msg) from e
+
+        usage = {}
+        metadata = {}
+        try:
+            async for chunk in stream:
+                if getattr(chunk, "usage", None):
+                    usage = self._extract_usage(chunk)
+                if not metadata.get("id"):
+                    metadata.update({"model": chunk.model, "id": chunk.id, "created": chunk.created})
+                if not chunk.choices:
+                    continue
+
+                choice = chunk.choices[0]
+                if choice.finish_reason:
+                    metadata["finish_reason"] = choice.finish_reason
+                if choice.delta and choice.delta.content:
+                    yield StreamChunk(content=choice.delta.content)
+        except Exception as e:
+            error_msg = f"{self.FRIENDLY_NAME} API error for model {model_name} while streaming: {str(e)}"
+            logging.error(error_msg)
+            raise RuntimeError(error_msg) from e
+        finally:
+            # Release the connection if the consumer stopped early (e.g. request cancelled)
+            await stream.close()
+
+        metadata["retry"] = retry_stats.as_metadata()
+        yield StreamChunk(
+            usage=usage,
+            metadata=metadata,
+            model_name=model_name,
+            friendly_name=self.FRIENDLY_NAME,
+            final=True,
+        )
+
     def count_tokens(self, text: str, model_name: str) -> int:
         """Count tokens for the given text.
 
@@ -5,6 +5,7 @@ import os
 from typing import TYPE_CHECKING, Optional
 
 from .base import ModelProvider, ProviderType
+from .health import get_health_monitor
 
 if TYPE_CHECKING:
     from tools.models import ToolModelCategory
@@ -15,6 +16,22 @@ class ModelProviderRegistry:
 
     _instance = None
 
+    # Native APIs first, then custom endpoints, then catch-all providers
+    PROVIDER_PRIORITY_ORDER = [
+        ProviderType.GOOGLE,  # Direct Gemini access
+        ProviderType.OPENAI,  # Direct OpenAI access
+        ProviderType.XAI,  # Direct X.AI GROK access
+        ProviderType.CUSTOM,  # Local/self-hosted models
+        ProviderType.OPENROUTER,  # Catch-all for cloud models
+    ]
+
+    # Vendor prefixes used by aggregators (OpenRouter) for natively served models
+    MODEL_NAMESPACES = {
+        ProviderType.GOOGLE: "google",
+        ProviderType.OPENAI: "openai",
+        ProviderType.XAI: "x-ai",
+    }
+
     def __new__(cls):
         """Singleton pattern for registry."""
         if cls._instance is None:
@@ -112,22 +129,15 @@ class ModelProviderRegistry:
         """
         logging.debug(f"get_provider_for_model called with model_name='{model_name}'")
 
-        # Define explicit provider priority order
-        # Native APIs first, then custom endpoints, then catch-all providers
-        PROVIDER_PRIORITY_ORDER = [
-            ProviderType.GOOGLE,  # Direct Gemini access
-            ProviderType.OPENAI,  # Direct OpenAI access
-            ProviderType.XAI,  # Direct X.AI GROK access
-            ProviderType.CUSTOM,  # Local/self-hosted models
-            ProviderType.OPENROUTER,  # Catch-all for cloud models
-        ]
-
         # Check providers in priority order
         instance = cls()
         logging.debug(f"Registry instance: {instance}")
         logging.debug(f"Available providers in registry: {list(instance._providers.keys())}")
 
-        for provider_type in PROVIDER_PRIORITY_ORDER:
+        health = get_health_monitor()
+        unhealthy_provider = None
+
+        for provider_type in cls.PROVIDER_PRIORITY_ORDER:
             logging.debug(f"Checking provider_type: {provider_type}")
             if provider_type in instance._providers:
                 logging.debug(f"Found {provider_type} in registry")
@@ -135,15 +145,98 @@ class ModelProviderRegistry:
                 provider = cls.get_provider(provider_type)
                 if provider and provider.validate_model_name(model_name):
                     logging.debug(f"{provider_type} validates model {model_name}")
+                    if not health.is_available(provider_type):
+                        # Circuit open - prefer another provider that serves the same model
+                        logging.info(f"{provider_type.value} circuit is open, looking for another provider")
+                        unhealthy_provider = unhealthy_provider or provider
+                        continue
+                    if unhealthy_provider and not cls._is_known_model(provider, model_name):
+                        # Catch-all providers accept any name; only take known models as a substitute
+                        continue
                     return provider
                 else:
                     logging.debug(f"{provider_type} does not validate model {model_name}")
             else:
                 logging.debug(f"{provider_type} not found in registry")
 
+        if unhealthy_provider:
+            # Callers fail fast or fail over at call time (see get_failover_model)
+            return unhealthy_provider
+
         logging.debug(f"No provider found for model {model_name}")
         return None
 
+    @classmethod
+    def get_failover_model(cls, model_name: str, provider_type: ProviderType) -> Optional[tuple[ModelProvider, str]]:
+        """Find an equivalent model on another healthy provider.
+
+        Used when the circuit for provider_type is open. Candidates are the
+        requested name, the canonical model name, its aliases and the
+        vendor-prefixed name used by OpenRouter (e.g. "google/<model>"), so
+        Gemini Pro can be served through OpenRouter while the Gemini API is down.
+
+        Args:
+            model_name: Requested model name or alias
+            provider_type: Provider whose circuit is open
+
+        Returns:
+            (provider, model_name) for the substitute, or None if there is none
+        """
+        instance = cls()
+        health = get_health_monitor()
+        candidates = cls._get_equivalent_model_names(model_name, provider_type)
+
+        for other_type in cls.PROVIDER_PRIORITY_ORDER:
+            if other_type == provider_type or other_type not in instance._providers:
+                continue
+            if not health.is_available(other_type):
+                continue
+            provider = cls.get_provider(other_type)
+            if not provider:
+                continue
+            for candidate in candidates:
+                try:
+                    if provider.validate_model_name(candidate) and cls._is_known_model(provider, candidate):
+                        return provider, provider.get_capabilities(candidate).model_name
+                except Exception as e:
+                    logging.debug(f"{other_type.value} failed to validate failover candidate {candidate}: {e}")
+
+        return None
+
+    @classmethod
+    def _get_equivalent_model_names(cls, model_name: str, provider_type: ProviderType) -> list[str]:
+        """Names under which other providers may offer the same model."""
+        names = [model_name]
+        source = cls.get_provider(provider_type)
+        canonical = model_name
+        if source:
+            try:
+                canonical = source.get_capabilities(model_name).model_name
+            except Exception:
+                pass
+            names.append(canonical)
+            # Native aliases (e.g. "pro") are often shared with OpenRouter's model registry
+            for alias, target in getattr(source, "SUPPORTED_MODELS", {}).items():
+                if target == canonical:
+                    names.append(alias)
+
+        namespace = cls.MODEL_NAMESPACES.get(provider_type)
+        if namespace:
+            names.append(f"{namespace}/{canonical}")
+        elif "/" in canonical:
+            # Aggregator name (e.g. "google/gemini-...") - try the native name
+            names.append(canonical.split("/", 1)[1])
+
+        return list(dict.fromkeys(names))
+
+    @staticmethod
+    def _is_known_model(provider: ModelProvider, model_name: str) -> bool:
+        """Whether the provider has real capabilities for the model, not generic catch-all defaults."""
+        try:
+            return not getattr(provider.get_capabilities(model_name), "_is_generic", False)
+        except Exception:
+            return False
+
     @classmethod
     def get_available_providers(cls) -> list[ProviderType]:
         """Get list of registered provider types."""
@@ -0,0 +1,362 @@
+"""
+Content-addressed response cache for model calls
+
+CI and simulator runs often send byte-identical prompts (e.g. the same
+precommit diff reviewed twice). With the cache enabled, such calls are
+answered from a local store instead of costing another model call.
+
+The key is a SHA-256 hash of the provider, resolved model name, system prompt,
+prompt, temperature and thinking mode, so any change to the request - including
+conversation history embedded in the prompt - is a miss. Only calls at or
+below RESPONSE_CACHE_MAX_TEMPERATURE are cached, since higher temperatures ask
+for varied answers. Tools can bypass the cache per request with use_cache=false.
+
+Backends:
+- memory: in-process LRU, lost on restart
+- sqlite: on-disk database shared across restarts and processes
+
+Both enforce a TTL, a maximum number of entries and a maximum total size,
+evicting least recently used entries first.
+
+Environment Variables:
+- RESPONSE_CACHE_BACKEND: none, memory or sqlite (default: none)
+- RESPONSE_CACHE_TTL: Seconds a cached response stays valid (default: 86400)
+- RESPONSE_CACHE_MAX_ENTRIES: Maximum number of cached responses (default: 1000)
+- RESPONSE_CACHE_MAX_MB: Maximum total size of cached responses in MB (default: 100)
+- RESPONSE_CACHE_MAX_TEMPERATURE: Highest temperature that is cached (default: 0.3)
+- RESPONSE_CACHE_PATH: SQLite database file (default: <tmp>/zen_mcp_response_cache.db)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Optional
+
+from utils.env import get_env_number
+
+from .base import ModelResponse, ProviderType
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(
+    provider_type: ProviderType,
+    model_name: str,
+    prompt: str,
+    system_prompt: Optional[str],
+    temperature: Optional[float],
+    thinking_mode: Optional[str],
+) -> str:
+    """Hash the parts of a request that determine its response."""
+    payload = json.dumps(
+        [provider_type.value, model_name, system_prompt or "", prompt, temperature, thinking_mode],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# Metadata describing one particular call rather than the answer itself
+TRANSIENT_METADATA_KEYS = {"retry", "rate_limit_wait", "hedge", "provider_substitution", "streamed", "cache"}
+
+
+def serialize_response(response: ModelResponse) -> str:
+    return json.dumps(
+        {
+            "content": response.content,
+            "usage": response.usage,
+            "model_name": response.model_name,
+            "friendly_name": response.friendly_name,
+            "provider": response.provider.value if isinstance(response.provider, ProviderType) else None,
+            "metadata": {k: v for k, v in response.metadata.items() if k not in TRANSIENT_METADATA_KEYS},
+        },
+        ensure_ascii=False,
+        default=str,
+    )
+
+
+def deserialize_response(value: str) -> ModelResponse:
+    data = json.loads(value)
+    provider = data.get("provider")
+    return ModelResponse(
+        content=data["content"],
+        usage=data.get("usage") or {},
+        model_name=data.get("model_name", ""),
+        friendly_name=data.get("friendly_name", ""),
+        provider=ProviderType(provider) if provider else ProviderType.GOOGLE,
+        metadata=data.get("metadata") or {},
+    )
+
+
+class ResponseCacheBackend(ABC):
+    """Storage for serialized responses with TTL, entry and size caps."""
+
+    # True if operations do I/O and should run off the event loop
+    blocking = False
+
+    def __init__(self, ttl: float, max_entries: int, max_bytes: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[tuple[str, float]]:
+        """Return (value, stored_at) if present and not expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: str) -> None:
+        """Store a value, evicting least recently used entries beyond the caps."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove all entries."""
+
+    @abstractmethod
+    def get_stats(self) -> dict[str, int]:
+        """Return entry count and total bytes."""
+
+
+class MemoryResponseCache(ResponseCacheBackend):
+    """In-process LRU cache."""
+
+    def __init__(self, ttl: float, max_entries: int, max_bytes: int):
+        super().__init__(ttl, max_entries, max_bytes)
+        # key -> (value, size, stored_at); most recently used last
+        self._entries: OrderedDict[str, tuple[str, int, float]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[tuple[str, float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, size, stored_at = entry
+            if time.time() - stored_at > self.ttl:
+                del self._entries[key]
+                self._bytes -= size
+                return None
+            self._entries.move_to_end(key)
+            return value, stored_at
+
+    def set(self, key: str, value: str) -> None:
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size, time.time())
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> dict[str, int]:
+        return {"entries": len(self._entries), "bytes": self._bytes}
+
+
+class SQLiteResponseCache(ResponseCacheBackend):
+    """On-disk cache in a SQLite database (WAL mode)."""
+
+    blocking = True
+
+    def __init__(self, path: str, ttl: float, max_entries: int, max_bytes: int):
+        super().__init__(ttl, max_entries, max_bytes)
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+
+    def get(self, key: str) -> Optional[tuple[str, float]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, stored_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            return row[0], row[1]
+
+    def set(self, key: str, value: str) -> None:
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, size, stored_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, value, size, now, now),
+                )
+                self._conn.execute("DELETE FROM responses WHERE stored_at < ?", (now - self.ttl,))
+                self._evict()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self) -> None:
+        """Delete least recently used rows until both caps hold."""
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+        doomed = []
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def get_stats(self) -> dict[str, int]:
+        with self._lock:
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"entries": count, "bytes": total}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ResponseCache:
+    """Cache policy (temperature threshold, bypass, counters) over a backend."""
+
+    def __init__(self, backend: Optional[ResponseCacheBackend] = None, max_temperature: Optional[float] = None):
+        self.max_temperature = (
+            max_temperature
+            if max_temperature is not None
+            else get_env_number("RESPONSE_CACHE_MAX_TEMPERATURE", 0.3, allow_zero=True)
+        )
+        self.backend = backend if backend is not None else self._create_backend_from_env()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.skipped = 0
+
+    @staticmethod
+    def _create_backend_from_env() -> Optional[ResponseCacheBackend]:
+        name = os.getenv("RESPONSE_CACHE_BACKEND", "none").strip().lower()
+        if name in ("", "none", "off", "false"):
+            return None
+
+        ttl = get_env_number("RESPONSE_CACHE_TTL", 86400.0)
+        max_entries = int(get_env_number("RESPONSE_CACHE_MAX_ENTRIES", 1000))
+        max_bytes = int(get_env_number("RESPONSE_CACHE_MAX_MB", 100.0) * 1024 * 1024)
+
+        if name == "memory":
+            backend = MemoryResponseCache(ttl, max_entries, max_bytes)
+        elif name == "sqlite":
+            path = os.getenv("RESPONSE_CACHE_PATH") or os.path.join(tempfile.gettempdir(), "zen_mcp_response_cache.db")
+            try:
+                backend = SQLiteResponseCache(path, ttl, max_entries, max_bytes)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Could not open response cache at {path} ({e}), response caching disabled")
+                return None
+        else:
+            logger.warning(f"Unknown RESPONSE_CACHE_BACKEND '{name}', response caching disabled")
+            return None
+
+        logger.info(f"Response cache enabled ({name}, ttl={ttl:g}s, max_entries={max_entries})")
+        return backend
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def is_cacheable(self, temperature: Optional[float], use_cache: bool = True) -> bool:
+        """Whether a request may be served from or stored in the cache."""
+        if not self.enabled:
+            return False
+        if not use_cache or temperature is None or temperature > self.max_temperature:
+            self.skipped += 1
+            return False
+        return True
+
+    def get(self, key: str) -> Optional[ModelResponse]:
+        """Look up a response; hits carry metadata["cache"] with the entry's age."""
+        try:
+            entry = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Response cache lookup failed: {e}")
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        value, stored_at = entry
+        response = deserialize_response(value)
+        response.metadata["cache"] = {"hit": True, "key": key[:16], "age": round(time.time() - stored_at, 1)}
+        return response
+
+    def set(self, key: str, response: ModelResponse) -> None:
+        try:
+            self.backend.set(key, serialize_response(response))
+            self.stores += 1
+        except Exception as e:
+            logger.warning(f"Response cache store failed: {e}")
+
+    def get_stats(self) -> dict[str, Any]:
+        stats = {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "max_temperature": self.max_temperature,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "skipped": self.skipped,
+        }
+        if self.backend:
+            try:
+                stats.update(self.backend.get_stats())
+            except Exception as e:
+                logger.debug(f"Could not read response cache stats: {e}")
+        return stats
+
+
+# Global instance (singleton pattern)
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    Get the global response cache instance.
+
+    Returns:
+        The singleton ResponseCache instance
+    """
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
@@ -0,0 +1,319 @@
+"""
+Shared retry policy for model provider API calls
+
+Every provider routes its API calls through the same RetryPolicy so that
+rate limits and transient failures are handled consistently:
+
+- Errors are classified as rate-limit, transient or fatal. Fatal errors
+  (bad request, auth, unknown model) are raised immediately.
+- Retry-After hints (HTTP header or Gemini RetryInfo) are honoured.
+- Otherwise delays use exponential backoff with jitter so bursts of 429s
+  from concurrent requests do not retry in lockstep.
+- A total deadline bounds each call including all attempts and waits.
+- The async path sleeps with asyncio.sleep and never blocks the event loop.
+
+Retry counts and wait time are collected in a RetryStats object which
+providers record in ModelResponse.metadata["retry"].
+
+Environment Variables:
+- PROVIDER_RETRY_MAX_ATTEMPTS: Total attempts per call including the first (default: 4)
+- PROVIDER_RETRY_BASE_DELAY: Initial backoff delay in seconds (default: 1.0)
+- PROVIDER_RETRY_MAX_DELAY: Upper bound for a single backoff delay in seconds (default: 30)
+- PROVIDER_RETRY_DEADLINE: Total time budget per call in seconds (default: 600)
+"""
+
+import asyncio
+import logging
+import random
+import re
+import time
+from collections.abc import Awaitable
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from enum import Enum
+from typing import Any, Callable, Optional, TypeVar
+
+import httpx
+
+from utils.env import get_env_number
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RATE_LIMIT_STATUS_CODES = {429}
+TRANSIENT_STATUS_CODES = {408, 500, 502, 503, 504, 529}
+
+# Fallback matching for errors that carry no status code (e.g. SDK-wrapped messages)
+RATE_LIMIT_TERMS = ["429", "rate limit", "rate_limit", "resource_exhausted", "too many requests", "quota"]
+TRANSIENT_TERMS = [
+    "timeout",
+    "timed out",
+    "connection",
+    "network",
+    "temporary",
+    "unavailable",
+    "overloaded",
+    "please retry",
+    "500",
+    "502",
+    "503",
+    "504",
+]
+
+# Gemini reports retry hints as google.rpc.RetryInfo, e.g. 'retryDelay': '27s'
+RETRY_DELAY_PATTERN = re.compile(r"retryDelay['\"]?\s*:\s*['\"](\d+(?:\.\d+)?)s['\"]")
+
+
+class ErrorCategory(Enum):
+    """How a failed provider call should be treated."""
+
+    RATE_LIMIT = "rate_limit"
+    TRANSIENT = "transient"
+    FATAL = "fatal"
+
+
+def _get_status_code(error: Exception) -> Optional[int]:
+    """Extract an HTTP status code from OpenAI, genai or httpx errors."""
+    for attr in ("status_code", "code", "status"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int) and 100 <= value <= 599:
+            return value
+
+    response = getattr(error, "response", None)
+    value = getattr(response, "status_code", None)
+    if isinstance(value, int):
+        return value
+    return None
+
+
+def classify_error(error: Exception) -> ErrorCategory:
+    """
+    Classify a provider error.
+
+    Args:
+        error: Exception raised by a provider SDK call
+
+    Returns:
+        ErrorCategory: RATE_LIMIT, TRANSIENT or FATAL
+    """
+    status_code = _get_status_code(error)
+    if status_code is not None:
+        if status_code in RATE_LIMIT_STATUS_CODES:
+            return ErrorCategory.RATE_LIMIT
+        if status_code in TRANSIENT_STATUS_CODES:
+            return ErrorCategory.TRANSIENT
+        return ErrorCategory.FATAL
+
+    if isinstance(error, (TimeoutError, ConnectionError, httpx.TimeoutException, httpx.TransportError)):
+        return ErrorCategory.TRANSIENT
+
+    # OpenAI SDK connection/timeout errors carry no status code
+    error_type = type(error).__name__
+    if error_type in ("APIConnectionError", "APITimeoutError"):
+        return ErrorCategory.TRANSIENT
+
+    error_str = str(error).lower()
+    if any(term in error_str for term in RATE_LIMIT_TERMS):
+        return ErrorCategory.RATE_LIMIT
+    if any(term in error_str for term in TRANSIENT_TERMS):
+        return ErrorCategory.TRANSIENT
+    return ErrorCategory.FATAL
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """
+    Extract a server-provided retry delay in seconds.
+
+    Checks retry-after-ms / Retry-After response headers (seconds or HTTP date)
+    and Gemini RetryInfo details.
+
+    Args:
+        error: Exception raised by a provider SDK call
+
+    Returns:
+        Optional[float]: Delay in seconds, or None if the server gave no hint
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if hasattr(headers, "get"):
+        try:
+            retry_after_ms = headers.get("retry-after-ms")
+            if retry_after_ms:
+                return max(0.0, float(retry_after_ms) / 1000)
+        except (TypeError, ValueError):
+            pass
+
+        retry_after = headers.get("retry-after")
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except (TypeError, ValueError):
+                try:
+                    retry_at = parsedate_to_datetime(retry_after)
+                    return max(0.0, retry_at.timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+
+    details = getattr(error, "details", None)
+    match = RETRY_DELAY_PATTERN.search(str(details) if details else str(error))
+    if match:
+        return float(match.group(1))
+    return None
+
+
+@dataclass
+class RetryStats:
+    """Attempt bookkeeping for a single provider call."""
+
+    attempts: int = 0
+    total_delay: float = 0.0
+    errors: list[str] = field(default_factory=list)
+
+    @property
+    def retries(self) -> int:
+        return max(0, self.attempts - 1)
+
+    def as_metadata(self) -> dict[str, Any]:
+        """Summary stored in ModelResponse.metadata["retry"]."""
+        return {
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "total_delay": round(self.total_delay, 3),
+            "errors": list(self.errors),
+        }
+
+
+class RetryPolicy:
+    """Classified, deadline-bounded retries with jittered exponential backoff."""
+
+    def __init__(
+        self,
+        max_attempts: Optional[int] = None,
+        base_delay: Optional[float] = None,
+        max_delay: Optional[float] = None,
+        deadline: Optional[float] = None,
+    ):
+        self.max_attempts = max_attempts or int(get_env_number("PROVIDER_RETRY_MAX_ATTEMPTS", 4))
+        self.base_delay = base_delay if base_delay is not None else get_env_number("PROVIDER_RETRY_BASE_DELAY", 1.0)
+        self.max_delay = max_delay if max_delay is not None else get_env_number("PROVIDER_RETRY_MAX_DELAY", 30.0)
+        self.deadline = deadline if deadline is not None else get_env_number("PROVIDER_RETRY_DEADLINE", 600.0)
+
+    def compute_delay(self, attempt: int, error: Exception) -> float:
+        """
+        Delay before the next attempt.
+
+        Args:
+            attempt: Number of attempts made so far (1-based)
+            error: The error from the last attempt
+
+        Returns:
+            float: Seconds to wait
+        """
+        retry_after = get_retry_after(error)
+        if retry_after is not None:
+            # Small jitter so clients sharing one Retry-After do not all return at once
+            return retry_after + random.uniform(0, min(1.0, retry_after * 0.1))
+
+        backoff = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return backoff / 2 + random.uniform(0, backoff / 2)
+
+    def _next_delay(self, error: Exception, stats: RetryStats, started: float, description: str) -> Optional[float]:
+        """Record the failure and return the delay before retrying, or None to give up."""
+        category = classify_error(error)
+        stats.errors.append(category.value)
+
+        if category is ErrorCategory.FATAL:
+            return None
+        if stats.attempts >= self.max_attempts:
+            logger.warning(f"{description} failed after {stats.attempts} attempts ({category.value}): {error}")
+            return None
+
+        delay = self.compute_delay(stats.attempts, error)
+        remaining = self.deadline - (time.monotonic() - started)
+        if delay >= remaining:
+            logger.warning(
+                f"{description} {category.value} error, next retry in {delay:.1f}s would exceed "
+                f"the {self.deadline:.0f}s deadline - giving up"
+            )
+            return None
+
+        logger.info(
+            f"{description} {category.value} error (attempt {stats.attempts}/{self.max_attempts}), "
+            f"retrying in {delay:.1f}s: {error}"
+        )
+        stats.total_delay += delay
+        return delay
+
+    async def run(
+        self,
+        operation: Callable[[], Awaitable[T]],
+        stats: Optional[RetryStats] = None,
+        description: str = "Provider call",
+    ) -> T:
+        """
+        Run an async operation with retries.
+
+        Args:
+            operation: Zero-argument callable returning a fresh awaitable per attempt
+            stats: Optional RetryStats to fill in for metadata
+            description: Label used in log messages
+
+        Returns:
+            The operation's result; the last error is raised when retries are exhausted
+        """
+        stats = stats if stats is not None else RetryStats()
+        started = time.monotonic()
+
+        while True:
+            stats.attempts += 1
+            remaining = self.deadline - (time.monotonic() - started)
+            try:
+                return await asyncio.wait_for(operation(), timeout=max(remaining, 0.001))
+            except Exception as e:
+                delay = self._next_delay(e, stats, started, description)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+
+    def run_sync(
+        self,
+        operation: Callable[[], T],
+        stats: Optional[RetryStats] = None,
+        description: str = "Provider call",
+    ) -> T:
+        """
+        Blocking counterpart of run() for the sync generate_content path.
+
+        The deadline bounds waits between attempts; an in-flight attempt is
+        limited only by the client's own timeout.
+        """
+        stats = stats if stats is not None else RetryStats()
+        started = time.monotonic()
+
+        while True:
+            stats.attempts += 1
+            try:
+                return operation()
+            except Exception as e:
+                delay = self._next_delay(e, stats, started, description)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+
+
+# Global instance (singleton pattern)
+_retry_policy: Optional[RetryPolicy] = None
+
+
+def get_retry_policy() -> RetryPolicy:
+    """
+    Get the retry policy shared by all providers.
+
+    Returns:
+        The singleton RetryPolicy instance
+    """
+    global _retry_policy
+    if _retry_policy is None:
+        _retry_policy = RetryPolicy()
+    return _retry_policy
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark the JSON codecs used for stored conversation threads
+
+Times Pydantic (model_dump_json / model_validate_json) against the orjson
+path in utils.conversation_memory for 20-turn threads, both as one document
+(the Redis blob layout) and turn by turn (the append layout and SQLite).
+Compression is left out so only the codec is measured.
+
+Usage:
+    python scripts/benchmark_thread_codec.py [--turns 20] [--words 400] [--number 2000]
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils import conversation_memory  # noqa: E402
+from utils.conversation_memory import ConversationTurn, ThreadContext  # noqa: E402
+
+
+def build_thread(turns: int, words: int) -> ThreadContext:
+    """A thread shaped like a real one: long responses, files, metadata and rendered headers."""
+    return ThreadContext(
+        thread_id="00000000-0000-0000-0000-000000000000",
+        created_at="2025-01-01T00:00:00+00:00",
+        last_updated_at="2025-01-01T01:00:00+00:00",
+        tool_name="codereview",
+        turns=[
+            ConversationTurn(
+                role="user" if i % 2 == 0 else "assistant",
+                content=" ".join(f"word{j}" for j in range(words)),
+                timestamp="2025-01-01T00:00:00+00:00",
+                files=["/workspace/src/main.py", "/workspace/src/utils.py"],
+                tool_name="codereview",
+                model_provider="google",
+                model_name="gemini-2.5-flash",
+                model_metadata={"usage": {"input_tokens": 1200, "output_tokens": 600}},
+                rendered_header="Gemini using codereview via google/gemini-2.5-flash",
+                token_count=words * 2,
+                file_hashes={"/workspace/src/main.py": "ab" * 32, "/workspace/src/utils.py": "cd" * 32},
+            )
+            for i in range(turns)
+        ],
+        initial_context={"prompt": "Review the change", "files": ["/workspace/src/main.py"]},
+    )
+
+
+def measure(label: str, func, number: int) -> float:
+    microseconds = timeit.timeit(func, number=number) / number * 1e6
+    print(f"  {label:<34} {microseconds:>9.1f} us")
+    return microseconds
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--turns", type=int, default=20, help="Turns per thread")
+    parser.add_argument("--words", type=int, default=400, help="Words per turn")
+    parser.add_argument("--number", type=int, default=2000, help="Iterations per measurement")
+    args = parser.parse_args()
+
+    if conversation_memory.orjson is None:
+        print("orjson is not installed; install it with: pip install orjson")
+        return 1
+
+    context = build_thread(args.turns, args.words)
+    document = context.model_dump_json()
+    turn_documents = [turn.model_dump_json() for turn in context.turns]
+    assert conversation_memory._dump_json(context) == document, "codecs must write the same JSON"
+
+    print(f"{args.turns}-turn thread, {len(document):,} bytes of JSON, {args.number} iterations\n")
+
+    print("Encode thread (blob layout)")
+    pydantic_encode = measure("pydantic model_dump_json", context.model_dump_json, args.number)
+    orjson_encode = measure("orjson", lambda: conversation_memory._dump_json(context), args.number)
+
+    print("Decode thread (blob layout)")
+    pydantic_decode = measure(
+        "pydantic model_validate_json", lambda: ThreadContext.model_validate_json(document), args.number
+    )
+    orjson_decode = measure("orjson", lambda: conversation_memory._load_json(ThreadContext, document), args.number)
+
+    print("Decode turns (append layout, SQLite)")
+    measure(
+        "pydantic model_validate_json",
+        lambda: [ConversationTurn.model_validate_json(turn) for turn in turn_documents],
+        args.number,
+    )
+    measure(
+        "orjson",
+        lambda: [conversation_memory._load_json(ConversationTurn, turn) for turn in turn_documents],
+        args.number,
+    )
+
+    print(
+        f"\norjson speedup: encode {pydantic_encode / orjson_encode:.2f}x, decode {pydantic_decode / orjson_decode:.2f}x"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -23,9 +23,10 @@ import logging
 import os
 import sys
 import time
+from collections.abc import Awaitable
 from datetime import datetime
 from logging.handlers import RotatingFileHandler
-from typing import Any
+from typing import Any, Callable, Optional
 
 from mcp.server import Server
 from mcp.server.models import InitializationOptions
@@ -352,6 +353,24 @@ async def handle_list_tools() -> list[Tool]:
                 ),
                 inputSchema={"type": "object", "properties": {}},
             ),
+            Tool(
+                name="threads",
+                description=(
+                    "CONVERSATION THREAD STATS - Report how many conversation threads are active, "
+                    "how much storage they use and which threads are largest. Useful for capacity planning."
+                ),
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "limit": {
+                            "type": "integer",
+                            "minimum": 1,
+                            "maximum": 100,
+                            "description": "How many of the largest threads to list (default: 10)",
+                        }
+                    },
+                },
+            ),
         ]
     )
 
@@ -379,6 +398,17 @@ async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextCon
     Returns:
         List of TextContent objects containing the tool's response
     """
+    from utils.conversation_memory import conversation_request_scope
+
+    # Every stage of the request shares one snapshot of each conversation thread
+    with conversation_request_scope() as conversation_scope:
+        result = await _dispatch_tool_call(name, arguments)
+    logger.debug(f"[THREAD] Tool '{name}' made {conversation_scope.round_trips} conversation storage round-trips")
+    return result
+
+
+async def _dispatch_tool_call(name: str, arguments: dict[str, Any]) -> list[TextContent]:
+    """Reconstruct conversation context if needed and route the call to its tool."""
     logger.info(f"MCP tool call: {name}")
     logger.debug(f"MCP tool arguments: {list(arguments.keys())}")
 
@@ -405,7 +435,7 @@ async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextCon
         except Exception:
             pass
 
-        arguments = await reconstruct_thread_context(arguments)
+        arguments = await reconstruct_thread_context(arguments, tool_name=name)
         logger.debug(f"[CONVERSATION_DEBUG] After thread reconstruction, arguments keys: {list(arguments.keys())}")
         if "_remaining_tokens" in arguments:
             logger.debug(f"[CONVERSATION_DEBUG] Remaining token budget: {arguments['_remaining_tokens']:,}")
@@ -414,6 +444,12 @@ async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextCon
     if name in TOOLS:
         logger.info(f"Executing tool '{name}' with {len(arguments)} parameter(s)")
         tool = TOOLS[name]
+
+        # Stream model output with progress notifications when the client asked for progress
+        progress_callback = get_progress_callback()
+        if progress_callback:
+            arguments = {**arguments, "_progress_callback": progress_callback}
+
         result = await tool.execute(arguments)
         logger.info(f"Tool '{name}' execution completed")
 
@@ -431,6 +467,11 @@ async def handle_call_tool(name: str, arguments: dict[str, Any]) -> list[TextCon
         result = await handle_version()
         logger.info(f"Utility tool '{name}' execution completed")
         return result
+    elif name == "threads":
+        logger.info(f"Executing utility tool '{name}'")
+        result = await handle_thread_stats(arguments)
+        logger.info(f"Utility tool '{name}' execution completed")
+        return result
 
     # Handle unknown tool requests gracefully
     else:
@@ -490,26 +531,59 @@ Remember: Only suggest follow-ups when they would genuinely add value to the dis
 "Claude to use the continuation_id when you do."""
 
 
-async def reconstruct_thread_context(arguments: dict[str, Any]) -> dict[str, Any]:
+def get_progress_callback() -> Optional[Callable[[float, Optional[str]], Awaitable[None]]]:
+    """
+    Build a progress reporter for the MCP request being handled.
+
+    Returns None when the client did not send a progressToken or when called
+    outside a request (e.g. handle_call_tool invoked directly in tests).
+
+    Returns:
+        Async callable(progress, message) sending notifications/progress, or None
+    """
+    try:
+        ctx = server.request_context
+    except LookupError:
+        return None
+
+    progress_token = ctx.meta.progressToken if ctx.meta else None
+    if progress_token is None:
+        return None
+
+    async def report_progress(progress: float, message: Optional[str] = None) -> None:
+        await ctx.session.send_progress_notification(
+            progress_token, progress, message=message, related_request_id=ctx.request_id
+        )
+
+    return report_progress
+
+
+async def reconstruct_thread_context(arguments: dict[str, Any], tool_name: Optional[str] = None) -> dict[str, Any]:
     """
     Reconstruct conversation context for thread continuation.
 
     This function loads the conversation history from Redis and integrates it
-    into the request arguments to provide full context to the tool.
+    into the request arguments to provide full context to the tool. Redis
+    round-trips and file reads run on the tool executor under the calling
+    tool's concurrency limit.
 
     Args:
         arguments: Original request arguments containing continuation_id
+        tool_name: Name of the tool being continued (selects the executor limit)
 
     Returns:
         Modified arguments with conversation history injected
     """
-    from utils.conversation_memory import add_turn, build_conversation_history, get_thread
+    from utils.conversation_compaction import build_compacted_history
+    from utils.conversation_memory import add_turn, get_thread
+    from utils.tool_executor import run_blocking
 
     continuation_id = arguments["continuation_id"]
+    executor_key = tool_name or "conversation"
 
     # Get thread context from Redis
     logger.debug(f"[CONVERSATION_DEBUG] Looking up thread {continuation_id} in Redis")
-    context = get_thread(continuation_id)
+    context = await run_blocking(executor_key, get_thread, continuation_id)
     if not context:
         logger.warning(f"Thread not found: {continuation_id}")
         logger.debug(f"[CONVERSATION_DEBUG] Thread {continuation_id} not found in Redis or expired")
@@ -524,8 +598,8 @@ async def reconstruct_thread_context(arguments: dict[str, Any]) -> dict[str, Any
         # Return error asking Claude to restart conversation with full context
         raise ValueError(
             f"Conversation thread '{continuation_id}' was not found or has expired. "
-            f"This may happen if the conversation was created more than 1 hour ago or if there was an issue "
-            f"with Redis storage. "
+            f"This may happen if the conversation was inactive for longer than the conversation timeout "
+            f"(and was not archived) or if there was an issue with conversation storage. "
             f"Please restart the conversation by providing your full question/prompt without the "
             f"continuation_id parameter. "
             f"This will create a new conversation thread that can continue with follow-up exchanges."
@@ -539,7 +613,7 @@ async def reconstruct_thread_context(arguments: dict[str, Any]) -> dict[str, Any
         logger.debug(f"[CONVERSATION_DEBUG] Adding user turn to thread {continuation_id}")
         logger.debug(f"[CONVERSATION_DEBUG] User prompt length: {len(user_prompt)} chars")
         logger.debug(f"[CONVERSATION_DEBUG] User files: {user_files}")
-        success = add_turn(continuation_id, "user", user_prompt, files=user_files)
+        success = await run_blocking(executor_key, add_turn, continuation_id, "user", user_prompt, files=user_files)
         if not success:
             logger.warning(f"Failed to add user turn to thread {continuation_id}")
             logger.debug("[CONVERSATION_DEBUG] Failed to add user turn - thread may be at turn limit or expired")
@@ -555,7 +629,7 @@ async def reconstruct_thread_context(arguments: dict[str, Any]) -> dict[str, Any
     logger.debug(f"[CONVERSATION_DEBUG] Building conversation history for thread {continuation_id}")
     logger.debug(f"[CONVERSATION_DEBUG] Thread has {len(context.turns)} turns, tool: {context.tool_name}")
     logger.debug(f"[CONVERSATION_DEBUG] Using model: {model_context.model_name}")
-    conversation_history, conversation_tokens = build_conversation_history(context, model_context)
+    conversation_history, conversation_tokens = await build_compacted_history(context, model_context, executor_key)
     logger.debug(f"[CONVERSATION_DEBUG] Conversation history built: {conversation_tokens:,} tokens")
     logger.debug(f"[CONVERSATION_DEBUG] Conversation history length: {len(conversation_history)} chars")
 
@@ -652,7 +726,7 @@ async def handle_version() -> list[TextContent]:
         "max_context_tokens": "Dynamic (model-specific)",
         "python_version": f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}",
         "server_started": datetime.now().isoformat(),
-        "available_tools": list(TOOLS.keys()) + ["version"],
+        "available_tools": list(TOOLS.keys()) + ["version", "threads"],
     }
 
     # Check configured providers
@@ -667,6 +741,110 @@ async def handle_version() -> list[TextContent]:
     if ModelProviderRegistry.get_provider(ProviderType.OPENROUTER):
         configured_providers.append("OpenRouter (configured via conf/custom_models.json)")
 
+    # Shared HTTP connection pool used by OpenAI-compatible providers
+    from providers.connection_pool import get_connection_manager
+
+    pool_stats = get_connection_manager().get_stats()
+    pool_lines = [
+        f"  - Limits: {pool_stats['max_connections']} connections, "
+        f"{pool_stats['max_keepalive_connections']} keep-alive, {pool_stats['keepalive_expiry']:g}s expiry",
+        f"  - HTTP/2: {'enabled' if pool_stats['http2'] else 'disabled'}",
+        f"  - Requests sent: {pool_stats['requests']}",
+        f"  - Open connections: {pool_stats['sync']['connections'] + pool_stats['async']['connections']} "
+        f"({pool_stats['sync']['idle'] + pool_stats['async']['idle']} idle)",
+    ]
+
+    # Circuit breaker state per provider
+    from providers.health import get_health_monitor
+
+    health_stats = get_health_monitor().get_stats()
+    health_lines = [
+        f"  - {provider}: {stats['state']} ({stats['failures']}/{stats['calls']} recent calls failed"
+        + (f", avg latency {stats['avg_latency']:.1f}s" if stats["avg_latency"] is not None else "")
+        + (f", retry in {stats['retry_in']:.0f}s" if stats["state"] == "open" else "")
+        + ")"
+        for provider, stats in health_stats.items()
+    ] or ["  - No provider calls yet"]
+
+    # Hedged requests for latency-sensitive tools
+    from utils.request_hedging import get_request_hedger
+
+    hedge_stats = get_request_hedger().get_stats()
+    if hedge_stats["tools"]:
+        hedge_lines = [
+            f"  - Enabled for: {', '.join(hedge_stats['tools'])} "
+            f"(trigger: p{hedge_stats['percentile']:g} latency, secondary: {hedge_stats['hedge_model'] or 'auto'})"
+        ]
+        for tool_name, tool_stats in hedge_stats["stats"].items():
+            hedge_lines.append(
+                f"  - {tool_name}: {tool_stats['hedged']}/{tool_stats['requests']} hedged, "
+                f"{tool_stats['hedge_wins']} won by hedge, ~{tool_stats['extra_tokens']:,} extra tokens"
+            )
+    else:
+        hedge_lines = ["  - Disabled (set HEDGE_TOOLS to enable)"]
+
+    # Response cache for repeated low-temperature requests
+    from providers.response_cache import get_response_cache
+
+    cache_stats = get_response_cache().get_stats()
+    if cache_stats["backend"]:
+        cache_lines = [
+            f"  - Backend: {cache_stats['backend']} (temperature <= {cache_stats['max_temperature']:g})",
+            f"  - Entries: {cache_stats.get('entries', 0)} ({cache_stats.get('bytes', 0) / 1024:,.0f} KB)",
+            f"  - Hits: {cache_stats['hits']}, misses: {cache_stats['misses']}, skipped: {cache_stats['skipped']}",
+        ]
+    else:
+        cache_lines = ["  - Disabled (set RESPONSE_CACHE_BACKEND to memory or sqlite)"]
+
+    # File content cache for unchanged files
+    from utils.file_utils import get_file_cache_stats
+
+    file_cache_stats = get_file_cache_stats()
+    if file_cache_stats["enabled"]:
+        file_cache_lines = [
+            f"  - Entries: {file_cache_stats['entries']} "
+            f"({file_cache_stats['bytes'] / 1024:,.0f} of {file_cache_stats['max_bytes'] / 1024:,.0f} KB)",
+            f"  - Hits: {file_cache_stats['hits']}, misses: {file_cache_stats['misses']}, "
+            f"evictions: {file_cache_stats['evictions']}",
+        ]
+    else:
+        file_cache_lines = ["  - Disabled (FILE_CONTENT_CACHE_MAX_MB=0)"]
+
+    # Blocking-work executor load
+    from utils.tool_executor import get_tool_executor
+
+    executor_stats = get_tool_executor().get_stats()
+    executor_lines = [
+        f"  - Workers: {executor_stats['max_workers']} "
+        f"(active: {executor_stats['active']}, queued: {executor_stats['queued']}, "
+        f"backlog: {executor_stats['pool_backlog']})"
+    ]
+    for tool_name, tool_stats in executor_stats["tools"].items():
+        executor_lines.append(
+            f"  - {tool_name}: limit {tool_stats['limit']}, active {tool_stats['active']}, "
+            f"queued {tool_stats['queued']}, completed {tool_stats['completed']}"
+        )
+
+    # Conversation thread writes
+    from utils.conversation_archive import get_archive
+    from utils.conversation_memory import get_json_codec, get_write_stats
+    from utils.tool_executor import run_blocking
+
+    write_stats = get_write_stats()
+    archive = get_archive()
+    if archive:
+        archived = await run_blocking("version", archive.count)
+        archive_status = f"{archived} threads in {archive.path}"
+    else:
+        archive_status = "disabled"
+    storage_lines = [
+        f"  - Backend: {os.getenv('CONVERSATION_STORE', 'redis').lower()}",
+        f"  - Archive: {archive_status}",
+        f"  - JSON codec: {get_json_codec()}",
+        f"  - Versioned writes: {write_stats['writes']} "
+        f"(conflicts retried: {write_stats['conflicts']}, given up: {write_stats['exhausted']})",
+    ]
+
     # Format the information in a human-readable way
     text = f"""Zen MCP Server v{__version__}
 Updated: {__updated__}
@@ -685,11 +863,102 @@ Configured Providers:
 Available Tools:
 {chr(10).join(f"  - {tool}" for tool in version_info["available_tools"])}
 
+Tool Executor:
+{chr(10).join(executor_lines)}
+
+HTTP Connection Pool:
+{chr(10).join(pool_lines)}
+
+Provider Health:
+{chr(10).join(health_lines)}
+
+Request Hedging:
+{chr(10).join(hedge_lines)}
+
+Response Cache:
+{chr(10).join(cache_lines)}
+
+File Content Cache:
+{chr(10).join(file_cache_lines)}
+
+Conversation Storage:
+{chr(10).join(storage_lines)}
+
 For updates, visit: https://github.com/BeehiveInnovations/zen-mcp-server"""
 
     # Create standardized tool output
-    tool_output = ToolOutput(status="success", content=text, content_type="text", metadata={"tool_name": "version"})
+    tool_output = ToolOutput(
+        status="success",
+        content=text,
+        content_type="text",
+        metadata={
+            "tool_name": "version",
+            "tool_executor": executor_stats,
+            "http_pool": pool_stats,
+            "provider_health": health_stats,
+            "request_hedging": hedge_stats,
+            "response_cache": cache_stats,
+            "file_cache": file_cache_stats,
+            "conversation_writes": write_stats,
+        },
+    )
+
+    return [TextContent(type="text", text=tool_output.model_dump_json())]
+
+
+async def handle_thread_stats(arguments: dict[str, Any]) -> list[TextContent]:
+    """
+    Report active conversation threads and the largest of them.
+
+    Reads the conversation store's thread index (expired threads are swept
+    from it first), so no storage-wide key scan is needed.
 
+    Args:
+        arguments: Optional "limit" - how many of the largest threads to list
+
+    Returns:
+        Formatted text with thread count, total size and the heaviest threads
+    """
+    from utils.conversation_store import get_conversation_store
+    from utils.tool_executor import run_blocking
+
+    try:
+        limit = min(max(int(arguments.get("limit", 10)), 1), 100)
+    except (TypeError, ValueError):
+        limit = 10
+
+    store = get_conversation_store()
+    try:
+        stats = await run_blocking("threads", store.thread_stats, limit)
+    except Exception as e:
+        logger.warning(f"Could not read conversation thread stats: {e}")
+        tool_output = ToolOutput(
+            status="error",
+            content=f"Conversation store ({store.name}) unavailable: {e}",
+            content_type="text",
+            metadata={"tool_name": "threads"},
+        )
+        return [TextContent(type="text", text=tool_output.model_dump_json())]
+
+    thread_lines = [
+        f"  {rank}. {thread['thread_id']}: {thread['bytes'] / 1024:,.1f} KB, {thread['turns']} turns, "
+        f"updated {thread['last_updated_at']}"
+        for rank, thread in enumerate(stats["heaviest"], 1)
+    ] or ["  - No active threads"]
+
+    text = f"""Conversation Threads ({store.name} store)
+- Active threads: {stats['threads']}
+- Total size: {stats['bytes'] / 1024:,.1f} KB
+
+Largest threads:
+{chr(10).join(thread_lines)}"""
+
+    tool_output = ToolOutput(
+        status="success",
+        content=text,
+        content_type="text",
+        metadata={"tool_name": "threads", "store": store.name, **stats},
+    )
     return [TextContent(type="text", text=tool_output.model_dump_json())]
 
 
@@ -727,18 +996,30 @@ async def main():
     logger.info(f"Available tools: {list(TOOLS.keys())}")
     logger.info("Server ready - waiting for tool requests...")
 
+    # Move idle conversation threads to the on-disk archive, if one is configured
+    from utils.conversation_archive import get_archive, run_archiver
+
+    archive = get_archive()
+    archiver = asyncio.create_task(run_archiver()) if archive else None
+    if archive:
+        logger.info(f"Conversation archive: {archive.path}")
+
     # Run the server using stdio transport (standard input/output)
     # This allows the server to be launched by MCP clients as a subprocess
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(
-            read_stream,
-            write_stream,
-            InitializationOptions(
-                server_name="zen",
-                server_version=__version__,
-                capabilities=ServerCapabilities(tools=ToolsCapability()),  # Advertise tool support capability
-            ),
-        )
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await server.run(
+                read_stream,
+                write_stream,
+                InitializationOptions(
+                    server_name="zen",
+                    server_version=__version__,
+                    capabilities=ServerCapabilities(tools=ToolsCapability()),  # Advertise tool support capability
+                ),
+            )
+    finally:
+        if archiver:
+            archiver.cancel()
 
 
 if __name__ == "__main__":
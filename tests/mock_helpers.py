@@ -1,6 +1,7 @@
 """Helper functions for test mocking."""
 
-from unittest.mock import Mock
+from typing import Optional
+from unittest.mock import AsyncMock, Mock
 
 from providers.base import ModelCapabilities, ProviderType, RangeTemperatureConstraint
 
@@ -37,5 +38,205 @@ def create_mock_provider(model_name="gemini-2.5-flash-preview-05-20", context_wi
     mock_response.metadata = {"finish_reason": "STOP"}
 
     mock_provider.generate_content.return_value = mock_response
+    mock_provider.agenerate_content = AsyncMock(return_value=mock_response)
 
     return mock_provider
+
+
+def create_mock_redis_client():
+    """Create a Mock Redis client whose compare-and-set thread writes are recorded as setex calls."""
+    mock_client = Mock()
+
+    def compare_and_set(keys, args, client=None) -> int:
+        mock_client.setex(keys[0], int(args[3]), args[1])
+        return 1
+
+    mock_client.register_script.return_value = compare_and_set
+    # Commands queued on a pipeline are recorded on the client itself
+    mock_client.pipeline.return_value = mock_client
+    return mock_client
+
+
+class FakeRedis:
+    """In-memory stand-in for the Redis commands conversation memory uses."""
+
+    def __init__(self):
+        self.data: dict = {}
+        self.ttl: dict[str, int] = {}
+        self.calls: list[str] = []
+
+    def get(self, key: str) -> Optional[str]:
+        self.calls.append("get")
+        return self.data.get(key)
+
+    def setex(self, key: str, ttl: int, value: str) -> bool:
+        self.calls.append("setex")
+        self.data[key] = value
+        self.ttl[key] = ttl
+        return True
+
+    def set(self, key: str, value: str, ex: Optional[int] = None) -> bool:
+        self.calls.append("set")
+        self.data[key] = value
+        if ex is not None:
+            self.ttl[key] = ex
+        return True
+
+    def exists(self, key: str) -> int:
+        return int(key in self.data)
+
+    def delete(self, *keys: str) -> int:
+        for key in keys:
+            self.ttl.pop(key, None)
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def expire(self, key: str, ttl: int) -> bool:
+        if key not in self.data:
+            return False
+        self.ttl[key] = ttl
+        return True
+
+    def hset(self, key: str, field: Optional[str] = None, value: Optional[str] = None, mapping=None) -> int:
+        entry = self.data.setdefault(key, {})
+        updates = dict(mapping or {})
+        if field is not None:
+            updates[field] = value
+        entry.update(updates)
+        return len(updates)
+
+    def hdel(self, key: str, *fields: str) -> int:
+        entry = self.data.get(key, {})
+        return sum(entry.pop(field, None) is not None for field in fields)
+
+    def zadd(self, key: str, mapping: dict) -> int:
+        entry = self.data.setdefault(key, {})
+        added = len(set(mapping) - set(entry))
+        entry.update({member: float(score) for member, score in mapping.items()})
+        return added
+
+    def zincrby(self, key: str, amount: float, member: str) -> float:
+        entry = self.data.setdefault(key, {})
+        entry[member] = entry.get(member, 0.0) + amount
+        return entry[member]
+
+    def zrem(self, key: str, *members: str) -> int:
+        entry = self.data.get(key, {})
+        return sum(entry.pop(member, None) is not None for member in members)
+
+    def zrange(self, key: str, start: int, end: int, withscores: bool = False) -> list:
+        items = sorted(self.data.get(key, {}).items(), key=lambda item: (item[1], item[0]))
+        items = items[start:] if end == -1 else items[start : end + 1]
+        return items if withscores else [member for member, _ in items]
+
+    def zrangebyscore(self, key: str, low, high) -> list:
+        low, high = float(low), float(high)
+        return [member for member, score in self.zrange(key, 0, -1, withscores=True) if low <= score <= high]
+
+    def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        entry = self.data.setdefault(key, {})
+        entry[field] = str(int(entry.get(field, 0)) + amount)
+        return int(entry[field])
+
+    def hget(self, key: str, field: str) -> Optional[str]:
+        return self.data.get(key, {}).get(field)
+
+    def hgetall(self, key: str) -> dict:
+        return dict(self.data.get(key, {}))
+
+    def rpush(self, key: str, *values: str) -> int:
+        entry = self.data.setdefault(key, [])
+        entry.extend(values)
+        return len(entry)
+
+    def mget(self, keys: list[str]) -> list:
+        self.calls.append("mget")
+        return [self.data.get(key) for key in keys]
+
+    def llen(self, key: str) -> int:
+        return len(self.data.get(key, []))
+
+    def lrange(self, key: str, start: int, end: int) -> list:
+        items = self.data.get(key, [])
+        return items[start:] if end == -1 else items[start : end + 1]
+
+    def ltrim(self, key: str, start: int, end: int) -> bool:
+        if key in self.data:
+            self.data[key] = self.data[key][start : end + 1]
+        return True
+
+    def sadd(self, key: str, *values: str) -> int:
+        entry = self.data.setdefault(key, set())
+        added = len(set(values) - entry)
+        entry.update(values)
+        return added
+
+    def smembers(self, key: str) -> set:
+        return set(self.data.get(key, set()))
+
+    def register_script(self, script: str):
+        """Only RedisConversationStore.CAS_SCRIPT is supported."""
+
+        def compare_and_set(keys, args, client=None) -> int:
+            self.calls.append("evalsha")
+            blob_key, version_key, index_key, bytes_key, turns_key = keys
+            expected, value, version, ttl, thread_id, now, turns = args
+            if self.data.get(version_key, "0") != expected:
+                return 0
+            if blob_key not in self.data:
+                return -1
+            self.setex(blob_key, int(ttl), value)
+            self.setex(version_key, int(ttl), version)
+            del self.calls[-2:]
+            self.zadd(index_key, {thread_id: float(now)})
+            self.zadd(bytes_key, {thread_id: len(value)})
+            self.hset(turns_key, thread_id, str(turns))
+            return 1
+
+        return compare_and_set
+
+    def pipeline(self, transaction: bool = True) -> "FakePipeline":
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Queues commands until execute(), except between watch() and multi()."""
+
+    def __init__(self, client: FakeRedis):
+        self.client = client
+        self.queue: list = []
+        self.immediate = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def watch(self, *keys):
+        self.immediate = True
+
+    def unwatch(self):
+        self.immediate = False
+
+    def multi(self):
+        self.immediate = False
+
+    def execute(self) -> list:
+        # Record the whole pipeline as one round-trip
+        mark = len(self.client.calls)
+        results = [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.queue]
+        del self.client.calls[mark:]
+        self.client.calls.append("execute")
+        self.queue = []
+        return results
+
+    def __getattr__(self, name):
+        command = getattr(self.client, name)
+
+        def call(*args, **kwargs):
+            if self.immediate:
+                return command(*args, **kwargs)
+            self.queue.append((name, args, kwargs))
+            return self
+
+        return call
@@ -0,0 +1,223 @@
+"""Tests for provider circuit breakers and cross-provider failover."""
+
+import os
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from providers import ModelProviderRegistry
+from providers.base import ModelResponse, ProviderType
+from providers.gemini import GeminiModelProvider
+from providers.health import CircuitBreaker, CircuitState, ProviderHealthMonitor
+from providers.openrouter import OpenRouterProvider
+from tools.chat import ChatTool
+
+
+def make_monitor(**env):
+    defaults = {"CIRCUIT_BREAKER_MIN_CALLS": "3", "CIRCUIT_BREAKER_COOLDOWN": "30"}
+    with patch.dict(os.environ, {**defaults, **env}, clear=True):
+        return ProviderHealthMonitor()
+
+
+def trip(monitor, provider_type):
+    breaker = monitor.get_breaker(provider_type)
+    for _ in range(breaker.min_calls):
+        monitor.record_failure(provider_type, 1.0, RuntimeError("503 Service Unavailable"))
+    assert breaker.state == CircuitState.OPEN
+
+
+class TestCircuitBreaker:
+    """Test breaker state transitions."""
+
+    def test_opens_at_failure_rate_after_min_calls(self):
+        breaker = CircuitBreaker("google", min_calls=4, failure_rate=0.5)
+        breaker.record_success(0.5)
+        breaker.record_failure(1.0)
+        breaker.record_failure(1.0)
+        assert breaker.state == CircuitState.CLOSED  # only 3 calls so far
+
+        breaker.record_failure(1.0)
+        assert breaker.state == CircuitState.OPEN
+        assert not breaker.allow_request()
+        assert 29 < breaker.retry_in() <= 30
+
+    def test_half_open_admits_single_trial(self):
+        breaker = CircuitBreaker("openai", min_calls=1, cooldown=30)
+        breaker.record_failure(1.0)
+        breaker._opened_at -= 31
+
+        assert breaker.is_available()
+        assert breaker.allow_request()
+        assert breaker.state == CircuitState.HALF_OPEN
+        assert not breaker.allow_request()  # trial already in flight
+
+        breaker.record_success(0.2)
+        assert breaker.state == CircuitState.CLOSED
+        assert breaker.get_stats()["calls"] == 1
+
+    def test_failed_trial_reopens(self):
+        breaker = CircuitBreaker("xai", min_calls=1, cooldown=30)
+        breaker.record_failure(1.0)
+        breaker._opened_at -= 31
+        assert breaker.allow_request()
+
+        breaker.record_failure(1.0)
+        assert breaker.state == CircuitState.OPEN
+        assert not breaker.allow_request()
+
+
+class TestProviderHealthMonitor:
+    """Test error classification and configuration."""
+
+    def test_fatal_errors_do_not_count(self):
+        monitor = make_monitor()
+        error = RuntimeError("OpenAI API error")
+        error.__cause__ = ValueError("400 invalid request: prompt too long")
+        for _ in range(5):
+            monitor.record_failure(ProviderType.OPENAI, 0.1, error)
+
+        assert "openai" not in monitor.get_stats()
+        assert monitor.is_available(ProviderType.OPENAI)
+
+    def test_transient_errors_open_circuit(self):
+        monitor = make_monitor()
+        trip(monitor, ProviderType.GOOGLE)
+
+        assert not monitor.is_available(ProviderType.GOOGLE)
+        stats = monitor.get_stats()["google"]
+        assert stats["state"] == "open"
+        assert stats["failure_rate"] == 1.0
+
+    def test_disabled(self):
+        monitor = make_monitor(CIRCUIT_BREAKER_ENABLED="false")
+        for _ in range(10):
+            monitor.record_failure(ProviderType.GOOGLE, 1.0, TimeoutError())
+        assert monitor.is_available(ProviderType.GOOGLE)
+
+
+@pytest.mark.no_mock_provider
+class TestRegistryFailover:
+    """Test routing around providers with an open circuit."""
+
+    def setup_method(self):
+        self.registry = ModelProviderRegistry()
+        self._original_providers = self.registry._providers.copy()
+        self._original_initialized = self.registry._initialized_providers.copy()
+        self.registry._providers.clear()
+        self.registry._initialized_providers.clear()
+
+        ModelProviderRegistry.register_provider(ProviderType.GOOGLE, GeminiModelProvider)
+        ModelProviderRegistry.register_provider(ProviderType.OPENROUTER, OpenRouterProvider)
+        self.monitor = make_monitor()
+
+    def teardown_method(self):
+        self.registry._providers.clear()
+        self.registry._initialized_providers.clear()
+        self.registry._providers.update(self._original_providers)
+        self.registry._initialized_providers.update(self._original_initialized)
+
+    def test_open_provider_skipped_for_shared_alias(self):
+        with (
+            patch.dict(os.environ, {"GEMINI_API_KEY": "test-key", "OPENROUTER_API_KEY": "test-key"}),
+            patch("providers.registry.get_health_monitor", return_value=self.monitor),
+        ):
+            assert ModelProviderRegistry.get_provider_for_model("pro").get_provider_type() == ProviderType.GOOGLE
+
+            trip(self.monitor, ProviderType.GOOGLE)
+            provider = ModelProviderRegistry.get_provider_for_model("pro")
+            assert provider.get_provider_type() == ProviderType.OPENROUTER
+
+            # OpenRouter does not know the dated native name, so the unhealthy native provider is returned
+            provider = ModelProviderRegistry.get_provider_for_model("gemini-2.5-pro-preview-06-05")
+            assert provider.get_provider_type() == ProviderType.GOOGLE
+
+    def test_failover_model_resolves_equivalent(self):
+        with (
+            patch.dict(os.environ, {"GEMINI_API_KEY": "test-key", "OPENROUTER_API_KEY": "test-key"}),
+            patch("providers.registry.get_health_monitor", return_value=self.monitor),
+        ):
+            provider, model_name = ModelProviderRegistry.get_failover_model(
+                "gemini-2.5-pro-preview-06-05", ProviderType.GOOGLE
+            )
+            assert provider.get_provider_type() == ProviderType.OPENROUTER
+            assert model_name == "google/gemini-2.5-pro-preview"
+
+            trip(self.monitor, ProviderType.OPENROUTER)
+            assert ModelProviderRegistry.get_failover_model("pro", ProviderType.GOOGLE) is None
+
+
+class TestToolFailover:
+    """Test BaseTool routing and outcome recording."""
+
+    async def test_substitutes_provider_when_circuit_open(self):
+        monitor = make_monitor()
+        trip(monitor, ProviderType.GOOGLE)
+
+        primary = MagicMock()
+        primary.get_provider_type.return_value = ProviderType.GOOGLE
+        substitute = MagicMock()
+        substitute.get_provider_type.return_value = ProviderType.OPENROUTER
+        substitute.supports_thinking_mode.return_value = False
+        substitute.get_capabilities.return_value.supports_streaming = False
+        substitute.agenerate_content = AsyncMock(return_value=ModelResponse(content="ok", model_name="sub"))
+
+        with (
+            patch("tools.base.get_health_monitor", return_value=monitor),
+            patch("utils.rate_limiter.get_health_monitor", return_value=monitor),
+            patch.object(
+                ModelProviderRegistry,
+                "get_failover_model",
+                return_value=(substitute, "google/gemini-2.5-pro-preview"),
+            ),
+        ):
+            response = await ChatTool()._generate_model_response(
+                primary, "pro", prompt="Hi", temperature=0.5, thinking_mode="high"
+            )
+
+        primary.agenerate_content.assert_not_called()
+        call_kwargs = substitute.agenerate_content.call_args.kwargs
+        assert call_kwargs["model_name"] == "google/gemini-2.5-pro-preview"
+        assert call_kwargs["thinking_mode"] is None
+        assert response.metadata["provider_substitution"] == {
+            "reason": "circuit_open",
+            "requested_provider": "google",
+            "requested_model": "pro",
+            "provider": "openrouter",
+            "model": "google/gemini-2.5-pro-preview",
+        }
+        assert monitor.get_stats()["openrouter"]["calls"] == 1
+
+    async def test_fails_fast_without_substitute(self):
+        monitor = make_monitor()
+        trip(monitor, ProviderType.XAI)
+        provider = MagicMock()
+        provider.get_provider_type.return_value = ProviderType.XAI
+        provider.agenerate_content = AsyncMock()
+
+        with (
+            patch("tools.base.get_health_monitor", return_value=monitor),
+            patch.object(ModelProviderRegistry, "get_failover_model", return_value=None),
+        ):
+            with pytest.raises(RuntimeError, match="circuit open"):
+                await ChatTool()._generate_model_response(provider, "grok-3", prompt="Hi")
+
+        provider.agenerate_content.assert_not_called()
+
+    async def test_records_provider_failures(self):
+        monitor = make_monitor()
+        provider = MagicMock()
+        provider.get_provider_type.return_value = ProviderType.OPENAI
+        provider.get_capabilities.return_value.supports_streaming = False
+        error = RuntimeError("OpenAI API error for model o3 after 4 attempts")
+        error.__cause__ = TimeoutError("timed out")
+        provider.agenerate_content = AsyncMock(side_effect=error)
+
+        with (
+            patch("tools.base.get_health_monitor", return_value=monitor),
+            patch("utils.rate_limiter.get_health_monitor", return_value=monitor),
+        ):
+            for _ in range(3):
+                with pytest.raises(RuntimeError):
+                    await ChatTool()._generate_model_response(provider, "o3", prompt="Hi")
+
+        assert monitor.get_stats()["openai"]["state"] == "open"
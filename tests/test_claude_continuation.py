@@ -11,7 +11,7 @@ from unittest.mock import Mock, patch
 import pytest
 from pydantic import Field
 
-from tests.mock_helpers import create_mock_provider
+from tests.mock_helpers import create_mock_provider, create_mock_redis_client
 from tools.base import BaseTool, ToolRequest
 from utils.conversation_memory import MAX_CONVERSATION_TURNS
 
@@ -69,7 +69,7 @@ class TestClaudeContinuationOffers:
         tool = ClaudeContinuationTool()
         tool.default_model = "gemini-2.5-flash-preview-05-20"
 
-        mock_client = Mock()
+        mock_client = create_mock_redis_client()
         mock_redis.return_value = mock_client
 
         # Mock the model
@@ -77,7 +77,7 @@ class TestClaudeContinuationOffers:
             mock_provider = create_mock_provider()
             mock_provider.get_provider_type.return_value = Mock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = Mock(
+            mock_provider.agenerate_content.return_value = Mock(
                 content="Analysis complete.",
                 usage={"input_tokens": 10, "output_tokens": 20, "total_tokens": 30},
                 model_name="gemini-2.5-flash-preview-05-20",
@@ -101,7 +101,7 @@ class TestClaudeContinuationOffers:
     @patch.dict("os.environ", {"PYTEST_CURRENT_TEST": ""}, clear=False)
     async def test_existing_conversation_still_offers_continuation(self, mock_redis):
         """Test that existing threaded conversations still offer continuation if turns remain"""
-        mock_client = Mock()
+        mock_client = create_mock_redis_client()
         mock_redis.return_value = mock_client
 
         # Mock existing thread context with 2 turns
@@ -134,7 +134,7 @@ class TestClaudeContinuationOffers:
             mock_provider = create_mock_provider()
             mock_provider.get_provider_type.return_value = Mock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = Mock(
+            mock_provider.agenerate_content.return_value = Mock(
                 content="Continued analysis.",
                 usage={"input_tokens": 10, "output_tokens": 20, "total_tokens": 30},
                 model_name="gemini-2.5-flash-preview-05-20",
@@ -159,7 +159,7 @@ class TestClaudeContinuationOffers:
     @patch.dict("os.environ", {"PYTEST_CURRENT_TEST": ""}, clear=False)
     async def test_full_response_flow_with_continuation_offer(self, mock_redis):
         """Test complete response flow that creates continuation offer"""
-        mock_client = Mock()
+        mock_client = create_mock_redis_client()
         mock_redis.return_value = mock_client
 
         # Mock the model to return a response without follow-up question
@@ -167,7 +167,7 @@ class TestClaudeContinuationOffers:
             mock_provider = create_mock_provider()
             mock_provider.get_provider_type.return_value = Mock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = Mock(
+            mock_provider.agenerate_content.return_value = Mock(
                 content="Analysis complete. The code looks good.",
                 usage={"input_tokens": 10, "output_tokens": 20, "total_tokens": 30},
                 model_name="gemini-2.5-flash-preview-05-20",
@@ -197,7 +197,7 @@ class TestClaudeContinuationOffers:
     @patch.dict("os.environ", {"PYTEST_CURRENT_TEST": ""}, clear=False)
     async def test_continuation_always_offered_with_natural_language(self, mock_redis):
         """Test that continuation is always offered with natural language prompts"""
-        mock_client = Mock()
+        mock_client = create_mock_redis_client()
         mock_redis.return_value = mock_client
 
         # Mock the model to return a response with natural language follow-up
@@ -209,7 +209,7 @@ class TestClaudeContinuationOffers:
             content_with_followup = """Analysis complete. The code looks good.
 
 I'd be happy to examine the error handling patterns in more detail if that would be helpful."""
-            mock_provider.generate_content.return_value = Mock(
+            mock_provider.agenerate_content.return_value = Mock(
                 content=content_with_followup,
                 usage={"input_tokens": 10, "output_tokens": 20, "total_tokens": 30},
                 model_name="gemini-2.5-flash-preview-05-20",
@@ -233,7 +233,7 @@ I'd be happy to examine the error handling patterns in more detail if that would
     @patch.dict("os.environ", {"PYTEST_CURRENT_TEST": ""}, clear=False)
     async def test_threaded_conversation_with_continuation_offer(self, mock_redis):
         """Test that threaded conversations still get continuation offers when turns remain"""
-        mock_client = Mock()
+        mock_client = create_mock_redis_client()
         mock_redis.return_value = mock_client
 
         # Mock existing thread context
@@ -254,7 +254,7 @@ I'd be happy to examine the error handling patterns in more detail if that would
             mock_provider = create_mock_provider()
             mock_provider.get_provider_type.return_value = Mock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = Mock(
+            mock_provider.agenerate_content.return_value = Mock(
                 content="Continued analysis complete.",
                 usage={"input_tokens": 10, "output_tokens": 20, "total_tokens": 30},
                 model_name="gemini-2.5-flash-preview-05-20",
@@ -278,7 +278,7 @@ I'd be happy to examine the error handling patterns in more detail if that would
     @patch.dict("os.environ", {"PYTEST_CURRENT_TEST": ""}, clear=False)
     async def test_max_turns_reached_no_continuation_offer(self, mock_redis):
         """Test that no continuation is offered when max turns would be exceeded"""
-        mock_client = Mock()
+        mock_client = create_mock_redis_client()
         mock_redis.return_value = mock_client
 
         # Mock existing thread context at max turns
@@ -310,7 +310,7 @@ I'd be happy to examine the error handling patterns in more detail if that would
             mock_provider = create_mock_provider()
             mock_provider.get_provider_type.return_value = Mock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = Mock(
+            mock_provider.agenerate_content.return_value = Mock(
                 content="Final response.",
                 usage={"input_tokens": 10, "output_tokens": 20, "total_tokens": 30},
                 model_name="gemini-2.5-flash-preview-05-20",
@@ -342,7 +342,7 @@ class TestContinuationIntegration:
     @patch.dict("os.environ", {"PYTEST_CURRENT_TEST": ""}, clear=False)
     async def test_continuation_offer_creates_proper_thread(self, mock_redis):
         """Test that continuation offers create properly formatted threads"""
-        mock_client = Mock()
+        mock_client = create_mock_redis_client()
         mock_redis.return_value = mock_client
 
         # Mock the get call that add_turn makes to retrieve the existing thread
@@ -361,7 +361,7 @@ class TestContinuationIntegration:
             mock_provider = create_mock_provider()
             mock_provider.get_provider_type.return_value = Mock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = Mock(
+            mock_provider.agenerate_content.return_value = Mock(
                 content="Analysis result",
                 usage={"input_tokens": 10, "output_tokens": 20, "total_tokens": 30},
                 model_name="gemini-2.5-flash-preview-05-20",
@@ -406,7 +406,7 @@ class TestContinuationIntegration:
     @patch.dict("os.environ", {"PYTEST_CURRENT_TEST": ""}, clear=False)
     async def test_claude_can_use_continuation_id(self, mock_redis):
         """Test that Claude can use the provided continuation_id in subsequent calls"""
-        mock_client = Mock()
+        mock_client = create_mock_redis_client()
         mock_redis.return_value = mock_client
 
         # Step 1: Initial request creates continuation offer
@@ -414,7 +414,7 @@ class TestContinuationIntegration:
             mock_provider = create_mock_provider()
             mock_provider.get_provider_type.return_value = Mock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = Mock(
+            mock_provider.agenerate_content.return_value = Mock(
                 content="Structure analysis done.",
                 usage={"input_tokens": 10, "output_tokens": 20, "total_tokens": 30},
                 model_name="gemini-2.5-flash-preview-05-20",
@@ -451,7 +451,7 @@ class TestContinuationIntegration:
             mock_client.get.return_value = existing_context.model_dump_json()
 
             # Step 3: Claude uses continuation_id
-            mock_provider.generate_content.return_value = Mock(
+            mock_provider.agenerate_content.return_value = Mock(
                 content="Performance analysis done.",
                 usage={"input_tokens": 10, "output_tokens": 20, "total_tokens": 30},
                 model_name="gemini-2.5-flash-preview-05-20",
@@ -40,7 +40,7 @@ class TestDynamicContextRequests:
         mock_provider = create_mock_provider()
         mock_provider.get_provider_type.return_value = Mock(value="google")
         mock_provider.supports_thinking_mode.return_value = False
-        mock_provider.generate_content.return_value = Mock(
+        mock_provider.agenerate_content.return_value = Mock(
             content=clarification_json, usage={}, model_name="gemini-2.5-flash-preview-05-20", metadata={}
         )
         mock_get_provider.return_value = mock_provider
@@ -81,7 +81,7 @@ class TestDynamicContextRequests:
         mock_provider = create_mock_provider()
         mock_provider.get_provider_type.return_value = Mock(value="google")
         mock_provider.supports_thinking_mode.return_value = False
-        mock_provider.generate_content.return_value = Mock(
+        mock_provider.agenerate_content.return_value = Mock(
             content=normal_response, usage={}, model_name="gemini-2.5-flash-preview-05-20", metadata={}
         )
         mock_get_provider.return_value = mock_provider
@@ -105,7 +105,7 @@ class TestDynamicContextRequests:
         mock_provider = create_mock_provider()
         mock_provider.get_provider_type.return_value = Mock(value="google")
         mock_provider.supports_thinking_mode.return_value = False
-        mock_provider.generate_content.return_value = Mock(
+        mock_provider.agenerate_content.return_value = Mock(
             content=malformed_json, usage={}, model_name="gemini-2.5-flash-preview-05-20", metadata={}
         )
         mock_get_provider.return_value = mock_provider
@@ -145,7 +145,7 @@ class TestDynamicContextRequests:
         mock_provider = create_mock_provider()
         mock_provider.get_provider_type.return_value = Mock(value="google")
         mock_provider.supports_thinking_mode.return_value = False
-        mock_provider.generate_content.return_value = Mock(
+        mock_provider.agenerate_content.return_value = Mock(
             content=clarification_json, usage={}, model_name="gemini-2.5-flash-preview-05-20", metadata={}
         )
         mock_get_provider.return_value = mock_provider
@@ -232,7 +232,7 @@ class TestCollaborationWorkflow:
         mock_provider = create_mock_provider()
         mock_provider.get_provider_type.return_value = Mock(value="google")
         mock_provider.supports_thinking_mode.return_value = False
-        mock_provider.generate_content.return_value = Mock(
+        mock_provider.agenerate_content.return_value = Mock(
             content=clarification_json, usage={}, model_name="gemini-2.5-flash-preview-05-20", metadata={}
         )
         mock_get_provider.return_value = mock_provider
@@ -271,7 +271,7 @@ class TestCollaborationWorkflow:
         mock_provider = create_mock_provider()
         mock_provider.get_provider_type.return_value = Mock(value="google")
         mock_provider.supports_thinking_mode.return_value = False
-        mock_provider.generate_content.return_value = Mock(
+        mock_provider.agenerate_content.return_value = Mock(
             content=clarification_json, usage={}, model_name="gemini-2.5-flash-preview-05-20", metadata={}
         )
         mock_get_provider.return_value = mock_provider
@@ -298,7 +298,7 @@ class TestCollaborationWorkflow:
         **Root Cause:** The config.py file shows the database host is set to 'localhost' but the database is running on a different server.
         """
 
-        mock_provider.generate_content.return_value = Mock(
+        mock_provider.agenerate_content.return_value = Mock(
             content=final_response, usage={}, model_name="gemini-2.5-flash-preview-05-20", metadata={}
         )
 
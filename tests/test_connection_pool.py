@@ -0,0 +1,86 @@
+"""Tests for the shared HTTP connection pool."""
+
+import os
+from unittest.mock import patch
+
+import httpx
+
+from providers.connection_pool import ConnectionManager
+from providers.custom import CustomProvider
+from providers.openai import OpenAIModelProvider
+from providers.xai import XAIModelProvider
+
+
+class TestConnectionManager:
+    """Test pool configuration and client sharing."""
+
+    def test_defaults(self):
+        with patch.dict(os.environ, {}, clear=True):
+            manager = ConnectionManager()
+
+        assert manager.max_connections == 100
+        assert manager.max_keepalive_connections == 20
+        assert manager.keepalive_expiry == 30.0
+        assert manager.http2 is False
+
+    def test_env_configuration(self):
+        env = {
+            "HTTP_POOL_MAX_CONNECTIONS": "50",
+            "HTTP_POOL_MAX_KEEPALIVE": "10",
+            "HTTP_POOL_KEEPALIVE_EXPIRY": "bogus",
+        }
+        with patch.dict(os.environ, env, clear=True):
+            manager = ConnectionManager()
+
+        assert manager.limits == httpx.Limits(max_connections=50, max_keepalive_connections=10, keepalive_expiry=30.0)
+
+    def test_http2_requires_h2(self):
+        with patch.dict(os.environ, {"HTTP_ENABLE_HTTP2": "true"}, clear=True):
+            with patch("providers.connection_pool._http2_available", return_value=False):
+                manager = ConnectionManager()
+
+        assert manager.http2 is False
+
+    def test_sync_client_is_shared(self):
+        manager = ConnectionManager()
+        try:
+            assert manager.get_sync_client() is manager.get_sync_client()
+        finally:
+            manager.close()
+
+    async def test_async_client_reused_within_loop(self):
+        manager = ConnectionManager()
+        client = manager.get_async_client()
+        assert manager.get_async_client() is client
+        await client.aclose()
+        assert manager.get_async_client() is not client
+
+    def test_stats(self):
+        manager = ConnectionManager()
+        stats = manager.get_stats()
+
+        assert stats["requests"] == 0
+        assert stats["sync"] == {"connections": 0, "idle": 0}
+        assert stats["max_connections"] == manager.max_connections
+
+
+class TestProvidersSharePool:
+    """Test that OpenAI-compatible providers use the shared pool."""
+
+    def test_providers_share_http_client(self):
+        manager = ConnectionManager()
+        with patch("providers.openai_compatible.get_connection_manager", return_value=manager):
+            openai_provider = OpenAIModelProvider("test-key")
+            xai_provider = XAIModelProvider("test-key")
+
+            assert openai_provider.client._client is manager.get_sync_client()
+            assert xai_provider.client._client is manager.get_sync_client()
+        manager.close()
+
+    def test_provider_timeouts_still_apply(self):
+        manager = ConnectionManager()
+        with patch("providers.openai_compatible.get_connection_manager", return_value=manager):
+            provider = CustomProvider(api_key="", base_url="http://localhost:11434/v1")
+
+            assert provider.client.timeout == provider.timeout_config
+        manager.close()
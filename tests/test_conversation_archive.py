@@ -0,0 +1,162 @@
+"""Tests for moving idle conversation threads to the on-disk archive and back."""
+
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from tests.mock_helpers import FakeRedis
+from utils import conversation_archive
+from utils.conversation_archive import archive_idle_threads, get_archive, get_idle_seconds
+from utils.conversation_memory import (
+    CONVERSATION_TIMEOUT_SECONDS,
+    add_turn,
+    create_thread,
+    get_thread,
+    get_thread_chain,
+)
+from utils.conversation_store import InMemoryConversationStore, RedisConversationStore, SQLiteConversationStore
+
+
+@pytest.fixture(params=["redis-blob", "redis-append", "memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param.startswith("redis"):
+        backend = RedisConversationStore()
+    elif request.param == "memory":
+        backend = InMemoryConversationStore(ttl=CONVERSATION_TIMEOUT_SECONDS, max_threads=100)
+    else:
+        backend = SQLiteConversationStore(str(tmp_path / "threads.db"), ttl=CONVERSATION_TIMEOUT_SECONDS)
+    layout = "append" if request.param == "redis-append" else "blob"
+
+    with (
+        patch("utils.conversation_memory.get_redis_client", return_value=FakeRedis()),
+        patch.dict(
+            os.environ,
+            {"CONVERSATION_STORAGE_LAYOUT": layout, "CONVERSATION_ARCHIVE_PATH": str(tmp_path / "archive.db")},
+        ),
+        patch("utils.conversation_store.get_conversation_store", return_value=backend),
+        patch.dict(conversation_archive._archives, clear=True),
+    ):
+        yield backend
+        get_archive().close()
+
+
+def sweep(hours_later: float = 2) -> int:
+    """Run an archive sweep as if it were hours_later from now."""
+    with patch("utils.conversation_archive.time.time", return_value=time.time() + hours_later * 3600):
+        return archive_idle_threads()
+
+
+class TestArchive:
+    """Test archiving idle threads and restoring them on continuation."""
+
+    def test_idle_thread_archived_and_restored(self, store):
+        thread_id = create_thread("chat", {"prompt": "Investigate the leak"})
+        add_turn(thread_id, "user", "Where is the leak?")
+        add_turn(thread_id, "assistant", "In the cache")
+
+        assert sweep() == 1
+        assert store.get(thread_id) is None
+        assert get_archive().count() == 1
+
+        context = get_thread(thread_id)
+        assert [turn.content for turn in context.turns] == ["Where is the leak?", "In the cache"]
+        assert context.initial_context == {"prompt": "Investigate the leak"}
+        assert get_archive().count() == 0
+
+        # The restored thread takes writes as before
+        assert add_turn(thread_id, "user", "Next morning")
+        assert len(get_thread(thread_id).turns) == 3
+        assert get_thread(thread_id).version == 3
+
+    def test_active_thread_kept(self, store):
+        thread_id = create_thread("chat", {})
+
+        assert sweep(hours_later=0.5) == 0
+        assert store.get(thread_id) is not None
+        assert get_archive().count() == 0
+
+    def test_thread_written_during_archive_stays(self, store):
+        thread_id = create_thread("chat", {})
+        archive = get_archive()
+        put = archive.put
+
+        def put_then_write(context, files):
+            put(context, files)
+            add_turn(thread_id, "user", "Arrived mid-sweep")
+
+        with patch.object(archive, "put", side_effect=put_then_write):
+            assert sweep() == 0
+
+        assert [turn.content for turn in store.get(thread_id).turns] == ["Arrived mid-sweep"]
+        assert archive.count() == 0
+
+    def test_chain_restores_archived_ancestors(self, store):
+        parent = create_thread("analyze", {})
+        add_turn(parent, "assistant", "Parent finding")
+        child = create_thread("chat", {}, parent_thread_id=parent)
+
+        assert sweep() == 2
+
+        chain = get_thread_chain(child)
+        assert [context.thread_id for context in chain] == [parent, child]
+        assert chain[0].turns[0].content == "Parent finding"
+
+    def test_file_snapshots_archived(self, store, project_path):
+        source = project_path / "leak.py"
+        source.write_text("cache = {}\n")
+        thread_id = create_thread("chat", {})
+        add_turn(thread_id, "user", "Review", files=[str(source)])
+        digest = store.get(thread_id).turns[0].file_hashes[str(source)]
+
+        sweep()
+        source.write_text("cache = LRU()\n")
+        get_thread(thread_id)
+
+        # History shows the file as it was discussed
+        assert "cache = {}" in store.get_files([digest])[digest]
+
+    def test_retention(self, store):
+        create_thread("chat", {})
+        sweep()
+
+        with patch.dict(os.environ, {"CONVERSATION_ARCHIVE_RETENTION_DAYS": "1"}):
+            sweep(hours_later=30)
+
+        assert get_archive().count() == 0
+
+    async def test_version_counts_archive_off_the_event_loop(self, store):
+        from server import handle_call_tool
+
+        create_thread("chat", {})
+        sweep()
+        archive = get_archive()
+        count = archive.count
+        counted_on = []
+
+        def tracked_count():
+            counted_on.append(threading.current_thread())
+            return count()
+
+        with patch.object(archive, "count", side_effect=tracked_count):
+            result = await handle_call_tool("version", {})
+
+        assert f"Archive: 1 threads in {archive.path}" in result[0].text
+        assert counted_on and threading.main_thread() not in counted_on
+
+
+class TestArchiveSettings:
+    """Test archive configuration."""
+
+    def test_disabled_by_default(self):
+        with patch.dict(os.environ, {"CONVERSATION_ARCHIVE_PATH": ""}):
+            assert get_archive() is None
+            assert archive_idle_threads() == 0
+
+    def test_idle_time_capped_below_timeout(self):
+        with patch.dict(os.environ, {"CONVERSATION_ARCHIVE_IDLE_MINUTES": "6000"}):
+            assert get_idle_seconds() == CONVERSATION_TIMEOUT_SECONDS / 2
+        with patch.dict(os.environ, {"CONVERSATION_ARCHIVE_IDLE_MINUTES": "30"}):
+            assert get_idle_seconds() == 1800
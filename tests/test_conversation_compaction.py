@@ -0,0 +1,221 @@
+"""Tests for summarising old conversation turns when history outgrows its budget."""
+
+import asyncio
+import os
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from providers.base import ProviderType
+from tests.mock_helpers import FakeRedis, create_mock_provider
+from utils.conversation_compaction import build_compacted_history
+from utils.conversation_memory import (
+    ConversationTurn,
+    add_turn,
+    build_conversation_history,
+    create_thread,
+    get_thread,
+    set_thread_summary,
+)
+from utils.conversation_store import InMemoryConversationStore, RedisConversationStore, SQLiteConversationStore
+from utils.model_context import ModelContext
+from utils.tool_executor import ToolExecutor, run_blocking
+
+
+@pytest.fixture
+def memory_store():
+    backend = InMemoryConversationStore(ttl=3600, max_threads=100)
+    with patch("utils.conversation_store.get_conversation_store", return_value=backend):
+        yield backend
+
+
+@pytest.fixture
+def summarizer():
+    provider = create_mock_provider()
+    provider.agenerate_content.return_value.content = "- Agreed to keep the cache keyed by path"
+    with (
+        patch.dict(os.environ, {"CONVERSATION_COMPACTION_MODEL": "flash"}),
+        patch("providers.registry.ModelProviderRegistry.get_provider_for_model", return_value=provider),
+    ):
+        yield provider
+
+
+def long_thread(turns=10):
+    thread_id = create_thread("chat", {})
+    for i in range(turns):
+        role = "user" if i % 2 == 0 else "assistant"
+        add_turn(thread_id, role, f"turn-{i + 1} " + "word " * 800)
+    return thread_id
+
+
+async def build_history(thread_id, history_tokens=4_000):
+    model_context = ModelContext("flash")
+    with patch.object(ModelContext, "calculate_token_allocation") as allocation:
+        allocation.return_value.file_tokens = 1_000
+        allocation.return_value.history_tokens = history_tokens
+        history, _ = await build_compacted_history(get_thread(thread_id), model_context, "chat")
+    return history
+
+
+class TestCompaction:
+    """Test when and how old turns are summarised."""
+
+    async def test_old_turns_replaced_by_summary(self, memory_store, summarizer):
+        thread_id = long_thread()
+
+        history = await build_history(thread_id)
+
+        summary = get_thread(thread_id).summary
+        assert summary is not None
+        assert 0 < summary.summarized_turns < 10
+        assert f"--- Summary of turns 1-{summary.summarized_turns} ---" in history
+        assert "Agreed to keep the cache keyed by path" in history
+        assert "turn-10 " in history
+        assert "turn-1 " not in history
+        assert "[Note: Showing" not in history
+
+        prompt = summarizer.agenerate_content.call_args.kwargs["prompt"]
+        assert "turn-1 " in prompt
+
+    async def test_stored_summary_reused(self, memory_store, summarizer):
+        thread_id = long_thread()
+        await build_history(thread_id)
+        summarizer.agenerate_content.reset_mock()
+
+        history = await build_history(thread_id)
+
+        summarizer.agenerate_content.assert_not_called()
+        assert "Agreed to keep the cache keyed by path" in history
+
+    async def test_summary_absorbs_previous_summary(self, memory_store, summarizer):
+        thread_id = long_thread()
+        await build_history(thread_id)
+        first = get_thread(thread_id).summary
+        for i in range(10, 20):
+            add_turn(thread_id, "user" if i % 2 == 0 else "assistant", f"turn-{i + 1} " + "word " * 800)
+
+        await build_history(thread_id)
+
+        second = get_thread(thread_id).summary
+        assert second.summarized_turns > first.summarized_turns
+        assert "Summary of turns" in summarizer.agenerate_content.call_args.kwargs["prompt"]
+
+    async def test_no_compaction_when_enough_turns_fit(self, memory_store, summarizer):
+        thread_id = long_thread(turns=4)
+
+        history = await build_history(thread_id, history_tokens=4_500)
+
+        summarizer.agenerate_content.assert_not_called()
+        assert get_thread(thread_id).summary is None
+        assert "[Note: Showing 3 most recent turns out of 4 total]" in history
+
+    async def test_disabled(self, memory_store, summarizer):
+        thread_id = long_thread()
+
+        with patch.dict(os.environ, {"CONVERSATION_COMPACTION_THRESHOLD": "0"}):
+            history = await build_history(thread_id)
+
+        summarizer.agenerate_content.assert_not_called()
+        assert "[Note: Showing" in history
+
+    async def test_provider_failure_drops_turns(self, memory_store, summarizer):
+        summarizer.agenerate_content.side_effect = RuntimeError("quota exceeded")
+        thread_id = long_thread()
+
+        history = await build_history(thread_id)
+
+        assert get_thread(thread_id).summary is None
+        assert "[Note: Showing" in history
+        assert "turn-10 " in history
+
+    def test_sync_build_drops_old_turns(self, memory_store, summarizer):
+        model_context = ModelContext("flash")
+        with patch.object(ModelContext, "calculate_token_allocation") as allocation:
+            allocation.return_value.file_tokens = 1_000
+            allocation.return_value.history_tokens = 4_000
+            history, _ = build_conversation_history(get_thread(long_thread()), model_context)
+
+        summarizer.agenerate_content.assert_not_called()
+        assert "[Note: Showing" in history
+
+
+class TestSummaryModelCall:
+    """Test that summaries go through the same rate limits and health checks as tool calls."""
+
+    @pytest.fixture
+    def health(self):
+        monitor = MagicMock()
+        monitor.allow_request.return_value = True
+        with (
+            patch("providers.health.get_health_monitor", return_value=monitor),
+            patch("utils.rate_limiter.get_health_monitor", return_value=monitor),
+        ):
+            yield monitor
+
+    async def test_rate_limited_and_recorded(self, memory_store, summarizer, health):
+        limiter = MagicMock()
+        limiter.acquire = AsyncMock(return_value=MagicMock(waited=0.0))
+
+        with patch("utils.rate_limiter.get_rate_limiter", return_value=limiter):
+            await build_history(long_thread())
+
+        provider_type, model_name, tokens = limiter.acquire.await_args.args
+        assert provider_type == ProviderType.GOOGLE
+        assert model_name == "gemini-2.5-flash-preview-05-20"
+        assert tokens > 1_000
+        health.record_success.assert_called_once()
+        summarizer.generate_content.assert_not_called()
+
+    async def test_open_circuit_skips_compaction(self, memory_store, summarizer, health):
+        health.allow_request.return_value = False
+
+        history = await build_history(long_thread())
+
+        summarizer.agenerate_content.assert_not_called()
+        assert "[Note: Showing" in history
+
+    async def test_summary_awaited_without_holding_a_tool_slot(self, memory_store, summarizer, health):
+        async def summarise(**kwargs):
+            # Would wait forever if rendering still held the only "chat" slot
+            await asyncio.wait_for(run_blocking("chat", lambda: None), timeout=2)
+            return summarizer.generate_content.return_value
+
+        summarizer.agenerate_content.side_effect = summarise
+        thread_id = long_thread()
+
+        with patch("utils.tool_executor._tool_executor", ToolExecutor(tool_limits={"chat": 1})):
+            history = await build_history(thread_id)
+
+        assert "Agreed to keep the cache keyed by path" in history
+
+
+@pytest.mark.parametrize("backend", ["redis-blob", "redis-append", "memory", "sqlite"])
+def test_set_summary_round_trip(backend, tmp_path):
+    client = FakeRedis()
+    if backend.startswith("redis"):
+        store = RedisConversationStore()
+    elif backend == "memory":
+        store = InMemoryConversationStore(ttl=3600, max_threads=10)
+    else:
+        store = SQLiteConversationStore(str(tmp_path / "threads.db"), ttl=3600)
+    layout = "append" if backend == "redis-append" else "blob"
+
+    with (
+        patch("utils.conversation_memory.get_redis_client", return_value=client),
+        patch.dict(os.environ, {"CONVERSATION_STORAGE_LAYOUT": layout}),
+        patch("utils.conversation_store.get_conversation_store", return_value=store),
+    ):
+        thread_id = create_thread("chat", {})
+        add_turn(thread_id, "user", "hello")
+        summary = ConversationTurn(
+            role="assistant", content="- said hello", timestamp="2025-01-01T00:00:00+00:00", summarized_turns=1
+        )
+
+        assert set_thread_summary(thread_id, summary)
+        add_turn(thread_id, "assistant", "hi")
+
+        stored = get_thread(thread_id)
+        assert stored.summary.content == "- said hello"
+        assert stored.summary.summarized_turns == 1
+        assert len(stored.turns) == 2
+        assert not set_thread_summary("00000000-0000-0000-0000-000000000000", summary)
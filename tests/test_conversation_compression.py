@@ -0,0 +1,89 @@
+"""Tests for compressed conversation payloads."""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from tests.mock_helpers import FakeRedis
+from utils.conversation_memory import (
+    COMPRESSED_PAYLOAD_PREFIX,
+    ConversationTurn,
+    ThreadContext,
+    add_turn,
+    create_thread,
+    get_thread,
+)
+
+LARGE_RESPONSE = "def handler(event):\n    return process(event)\n" * 1000
+
+
+@pytest.fixture(params=["blob", "append"])
+def redis_client(request):
+    client = FakeRedis()
+    with (
+        patch("utils.conversation_memory.get_redis_client", return_value=client),
+        patch.dict(os.environ, {"CONVERSATION_STORAGE_LAYOUT": request.param}),
+    ):
+        yield client
+
+
+def stored_strings(client: FakeRedis) -> list[str]:
+    values = []
+    for key, value in client.data.items():
+        if key.startswith("threads:"):
+            continue  # Thread index, not thread content
+        if isinstance(value, str):
+            values.append(value)
+        elif isinstance(value, list):
+            values.extend(value)
+        else:
+            values.extend(value.values())
+    return values
+
+
+class TestCompression:
+    """Test transparent compression of stored threads."""
+
+    def test_large_turns_are_compressed(self, redis_client):
+        thread_id = create_thread("codereview", {"prompt": "Review"})
+        assert add_turn(thread_id, "assistant", LARGE_RESPONSE)
+
+        stored = stored_strings(redis_client)
+        assert any(value.startswith(COMPRESSED_PAYLOAD_PREFIX) for value in stored)
+        assert sum(len(value) for value in stored) < len(LARGE_RESPONSE) / 10
+        assert get_thread(thread_id).turns[0].content == LARGE_RESPONSE
+
+    def test_small_payloads_stay_plain(self, redis_client):
+        thread_id = create_thread("chat", {"prompt": "Hi"})
+        add_turn(thread_id, "user", "Short question")
+
+        assert not any(value.startswith(COMPRESSED_PAYLOAD_PREFIX) for value in stored_strings(redis_client))
+
+    def test_disabled(self, redis_client):
+        with patch.dict(os.environ, {"CONVERSATION_COMPRESSION": "none"}):
+            thread_id = create_thread("codereview", {"prompt": "Review"})
+            add_turn(thread_id, "assistant", LARGE_RESPONSE)
+
+        assert not any(value.startswith(COMPRESSED_PAYLOAD_PREFIX) for value in stored_strings(redis_client))
+        assert get_thread(thread_id).turns[0].content == LARGE_RESPONSE
+
+    def test_uncompressed_keys_remain_readable(self):
+        client = FakeRedis()
+        thread_id = "12345678-1234-1234-1234-123456789012"
+        context = ThreadContext(
+            thread_id=thread_id,
+            created_at="2023-01-01T00:00:00Z",
+            last_updated_at="2023-01-01T00:00:00Z",
+            tool_name="chat",
+            turns=[ConversationTurn(role="assistant", content=LARGE_RESPONSE, timestamp="2023-01-01T00:00:00Z")],
+            initial_context={},
+        )
+        client.data[f"thread:{thread_id}"] = context.model_dump_json()
+
+        with patch("utils.conversation_memory.get_redis_client", return_value=client):
+            assert get_thread(thread_id).turns[0].content == LARGE_RESPONSE
+            # The next write stores it compressed
+            assert add_turn(thread_id, "user", "Thanks")
+
+        assert client.data[f"thread:{thread_id}"].startswith(COMPRESSED_PAYLOAD_PREFIX)
@@ -0,0 +1,173 @@
+"""Tests for versioned, compare-and-set writes to conversation threads."""
+
+import os
+from contextlib import contextmanager
+from unittest.mock import patch
+
+import pytest
+
+from tests.mock_helpers import FakeRedis
+from utils import conversation_codec, conversation_memory
+from utils.conversation_memory import (
+    ConversationRequestScope,
+    ConversationTurn,
+    add_turn,
+    conversation_request_scope,
+    create_thread,
+    get_thread,
+    get_write_stats,
+    set_thread_summary,
+)
+from utils.conversation_store import InMemoryConversationStore, RedisConversationStore, SQLiteConversationStore
+
+
+@pytest.fixture
+def redis_client():
+    client = FakeRedis()
+    with (
+        patch("utils.conversation_memory.get_redis_client", return_value=client),
+        patch.dict(os.environ, {"CONVERSATION_STORAGE_LAYOUT": "blob"}),
+        patch("utils.conversation_store.get_conversation_store", return_value=RedisConversationStore()),
+        patch.dict(conversation_codec._write_stats, {"writes": 0, "conflicts": 0, "exhausted": 0}),
+    ):
+        yield client
+
+
+@contextmanager
+def active(scope):
+    """Run as part of the request that owns scope."""
+    token = conversation_codec._request_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        conversation_codec._request_scope.reset(token)
+
+
+def loaded_scope(thread_id):
+    """A request scope holding a snapshot of the thread, as a tool call that loaded it would."""
+    scope = ConversationRequestScope()
+    with active(scope):
+        get_thread(thread_id)
+    return scope
+
+
+class TestCompareAndSet:
+    """Test that concurrent writers to one blob-layout thread keep each other's updates."""
+
+    def test_stale_snapshot_does_not_overwrite(self, redis_client):
+        thread_id = create_thread("chat", {})
+        stale = loaded_scope(thread_id)
+
+        add_turn(thread_id, "user", "From the first tool")
+        with active(stale):
+            assert add_turn(thread_id, "user", "From the second tool")
+
+        turns = [turn.content for turn in get_thread(thread_id).turns]
+        assert turns == ["From the first tool", "From the second tool"]
+        assert get_thread(thread_id).version == 2
+        assert get_write_stats() == {"writes": 2, "conflicts": 1, "exhausted": 0}
+
+    def test_parallel_requests_keep_all_turns(self, redis_client):
+        thread_id = create_thread("chat", {})
+
+        # Both requests load the thread before either writes
+        first, second = loaded_scope(thread_id), loaded_scope(thread_id)
+        with active(first):
+            assert add_turn(thread_id, "assistant", "Review done")
+        with active(second):
+            assert add_turn(thread_id, "assistant", "Tests written")
+
+        assert {turn.content for turn in get_thread(thread_id).turns} == {"Review done", "Tests written"}
+
+    def test_turn_limit_checked_on_fresh_data(self, redis_client):
+        thread_id = create_thread("chat", {})
+        stale = loaded_scope(thread_id)
+        add_turn(thread_id, "user", "First")
+
+        with patch.object(conversation_memory, "MAX_CONVERSATION_TURNS", 1), active(stale):
+            assert not add_turn(thread_id, "user", "Second")
+
+        assert len(get_thread(thread_id).turns) == 1
+
+    def test_gives_up_after_retries(self, redis_client):
+        thread_id = create_thread("chat", {})
+
+        with (
+            patch.dict(os.environ, {"CONVERSATION_WRITE_RETRIES": "2"}),
+            patch.object(redis_client, "register_script", return_value=lambda keys, args, client=None: 0),
+        ):
+            assert not add_turn(thread_id, "user", "Never lands")
+
+        assert get_thread(thread_id).turns == []
+        assert get_write_stats() == {"writes": 0, "conflicts": 3, "exhausted": 1}
+
+    def test_expired_thread_is_not_recreated(self, redis_client):
+        thread_id = create_thread("chat", {})
+        scope = loaded_scope(thread_id)
+        redis_client.delete(f"thread:{thread_id}")
+
+        with active(scope):
+            assert not add_turn(thread_id, "user", "Too late")
+
+        assert redis_client.get(f"thread:{thread_id}") is None
+
+    def test_summary_is_versioned(self, redis_client):
+        thread_id = create_thread("chat", {})
+        stale = loaded_scope(thread_id)
+        add_turn(thread_id, "user", "Hello")
+        summary = ConversationTurn(role="assistant", content="- hello", timestamp="2025-01-01T00:00:00+00:00")
+
+        with active(stale):
+            assert set_thread_summary(thread_id, summary)
+
+        context = get_thread(thread_id)
+        assert [turn.content for turn in context.turns] == ["Hello"]
+        assert context.summary.content == "- hello"
+        assert context.version == 2
+
+
+@pytest.mark.parametrize("backend", ["redis-blob", "redis-append", "memory", "sqlite"])
+def test_every_write_bumps_version(backend, tmp_path):
+    client = FakeRedis()
+    if backend.startswith("redis"):
+        store = RedisConversationStore()
+    elif backend == "memory":
+        store = InMemoryConversationStore(ttl=3600, max_threads=10)
+    else:
+        store = SQLiteConversationStore(str(tmp_path / "threads.db"), ttl=3600)
+    layout = "append" if backend == "redis-append" else "blob"
+
+    with (
+        patch("utils.conversation_memory.get_redis_client", return_value=client),
+        patch.dict(os.environ, {"CONVERSATION_STORAGE_LAYOUT": layout}),
+        patch("utils.conversation_store.get_conversation_store", return_value=store),
+    ):
+        thread_id = create_thread("chat", {})
+        assert get_thread(thread_id).version == 0
+
+        with conversation_request_scope():
+            add_turn(thread_id, "user", "Question")
+            add_turn(thread_id, "assistant", "Answer")
+            summary = ConversationTurn(role="assistant", content="- Q&A", timestamp="2025-01-01T00:00:00+00:00")
+            set_thread_summary(thread_id, summary)
+            assert get_thread(thread_id).version == 3
+
+        assert get_thread(thread_id).version == 3
+
+
+def test_migration_drops_version_key():
+    client = FakeRedis()
+    with (
+        patch("utils.conversation_memory.get_redis_client", return_value=client),
+        patch("utils.conversation_store.get_conversation_store", return_value=RedisConversationStore()),
+    ):
+        with patch.dict(os.environ, {"CONVERSATION_STORAGE_LAYOUT": "blob"}):
+            thread_id = create_thread("chat", {})
+            add_turn(thread_id, "user", "Before migration")
+        with patch.dict(os.environ, {"CONVERSATION_STORAGE_LAYOUT": "append"}):
+            add_turn(thread_id, "assistant", "After migration")
+            context = get_thread(thread_id)
+
+    assert f"thread:{thread_id}:version" not in client.data
+    assert context.version == 2
+    assert [turn.content for turn in context.turns] == ["Before migration", "After migration"]
@@ -0,0 +1,128 @@
+"""Tests for embedding changed files as diffs and re-embedding only changed files."""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from tools.chat import ChatTool
+from utils.conversation_memory import add_turn, build_conversation_history, create_thread, get_thread
+from utils.conversation_store import InMemoryConversationStore
+from utils.model_context import ModelContext
+
+
+@pytest.fixture
+def memory_store():
+    backend = InMemoryConversationStore(ttl=3600, max_threads=100)
+    with patch("utils.conversation_store.get_conversation_store", return_value=backend):
+        yield backend
+
+
+@pytest.fixture
+def module(project_path):
+    path = project_path / "service.py"
+    path.write_text("".join(f"def handler_{i}():\n    return {i}\n\n" for i in range(100)))
+    return path
+
+
+def build_history(thread_id):
+    model_context = ModelContext("flash")
+    with patch.object(ModelContext, "calculate_token_allocation") as allocation:
+        allocation.return_value.file_tokens = 100_000
+        allocation.return_value.history_tokens = 200_000
+        history, _ = build_conversation_history(get_thread(thread_id), model_context)
+    return history
+
+
+class TestFileDeltas:
+    """Test that files changed between turns are embedded once plus diffs."""
+
+    def test_small_edit_embedded_as_diff(self, memory_store, module):
+        thread_id = create_thread("codereview", {})
+        add_turn(thread_id, "user", "Review", files=[str(module)])
+        module.write_text(module.read_text().replace("return 50\n", "return 50 * 2\n"))
+        add_turn(thread_id, "assistant", "Doubled handler_50", files=[str(module)])
+
+        history = build_history(thread_id)
+
+        assert history.count(f"--- BEGIN FILE: {module} ---") == 1
+        assert f"--- BEGIN CHANGES: {module} (turn 2) ---" in history
+        assert "-    return 50\n+    return 50 * 2" in history
+        # First version in full plus a few diff lines, not a second copy
+        assert len(history) < 1.2 * len(module.read_text()) + 3_000
+
+    def test_inserted_lines_do_not_renumber_the_diff(self, memory_store, module):
+        thread_id = create_thread("codereview", {})
+        add_turn(thread_id, "user", "Review", files=[str(module)])
+        module.write_text("import logging\n" + module.read_text())
+        add_turn(thread_id, "user", "Added an import", files=[str(module)])
+
+        history = build_history(thread_id)
+
+        changes = history.split(f"--- BEGIN CHANGES: {module} (turn 2) ---")[1].split("--- END CHANGES")[0]
+        assert "+import logging" in changes
+        assert len(changes.strip().splitlines()) < 10
+
+    def test_unchanged_file_embedded_once(self, memory_store, module):
+        thread_id = create_thread("codereview", {})
+        add_turn(thread_id, "user", "Review", files=[str(module)])
+        add_turn(thread_id, "assistant", "Looks fine", files=[str(module)])
+
+        history = build_history(thread_id)
+
+        assert history.count(f"--- BEGIN FILE: {module} ---") == 1
+        assert "BEGIN CHANGES" not in history
+
+    def test_rewrite_shows_newest_version(self, memory_store, module):
+        thread_id = create_thread("codereview", {})
+        add_turn(thread_id, "user", "Review", files=[str(module)])
+        module.write_text("".join(f"async def task_{i}():\n    await run({i})\n\n" for i in range(100)))
+        add_turn(thread_id, "assistant", "Rewrote it", files=[str(module)])
+
+        history = build_history(thread_id)
+
+        assert "BEGIN CHANGES" not in history
+        assert "await run(7)" in history
+        assert "def handler_7" not in history
+
+
+class TestFilterChangedFiles:
+    """Test that filter_new_files re-embeds files whose content changed."""
+
+    def test_unchanged_file_filtered(self, memory_store, module):
+        thread_id = create_thread("chat", {})
+        add_turn(thread_id, "user", "Review", files=[str(module)])
+
+        assert ChatTool().filter_new_files([str(module)], thread_id) == []
+
+    def test_changed_file_embedded_again(self, memory_store, module, project_path):
+        other = project_path / "other.py"
+        other.write_text("x = 1\n")
+        thread_id = create_thread("chat", {})
+        add_turn(thread_id, "user", "Review", files=[str(module), str(other)])
+        module.write_text(module.read_text() + "def handler_new():\n    return None\n")
+
+        assert ChatTool().filter_new_files([str(module), str(other)], thread_id) == [str(module)]
+
+    def test_changed_file_not_listed_as_already_available(self, memory_store, module, project_path):
+        other = project_path / "other.py"
+        other.write_text("x = 1\n")
+        thread_id = create_thread("chat", {})
+        add_turn(thread_id, "user", "Review", files=[str(module), str(other)])
+        module.write_text(module.read_text() + "def handler_new():\n    return None\n")
+
+        content, processed = ChatTool()._prepare_file_content_for_prompt([str(module), str(other)], thread_id)
+
+        assert processed == [str(module)]
+        assert "def handler_new" in content
+        note = content.split("--- NOTE: Additional files referenced in conversation history ---")[1]
+        assert str(other) in note
+        assert str(module) not in note
+
+    def test_files_without_snapshots_filtered_by_path(self, memory_store, module):
+        thread_id = create_thread("chat", {})
+        with patch.dict(os.environ, {"CONVERSATION_FILE_SNAPSHOTS": "false"}):
+            add_turn(thread_id, "user", "Review", files=[str(module)])
+        module.write_text("changed = True\n")
+
+        assert ChatTool().filter_new_files([str(module)], thread_id) == []
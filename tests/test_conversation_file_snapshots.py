@@ -0,0 +1,181 @@
+"""Tests for content-addressed file snapshots in conversation history."""
+
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+
+from tests.mock_helpers import FakeRedis
+from utils.conversation_memory import (
+    add_turn,
+    build_conversation_history,
+    conversation_request_scope,
+    create_thread,
+    get_thread,
+)
+from utils.conversation_store import InMemoryConversationStore, RedisConversationStore, SQLiteConversationStore
+from utils.file_utils import read_file_content, reset_file_cache
+from utils.model_context import ModelContext
+
+
+@pytest.fixture
+def source_file(project_path):
+    path = project_path / "module.py"
+    path.write_text("def answer():\n    return 42\n")
+    return path
+
+
+@pytest.fixture
+def memory_store():
+    backend = InMemoryConversationStore(ttl=3600, max_threads=100)
+    with patch("utils.conversation_store.get_conversation_store", return_value=backend):
+        yield backend
+
+
+def build_history(thread_id):
+    model_context = ModelContext("flash")
+    with patch.object(ModelContext, "calculate_token_allocation") as allocation:
+        allocation.return_value.file_tokens = 100_000
+        allocation.return_value.history_tokens = 200_000
+        history, _ = build_conversation_history(get_thread(thread_id), model_context)
+    return history
+
+
+class TestSnapshots:
+    """Test that history embeds files as they were when discussed."""
+
+    def test_history_shows_discussed_content(self, memory_store, source_file):
+        thread_id = create_thread("chat", {})
+        add_turn(thread_id, "user", "What does this return?", files=[str(source_file)])
+        source_file.write_text("def answer():\n    return 0\n")
+
+        history = build_history(thread_id)
+
+        assert "return 42" in history
+        assert "return 0" not in history
+
+    def test_rebuild_does_not_read_disk(self, memory_store, source_file):
+        thread_id = create_thread("chat", {})
+        add_turn(thread_id, "user", "Review", files=[str(source_file)])
+
+        with patch("utils.file_utils.read_file_content", side_effect=AssertionError("disk read")):
+            history = build_history(thread_id)
+
+        assert "return 42" in history
+
+    def test_newest_snapshot_wins(self, memory_store, source_file):
+        thread_id = create_thread("chat", {})
+        add_turn(thread_id, "user", "Review", files=[str(source_file)])
+        source_file.write_text("def answer():\n    return 7\n")
+        add_turn(thread_id, "assistant", "Changed it", files=[str(source_file)])
+
+        history = build_history(thread_id)
+
+        assert "return 7" in history
+        assert "return 42" not in history
+
+    def test_unreadable_files_are_read_at_rebuild(self, memory_store, project_path):
+        missing = project_path / "later.py"
+        thread_id = create_thread("chat", {})
+        add_turn(thread_id, "user", "Review", files=[str(missing)])
+        missing.write_text("created_later = True\n")
+
+        assert get_thread(thread_id).turns[0].file_hashes is None
+        assert "created_later = True" in build_history(thread_id)
+
+    def test_disabled(self, memory_store, source_file):
+        thread_id = create_thread("chat", {})
+        with patch.dict(os.environ, {"CONVERSATION_FILE_SNAPSHOTS": "false"}):
+            add_turn(thread_id, "user", "Review", files=[str(source_file)])
+
+        assert get_thread(thread_id).turns[0].file_hashes is None
+        assert memory_store._files == {}
+
+
+class TestSnapshotLifetime:
+    """Test sharing and reference counting of snapshots."""
+
+    def test_identical_files_stored_once(self, memory_store, source_file):
+        first = create_thread("chat", {})
+        second = create_thread("chat", {})
+        add_turn(first, "user", "Review", files=[str(source_file)])
+        add_turn(second, "user", "Review", files=[str(source_file)])
+
+        (digest,) = memory_store._files
+        assert memory_store._file_refs[digest] == {first, second}
+
+    def test_memory_snapshot_released_with_last_thread(self, source_file):
+        backend = InMemoryConversationStore(ttl=60, max_threads=10)
+        with patch("utils.conversation_store.get_conversation_store", return_value=backend):
+            first = create_thread("chat", {})
+            add_turn(first, "user", "Review", files=[str(source_file)])
+            with patch("utils.conversation_store.time.time", return_value=time.time() + 30):
+                second = create_thread("chat", {})
+                add_turn(second, "user", "Review", files=[str(source_file)])
+            with patch("utils.conversation_store.time.time", return_value=time.time() + 61):
+                assert get_thread(first) is None
+                assert len(backend._files) == 1
+            with patch("utils.conversation_store.time.time", return_value=time.time() + 91):
+                assert get_thread(second) is None
+                assert backend._files == {}
+
+    def test_sqlite_purges_unreferenced_snapshots(self, tmp_path, source_file):
+        backend = SQLiteConversationStore(str(tmp_path / "threads.db"), ttl=60)
+        with patch("utils.conversation_store.get_conversation_store", return_value=backend):
+            thread_id = create_thread("chat", {})
+            add_turn(thread_id, "user", "Review", files=[str(source_file)])
+            assert "return 42" in build_history(thread_id)
+
+            with patch("utils.conversation_store.time.time", return_value=time.time() + 61):
+                create_thread("chat", {})
+
+        assert backend._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0] == 0
+
+    @pytest.mark.parametrize("layout", ["blob", "append"])
+    def test_redis_snapshot_ttl_follows_thread(self, layout, source_file):
+        client = FakeRedis()
+        with (
+            patch("utils.conversation_memory.get_redis_client", return_value=client),
+            patch.dict(os.environ, {"CONVERSATION_STORAGE_LAYOUT": layout}),
+            patch("utils.conversation_store.get_conversation_store", return_value=RedisConversationStore()),
+        ):
+            thread_id = create_thread("chat", {})
+            add_turn(thread_id, "user", "Review", files=[str(source_file)])
+            (digest,) = get_thread(thread_id).turns[0].file_hashes.values()
+            client.ttl[f"file:{digest}"] = 1
+
+            add_turn(thread_id, "assistant", "No files this time")
+
+            assert client.ttl[f"file:{digest}"] > 1
+            assert "return 42" in build_history(thread_id)
+
+
+class TestSnapshotCost:
+    """Test that snapshots reuse content already read and stored."""
+
+    def test_file_read_for_prompt_not_read_again(self, memory_store, source_file):
+        reset_file_cache()
+        read_file_content(str(source_file))
+        thread_id = create_thread("chat", {})
+
+        with (
+            patch("utils.file_utils.open", side_effect=AssertionError("disk read"), create=True),
+            patch("utils.file_utils.hashlib.sha256", side_effect=AssertionError("hashed again")),
+        ):
+            add_turn(thread_id, "assistant", "Reviewed", files=[str(source_file)])
+
+        assert get_thread(thread_id).turns[0].file_hashes
+
+    def test_unchanged_files_not_stored_again(self, memory_store, source_file):
+        thread_id = create_thread("chat", {})
+        with conversation_request_scope():
+            get_thread(thread_id)  # As reconstruction does
+            add_turn(thread_id, "user", "Review", files=[str(source_file)])
+            with patch.object(memory_store, "put_files", wraps=memory_store.put_files) as put_files:
+                add_turn(thread_id, "assistant", "Reviewed", files=[str(source_file)])
+                source_file.write_text("def answer():\n    return 7\n")
+                add_turn(thread_id, "user", "Changed it", files=[str(source_file)])
+
+        assert put_files.call_count == 1
+        assert "return 7" in build_history(thread_id)
@@ -99,7 +99,7 @@ class TestConversationHistoryBugFix:
                     metadata={"finish_reason": "STOP"},
                 )
 
-            mock_provider.generate_content.side_effect = capture_prompt
+            mock_provider.agenerate_content.side_effect = capture_prompt
             mock_get_provider.return_value = mock_provider
 
             # Execute tool with continuation_id
@@ -159,7 +159,7 @@ class TestConversationHistoryBugFix:
                     metadata={"finish_reason": "STOP"},
                 )
 
-            mock_provider.generate_content.side_effect = capture_prompt
+            mock_provider.agenerate_content.side_effect = capture_prompt
             mock_get_provider.return_value = mock_provider
 
             # Execute tool with continuation_id for non-existent thread
@@ -197,7 +197,7 @@ class TestConversationHistoryBugFix:
                     metadata={"finish_reason": "STOP"},
                 )
 
-            mock_provider.generate_content.side_effect = capture_prompt
+            mock_provider.agenerate_content.side_effect = capture_prompt
             mock_get_provider.return_value = mock_provider
 
             # Execute tool without continuation_id (new conversation)
@@ -281,7 +281,7 @@ class TestConversationHistoryBugFix:
                     metadata={"finish_reason": "STOP"},
                 )
 
-            mock_provider.generate_content.side_effect = capture_prompt
+            mock_provider.agenerate_content.side_effect = capture_prompt
             mock_get_provider.return_value = mock_provider
 
             # Mock read_files to simulate file existence and capture its calls
@@ -0,0 +1,114 @@
+"""Tests for history building from per-turn rendered headers and token counts."""
+
+from unittest.mock import Mock, patch
+
+import pytest
+
+from utils.conversation_memory import (
+    ThreadContext,
+    add_turn,
+    build_conversation_history,
+    create_thread,
+    get_thread,
+)
+from utils.conversation_store import InMemoryConversationStore
+from utils.model_context import ModelContext, TokenAllocation
+
+
+@pytest.fixture
+def store():
+    backend = InMemoryConversationStore(ttl=3600, max_threads=100)
+    with patch("utils.conversation_store.get_conversation_store", return_value=backend):
+        yield backend
+
+
+def make_model_context(history_tokens=1_000_000):
+    model_context = Mock(model_name="test-model")
+    model_context.calculate_token_allocation.return_value = TokenAllocation(
+        total_tokens=2_000_000,
+        content_tokens=1_500_000,
+        response_tokens=500_000,
+        file_tokens=0,
+        history_tokens=history_tokens,
+    )
+    model_context.estimate_tokens.side_effect = ModelContext.estimate_tokens
+    return model_context
+
+
+def legacy_copy(context: ThreadContext) -> ThreadContext:
+    """The same thread as stored before turns carried their rendering."""
+    turns = [turn.model_copy(update={"rendered_header": None, "token_count": None}) for turn in context.turns]
+    return context.model_copy(update={"turns": turns})
+
+
+class TestStoredRendering:
+    """Test that turns carry their rendering from when they were written."""
+
+    def test_add_turn_records_header_and_tokens(self, store):
+        thread_id = create_thread("chat", {})
+        add_turn(thread_id, "user", "Question")
+        add_turn(
+            thread_id,
+            "assistant",
+            "A" * 300,
+            files=["/a.py"],
+            tool_name="chat",
+            model_provider="google",
+            model_name="flash",
+        )
+
+        user_turn, assistant_turn = get_thread(thread_id).turns
+
+        assert user_turn.rendered_header == "Claude"
+        assert assistant_turn.rendered_header == "Gemini using chat via google/flash"
+        assert assistant_turn.token_count == ModelContext.estimate_tokens(
+            "Files used in this turn: /a.py\n\n" + "A" * 300
+        )
+
+    def test_history_matches_legacy_turns(self, store):
+        thread_id = create_thread("chat", {})
+        add_turn(thread_id, "user", "Question", files=["/missing.py"])
+        add_turn(thread_id, "assistant", "Answer", tool_name="chat", model_provider="google", model_name="flash")
+        context = get_thread(thread_id)
+
+        history, tokens = build_conversation_history(context, make_model_context(), read_files_func=lambda files: "")
+        legacy_history, legacy_tokens = build_conversation_history(
+            legacy_copy(context), make_model_context(), read_files_func=lambda files: ""
+        )
+
+        assert history == legacy_history
+        assert tokens == legacy_tokens
+        assert "--- Turn 2 (Gemini using chat via google/flash) ---" in history
+
+
+class TestBudgetFill:
+    """Test the newest-first budget fill using stored token counts."""
+
+    def test_stored_counts_replace_measuring_turn_content(self, store):
+        thread_id = create_thread("chat", {})
+        for i in range(3):
+            add_turn(thread_id, "user", f"turn {i} " + "x" * 3000)
+        model_context = make_model_context()
+
+        build_conversation_history(get_thread(thread_id), model_context, read_files_func=lambda files: "")
+
+        measured = [call.args[0] for call in model_context.estimate_tokens.call_args_list]
+        assert all(len(text) < 3000 for text in measured)
+
+    def test_oldest_turns_dropped_by_stored_counts(self, store):
+        thread_id = create_thread("chat", {})
+        for i in range(3):
+            add_turn(thread_id, "user", f"turn {i}")
+        context = get_thread(thread_id)
+        # Pretend the oldest turn is huge; only the stored count says so
+        turns = [context.turns[0].model_copy(update={"token_count": 50_000}), *context.turns[1:]]
+
+        history, _ = build_conversation_history(
+            context.model_copy(update={"turns": turns}),
+            make_model_context(history_tokens=10_000),
+            read_files_func=lambda files: "",
+        )
+
+        assert "turn 0" not in history
+        assert "--- Turn 2 (Claude) ---\nturn 1" in history
+        assert "[Note: Showing 2 most recent turns out of 3 total]" in history
@@ -6,11 +6,12 @@ discussions in stateless MCP environments.
 """
 
 import os
-from unittest.mock import Mock, patch
+from unittest.mock import patch
 
 import pytest
 
 from server import get_follow_up_instructions
+from tests.mock_helpers import create_mock_redis_client
 from utils.conversation_memory import (
     CONVERSATION_TIMEOUT_SECONDS,
     MAX_CONVERSATION_TURNS,
@@ -29,7 +30,7 @@ class TestConversationMemory:
     @patch("utils.conversation_memory.get_redis_client")
     def test_create_thread(self, mock_redis):
         """Test creating a new thread"""
-        mock_client = Mock()
+        mock_client = create_mock_redis_client()
         mock_redis.return_value = mock_client
 
         thread_id = create_thread("chat", {"prompt": "Hello", "files": ["/test.py"]})
@@ -46,7 +47,7 @@ class TestConversationMemory:
     @patch("utils.conversation_memory.get_redis_client")
     def test_get_thread_valid(self, mock_redis):
         """Test retrieving an existing thread"""
-        mock_client = Mock()
+        mock_client = create_mock_redis_client()
         mock_redis.return_value = mock_client
 
         test_uuid = "12345678-1234-1234-1234-123456789012"
@@ -78,7 +79,7 @@ class TestConversationMemory:
     @patch("utils.conversation_memory.get_redis_client")
     def test_get_thread_not_found(self, mock_redis):
         """Test handling thread not found"""
-        mock_client = Mock()
+        mock_client = create_mock_redis_client()
         mock_redis.return_value = mock_client
         mock_client.get.return_value = None
 
@@ -88,7 +89,7 @@ class TestConversationMemory:
     @patch("utils.conversation_memory.get_redis_client")
     def test_add_turn_success(self, mock_redis):
         """Test adding a turn to existing thread"""
-        mock_client = Mock()
+        mock_client = create_mock_redis_client()
         mock_redis.return_value = mock_client
 
         test_uuid = "12345678-1234-1234-1234-123456789012"
@@ -114,7 +115,7 @@ class TestConversationMemory:
     @patch("utils.conversation_memory.get_redis_client")
     def test_add_turn_max_limit(self, mock_redis):
         """Test turn limit enforcement"""
-        mock_client = Mock()
+        mock_client = create_mock_redis_client()
         mock_redis.return_value = mock_client
 
         test_uuid = "12345678-1234-1234-1234-123456789012"
@@ -221,7 +222,7 @@ class TestConversationFlow:
     @patch("utils.conversation_memory.get_redis_client")
     def test_complete_conversation_cycle(self, mock_redis):
         """Test a complete 5-turn conversation until limit reached"""
-        mock_client = Mock()
+        mock_client = create_mock_redis_client()
         mock_redis.return_value = mock_client
 
         # Simulate independent MCP request cycles
@@ -327,7 +328,7 @@ class TestConversationFlow:
         """Test that invalid continuation IDs raise proper error for restart"""
         from server import reconstruct_thread_context
 
-        mock_client = Mock()
+        mock_client = create_mock_redis_client()
         mock_redis.return_value = mock_client
         mock_client.get.return_value = None  # Thread not found
 
@@ -423,7 +424,7 @@ class TestConversationFlow:
     @patch("utils.conversation_memory.get_redis_client")
     def test_complete_conversation_with_dynamic_turns(self, mock_redis):
         """Test complete conversation respecting MAX_CONVERSATION_TURNS dynamically"""
-        mock_client = Mock()
+        mock_client = create_mock_redis_client()
         mock_redis.return_value = mock_client
 
         thread_id = create_thread("chat", {"prompt": "Start conversation"})
@@ -484,7 +485,7 @@ class TestConversationFlow:
 
         ModelProviderRegistry.clear_cache()
 
-        mock_client = Mock()
+        mock_client = create_mock_redis_client()
         mock_redis.return_value = mock_client
 
         # Start conversation with files
@@ -632,7 +633,7 @@ class TestConversationFlow:
     @patch("utils.conversation_memory.get_redis_client")
     def test_stateless_request_isolation(self, mock_redis):
         """Test that each request cycle is independent but shares context via Redis"""
-        mock_client = Mock()
+        mock_client = create_mock_redis_client()
         mock_redis.return_value = mock_client
 
         # Simulate two different "processes" accessing same thread
@@ -0,0 +1,96 @@
+"""Tests for request-scoped conversation thread snapshots."""
+
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+from server import handle_call_tool
+from tests.mock_helpers import FakeRedis, create_mock_provider
+from tools.chat import ChatTool
+from utils.conversation_memory import (
+    add_turn,
+    conversation_request_scope,
+    create_thread,
+    get_request_scope,
+    get_thread,
+    get_thread_chain,
+)
+
+
+@pytest.fixture(params=["blob", "append"])
+def redis_client(request):
+    client = FakeRedis()
+    with (
+        patch("utils.conversation_memory.get_redis_client", return_value=client),
+        patch.dict(os.environ, {"CONVERSATION_STORAGE_LAYOUT": request.param}),
+    ):
+        yield client
+
+
+class TestRequestScope:
+    """Test snapshot reuse and write-through within one scope."""
+
+    def test_thread_is_read_once(self, redis_client):
+        thread_id = create_thread("chat", {"prompt": "Hi"})
+
+        with conversation_request_scope() as scope:
+            first = get_thread(thread_id)
+            assert get_thread(thread_id) is first
+            assert get_thread_chain(thread_id) == [first]
+
+        assert scope.round_trips == 1
+        assert get_request_scope() is None
+
+    def test_writes_are_visible_without_rereading(self, redis_client):
+        thread_id = create_thread("chat", {"prompt": "Hi"})
+
+        with conversation_request_scope() as scope:
+            get_thread(thread_id)
+            assert add_turn(thread_id, "user", "Question")
+            assert add_turn(thread_id, "assistant", "Answer")
+            assert [turn.content for turn in get_thread(thread_id).turns] == ["Question", "Answer"]
+
+        assert scope.version(thread_id) == 2
+        # One read plus one write per turn
+        assert scope.round_trips == 3
+        assert [turn.content for turn in get_thread(thread_id).turns] == ["Question", "Answer"]
+
+    def test_nested_scopes_share_snapshots(self, redis_client):
+        with conversation_request_scope() as outer:
+            with conversation_request_scope() as inner:
+                assert inner is outer
+
+    def test_no_caching_outside_scope(self, redis_client):
+        thread_id = create_thread("chat", {"prompt": "Hi"})
+        assert get_thread(thread_id) is not get_thread(thread_id)
+
+
+class TestToolCallRoundTrips:
+    """Test the number of storage round-trips for a continued tool call."""
+
+    async def test_continued_chat_call(self, redis_client):
+        thread_id = create_thread("chat", {"prompt": "Hi"})
+        add_turn(thread_id, "user", "Hi")
+        add_turn(thread_id, "assistant", "Hello! How can I help?", tool_name="chat")
+        redis_client.calls.clear()
+
+        provider = create_mock_provider()
+        provider.agenerate_content.return_value.content = "Here is more detail."
+        with (
+            patch.object(ChatTool, "get_model_provider", return_value=provider),
+            patch.dict(os.environ, {"PYTEST_CURRENT_TEST": ""}),  # Enable the continuation offer
+            conversation_request_scope() as scope,
+        ):
+            result = await handle_call_tool("chat", {"prompt": "Tell me more", "continuation_id": thread_id})
+
+        output = json.loads(result[0].text)
+        assert output["status"] == "continuation_available"
+        # Load the thread once, write the user turn, then create the child thread
+        # offered for continuation and write the assistant turn to it
+        assert scope.round_trips == 4
+        assert len(get_thread(thread_id).turns) == 3
+        child = get_thread(output["continuation_offer"]["continuation_id"])
+        assert child.parent_thread_id == thread_id
+        assert child.turns[0].content.startswith("Here is more detail.")
@@ -0,0 +1,190 @@
+"""Tests for the append-only conversation storage layout."""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from tests.mock_helpers import FakeRedis
+from utils.conversation_memory import (
+    ConversationTurn,
+    ThreadContext,
+    add_turn,
+    conversation_request_scope,
+    create_thread,
+    get_thread,
+    get_thread_chain,
+    set_thread_summary,
+)
+
+
+@pytest.fixture
+def redis_client():
+    client = FakeRedis()
+    with (
+        patch("utils.conversation_memory.get_redis_client", return_value=client),
+        patch.dict(os.environ, {"CONVERSATION_STORAGE_LAYOUT": "append"}),
+    ):
+        yield client
+
+
+class TestAppendLayout:
+    """Test thread storage as a metadata hash plus a turn list."""
+
+    def test_round_trip(self, redis_client):
+        parent_id = create_thread("analyze", {"prompt": "parent"})
+        thread_id = create_thread("chat", {"prompt": "Hello", "files": ["/a.py"]}, parent_thread_id=parent_id)
+        assert add_turn(thread_id, "user", "Question", files=["/a.py"])
+        assert add_turn(thread_id, "assistant", "Answer", tool_name="chat", model_metadata={"usage": 1})
+
+        context = get_thread(thread_id)
+
+        assert f"thread:{thread_id}" not in redis_client.data
+        assert context.parent_thread_id == parent_id
+        assert context.tool_name == "chat"
+        assert context.initial_context == {"prompt": "Hello", "files": ["/a.py"]}
+        assert [turn.content for turn in context.turns] == ["Question", "Answer"]
+        assert context.turns[1].model_metadata == {"usage": 1}
+        assert context.last_updated_at == context.turns[1].timestamp
+        assert get_thread(parent_id).parent_thread_id is None
+
+    def test_append_does_not_rewrite_thread(self, redis_client):
+        thread_id = create_thread("chat", {"prompt": "Hello"})
+        for i in range(5):
+            add_turn(thread_id, "user", f"Turn {i}" * 1000)
+        redis_client.calls.clear()
+
+        assert add_turn(thread_id, "assistant", "Short")
+
+        # One read pipeline and one MULTI block; no GET or SETEX of the whole thread
+        assert redis_client.calls == ["execute", "execute"]
+        assert redis_client.ttl[f"thread:{thread_id}:turns"] == redis_client.ttl[f"thread:{thread_id}:meta"]
+
+    def test_turn_limit(self, redis_client):
+        thread_id = create_thread("chat", {"prompt": "Hello"})
+        with patch("utils.conversation_memory.MAX_CONVERSATION_TURNS", 2):
+            assert add_turn(thread_id, "user", "one")
+            assert add_turn(thread_id, "assistant", "two")
+            assert not add_turn(thread_id, "user", "three")
+
+        assert len(get_thread(thread_id).turns) == 2
+
+    def test_missing_thread(self, redis_client):
+        assert not add_turn("12345678-1234-1234-1234-123456789012", "user", "Hello")
+        assert get_thread("12345678-1234-1234-1234-123456789012") is None
+
+
+class TestBlobMigration:
+    """Test that existing blob-format threads keep working."""
+
+    def make_blob(self, redis_client) -> str:
+        thread_id = "12345678-1234-1234-1234-123456789012"
+        context = ThreadContext(
+            thread_id=thread_id,
+            created_at="2023-01-01T00:00:00Z",
+            last_updated_at="2023-01-01T00:00:00Z",
+            tool_name="analyze",
+            turns=[ConversationTurn(role="user", content="Old turn", timestamp="2023-01-01T00:00:00Z")],
+            initial_context={"prompt": "Old"},
+        )
+        redis_client.data[f"thread:{thread_id}"] = context.model_dump_json()
+        return thread_id
+
+    def test_blob_thread_is_readable(self, redis_client):
+        thread_id = self.make_blob(redis_client)
+
+        context = get_thread(thread_id)
+
+        assert context.turns[0].content == "Old turn"
+
+    def test_append_migrates_blob_thread(self, redis_client):
+        thread_id = self.make_blob(redis_client)
+
+        assert add_turn(thread_id, "assistant", "New turn")
+
+        assert f"thread:{thread_id}" not in redis_client.data
+        assert redis_client.data[f"thread:{thread_id}:meta"]["tool_name"] == "analyze"
+        context = get_thread(thread_id)
+        assert [turn.content for turn in context.turns] == ["Old turn", "New turn"]
+        assert context.initial_context == {"prompt": "Old"}
+
+    def test_append_migrates_blob_thread_from_request_snapshot(self, redis_client):
+        thread_id = self.make_blob(redis_client)
+
+        with conversation_request_scope():
+            get_thread(thread_id)
+            assert add_turn(thread_id, "assistant", "New turn")
+
+        context = get_thread(thread_id)
+        assert [turn.content for turn in context.turns] == ["Old turn", "New turn"]
+        assert context.initial_context == {"prompt": "Old"}
+        assert f"thread:{thread_id}" not in redis_client.data
+
+    def test_summary_migrates_blob_thread_from_request_snapshot(self, redis_client):
+        thread_id = self.make_blob(redis_client)
+        summary = ConversationTurn(role="assistant", content="- old", timestamp="t", summarized_turns=1)
+
+        with conversation_request_scope():
+            get_thread(thread_id)
+            assert set_thread_summary(thread_id, summary)
+
+        context = get_thread(thread_id)
+        assert context.summary.content == "- old"
+        assert [turn.content for turn in context.turns] == ["Old turn"]
+        assert context.tool_name == "analyze"
+
+
+class TestThreadChain:
+    """Test loading a parent chain in one batched read."""
+
+    @pytest.fixture(params=["blob", "append"])
+    def layout_client(self, request):
+        client = FakeRedis()
+        with (
+            patch("utils.conversation_memory.get_redis_client", return_value=client),
+            patch.dict(os.environ, {"CONVERSATION_STORAGE_LAYOUT": request.param}),
+        ):
+            yield client
+
+    def test_chain_loads_in_two_round_trips(self, layout_client):
+        thread_ids = [create_thread("chat", {"prompt": "root"})]
+        for i in range(4):
+            thread_ids.append(create_thread("chat", {"prompt": f"hop {i}"}, parent_thread_id=thread_ids[-1]))
+        layout_client.calls.clear()
+
+        chain = get_thread_chain(thread_ids[-1])
+
+        assert len(layout_client.calls) == 2
+        assert [context.thread_id for context in chain] == thread_ids
+        assert chain[-1].ancestor_ids == list(reversed(thread_ids[:-1]))
+
+    def test_max_depth(self, layout_client):
+        thread_ids = [create_thread("chat", {"prompt": "root"})]
+        for i in range(4):
+            thread_ids.append(create_thread("chat", {"prompt": f"hop {i}"}, parent_thread_id=thread_ids[-1]))
+
+        chain = get_thread_chain(thread_ids[-1], max_depth=3)
+
+        assert [context.thread_id for context in chain] == thread_ids[-3:]
+
+    def test_legacy_threads_are_walked(self):
+        client = FakeRedis()
+        parent_id = "12345678-1234-1234-1234-123456789012"
+        child_id = "87654321-4321-4321-4321-210987654321"
+        for thread_id, parent in ((parent_id, None), (child_id, parent_id)):
+            context = ThreadContext(
+                thread_id=thread_id,
+                parent_thread_id=parent,
+                created_at="2023-01-01T00:00:00Z",
+                last_updated_at="2023-01-01T00:00:00Z",
+                tool_name="chat",
+                turns=[],
+                initial_context={},
+            )
+            client.data[f"thread:{thread_id}"] = context.model_dump_json(exclude={"ancestor_ids"})
+
+        with patch("utils.conversation_memory.get_redis_client", return_value=client):
+            chain = get_thread_chain(child_id)
+
+        assert [context.thread_id for context in chain] == [parent_id, child_id]
+        assert client.calls == ["get", "get"]
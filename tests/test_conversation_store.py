@@ -0,0 +1,157 @@
+"""Tests for the pluggable conversation storage backends."""
+
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+
+from tests.mock_helpers import FakeRedis
+from utils import conversation_store
+from utils.conversation_memory import ConversationTurn, add_turn, create_thread, get_thread, get_thread_chain
+from utils.conversation_store import (
+    InMemoryConversationStore,
+    RedisConversationStore,
+    SQLiteConversationStore,
+    get_conversation_store,
+)
+
+
+@pytest.fixture(params=["redis-blob", "redis-append", "memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param.startswith("redis"):
+        layout = request.param.split("-")[1]
+        with (
+            patch("utils.conversation_memory.get_redis_client", return_value=FakeRedis()),
+            patch.dict(os.environ, {"CONVERSATION_STORAGE_LAYOUT": layout}),
+            patch("utils.conversation_store.get_conversation_store", return_value=RedisConversationStore()),
+        ):
+            yield
+    else:
+        backend = (
+            InMemoryConversationStore(ttl=3600, max_threads=100)
+            if request.param == "memory"
+            else SQLiteConversationStore(str(tmp_path / "threads.db"), ttl=3600)
+        )
+        with patch("utils.conversation_store.get_conversation_store", return_value=backend):
+            yield backend
+
+
+class TestBackendContract:
+    """Every backend must behave the same through the conversation memory API."""
+
+    def test_round_trip(self, store):
+        parent_id = create_thread("analyze", {"prompt": "parent"})
+        thread_id = create_thread("chat", {"prompt": "Hello", "files": ["/a.py"]}, parent_thread_id=parent_id)
+        assert add_turn(thread_id, "user", "Question", files=["/a.py"])
+        assert add_turn(thread_id, "assistant", "Answer", tool_name="chat", model_metadata={"usage": 1})
+
+        context = get_thread(thread_id)
+
+        assert context.parent_thread_id == parent_id
+        assert context.initial_context == {"prompt": "Hello", "files": ["/a.py"]}
+        assert [turn.content for turn in context.turns] == ["Question", "Answer"]
+        assert context.turns[1].model_metadata == {"usage": 1}
+        assert context.last_updated_at == context.turns[1].timestamp
+        assert [thread.thread_id for thread in get_thread_chain(thread_id)] == [parent_id, thread_id]
+
+    def test_turn_limit(self, store):
+        thread_id = create_thread("chat", {"prompt": "Hello"})
+        with patch("utils.conversation_memory.MAX_CONVERSATION_TURNS", 2):
+            assert add_turn(thread_id, "user", "one")
+            assert add_turn(thread_id, "assistant", "two")
+            assert not add_turn(thread_id, "user", "three")
+
+        assert len(get_thread(thread_id).turns) == 2
+
+    def test_missing_thread(self, store):
+        assert not add_turn("12345678-1234-1234-1234-123456789012", "user", "Hello")
+        assert get_thread("12345678-1234-1234-1234-123456789012") is None
+        assert get_thread("not-a-uuid") is None
+
+
+class TestInMemoryStore:
+    """Test LRU eviction and TTL expiry of the in-process store."""
+
+    def test_least_recently_used_thread_is_evicted(self):
+        backend = InMemoryConversationStore(ttl=3600, max_threads=2)
+        with patch("utils.conversation_store.get_conversation_store", return_value=backend):
+            first = create_thread("chat", {})
+            second = create_thread("chat", {})
+            get_thread(first)
+            third = create_thread("chat", {})
+
+            assert get_thread(second) is None
+            assert get_thread(first) is not None
+            assert get_thread(third) is not None
+
+    def test_expired_thread_is_gone(self):
+        backend = InMemoryConversationStore(ttl=60, max_threads=10)
+        with patch("utils.conversation_store.get_conversation_store", return_value=backend):
+            thread_id = create_thread("chat", {})
+            with patch("utils.conversation_store.time.time", return_value=time.time() + 61):
+                assert get_thread(thread_id) is None
+                assert not add_turn(thread_id, "user", "Hello")
+
+
+class TestSQLiteStore:
+    """Test durability and expiry of the SQLite store."""
+
+    def test_threads_survive_reopening(self, tmp_path):
+        path = str(tmp_path / "threads.db")
+        with patch("utils.conversation_store.get_conversation_store", return_value=SQLiteConversationStore(path, 3600)):
+            thread_id = create_thread("chat", {"prompt": "Hello"})
+            add_turn(thread_id, "user", "Persisted")
+
+        reopened = SQLiteConversationStore(path, 3600)
+        assert reopened.get(thread_id).turns[0].content == "Persisted"
+        assert reopened._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def test_expired_threads_are_purged(self, tmp_path):
+        backend = SQLiteConversationStore(str(tmp_path / "threads.db"), ttl=60)
+        with patch("utils.conversation_store.get_conversation_store", return_value=backend):
+            old_id = create_thread("chat", {})
+            add_turn(old_id, "user", "Old")
+            with patch("utils.conversation_store.time.time", return_value=time.time() + 61):
+                assert get_thread(old_id) is None
+                create_thread("chat", {})
+
+        assert backend._conn.execute("SELECT COUNT(*) FROM turns").fetchone()[0] == 0
+
+    def test_summary_refreshes_expiry(self, tmp_path):
+        backend = SQLiteConversationStore(str(tmp_path / "threads.db"), ttl=60)
+        with patch("utils.conversation_store.get_conversation_store", return_value=backend):
+            thread_id = create_thread("chat", {})
+            with patch("utils.conversation_store.time.time", return_value=time.time() + 50):
+                summary = ConversationTurn(role="assistant", content="- earlier", timestamp="t", summarized_turns=2)
+                assert backend.set_summary(thread_id, summary)
+            with patch("utils.conversation_store.time.time", return_value=time.time() + 100):
+                assert get_thread(thread_id).summary.content == "- earlier"
+
+
+class TestBackendSelection:
+    """Test choosing the backend from CONVERSATION_STORE."""
+
+    @pytest.fixture(autouse=True)
+    def fresh_stores(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(conversation_store, "_stores", {})
+        monkeypatch.setenv("CONVERSATION_STORE_PATH", str(tmp_path / "threads.db"))
+
+    @pytest.mark.parametrize(
+        "backend, expected",
+        [
+            ("redis", RedisConversationStore),
+            ("memory", InMemoryConversationStore),
+            ("SQLite", SQLiteConversationStore),
+            ("bogus", RedisConversationStore),
+        ],
+    )
+    def test_backend_from_env(self, monkeypatch, backend, expected):
+        monkeypatch.setenv("CONVERSATION_STORE", backend)
+        store = get_conversation_store()
+        assert isinstance(store, expected)
+        assert get_conversation_store() is store
+
+    def test_default_is_redis(self, monkeypatch):
+        monkeypatch.delenv("CONVERSATION_STORE", raising=False)
+        assert isinstance(get_conversation_store(), RedisConversationStore)
@@ -0,0 +1,160 @@
+"""Tests for the active-thread index and the threads utility tool."""
+
+import json
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+
+from server import handle_call_tool
+from tests.mock_helpers import FakeRedis
+from utils.conversation_memory import ConversationTurn, add_turn, create_thread
+from utils.conversation_store import InMemoryConversationStore, RedisConversationStore, SQLiteConversationStore
+
+
+@pytest.fixture(params=["redis-blob", "redis-append", "memory", "sqlite"])
+def store(request, tmp_path):
+    client = FakeRedis()
+    if request.param.startswith("redis"):
+        backend = RedisConversationStore()
+    elif request.param == "memory":
+        backend = InMemoryConversationStore(ttl=3600, max_threads=100)
+    else:
+        backend = SQLiteConversationStore(str(tmp_path / "threads.db"), ttl=3600)
+    layout = "append" if request.param == "redis-append" else "blob"
+
+    with (
+        patch("utils.conversation_memory.get_redis_client", return_value=client),
+        patch.dict(os.environ, {"CONVERSATION_STORAGE_LAYOUT": layout}),
+        patch("utils.conversation_store.get_conversation_store", return_value=backend),
+    ):
+        yield backend
+
+
+def thread_with_turns(turns: int, size: int) -> str:
+    thread_id = create_thread("chat", {})
+    for i in range(turns):
+        # Random text, so compressed sizes keep the same order
+        add_turn(thread_id, "user" if i % 2 == 0 else "assistant", os.urandom(size // 2).hex())
+    return thread_id
+
+
+class TestThreadStats:
+    """Test thread counts, sizes and the heaviest-thread ranking."""
+
+    def test_counts_and_ranking(self, store):
+        small = thread_with_turns(1, 10)
+        large = thread_with_turns(3, 400)
+        medium = thread_with_turns(2, 200)
+
+        stats = store.thread_stats(limit=2)
+
+        assert stats["threads"] == 3
+        assert [thread["thread_id"] for thread in stats["heaviest"]] == [large, medium]
+        assert [thread["turns"] for thread in stats["heaviest"]] == [3, 2]
+        assert stats["bytes"] >= sum(thread["bytes"] for thread in stats["heaviest"]) > 1000
+        assert small not in [thread["thread_id"] for thread in stats["heaviest"]]
+
+    def test_empty(self, store):
+        assert store.thread_stats(limit=5) == {"threads": 0, "bytes": 0, "heaviest": []}
+
+    def test_expired_threads_are_left_out(self, store):
+        thread_with_turns(1, 10)
+        later = time.time() + 7200 if isinstance(store, RedisConversationStore) else time.time() + 3601
+        with (
+            patch("utils.conversation_store.time.time", return_value=later),
+            patch("utils.conversation_memory.CONVERSATION_TIMEOUT_SECONDS", 3600),
+        ):
+            assert store.thread_stats(limit=5)["threads"] == 0
+
+
+class TestRedisIndex:
+    """Test the Redis sorted-set index."""
+
+    @pytest.mark.parametrize("layout", ["blob", "append"])
+    def test_sweep_removes_expired_entries(self, layout):
+        client = FakeRedis()
+        with (
+            patch("utils.conversation_memory.get_redis_client", return_value=client),
+            patch.dict(os.environ, {"CONVERSATION_STORAGE_LAYOUT": layout}),
+            patch("utils.conversation_store.get_conversation_store", return_value=RedisConversationStore()),
+        ):
+            old = create_thread("chat", {})
+            client.data[RedisConversationStore.INDEX_KEY][old] -= 2 * 24 * 3600
+            fresh = thread_with_turns(1, 10)
+
+            stats = RedisConversationStore().thread_stats(limit=5)
+
+        assert [thread["thread_id"] for thread in stats["heaviest"]] == [fresh]
+        for key in (
+            RedisConversationStore.INDEX_KEY,
+            RedisConversationStore.BYTES_KEY,
+            RedisConversationStore.TURNS_KEY,
+        ):
+            assert old not in client.data[key]
+
+    def test_index_written_with_thread(self):
+        client = FakeRedis()
+        with (
+            patch("utils.conversation_memory.get_redis_client", return_value=client),
+            patch("utils.conversation_store.get_conversation_store", return_value=RedisConversationStore()),
+        ):
+            thread_id = create_thread("chat", {})
+            assert client.calls == ["execute"]
+            add_turn(thread_id, "user", "Hello")
+
+        assert client.data[RedisConversationStore.TURNS_KEY][thread_id] == "1"
+        assert client.data[RedisConversationStore.BYTES_KEY][thread_id] == len(client.data[f"thread:{thread_id}"])
+
+    def test_trimmed_append_leaves_index_unchanged(self):
+        client = FakeRedis()
+        store = RedisConversationStore()
+        with (
+            patch("utils.conversation_memory.get_redis_client", return_value=client),
+            patch.dict(os.environ, {"CONVERSATION_STORAGE_LAYOUT": "append"}),
+        ):
+            thread_id = create_thread("chat", {})
+            store.append_turn(thread_id, ConversationTurn(role="user", content="one", timestamp="t"), 2)
+            stale = store.get(thread_id)
+            store.append_turn(thread_id, ConversationTurn(role="assistant", content="two", timestamp="t"), 2)
+            index_bytes = client.data[RedisConversationStore.BYTES_KEY][thread_id]
+
+            # A writer holding the one-turn snapshot races for the last slot and loses
+            late = ConversationTurn(role="user", content="three", timestamp="t")
+            assert not store.append_turn(thread_id, late, 2, stale)
+            assert [turn.content for turn in store.get(thread_id).turns] == ["one", "two"]
+
+        assert int(client.data[RedisConversationStore.TURNS_KEY][thread_id]) == 2
+        assert client.data[RedisConversationStore.BYTES_KEY][thread_id] == index_bytes
+
+
+class TestThreadsTool:
+    """Test the threads utility tool."""
+
+    async def test_reports_largest_threads(self):
+        backend = InMemoryConversationStore(ttl=3600, max_threads=100)
+        with patch("utils.conversation_store.get_conversation_store", return_value=backend):
+            thread_with_turns(1, 10)
+            large = thread_with_turns(2, 500)
+
+            result = await handle_call_tool("threads", {"limit": 1})
+
+        output = json.loads(result[0].text)
+        assert output["status"] == "success"
+        assert "Active threads: 2" in output["content"]
+        assert f"1. {large}:" in output["content"]
+        assert output["metadata"]["store"] == "memory"
+        assert len(output["metadata"]["heaviest"]) == 1
+
+    async def test_store_failure(self):
+        backend = InMemoryConversationStore(ttl=3600, max_threads=100)
+        with (
+            patch("utils.conversation_store.get_conversation_store", return_value=backend),
+            patch.object(backend, "thread_stats", side_effect=ConnectionError("down")),
+        ):
+            result = await handle_call_tool("threads", {})
+
+        output = json.loads(result[0].text)
+        assert output["status"] == "error"
+        assert "down" in output["content"]
@@ -8,11 +8,11 @@ continuations.
 """
 
 from pathlib import Path
-from unittest.mock import Mock, patch
+from unittest.mock import patch
 
 import pytest
 
-from tests.mock_helpers import create_mock_provider
+from tests.mock_helpers import create_mock_provider, create_mock_redis_client
 from tools.chat import ChatTool
 from tools.models import ToolOutput
 from utils.conversation_memory import add_turn, create_thread
@@ -25,6 +25,20 @@ class TestDirectoryExpansionTracking:
     def tool(self):
         return ChatTool()
 
+    @staticmethod
+    async def execute_capturing_request(tool, arguments):
+        """Execute the tool and return its result along with the validated request"""
+        requests = []
+        prepare_prompt = tool.prepare_prompt
+
+        async def capture(request):
+            requests.append(request)
+            return await prepare_prompt(request)
+
+        with patch.object(tool, "prepare_prompt", side_effect=capture):
+            result = await tool.execute(arguments)
+        return result, requests[0]
+
     @pytest.fixture
     def temp_directory_with_files(self, project_path):
         """Create a temporary directory with multiple files"""
@@ -94,7 +108,7 @@ def helper_function():
         }
 
         # Execute the tool
-        result = await tool.execute(request_args)
+        result, request = await self.execute_capturing_request(tool, request_args)
 
         # Verify the tool executed successfully
         assert result is not None
@@ -103,7 +117,7 @@ def helper_function():
         assert tool_output.status in ["success", "continuation_available"]
 
         # Verify that the actually processed files were the expanded individual files
-        captured_files = getattr(tool, "_actually_processed_files", [])
+        captured_files = request._processed_files
         assert captured_files is not None
         assert len(captured_files) == len(expected_files)
 
@@ -128,7 +142,7 @@ def helper_function():
     ):
         """Test that conversation continuation works correctly with directory expansion"""
         # Setup mock Redis client with in-memory storage
-        mock_client = Mock()
+        mock_client = create_mock_redis_client()
         redis_storage = {}  # Simulate Redis storage
 
         def mock_get(key):
@@ -200,7 +214,7 @@ def helper_function():
     def test_get_conversation_embedded_files_with_expanded_files(self, mock_redis, tool, temp_directory_with_files):
         """Test that get_conversation_embedded_files returns expanded files"""
         # Setup mock Redis client with in-memory storage
-        mock_client = Mock()
+        mock_client = create_mock_redis_client()
         redis_storage = {}  # Simulate Redis storage
 
         def mock_get(key):
@@ -241,7 +255,7 @@ def helper_function():
     def test_file_filtering_with_mixed_files_and_directories(self, mock_redis, tool, temp_directory_with_files):
         """Test file filtering when request contains both individual files and directories"""
         # Setup mock Redis client with in-memory storage
-        mock_client = Mock()
+        mock_client = create_mock_redis_client()
         redis_storage = {}  # Simulate Redis storage
 
         def mock_get(key):
@@ -286,7 +300,7 @@ def helper_function():
     @pytest.mark.asyncio
     @patch("providers.ModelProviderRegistry.get_provider_for_model")
     async def test_actually_processed_files_stored_correctly(self, mock_get_provider, tool, temp_directory_with_files):
-        """Test that _actually_processed_files is stored correctly after file processing"""
+        """Test that the processed files are stored on the request after file processing"""
         # Setup mock provider
         mock_provider = create_mock_provider()
         mock_get_provider.return_value = mock_provider
@@ -301,14 +315,14 @@ def helper_function():
             "model": "flash",
         }
 
-        result = await tool.execute(request_args)
+        result, request = await self.execute_capturing_request(tool, request_args)
 
         # Verify the tool executed successfully
         assert result is not None
 
-        # Verify that _actually_processed_files was set correctly
-        assert hasattr(tool, "_actually_processed_files")
-        actually_processed = tool._actually_processed_files
+        # Verify that the processed files were recorded on the request, not the shared tool
+        actually_processed = request._processed_files
+        assert not hasattr(tool, "_actually_processed_files")
 
         # Should contain individual files, not the directory
         # Normalize paths to handle /private prefix differences
@@ -0,0 +1,33 @@
+"""Tests for the shared environment number helper."""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from utils.env import get_env_number
+
+
+class TestGetEnvNumber:
+    """Test parsing of numeric tuning variables."""
+
+    def test_unset_uses_default(self):
+        with patch.dict(os.environ, {}, clear=True):
+            assert get_env_number("ZEN_TEST_NUMBER", 5) == 5
+
+    def test_parses_value(self):
+        with patch.dict(os.environ, {"ZEN_TEST_NUMBER": "2.5"}):
+            assert get_env_number("ZEN_TEST_NUMBER", 5) == 2.5
+
+    @pytest.mark.parametrize("value", ["abc", "-1", "0"])
+    def test_invalid_uses_default(self, value):
+        with patch.dict(os.environ, {"ZEN_TEST_NUMBER": value}):
+            assert get_env_number("ZEN_TEST_NUMBER", 5) == 5
+
+    def test_zero_allowed_when_requested(self):
+        with patch.dict(os.environ, {"ZEN_TEST_NUMBER": "0"}):
+            assert get_env_number("ZEN_TEST_NUMBER", 5, allow_zero=True) == 0
+
+    def test_invalid_without_default(self):
+        with patch.dict(os.environ, {"ZEN_TEST_NUMBER": "-3"}):
+            assert get_env_number("ZEN_TEST_NUMBER", None) is None
@@ -0,0 +1,110 @@
+"""Tests for the cache of formatted file content in read_file_content."""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from utils import file_utils
+from utils.file_utils import get_file_cache_stats, read_file_content, reset_file_cache
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    reset_file_cache()
+    yield
+    reset_file_cache()
+
+
+@pytest.fixture
+def source(project_path):
+    path = project_path / "module.py"
+    path.write_text("def handler():\n    return 1\n")
+    return path
+
+
+def count_reads():
+    """Patch open() in file_utils and return the mock counting calls."""
+    return patch("utils.file_utils.open", side_effect=open, create=True)
+
+
+class TestFileContentCache:
+    """Test that unchanged files are served from the cache."""
+
+    def test_repeat_read_served_from_cache(self, source):
+        first = read_file_content(str(source))
+        with count_reads() as opened:
+            second = read_file_content(str(source))
+
+        assert second == first
+        assert opened.call_count == 0
+        stats = get_file_cache_stats()
+        assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+    def test_modified_file_read_again(self, source):
+        read_file_content(str(source))
+        source.write_text("def handler():\n    return 2\n")
+
+        content, _ = read_file_content(str(source))
+
+        assert "return 2" in content
+        assert get_file_cache_stats()["misses"] == 2
+
+    def test_touched_file_read_again(self, source):
+        read_file_content(str(source))
+        stat = source.stat()
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        with count_reads() as opened:
+            read_file_content(str(source))
+
+        assert opened.call_count == 1
+
+    def test_line_number_setting_cached_separately(self, source):
+        numbered, _ = read_file_content(str(source), include_line_numbers=True)
+        plain, _ = read_file_content(str(source), include_line_numbers=False)
+
+        assert "1│ def handler" in numbered
+        assert "1│" not in plain
+        assert get_file_cache_stats()["entries"] == 2
+
+    def test_errors_not_cached(self, project_path):
+        missing = project_path / "missing.py"
+        read_file_content(str(missing))
+        missing.write_text("x = 1\n")
+
+        content, _ = read_file_content(str(missing))
+
+        assert "x = 1" in content
+
+    def test_least_recently_used_evicted(self, project_path):
+        paths = []
+        for i in range(3):
+            path = project_path / f"part{i}.py"
+            path.write_text(f"# part {i}\n" + "x" * 400 + "\n")
+            paths.append(path)
+        size = len(read_file_content(str(paths[0]))[0].encode("utf-8"))
+        file_utils.get_file_cache().max_bytes = 2 * size + 10
+
+        read_file_content(str(paths[1]))
+        read_file_content(str(paths[0]))
+        read_file_content(str(paths[2]))
+
+        stats = get_file_cache_stats()
+        assert stats["entries"] == 2
+        assert stats["evictions"] == 1
+        assert stats["bytes"] <= 2 * size + 10
+        with count_reads() as opened:
+            read_file_content(str(paths[0]))
+            read_file_content(str(paths[1]))
+        assert opened.call_count == 1
+
+    def test_disabled(self, source):
+        with patch.dict(os.environ, {"FILE_CONTENT_CACHE_MAX_MB": "0"}):
+            reset_file_cache()
+            read_file_content(str(source))
+            with count_reads() as opened:
+                read_file_content(str(source))
+
+        assert opened.call_count == 1
+        assert get_file_cache_stats() == {"enabled": False}
@@ -0,0 +1,189 @@
+"""Tests for Gemini explicit context caching of conversation file sets."""
+
+import itertools
+import os
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from providers.gemini import GeminiModelProvider
+from providers.gemini_context_cache import (
+    CACHED_FILES_PLACEHOLDER,
+    GeminiContextCacheManager,
+    split_files_block,
+)
+from utils.conversation_memory import FILES_SECTION_END, FILES_SECTION_START
+
+MODEL = "gemini-2.5-flash-preview-05-20"
+
+
+def make_prompt(files="def main():\n    pass\n", question="What does main do?"):
+    return f"History\n{FILES_SECTION_START}\n{files}\n{FILES_SECTION_END}\nTurn 1\n\n{question}"
+
+
+def make_manager(**env):
+    defaults = {"GEMINI_CONTEXT_CACHE_MIN_TOKENS": "1", "GEMINI_CONTEXT_CACHE_TTL": "600"}
+    with patch.dict(os.environ, {**defaults, **env}, clear=True):
+        return GeminiContextCacheManager()
+
+
+def make_client():
+    client = MagicMock()
+    ids = itertools.count()
+    client.aio.caches.create = AsyncMock(side_effect=lambda **kw: SimpleNamespace(name=f"cachedContents/{next(ids)}"))
+    client.aio.caches.update = AsyncMock()
+    client.aio.caches.delete = AsyncMock()
+    response = MagicMock(text="It does nothing.", candidates=[])
+    response.usage_metadata = SimpleNamespace(
+        prompt_token_count=1000, candidates_token_count=10, cached_content_token_count=900
+    )
+    client.aio.models.generate_content = AsyncMock(return_value=response)
+    return client
+
+
+class TestPlanning:
+    """Test which requests are eligible for caching."""
+
+    def test_split_replaces_block_with_placeholder(self):
+        files_block, remainder = split_files_block(make_prompt())
+        assert files_block.startswith(FILES_SECTION_START) and files_block.endswith(FILES_SECTION_END)
+        assert "def main" not in remainder
+        assert CACHED_FILES_PLACEHOLDER in remainder
+        assert remainder.endswith("What does main do?")
+        assert split_files_block("No files here") is None
+
+    def test_requires_thread_and_minimum_size(self):
+        manager = make_manager(GEMINI_CONTEXT_CACHE_MIN_TOKENS="1000")
+        assert manager.plan(MODEL, make_prompt(), "system", "thread-1") is None
+
+        manager = make_manager()
+        assert manager.plan(MODEL, make_prompt(), "system", None) is None
+        assert manager.plan(MODEL, make_prompt(), "system", "thread-1") is not None
+
+    def test_disabled(self):
+        manager = make_manager(GEMINI_CONTEXT_CACHE_ENABLED="false")
+        assert manager.plan(MODEL, make_prompt(), "system", "thread-1") is None
+
+
+class TestHandleLifecycle:
+    """Test creation, reuse, extension and replacement of thread caches."""
+
+    async def test_reuses_handle_while_files_unchanged(self):
+        manager = make_manager()
+        client = make_client()
+
+        first = await manager.aensure(client, manager.plan(MODEL, make_prompt(question="One?"), "system", "t"))
+        second = await manager.aensure(client, manager.plan(MODEL, make_prompt(question="Two?"), "system", "t"))
+
+        assert first is second
+        assert client.aio.caches.create.await_count == 1
+        config = client.aio.caches.create.call_args.kwargs["config"]
+        assert config.system_instruction == "system"
+        assert config.ttl == "600s"
+        assert manager.get_stats()["reused"] == 1
+
+    async def test_file_change_replaces_cache(self):
+        manager = make_manager()
+        client = make_client()
+
+        first = await manager.aensure(client, manager.plan(MODEL, make_prompt(), "system", "t"))
+        second = await manager.aensure(client, manager.plan(MODEL, make_prompt(files="changed"), "system", "t"))
+
+        assert first.name != second.name
+        client.aio.caches.delete.assert_awaited_once_with(name=first.name)
+        assert manager.get_stats()["replaced"] == 1
+
+    async def test_near_expiry_extends_and_expired_recreates(self):
+        manager = make_manager()
+        client = make_client()
+        plan = manager.plan(MODEL, make_prompt(), "system", "t")
+
+        handle = await manager.aensure(client, plan)
+        handle.expires_at = time.time() + 5
+        await manager.aensure(client, plan)
+        client.aio.caches.update.assert_awaited_once()
+        assert handle.expires_at > time.time() + 500
+
+        handle.expires_at = time.time() - 1
+        replacement = await manager.aensure(client, plan)
+        assert replacement is not handle
+        assert client.aio.caches.create.await_count == 2
+
+    async def test_least_recently_used_threads_evicted(self):
+        manager = make_manager(GEMINI_CONTEXT_CACHE_MAX_THREADS="2")
+        client = make_client()
+        plans = {scope: manager.plan(MODEL, make_prompt(), "system", scope) for scope in ("a", "b", "c")}
+
+        await manager.aensure(client, plans["a"])
+        await manager.aensure(client, plans["b"])
+        await manager.aensure(client, plans["a"])
+        await manager.aensure(client, plans["c"])
+
+        assert list(manager._handles) == ["a", "c"]
+        assert manager.get_stats()["threads"] == 2
+
+    async def test_expired_handles_dropped(self):
+        manager = make_manager()
+        client = make_client()
+
+        old = await manager.aensure(client, manager.plan(MODEL, make_prompt(), "system", "old"))
+        old.expires_at = time.time() - 1
+        await manager.aensure(client, manager.plan(MODEL, make_prompt(), "system", "new"))
+
+        assert list(manager._handles) == ["new"]
+
+    async def test_create_failure_returns_none(self):
+        manager = make_manager()
+        client = make_client()
+        client.aio.caches.create = AsyncMock(side_effect=RuntimeError("too small"))
+
+        assert await manager.aensure(client, manager.plan(MODEL, make_prompt(), "system", "t")) is None
+        assert manager.get_stats()["failed"] == 1
+
+    def test_sync_client(self):
+        manager = make_manager()
+        client = MagicMock()
+        client.caches.create.return_value = SimpleNamespace(name="cachedContents/sync")
+
+        handle = manager.ensure(client, manager.plan(MODEL, make_prompt(), "system", "t"))
+        assert handle.name == "cachedContents/sync"
+
+
+class TestProviderIntegration:
+    """Test that the provider sends only the delta against the cached prefix."""
+
+    @pytest.fixture
+    def provider(self):
+        provider = GeminiModelProvider(api_key="test-key")
+        provider._client = make_client()
+        return provider
+
+    async def test_continuation_uses_cached_content(self, provider):
+        manager = make_manager()
+        with patch("providers.gemini.get_context_cache_manager", return_value=manager):
+            response = await provider.agenerate_content(
+                prompt=make_prompt(), model_name="flash", system_prompt="system", conversation_id="t"
+            )
+
+        call = provider._client.aio.models.generate_content.call_args.kwargs
+        assert call["config"].cached_content.startswith("cachedContents/")
+        assert "def main" not in call["contents"]
+        assert "system" not in call["contents"]
+        assert response.metadata["context_cache"] == call["config"].cached_content
+        assert response.usage["cached_tokens"] == 900
+
+    async def test_new_conversation_sends_full_prompt(self, provider):
+        manager = make_manager()
+        with patch("providers.gemini.get_context_cache_manager", return_value=manager):
+            response = await provider.agenerate_content(
+                prompt=make_prompt(), model_name="flash", system_prompt="system"
+            )
+
+        call = provider._client.aio.models.generate_content.call_args.kwargs
+        assert call["config"].cached_content is None
+        assert call["contents"].startswith("system\n\n")
+        assert "def main" in call["contents"]
+        assert "context_cache" not in response.metadata
+        provider._client.aio.caches.create.assert_not_called()
@@ -10,7 +10,7 @@ import json
 import os
 import shutil
 import tempfile
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from mcp.types import TextContent
@@ -71,9 +71,10 @@ class TestLargePromptHandling:
         # Mock the model to avoid actual API calls
         with patch.object(tool, "get_model_provider") as mock_get_provider:
             mock_provider = MagicMock()
+            mock_provider.agenerate_content = AsyncMock()
             mock_provider.get_provider_type.return_value = MagicMock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = MagicMock(
+            mock_provider.agenerate_content.return_value = MagicMock(
                 content="This is a test response",
                 usage={"input_tokens": 10, "output_tokens": 20, "total_tokens": 30},
                 model_name="gemini-2.5-flash-preview-05-20",
@@ -98,9 +99,10 @@ class TestLargePromptHandling:
         # Mock the model
         with patch.object(tool, "get_model_provider") as mock_get_provider:
             mock_provider = MagicMock()
+            mock_provider.agenerate_content = AsyncMock()
             mock_provider.get_provider_type.return_value = MagicMock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = MagicMock(
+            mock_provider.agenerate_content.return_value = MagicMock(
                 content="Processed prompt from file",
                 usage={"input_tokens": 10, "output_tokens": 20, "total_tokens": 30},
                 model_name="gemini-2.5-flash-preview-05-20",
@@ -126,8 +128,8 @@ class TestLargePromptHandling:
                 mock_read_file.assert_called_once_with(temp_prompt_file)
 
                 # Verify the reasonable content was used
-                # generate_content is called with keyword arguments
-                call_kwargs = mock_provider.generate_content.call_args[1]
+                # agenerate_content is called with keyword arguments
+                call_kwargs = mock_provider.agenerate_content.call_args[1]
                 prompt_arg = call_kwargs.get("prompt")
                 assert prompt_arg is not None
                 assert reasonable_prompt in prompt_arg
@@ -212,9 +214,10 @@ class TestLargePromptHandling:
 
         with patch.object(tool, "get_model_provider") as mock_get_provider:
             mock_provider = MagicMock()
+            mock_provider.agenerate_content = AsyncMock()
             mock_provider.get_provider_type.return_value = MagicMock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = MagicMock(
+            mock_provider.agenerate_content.return_value = MagicMock(
                 content="Success",
                 usage={"input_tokens": 10, "output_tokens": 20, "total_tokens": 30},
                 model_name="gemini-2.5-flash-preview-05-20",
@@ -246,9 +249,10 @@ class TestLargePromptHandling:
         # Mock the model provider to avoid real API calls
         with patch.object(tool, "get_model_provider") as mock_get_provider:
             mock_provider = MagicMock()
+            mock_provider.agenerate_content = AsyncMock()
             mock_provider.get_provider_type.return_value = MagicMock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = MagicMock(
+            mock_provider.agenerate_content.return_value = MagicMock(
                 content="Response to the large prompt",
                 usage={"input_tokens": 12000, "output_tokens": 10, "total_tokens": 12010},
                 model_name="gemini-2.5-flash-preview-05-20",
@@ -278,9 +282,10 @@ class TestLargePromptHandling:
 
         with patch.object(tool, "get_model_provider") as mock_get_provider:
             mock_provider = MagicMock()
+            mock_provider.agenerate_content = AsyncMock()
             mock_provider.get_provider_type.return_value = MagicMock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = MagicMock(
+            mock_provider.agenerate_content.return_value = MagicMock(
                 content="Success",
                 usage={"input_tokens": 10, "output_tokens": 20, "total_tokens": 30},
                 model_name="gemini-2.5-flash-preview-05-20",
@@ -300,9 +305,10 @@ class TestLargePromptHandling:
 
         with patch.object(tool, "get_model_provider") as mock_get_provider:
             mock_provider = MagicMock()
+            mock_provider.agenerate_content = AsyncMock()
             mock_provider.get_provider_type.return_value = MagicMock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = MagicMock(
+            mock_provider.agenerate_content.return_value = MagicMock(
                 content="Success",
                 usage={"input_tokens": 10, "output_tokens": 20, "total_tokens": 30},
                 model_name="gemini-2.5-flash-preview-05-20",
@@ -334,9 +340,10 @@ class TestLargePromptHandling:
 
         with patch.object(tool, "get_model_provider") as mock_get_provider:
             mock_provider = MagicMock()
+            mock_provider.agenerate_content = AsyncMock()
             mock_provider.get_provider_type.return_value = MagicMock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = MagicMock(
+            mock_provider.agenerate_content.return_value = MagicMock(
                 content="Weather is sunny",
                 usage={"input_tokens": 10, "output_tokens": 20, "total_tokens": 30},
                 model_name="gemini-2.5-flash-preview-05-20",
@@ -369,8 +376,8 @@ class TestLargePromptHandling:
             assert "Weather is sunny" in output["content"]
 
             # Verify the model was actually called with the huge prompt
-            mock_provider.generate_content.assert_called_once()
-            call_kwargs = mock_provider.generate_content.call_args[1]
+            mock_provider.agenerate_content.assert_called_once()
+            call_kwargs = mock_provider.agenerate_content.call_args[1]
             actual_prompt = call_kwargs.get("prompt")
 
             # Verify internal prompt was huge (proving we don't limit internal processing)
@@ -399,9 +406,10 @@ class TestLargePromptHandling:
 
         with patch.object(tool, "get_model_provider") as mock_get_provider:
             mock_provider = MagicMock()
+            mock_provider.agenerate_content = AsyncMock()
             mock_provider.get_provider_type.return_value = MagicMock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = MagicMock(
+            mock_provider.agenerate_content.return_value = MagicMock(
                 content="Hi there!",
                 usage={"input_tokens": 10, "output_tokens": 20, "total_tokens": 30},
                 model_name="gemini-2.5-flash-preview-05-20",
@@ -425,7 +433,7 @@ class TestLargePromptHandling:
             assert output["status"] == "success"
 
             # Verify the final prompt sent to model was huge (proving internal processing isn't limited)
-            call_kwargs = mock_get_provider.return_value.generate_content.call_args[1]
+            call_kwargs = mock_get_provider.return_value.agenerate_content.call_args[1]
             final_prompt = call_kwargs.get("prompt")
             assert len(final_prompt) > MCP_PROMPT_SIZE_LIMIT  # Internal prompt can be huge
             assert small_user_input in final_prompt  # But contains small user input
@@ -452,9 +460,10 @@ class TestLargePromptHandling:
 
         with patch.object(tool, "get_model_provider") as mock_get_provider:
             mock_provider = MagicMock()
+            mock_provider.agenerate_content = AsyncMock()
             mock_provider.get_provider_type.return_value = MagicMock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = MagicMock(
+            mock_provider.agenerate_content.return_value = MagicMock(
                 content="Continuing our conversation...",
                 usage={"input_tokens": 10, "output_tokens": 20, "total_tokens": 30},
                 model_name="gemini-2.5-flash-preview-05-20",
@@ -504,8 +513,8 @@ class TestLargePromptHandling:
                 assert "Continuing our conversation" in output["content"]
 
                 # Verify the model was called with the complete prompt (including huge history)
-                mock_provider.generate_content.assert_called_once()
-                call_kwargs = mock_provider.generate_content.call_args[1]
+                mock_provider.agenerate_content.assert_called_once()
+                call_kwargs = mock_provider.agenerate_content.call_args[1]
                 final_prompt = call_kwargs.get("prompt")
 
                 # The final prompt should contain both history and user input
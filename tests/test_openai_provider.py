@@ -1,7 +1,9 @@
 """Tests for OpenAI provider implementation."""
 
 import os
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
 
 from providers.base import ProviderType
 from providers.openai import OpenAIModelProvider
@@ -156,6 +158,38 @@ class TestOpenAIProvider:
         assert result.content == "Test response"
         assert result.model_name == "o4-mini"  # Should be the resolved name
 
+    @pytest.mark.asyncio
+    @patch("providers.openai_compatible.AsyncOpenAI")
+    async def test_agenerate_content_uses_async_client(self, mock_async_openai_class):
+        """Test that agenerate_content awaits AsyncOpenAI and resolves aliases."""
+        mock_client = MagicMock()
+        mock_async_openai_class.return_value = mock_client
+
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock()]
+        mock_response.choices[0].message.content = "Async response"
+        mock_response.choices[0].finish_reason = "stop"
+        mock_response.model = "o4-mini"
+        mock_response.id = "test-id"
+        mock_response.created = 1234567890
+        mock_response.usage = MagicMock()
+        mock_response.usage.prompt_tokens = 10
+        mock_response.usage.completion_tokens = 5
+        mock_response.usage.total_tokens = 15
+
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+
+        provider = OpenAIModelProvider("test-key")
+
+        result = await provider.agenerate_content(prompt="Test prompt", model_name="mini", temperature=1.0)
+
+        mock_client.chat.completions.create.assert_awaited_once()
+        call_kwargs = mock_client.chat.completions.create.call_args[1]
+        assert call_kwargs["model"] == "o4-mini"
+        assert result.content == "Async response"
+        assert result.model_name == "o4-mini"
+        assert result.usage["total_tokens"] == 15
+
     @patch("providers.openai_compatible.OpenAI")
     def test_generate_content_other_aliases(self, mock_openai_class):
         """Test other alias resolutions in generate_content."""
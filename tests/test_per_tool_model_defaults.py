@@ -3,7 +3,7 @@ Test per-tool model default selection functionality
 """
 
 import json
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
@@ -284,15 +284,17 @@ class TestFileContentPreparation:
         with patch.object(ModelProviderRegistry, "get_provider") as mock_get_provider:
             # Mock provider with capabilities
             mock_provider = MagicMock()
+            mock_provider.agenerate_content = AsyncMock()
             mock_provider.get_capabilities.return_value = MagicMock(context_window=1_000_000)
             mock_get_provider.side_effect = lambda ptype: mock_provider if ptype == ProviderType.GOOGLE else None
 
             # Create a tool and test file content preparation
             tool = ThinkDeepTool()
-            tool._current_model_name = "auto"
 
             # Call the method
-            content, processed_files = tool._prepare_file_content_for_prompt(["/test/file.py"], None, "test")
+            content, processed_files = tool._prepare_file_content_for_prompt(
+                ["/test/file.py"], None, "test", arguments={"model": "auto"}
+            )
 
             # Check that it logged the correct message
             debug_calls = [call for call in mock_logger.debug.call_args_list if "Auto mode detected" in str(call)]
@@ -482,7 +484,8 @@ class TestUnavailableModelFallback:
                 with patch.object(ModelProviderRegistry, "get_provider_for_model") as mock_get_provider:
                     # Model is available
                     mock_provider = MagicMock()
-                    mock_provider.generate_content.return_value = MagicMock(content="Test response", metadata={})
+                    mock_provider.agenerate_content = AsyncMock()
+                    mock_provider.agenerate_content.return_value = MagicMock(content="Test response", metadata={})
                     mock_get_provider.return_value = mock_provider
 
                     # Mock the provider lookup in BaseTool.get_model_provider
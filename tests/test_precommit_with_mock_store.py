@@ -5,46 +5,17 @@ Enhanced tests for precommit tool using mock storage to test real logic
 import os
 import tempfile
 from pathlib import Path
-from typing import Optional
 from unittest.mock import patch
 
 import pytest
 
+from tests.mock_helpers import FakeRedis
 from tools.precommit import Precommit, PrecommitRequest
 
 
-class MockRedisClient:
+class MockRedisClient(FakeRedis):
     """Mock Redis client that uses in-memory dictionary storage"""
 
-    def __init__(self):
-        self.data: dict[str, str] = {}
-        self.ttl_data: dict[str, int] = {}
-
-    def get(self, key: str) -> Optional[str]:
-        return self.data.get(key)
-
-    def set(self, key: str, value: str, ex: Optional[int] = None) -> bool:
-        self.data[key] = value
-        if ex:
-            self.ttl_data[key] = ex
-        return True
-
-    def delete(self, key: str) -> int:
-        if key in self.data:
-            del self.data[key]
-            self.ttl_data.pop(key, None)
-            return 1
-        return 0
-
-    def exists(self, key: str) -> int:
-        return 1 if key in self.data else 0
-
-    def setex(self, key: str, time: int, value: str) -> bool:
-        """Set key to hold string value and set key to timeout after given seconds"""
-        self.data[key] = value
-        self.ttl_data[key] = time
-        return True
-
 
 class TestPrecommitToolWithMockStore:
     """Test precommit tool with mock storage to validate actual logic"""
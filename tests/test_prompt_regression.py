@@ -6,7 +6,7 @@ normal-sized prompts after implementing the large prompt handling feature.
 """
 
 import json
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
@@ -44,9 +44,10 @@ class TestPromptRegression:
 
         with patch.object(tool, "get_model_provider") as mock_get_provider:
             mock_provider = MagicMock()
+            mock_provider.agenerate_content = AsyncMock()
             mock_provider.get_provider_type.return_value = MagicMock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = mock_model_response(
+            mock_provider.agenerate_content.return_value = mock_model_response(
                 "This is a helpful response about Python."
             )
             mock_get_provider.return_value = mock_provider
@@ -59,7 +60,7 @@ class TestPromptRegression:
             assert "helpful response about Python" in output["content"]
 
             # Verify provider was called
-            mock_provider.generate_content.assert_called_once()
+            mock_provider.agenerate_content.assert_called_once()
 
     @pytest.mark.asyncio
     async def test_chat_with_files(self, mock_model_response):
@@ -68,21 +69,25 @@ class TestPromptRegression:
 
         with patch.object(tool, "get_model_provider") as mock_get_provider:
             mock_provider = MagicMock()
+            mock_provider.agenerate_content = AsyncMock()
             mock_provider.get_provider_type.return_value = MagicMock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = mock_model_response()
+            mock_provider.agenerate_content.return_value = mock_model_response()
             mock_get_provider.return_value = mock_provider
 
             # Mock file reading through the centralized method
             with patch.object(tool, "_prepare_file_content_for_prompt") as mock_prepare_files:
                 mock_prepare_files.return_value = ("File content here", ["/path/to/file.py"])
 
-                result = await tool.execute({"prompt": "Analyze this code", "files": ["/path/to/file.py"]})
+                arguments = {"prompt": "Analyze this code", "files": ["/path/to/file.py"]}
+                result = await tool.execute(arguments)
 
                 assert len(result) == 1
                 output = json.loads(result[0].text)
                 assert output["status"] == "success"
-                mock_prepare_files.assert_called_once_with(["/path/to/file.py"], None, "Context files")
+                mock_prepare_files.assert_called_once_with(
+                    ["/path/to/file.py"], None, "Context files", arguments=arguments
+                )
 
     @pytest.mark.asyncio
     async def test_thinkdeep_normal_analysis(self, mock_model_response):
@@ -91,9 +96,10 @@ class TestPromptRegression:
 
         with patch.object(tool, "get_model_provider") as mock_get_provider:
             mock_provider = MagicMock()
+            mock_provider.agenerate_content = AsyncMock()
             mock_provider.get_provider_type.return_value = MagicMock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = mock_model_response(
+            mock_provider.agenerate_content.return_value = mock_model_response(
                 "Here's a deeper analysis with edge cases..."
             )
             mock_get_provider.return_value = mock_provider
@@ -119,9 +125,10 @@ class TestPromptRegression:
 
         with patch.object(tool, "get_model_provider") as mock_get_provider:
             mock_provider = MagicMock()
+            mock_provider.agenerate_content = AsyncMock()
             mock_provider.get_provider_type.return_value = MagicMock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = mock_model_response(
+            mock_provider.agenerate_content.return_value = mock_model_response(
                 "Found 3 issues: 1) Missing error handling..."
             )
             mock_get_provider.return_value = mock_provider
@@ -151,9 +158,10 @@ class TestPromptRegression:
 
         with patch.object(tool, "get_model_provider") as mock_get_provider:
             mock_provider = MagicMock()
+            mock_provider.agenerate_content = AsyncMock()
             mock_provider.get_provider_type.return_value = MagicMock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = mock_model_response(
+            mock_provider.agenerate_content.return_value = mock_model_response(
                 "Changes look good, implementing feature as requested..."
             )
             mock_get_provider.return_value = mock_provider
@@ -189,9 +197,10 @@ class TestPromptRegression:
 
         with patch.object(tool, "get_model_provider") as mock_get_provider:
             mock_provider = MagicMock()
+            mock_provider.agenerate_content = AsyncMock()
             mock_provider.get_provider_type.return_value = MagicMock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = mock_model_response(
+            mock_provider.agenerate_content.return_value = mock_model_response(
                 "Root cause: The variable is undefined. Fix: Initialize it..."
             )
             mock_get_provider.return_value = mock_provider
@@ -217,9 +226,10 @@ class TestPromptRegression:
 
         with patch.object(tool, "get_model_provider") as mock_get_provider:
             mock_provider = MagicMock()
+            mock_provider.agenerate_content = AsyncMock()
             mock_provider.get_provider_type.return_value = MagicMock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = mock_model_response(
+            mock_provider.agenerate_content.return_value = mock_model_response(
                 "The code follows MVC pattern with clear separation..."
             )
             mock_get_provider.return_value = mock_provider
@@ -248,9 +258,10 @@ class TestPromptRegression:
 
         with patch.object(tool, "get_model_provider") as mock_get_provider:
             mock_provider = MagicMock()
+            mock_provider.agenerate_content = AsyncMock()
             mock_provider.get_provider_type.return_value = MagicMock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = mock_model_response()
+            mock_provider.agenerate_content.return_value = mock_model_response()
             mock_get_provider.return_value = mock_provider
 
             # Test with no files parameter
@@ -267,9 +278,10 @@ class TestPromptRegression:
 
         with patch.object(tool, "get_model_provider") as mock_get_provider:
             mock_provider = MagicMock()
+            mock_provider.agenerate_content = AsyncMock()
             mock_provider.get_provider_type.return_value = MagicMock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = mock_model_response()
+            mock_provider.agenerate_content.return_value = mock_model_response()
             mock_get_provider.return_value = mock_provider
 
             result = await tool.execute({"prompt": "Test", "thinking_mode": "high", "temperature": 0.8})
@@ -278,9 +290,9 @@ class TestPromptRegression:
             output = json.loads(result[0].text)
             assert output["status"] == "success"
 
-            # Verify generate_content was called with correct parameters
-            mock_provider.generate_content.assert_called_once()
-            call_kwargs = mock_provider.generate_content.call_args[1]
+            # Verify agenerate_content was called with correct parameters
+            mock_provider.agenerate_content.assert_called_once()
+            call_kwargs = mock_provider.agenerate_content.call_args[1]
             assert call_kwargs.get("temperature") == 0.8
             # thinking_mode would be passed if the provider supports it
             # In this test, we set supports_thinking_mode to False, so it won't be passed
@@ -292,9 +304,10 @@ class TestPromptRegression:
 
         with patch.object(tool, "get_model_provider") as mock_get_provider:
             mock_provider = MagicMock()
+            mock_provider.agenerate_content = AsyncMock()
             mock_provider.get_provider_type.return_value = MagicMock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = mock_model_response()
+            mock_provider.agenerate_content.return_value = mock_model_response()
             mock_get_provider.return_value = mock_provider
 
             special_prompt = 'Test with "quotes" and\nnewlines\tand tabs'
@@ -311,9 +324,10 @@ class TestPromptRegression:
 
         with patch.object(tool, "get_model_provider") as mock_get_provider:
             mock_provider = MagicMock()
+            mock_provider.agenerate_content = AsyncMock()
             mock_provider.get_provider_type.return_value = MagicMock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = mock_model_response()
+            mock_provider.agenerate_content.return_value = mock_model_response()
             mock_get_provider.return_value = mock_provider
 
             with patch("tools.base.read_files") as mock_read_files:
@@ -342,9 +356,10 @@ class TestPromptRegression:
 
         with patch.object(tool, "get_model_provider") as mock_get_provider:
             mock_provider = MagicMock()
+            mock_provider.agenerate_content = AsyncMock()
             mock_provider.get_provider_type.return_value = MagicMock(value="google")
             mock_provider.supports_thinking_mode.return_value = False
-            mock_provider.generate_content.return_value = mock_model_response()
+            mock_provider.agenerate_content.return_value = mock_model_response()
             mock_get_provider.return_value = mock_provider
 
             unicode_prompt = "Explain this: 你好世界 مرحبا بالعالم"
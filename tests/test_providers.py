@@ -1,7 +1,7 @@
 """Tests for the model provider abstraction system"""
 
 import os
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 
@@ -160,6 +160,33 @@ class TestGeminiProvider:
         assert response.usage["output_tokens"] == 20
         assert response.usage["total_tokens"] == 30
 
+    @pytest.mark.asyncio
+    @patch("google.genai.Client")
+    async def test_agenerate_content(self, mock_client_class):
+        """Test async content generation uses the genai aio client"""
+        mock_client = Mock()
+        mock_response = Mock()
+        mock_response.text = "Async content"
+        mock_candidate = Mock()
+        mock_candidate.finish_reason = "STOP"
+        mock_response.candidates = [mock_candidate]
+        mock_usage = Mock()
+        mock_usage.prompt_token_count = 10
+        mock_usage.candidates_token_count = 20
+        mock_response.usage_metadata = mock_usage
+        mock_client.aio.models.generate_content = AsyncMock(return_value=mock_response)
+        mock_client_class.return_value = mock_client
+
+        provider = GeminiModelProvider(api_key="test-key")
+
+        response = await provider.agenerate_content(prompt="Test prompt", model_name="flash", temperature=0.7)
+
+        mock_client.aio.models.generate_content.assert_awaited_once()
+        mock_client.models.generate_content.assert_not_called()
+        assert response.content == "Async content"
+        assert response.model_name == "gemini-2.5-flash-preview-05-20"
+        assert response.usage["total_tokens"] == 30
+
 
 class TestOpenAIProvider:
     """Test OpenAI model provider"""
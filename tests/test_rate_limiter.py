@@ -0,0 +1,101 @@
+"""Tests for the client-side rate limiter."""
+
+import asyncio
+import os
+from unittest.mock import patch
+
+from providers.base import ProviderType
+from utils.rate_limiter import RateLimit, RateLimiter, TokenBucket, parse_model_rate_limits
+
+
+def make_limiter(env):
+    with patch.dict(os.environ, env, clear=True):
+        return RateLimiter()
+
+
+class TestRateLimitConfiguration:
+    """Test env parsing and limit resolution."""
+
+    def test_parse_model_rate_limits(self):
+        limits = parse_model_rate_limits("o3=20/200000, O4-Mini=/1000000,grok-3=30,bad,o3-mini=x/1")
+        assert limits == {
+            "o3": RateLimit(rpm=20, tpm=200000),
+            "o4-mini": RateLimit(rpm=None, tpm=1000000),
+            "grok-3": RateLimit(rpm=30, tpm=None),
+        }
+
+    def test_provider_defaults_and_overrides(self):
+        limiter = make_limiter(
+            {
+                "OPENAI_RATE_LIMIT_RPM": "60",
+                "OPENAI_MODEL_RATE_LIMITS": "o3=10/50000",
+                "GOOGLE_RATE_LIMIT_TPM": "not-a-number",
+            }
+        )
+
+        assert limiter.get_limit(ProviderType.OPENAI, "o3") == RateLimit(rpm=10, tpm=50000)
+        assert limiter.get_limit(ProviderType.OPENAI, "o4-mini") == RateLimit(rpm=60, tpm=None)
+        assert limiter.get_limit(ProviderType.GOOGLE, "gemini-2.5-pro-preview-06-05").is_unlimited
+
+    async def test_unconfigured_limiter_does_not_wait(self):
+        limiter = make_limiter({})
+        reservation = await limiter.acquire(ProviderType.OPENAI, "o3", 1000)
+        assert reservation.waited == 0
+        assert limiter.get_stats() == {}
+
+
+class TestTokenBucket:
+    """Test token bucket arithmetic."""
+
+    def test_wait_time_and_oversized_requests(self):
+        bucket = TokenBucket(600)  # 10 per second
+        bucket.consume(600)
+
+        assert 0.9 < bucket.time_until_available(10) <= 1.0
+        # A request larger than the bucket waits for a full bucket, not forever
+        assert bucket.time_until_available(10_000) <= 60.0
+
+    def test_adjust_allows_debt(self):
+        bucket = TokenBucket(100)
+        bucket.adjust(150)
+        assert bucket.tokens < 0
+
+
+class TestRateLimiter:
+    """Test acquisition, fairness and usage correction."""
+
+    async def test_waits_when_bucket_empty(self):
+        limiter = make_limiter({"OPENAI_RATE_LIMIT_RPM": "600"})
+        await limiter.acquire(ProviderType.OPENAI, "o3")
+        limiter._limiters[(ProviderType.OPENAI, "o3")].requests.tokens = 0
+
+        reservation = await limiter.acquire(ProviderType.OPENAI, "o3")
+        assert reservation.waited >= 0.05
+
+    async def test_waiters_are_served_in_order(self):
+        limiter = make_limiter({"XAI_RATE_LIMIT_RPM": "1200"})  # one request every 50ms
+        await limiter.acquire(ProviderType.XAI, "grok-3")
+        limiter._limiters[(ProviderType.XAI, "grok-3")].requests.tokens = 0
+
+        order = []
+
+        async def request(index):
+            await limiter.acquire(ProviderType.XAI, "grok-3")
+            order.append(index)
+
+        await asyncio.gather(*(request(i) for i in range(4)))
+        assert order == [0, 1, 2, 3]
+
+    async def test_usage_corrects_token_estimate(self):
+        limiter = make_limiter({"GOOGLE_RATE_LIMIT_TPM": "100000"})
+        reservation = await limiter.acquire(ProviderType.GOOGLE, "gemini-2.5-flash-preview-05-20", 1000)
+        bucket = limiter._limiters[(ProviderType.GOOGLE, "gemini-2.5-flash-preview-05-20")].tokens
+        before = bucket.tokens
+
+        limiter.record_usage(reservation, 6000)
+
+        # Charged for the 5000 tokens beyond the estimate (allowing for refill in between)
+        assert before - bucket.tokens > 4990
+        stats = limiter.get_stats()["google/gemini-2.5-flash-preview-05-20"]
+        assert stats["tpm"] == 100000
+        assert stats["waiting"] == 0
@@ -0,0 +1,67 @@
+"""Tests for the shared Redis clients used by conversation memory."""
+
+import asyncio
+import os
+from unittest.mock import patch
+
+import pytest
+
+from utils import conversation_memory
+from utils.conversation_memory import get_async_redis_client, get_redis_client
+
+
+@pytest.fixture(autouse=True)
+def fresh_clients(monkeypatch):
+    monkeypatch.setattr(conversation_memory, "_redis_client", None)
+    monkeypatch.setattr(conversation_memory, "_async_redis_client", None)
+    monkeypatch.setattr(conversation_memory, "_async_redis_loop", None)
+
+
+class TestSyncClient:
+    """Test the process-wide sync client."""
+
+    def test_client_is_shared(self):
+        with patch.dict(os.environ, {"REDIS_URL": "redis://localhost:6379/0"}):
+            assert get_redis_client() is get_redis_client()
+
+    def test_pool_configuration(self):
+        env = {
+            "REDIS_URL": "redis://localhost:6379/0",
+            "REDIS_MAX_CONNECTIONS": "8",
+            "REDIS_SOCKET_TIMEOUT": "2.5",
+            "REDIS_HEALTH_CHECK_INTERVAL": "bogus",
+        }
+        with patch.dict(os.environ, env):
+            client = get_redis_client()
+
+        pool = client.connection_pool
+        assert pool.max_connections == 8
+        assert pool.connection_kwargs["socket_timeout"] == 2.5
+        assert pool.connection_kwargs["socket_connect_timeout"] == 5.0
+        assert pool.connection_kwargs["health_check_interval"] == 30
+        assert pool.connection_kwargs["decode_responses"] is True
+
+    def test_url_change_rebuilds_client(self):
+        with patch.dict(os.environ, {"REDIS_URL": "redis://localhost:6379/0"}):
+            first = get_redis_client()
+        with patch.dict(os.environ, {"REDIS_URL": "redis://localhost:6379/1"}):
+            second = get_redis_client()
+
+        assert first is not second
+        assert second.connection_pool.connection_kwargs["db"] == 1
+
+
+class TestAsyncClient:
+    """Test the event-loop-bound async client."""
+
+    async def test_client_is_shared_within_loop(self):
+        assert get_async_redis_client() is get_async_redis_client()
+
+    def test_new_loop_gets_new_client(self):
+        async def get_client():
+            return get_async_redis_client()
+
+        first = asyncio.run(get_client())
+        second = asyncio.run(get_client())
+
+        assert first is not second
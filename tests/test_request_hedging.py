@@ -0,0 +1,189 @@
+"""Tests for hedged model requests."""
+
+import asyncio
+import os
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from providers.base import ModelResponse, ProviderType
+from tools.analyze import AnalyzeTool
+from tools.chat import ChatTool
+from utils.request_hedging import RequestHedger
+
+
+def make_hedger(**env):
+    defaults = {"HEDGE_TOOLS": "chat", "HEDGE_MIN_SAMPLES": "5", "HEDGE_MIN_DELAY": "0.01"}
+    with patch.dict(os.environ, {**defaults, **env}, clear=True):
+        return RequestHedger()
+
+
+def warm(hedger, model_key, latency=0.05, count=5):
+    for _ in range(count):
+        hedger.record_latency(model_key, latency)
+
+
+async def respond(value, delay=0.0, error=None):
+    await asyncio.sleep(delay)
+    if error:
+        raise error
+    return value
+
+
+class TestHedgeConfiguration:
+    """Test opt-in and trigger delay computation."""
+
+    def test_disabled_by_default(self):
+        with patch.dict(os.environ, {}, clear=True):
+            hedger = RequestHedger()
+        assert not hedger.is_enabled("chat")
+
+    def test_trigger_delay_uses_percentile(self):
+        hedger = make_hedger(HEDGE_LATENCY_PERCENTILE="90")
+        assert hedger.get_trigger_delay("chat:google/flash") is None
+
+        for latency in range(1, 11):  # 1..10 seconds
+            hedger.record_latency("chat:google/flash", float(latency))
+        assert hedger.get_trigger_delay("chat:google/flash") == 9.0
+
+    def test_min_delay_floor(self):
+        hedger = make_hedger(HEDGE_MIN_DELAY="2")
+        warm(hedger, "chat:google/flash", latency=0.1)
+        assert hedger.get_trigger_delay("chat:google/flash") == 2.0
+
+
+class TestRace:
+    """Test racing the primary against the hedge."""
+
+    async def test_fast_primary_is_not_hedged(self):
+        hedger = make_hedger()
+        warm(hedger, "key")
+        secondary = AsyncMock()
+
+        result, info = await hedger.race("chat", "key", lambda: respond("primary"), secondary)
+
+        assert result == "primary" and info is None
+        secondary.assert_not_called()
+        assert hedger.get_stats()["stats"]["chat"]["hedged"] == 0
+
+    async def test_slow_primary_loses_to_hedge_and_is_cancelled(self):
+        hedger = make_hedger()
+        warm(hedger, "key", latency=0.02)
+        primary_task = {}
+
+        async def primary():
+            primary_task["task"] = asyncio.current_task()
+            return await respond("primary", delay=5)
+
+        result, info = await hedger.race("chat", "key", primary, lambda: respond("hedge", delay=0.01), extra_tokens=100)
+        await asyncio.sleep(0)
+
+        assert result == "hedge"
+        assert info["winner"] == "hedge"
+        assert primary_task["task"].cancelled()
+        stats = hedger.get_stats()["stats"]["chat"]
+        assert stats == {
+            "requests": 1,
+            "hedged": 1,
+            "hedge_rate": 1.0,
+            "hedge_wins": 1,
+            "primary_wins": 0,
+            "hedge_win_rate": 1.0,
+            "extra_tokens": 100,
+        }
+
+    async def test_primary_latency_recorded(self):
+        hedger = make_hedger()
+
+        await hedger.race("chat", "key", lambda: respond("primary", delay=0.05), AsyncMock())
+
+        assert hedger._latencies["key"][0] >= 0.05
+
+    async def test_cancelled_slow_primary_raises_trigger_delay(self):
+        hedger = make_hedger()
+        warm(hedger, "key", latency=0.02)
+        before = hedger.get_trigger_delay("key")
+
+        await hedger.race("chat", "key", lambda: respond("primary", delay=5), lambda: respond("hedge", delay=0.05))
+
+        # The losing primary ran for at least the delay plus the hedge's 0.05s
+        assert hedger._latencies["key"][-1] >= 0.07
+        assert hedger.get_trigger_delay("key") > before
+
+    async def test_abandoned_primary_is_sampled(self):
+        hedger = make_hedger()
+        race = asyncio.ensure_future(hedger.race("chat", "key", lambda: respond("primary", delay=5), AsyncMock()))
+        await asyncio.sleep(0.05)
+        race.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await race
+
+        assert list(hedger._latencies["key"]) == [pytest.approx(0.05, abs=0.04)]
+
+    async def test_failed_hedge_falls_back_to_primary(self):
+        hedger = make_hedger()
+        warm(hedger, "key", latency=0.02)
+
+        result, info = await hedger.race(
+            "chat",
+            "key",
+            lambda: respond("primary", delay=0.1),
+            lambda: respond(None, error=RuntimeError("hedge failed")),
+        )
+
+        assert result == "primary" and info["winner"] == "primary"
+
+    async def test_both_failing_raises_primary_error(self):
+        hedger = make_hedger()
+        warm(hedger, "key", latency=0.02)
+
+        with pytest.raises(ValueError, match="primary failed"):
+            await hedger.race(
+                "chat",
+                "key",
+                lambda: respond(None, delay=0.1, error=ValueError("primary failed")),
+                lambda: respond(None, error=RuntimeError("hedge failed")),
+            )
+
+
+class TestToolHedging:
+    """Test BaseTool integration."""
+
+    async def test_chat_response_records_hedge(self):
+        hedger = make_hedger()
+        warm(hedger, "chat:google/gemini-2.5-flash-preview-05-20", latency=0.02)
+
+        async def slow_primary(**kwargs):
+            await asyncio.sleep(5)
+
+        primary = MagicMock()
+        primary.get_provider_type.return_value = ProviderType.GOOGLE
+        primary.get_capabilities.return_value.model_name = "gemini-2.5-flash-preview-05-20"
+        primary.agenerate_content = AsyncMock(side_effect=slow_primary)
+
+        secondary = MagicMock()
+        secondary.get_provider_type.return_value = ProviderType.OPENROUTER
+        secondary.get_capabilities.return_value.supports_streaming = False
+        secondary.supports_thinking_mode.return_value = False
+        secondary.agenerate_content = AsyncMock(return_value=ModelResponse(content="fast", model_name="hedge"))
+
+        with (
+            patch("tools.base.get_request_hedger", return_value=hedger),
+            patch("tools.base.ModelProviderRegistry.get_failover_model", return_value=(secondary, "google/flash")),
+        ):
+            response = await ChatTool()._generate_model_response(primary, "flash", prompt="Hi")
+
+        assert response.content == "fast"
+        assert response.metadata["hedge"]["winner"] == "hedge"
+        assert response.metadata["hedge"]["provider"] == "openrouter"
+        assert response.metadata["hedge"]["model"] == "google/flash"
+
+    async def test_tools_not_opted_in_are_not_hedged(self):
+        hedger = make_hedger(HEDGE_TOOLS="chat")
+        provider = MagicMock()
+        provider.agenerate_content = AsyncMock(return_value=ModelResponse(content="ok", model_name="flash"))
+
+        with patch("tools.base.get_request_hedger", return_value=hedger):
+            await AnalyzeTool()._generate_model_response(provider, "flash", prompt="Hi")
+
+        assert hedger.get_stats()["stats"] == {}
@@ -0,0 +1,170 @@
+"""Tests for the content-addressed response cache."""
+
+import os
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from providers.base import ModelResponse, ProviderType
+from providers.response_cache import (
+    MemoryResponseCache,
+    ResponseCache,
+    SQLiteResponseCache,
+    make_cache_key,
+)
+from tools.chat import ChatTool
+
+
+def key(prompt="Review this diff", temperature=0.2, thinking_mode=None):
+    return make_cache_key(
+        ProviderType.GOOGLE, "gemini-2.5-flash-preview-05-20", prompt, "system", temperature, thinking_mode
+    )
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend_factory(request, tmp_path):
+    def factory(ttl=60.0, max_entries=10, max_bytes=1024 * 1024):
+        if request.param == "memory":
+            return MemoryResponseCache(ttl, max_entries, max_bytes)
+        return SQLiteResponseCache(str(tmp_path / "cache.db"), ttl, max_entries, max_bytes)
+
+    return factory
+
+
+class TestCacheKey:
+    """Test that every request component is part of the key."""
+
+    def test_key_changes_with_each_component(self):
+        base = key()
+        assert key() == base
+        assert key(prompt="Review that diff") != base
+        assert key(temperature=0.0) != base
+        assert key(thinking_mode="high") != base
+        assert make_cache_key(ProviderType.OPENAI, "o3", "Review this diff", "system", 0.2, None) != base
+
+
+class TestBackends:
+    """Test both backends for TTL, LRU eviction and size caps."""
+
+    def test_round_trip(self, backend_factory):
+        backend = backend_factory()
+        backend.set("a", "value")
+        value, stored_at = backend.get("a")
+        assert value == "value"
+        assert stored_at <= time.time()
+        assert backend.get("missing") is None
+
+    def test_ttl_expiry(self, backend_factory):
+        backend = backend_factory(ttl=0.05)
+        backend.set("a", "value")
+        time.sleep(0.1)
+        assert backend.get("a") is None
+
+    def test_lru_entry_cap(self, backend_factory):
+        backend = backend_factory(max_entries=2)
+        backend.set("a", "1")
+        time.sleep(0.01)
+        backend.set("b", "2")
+        time.sleep(0.01)
+        backend.get("a")  # "b" is now least recently used
+        time.sleep(0.01)
+        backend.set("c", "3")
+
+        assert backend.get("b") is None
+        assert backend.get("a") is not None and backend.get("c") is not None
+        assert backend.get_stats()["entries"] == 2
+
+    def test_size_cap(self, backend_factory):
+        backend = backend_factory(max_bytes=10)
+        backend.set("big", "x" * 11)  # larger than the whole cache
+        backend.set("a", "x" * 6)
+        time.sleep(0.01)
+        backend.set("b", "x" * 6)
+
+        assert backend.get("big") is None
+        assert backend.get("a") is None
+        assert backend.get_stats() == {"entries": 1, "bytes": 6}
+
+
+class TestResponseCache:
+    """Test policy: temperature threshold, bypass and serialization."""
+
+    def test_disabled_by_default(self):
+        with patch.dict(os.environ, {}, clear=True):
+            cache = ResponseCache()
+        assert not cache.enabled
+        assert not cache.is_cacheable(0.0)
+
+    def test_temperature_threshold_and_bypass(self):
+        cache = ResponseCache(MemoryResponseCache(60, 10, 1024), max_temperature=0.3)
+        assert cache.is_cacheable(0.3)
+        assert not cache.is_cacheable(0.5)
+        assert not cache.is_cacheable(0.2, use_cache=False)
+        assert cache.get_stats()["skipped"] == 2
+
+    def test_hit_restores_response(self):
+        cache = ResponseCache(MemoryResponseCache(60, 10, 1024 * 1024))
+        response = ModelResponse(
+            content="Looks good",
+            usage={"total_tokens": 42},
+            model_name="o3",
+            friendly_name="OpenAI",
+            provider=ProviderType.OPENAI,
+            metadata={"finish_reason": "stop", "retry": {"attempts": 2}},
+        )
+        cache.set("k", response)
+        cached = cache.get("k")
+
+        assert cached.content == "Looks good"
+        assert cached.provider == ProviderType.OPENAI
+        assert cached.usage == {"total_tokens": 42}
+        assert cached.metadata["finish_reason"] == "stop"
+        assert "retry" not in cached.metadata
+        assert cached.metadata["cache"]["hit"] is True
+        assert cache.get_stats()["hits"] == 1
+
+
+class TestToolCaching:
+    """Test BaseTool integration."""
+
+    def make_provider(self):
+        provider = MagicMock()
+        provider.get_provider_type.return_value = ProviderType.GOOGLE
+        provider.get_capabilities.return_value.model_name = "gemini-2.5-flash-preview-05-20"
+        provider.get_capabilities.return_value.supports_streaming = False
+        provider.agenerate_content = AsyncMock(
+            return_value=ModelResponse(content="answer", model_name="gemini-2.5-flash-preview-05-20")
+        )
+        return provider
+
+    @pytest.mark.parametrize("backend", ["memory", "sqlite"])
+    async def test_second_identical_call_is_served_from_cache(self, backend, tmp_path):
+        env = {"RESPONSE_CACHE_BACKEND": backend, "RESPONSE_CACHE_PATH": str(tmp_path / "cache.db")}
+        with patch.dict(os.environ, env):
+            cache = ResponseCache()
+        provider = self.make_provider()
+        tool = ChatTool()
+
+        with patch("tools.base.get_response_cache", return_value=cache):
+            first = await tool._generate_model_response(provider, "flash", prompt="Hi", temperature=0.2)
+            second = await tool._generate_model_response(provider, "flash", prompt="Hi", temperature=0.2)
+
+        assert provider.agenerate_content.await_count == 1
+        assert "cache" not in first.metadata
+        assert second.content == "answer"
+        assert second.metadata["cache"]["hit"] is True
+
+    async def test_bypass_and_high_temperature_skip_cache(self):
+        cache = ResponseCache(MemoryResponseCache(60, 10, 1024 * 1024), max_temperature=0.3)
+        provider = self.make_provider()
+        tool = ChatTool()
+
+        with patch("tools.base.get_response_cache", return_value=cache):
+            await tool._generate_model_response(provider, "flash", prompt="Hi", temperature=0.7)
+            await tool._generate_model_response(provider, "flash", prompt="Hi", temperature=0.7)
+            await tool._generate_model_response(provider, "flash", prompt="Hi", temperature=0.2)
+            await tool._generate_model_response(provider, "flash", use_cache=False, prompt="Hi", temperature=0.2)
+
+        assert provider.agenerate_content.await_count == 4
+        assert cache.get_stats()["stores"] == 1
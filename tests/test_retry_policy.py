@@ -0,0 +1,138 @@
+"""Tests for the shared provider retry policy."""
+
+import os
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+from providers.gemini import GeminiModelProvider
+from providers.retry import ErrorCategory, RetryPolicy, RetryStats, classify_error, get_retry_after
+
+
+class StatusError(Exception):
+    """Minimal stand-in for SDK errors that expose a status code and response."""
+
+    def __init__(self, message, status_code=None, headers=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response = httpx.Response(status_code or 500, headers=headers or {})
+
+
+def fast_policy(**overrides):
+    settings = {"max_attempts": 3, "base_delay": 0.001, "max_delay": 0.01, "deadline": 5.0}
+    settings.update(overrides)
+    return RetryPolicy(**settings)
+
+
+class TestErrorClassification:
+    """Test error classification and Retry-After parsing."""
+
+    def test_status_codes(self):
+        assert classify_error(StatusError("slow down", 429)) is ErrorCategory.RATE_LIMIT
+        assert classify_error(StatusError("bad gateway", 502)) is ErrorCategory.TRANSIENT
+        assert classify_error(StatusError("bad request", 400)) is ErrorCategory.FATAL
+        assert classify_error(StatusError("unauthorized", 401)) is ErrorCategory.FATAL
+
+    def test_network_errors_are_transient(self):
+        assert classify_error(httpx.ConnectTimeout("timed out")) is ErrorCategory.TRANSIENT
+        assert classify_error(ConnectionResetError()) is ErrorCategory.TRANSIENT
+
+    def test_message_fallback(self):
+        assert classify_error(Exception("429 RESOURCE_EXHAUSTED")) is ErrorCategory.RATE_LIMIT
+        assert classify_error(Exception("500 INTERNAL. Please retry")) is ErrorCategory.TRANSIENT
+        assert classify_error(ValueError("Invalid model name")) is ErrorCategory.FATAL
+
+    def test_retry_after_headers(self):
+        assert get_retry_after(StatusError("limited", 429, {"retry-after": "7"})) == 7.0
+        assert get_retry_after(StatusError("limited", 429, {"retry-after-ms": "250"})) == 0.25
+        assert get_retry_after(StatusError("limited", 429)) is None
+
+    def test_retry_after_gemini_details(self):
+        error = Exception("429 RESOURCE_EXHAUSTED")
+        error.details = {"error": {"details": [{"@type": "RetryInfo", "retryDelay": "12s"}]}}
+        assert get_retry_after(error) == 12.0
+
+    def test_env_configuration(self):
+        env = {"PROVIDER_RETRY_MAX_ATTEMPTS": "6", "PROVIDER_RETRY_DEADLINE": "bogus"}
+        with patch.dict(os.environ, env, clear=True):
+            policy = RetryPolicy()
+        assert policy.max_attempts == 6
+        assert policy.deadline == 600.0
+
+
+class TestRetryPolicy:
+    """Test retry execution."""
+
+    async def test_retries_transient_then_succeeds(self):
+        operation = AsyncMock(side_effect=[StatusError("unavailable", 503), "ok"])
+        stats = RetryStats()
+
+        assert await fast_policy().run(operation, stats=stats) == "ok"
+        assert stats.attempts == 2
+        assert stats.as_metadata()["retries"] == 1
+        assert stats.errors == ["transient"]
+
+    async def test_fatal_errors_are_not_retried(self):
+        operation = AsyncMock(side_effect=StatusError("bad request", 400))
+        stats = RetryStats()
+
+        with pytest.raises(StatusError):
+            await fast_policy().run(operation, stats=stats)
+        assert operation.await_count == 1
+        assert stats.errors == ["fatal"]
+
+    async def test_gives_up_after_max_attempts(self):
+        operation = AsyncMock(side_effect=StatusError("limited", 429))
+
+        with pytest.raises(StatusError):
+            await fast_policy().run(operation)
+        assert operation.await_count == 3
+
+    async def test_retry_after_beyond_deadline_gives_up(self):
+        operation = AsyncMock(side_effect=StatusError("limited", 429, {"retry-after": "60"}))
+        stats = RetryStats()
+
+        with pytest.raises(StatusError):
+            await fast_policy(deadline=1.0).run(operation, stats=stats)
+        assert stats.attempts == 1
+        assert stats.total_delay == 0
+
+    def test_sync_run(self):
+        operation = MagicMock(side_effect=[TimeoutError("read timeout"), "ok"])
+        stats = RetryStats()
+
+        assert fast_policy().run_sync(operation, stats=stats) == "ok"
+        assert stats.attempts == 2
+
+
+class TestProviderRetries:
+    """Test that providers route calls through the shared policy."""
+
+    async def test_gemini_records_retries_in_metadata(self):
+        provider = GeminiModelProvider(api_key="test-key")
+
+        mock_response = MagicMock()
+        mock_response.text = "Recovered"
+        mock_response.candidates = []
+        mock_response.usage_metadata = None
+
+        mock_client = MagicMock()
+        mock_client.aio.models.generate_content = AsyncMock(side_effect=[Exception("503 UNAVAILABLE"), mock_response])
+        provider._client = mock_client
+
+        with patch("providers.base.get_retry_policy", return_value=fast_policy()):
+            response = await provider.agenerate_content(prompt="Test", model_name="flash")
+
+        assert response.content == "Recovered"
+        assert response.metadata["retry"]["attempts"] == 2
+
+    async def test_gemini_wraps_exhausted_errors(self):
+        provider = GeminiModelProvider(api_key="test-key")
+        mock_client = MagicMock()
+        mock_client.aio.models.generate_content = AsyncMock(side_effect=Exception("503 UNAVAILABLE"))
+        provider._client = mock_client
+
+        with patch("providers.base.get_retry_policy", return_value=fast_policy()):
+            with pytest.raises(RuntimeError, match="after 3 attempts"):
+                await provider.agenerate_content(prompt="Test", model_name="flash")
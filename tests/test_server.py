@@ -30,9 +30,10 @@ class TestServerTools:
         assert "refactor" in tool_names
         assert "tracer" in tool_names
         assert "version" in tool_names
+        assert "threads" in tool_names
 
-        # Should have exactly 10 tools (including refactor and tracer)
-        assert len(tools) == 10
+        # Should have exactly 11 tools (including refactor, tracer and the utility tools)
+        assert len(tools) == 11
 
         # Check descriptions are verbose
         for tool in tools:
@@ -58,7 +59,7 @@ class TestServerTools:
         mock_provider = create_mock_provider()
         mock_provider.get_provider_type.return_value = Mock(value="google")
         mock_provider.supports_thinking_mode.return_value = False
-        mock_provider.generate_content.return_value = Mock(
+        mock_provider.agenerate_content.return_value = Mock(
             content="Chat response", usage={}, model_name="gemini-2.5-flash-preview-05-20", metadata={}
         )
         mock_get_provider.return_value = mock_provider
@@ -84,3 +85,8 @@ class TestServerTools:
         assert "Zen MCP Server v" in response  # Version agnostic check
         assert "Available Tools:" in response
         assert "thinkdeep" in response
+        assert "Tool Executor:" in response
+        assert "HTTP Connection Pool:" in response
+        assert "Provider Health:" in response
+        assert "Request Hedging:" in response
+        assert "Response Cache:" in response
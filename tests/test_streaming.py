@@ -0,0 +1,238 @@
+"""Tests for streamed model responses and MCP progress notifications."""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+from mcp.server.lowlevel.server import request_ctx
+from mcp.shared.context import RequestContext
+from mcp.types import RequestParams
+from openai import BadRequestError
+
+from providers.base import ModelResponse, ProviderType
+from providers.custom import CustomProvider
+from providers.gemini import GeminiModelProvider
+from providers.openai import OpenAIModelProvider
+from providers.xai import XAIModelProvider
+from tools.chat import ChatTool
+
+
+class FakeStream:
+    """Async iterator standing in for SDK stream objects."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._chunks)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def close(self):
+        self.closed = True
+
+    async def aclose(self):
+        self.closed = True
+
+
+def openai_chunk(content=None, finish_reason=None, usage=None):
+    choices = (
+        []
+        if content is None and finish_reason is None
+        else [SimpleNamespace(delta=SimpleNamespace(content=content), finish_reason=finish_reason)]
+    )
+    return SimpleNamespace(model="o3-mini", id="chatcmpl-1", created=1, choices=choices, usage=usage)
+
+
+class TestProviderStreaming:
+    """Test provider astream_content implementations."""
+
+    async def test_openai_streams_deltas_and_usage(self):
+        provider = OpenAIModelProvider("test-key")
+        stream = FakeStream(
+            [
+                openai_chunk("Hello"),
+                openai_chunk(", world", finish_reason="stop"),
+                openai_chunk(usage=SimpleNamespace(prompt_tokens=5, completion_tokens=3, total_tokens=8)),
+            ]
+        )
+        mock_client = MagicMock()
+        mock_client.chat.completions.create = AsyncMock(return_value=stream)
+
+        with patch("providers.openai_compatible.AsyncOpenAI", return_value=mock_client):
+            chunks = [chunk async for chunk in provider.astream_content(prompt="Hi", model_name="o3mini")]
+
+        call_kwargs = mock_client.chat.completions.create.call_args[1]
+        assert call_kwargs["stream"] is True
+        assert call_kwargs["model"] == "o3-mini"  # alias resolved
+        assert [c.content for c in chunks if c.content] == ["Hello", ", world"]
+        assert chunks[-1].final
+        assert chunks[-1].usage["total_tokens"] == 8
+        assert chunks[-1].metadata["finish_reason"] == "stop"
+        assert stream.closed
+
+    async def test_subclass_aliases_resolved_by_base(self):
+        mock_client = MagicMock()
+        mock_client.chat.completions.create = AsyncMock(side_effect=lambda **kwargs: FakeStream([]))
+
+        with patch("providers.openai_compatible.AsyncOpenAI", return_value=mock_client):
+            provider = XAIModelProvider("test-key")
+            [chunk async for chunk in provider.astream_content(prompt="Hi", model_name="grokfast")]
+
+        assert mock_client.chat.completions.create.call_args[1]["model"] == "grok-3-fast"
+
+    async def test_stream_usage_requested_only_where_supported(self):
+        mock_client = MagicMock()
+        mock_client.chat.completions.create = AsyncMock(side_effect=lambda **kwargs: FakeStream([]))
+
+        with patch("providers.openai_compatible.AsyncOpenAI", return_value=mock_client):
+            openai_provider = OpenAIModelProvider("test-key")
+            [chunk async for chunk in openai_provider.astream_content(prompt="Hi", model_name="o3-mini")]
+            custom_provider = CustomProvider(api_key="", base_url="http://localhost:11434/v1")
+            [chunk async for chunk in custom_provider.astream_content(prompt="Hi", model_name="llama3.2")]
+
+        openai_call, custom_call = mock_client.chat.completions.create.call_args_list
+        assert openai_call[1]["stream_options"] == {"include_usage": True}
+        assert "stream_options" not in custom_call[1]
+
+    async def test_rejected_stream_options_retried_without(self):
+        provider = OpenAIModelProvider("test-key")
+        rejected = BadRequestError(
+            "Unrecognized request argument supplied: stream_options",
+            response=httpx.Response(400, request=httpx.Request("POST", "https://proxy.local/v1/chat/completions")),
+            body=None,
+        )
+        mock_client = MagicMock()
+        mock_client.chat.completions.create = AsyncMock(side_effect=[rejected, FakeStream([openai_chunk("Hi")])])
+
+        with patch("providers.openai_compatible.AsyncOpenAI", return_value=mock_client):
+            chunks = [chunk async for chunk in provider.astream_content(prompt="Hi", model_name="o3-mini")]
+
+        assert chunks[0].content == "Hi"
+        first, second = mock_client.chat.completions.create.call_args_list
+        assert "stream_options" in first[1]
+        assert "stream_options" not in second[1]
+        assert provider._stream_usage is False
+
+    async def test_gemini_streams_text(self):
+        provider = GeminiModelProvider(api_key="test-key")
+        usage = SimpleNamespace(prompt_token_count=4, candidates_token_count=6)
+        stream = FakeStream(
+            [
+                SimpleNamespace(text="Part one. ", candidates=[], usage_metadata=None),
+                SimpleNamespace(
+                    text="Part two.", candidates=[SimpleNamespace(finish_reason="STOP")], usage_metadata=usage
+                ),
+            ]
+        )
+        mock_client = MagicMock()
+        mock_client.aio.models.generate_content_stream = AsyncMock(return_value=stream)
+        provider._client = mock_client
+
+        chunks = [chunk async for chunk in provider.astream_content(prompt="Hi", model_name="flash")]
+
+        assert "".join(c.content for c in chunks) == "Part one. Part two."
+        assert chunks[-1].model_name == "gemini-2.5-flash-preview-05-20"
+        assert chunks[-1].usage["total_tokens"] == 10
+        assert stream.closed
+
+    async def test_default_implementation_yields_single_chunk(self):
+        provider = GeminiModelProvider(api_key="test-key")
+        response = ModelResponse(
+            content="Whole response",
+            usage={"total_tokens": 3},
+            model_name="gemini-2.5-flash-preview-05-20",
+            friendly_name="Gemini",
+            provider=ProviderType.GOOGLE,
+        )
+        provider.agenerate_content = AsyncMock(return_value=response)
+
+        # Call the base implementation directly
+        from providers.base import ModelProvider
+
+        chunks = [c async for c in ModelProvider.astream_content(provider, prompt="Hi", model_name="flash")]
+
+        assert len(chunks) == 1
+        assert chunks[0].final and chunks[0].content == "Whole response"
+
+
+class TestToolStreaming:
+    """Test BaseTool streaming assembly and progress reporting."""
+
+    async def test_streams_when_progress_callback_present(self):
+        tool = ChatTool()
+        provider = GeminiModelProvider(api_key="test-key")
+        stream = FakeStream(
+            [
+                SimpleNamespace(text="Streamed ", candidates=[], usage_metadata=None),
+                SimpleNamespace(text="answer", candidates=[], usage_metadata=None),
+            ]
+        )
+        mock_client = MagicMock()
+        mock_client.aio.models.generate_content_stream = AsyncMock(return_value=stream)
+        provider._client = mock_client
+        progress = AsyncMock()
+
+        with patch("tools.base.STREAM_PROGRESS_INTERVAL_SECONDS", 0):
+            response = await tool._generate_model_response(
+                provider, "flash", progress_callback=progress, prompt="Hi", temperature=0.5
+            )
+
+        assert response.content == "Streamed answer"
+        assert response.metadata["streamed"] is True
+        assert response.provider == ProviderType.GOOGLE
+        assert progress.await_count == 2
+        assert progress.await_args_list[-1].args[0] == len("Streamed answer")
+
+    async def test_no_streaming_without_progress_callback(self):
+        tool = ChatTool()
+        provider = MagicMock()
+        response = ModelResponse(content="response", model_name="flash")
+        provider.agenerate_content = AsyncMock(return_value=response)
+
+        assert await tool._generate_model_response(provider, "flash", prompt="Hi") is response
+        provider.astream_content.assert_not_called()
+
+
+class TestProgressCallback:
+    """Test the server's MCP progress reporter."""
+
+    async def test_progress_callback_sends_notifications(self):
+        from server import get_progress_callback
+
+        session = MagicMock()
+        session.send_progress_notification = AsyncMock()
+        ctx = RequestContext(
+            request_id=7,
+            meta=RequestParams.Meta(progressToken="tok-1"),
+            session=session,
+            lifespan_context=None,
+        )
+
+        token = request_ctx.set(ctx)
+        try:
+            callback = get_progress_callback()
+            await callback(120, "received 120 characters")
+        finally:
+            request_ctx.reset(token)
+
+        session.send_progress_notification.assert_awaited_once_with(
+            "tok-1", 120, message="received 120 characters", related_request_id=7
+        )
+
+    def test_no_callback_without_progress_token(self):
+        from server import get_progress_callback
+
+        assert get_progress_callback() is None
+
+        ctx = RequestContext(request_id=1, meta=None, session=MagicMock(), lifespan_context=None)
+        token = request_ctx.set(ctx)
+        try:
+            assert get_progress_callback() is None
+        finally:
+            request_ctx.reset(token)
@@ -149,7 +149,7 @@ class TestComprehensive(unittest.TestCase):
         # Mock provider
         mock_provider = create_mock_provider()
         mock_provider.get_provider_type.return_value = Mock(value="google")
-        mock_provider.generate_content.return_value = Mock(
+        mock_provider.agenerate_content.return_value = Mock(
             content="Generated comprehensive test suite with edge cases",
             usage={"input_tokens": 100, "output_tokens": 200},
             model_name="gemini-2.5-flash-preview-05-20",
@@ -172,7 +172,7 @@ class TestComprehensive(unittest.TestCase):
     async def test_execute_with_test_examples(self, mock_get_provider, tool, temp_files):
         """Test execution with test examples"""
         mock_provider = create_mock_provider()
-        mock_provider.generate_content.return_value = Mock(
+        mock_provider.agenerate_content.return_value = Mock(
             content="Generated tests following the provided examples",
             usage={"input_tokens": 150, "output_tokens": 250},
             model_name="gemini-2.5-flash-preview-05-20",
@@ -324,9 +324,6 @@ class TestComprehensive(unittest.TestCase):
             mock_provider = create_mock_provider(context_window=200000)
             mock_get_provider.return_value = mock_provider
 
-            # Simulate model name being set
-            tool._current_model_name = "test-model"
-
             with patch.object(tool, "_process_test_examples") as mock_process:
                 mock_process.return_value = ("test content", "")
 
@@ -334,7 +331,10 @@ class TestComprehensive(unittest.TestCase):
                     mock_prepare.return_value = ("code content", ["/tmp/test.py"])
 
                     request = TestGenRequest(
-                        files=["/tmp/test.py"], prompt="Test prompt", test_examples=["/tmp/example.py"]
+                        files=["/tmp/test.py"],
+                        prompt="Test prompt",
+                        test_examples=["/tmp/example.py"],
+                        model="test-model",
                     )
 
                     # This should trigger token budget calculation
@@ -45,7 +45,7 @@ class TestThinkingModes:
         mock_provider = create_mock_provider()
         mock_provider.get_provider_type.return_value = Mock(value="google")
         mock_provider.supports_thinking_mode.return_value = True
-        mock_provider.generate_content.return_value = Mock(
+        mock_provider.agenerate_content.return_value = Mock(
             content="Minimal thinking response", usage={}, model_name="gemini-2.5-flash-preview-05-20", metadata={}
         )
         mock_get_provider.return_value = mock_provider
@@ -61,9 +61,9 @@ class TestThinkingModes:
 
         # Verify create_model was called with correct thinking_mode
         assert mock_get_provider.called
-        # Verify generate_content was called with thinking_mode
-        mock_provider.generate_content.assert_called_once()
-        call_kwargs = mock_provider.generate_content.call_args[1]
+        # Verify agenerate_content was called with thinking_mode
+        mock_provider.agenerate_content.assert_called_once()
+        call_kwargs = mock_provider.agenerate_content.call_args[1]
         assert call_kwargs.get("thinking_mode") == "minimal" or (
             not mock_provider.supports_thinking_mode.return_value and call_kwargs.get("thinking_mode") is None
         )  # thinking_mode parameter
@@ -82,7 +82,7 @@ class TestThinkingModes:
         mock_provider = create_mock_provider()
         mock_provider.get_provider_type.return_value = Mock(value="google")
         mock_provider.supports_thinking_mode.return_value = True
-        mock_provider.generate_content.return_value = Mock(
+        mock_provider.agenerate_content.return_value = Mock(
             content="Low thinking response", usage={}, model_name="gemini-2.5-flash-preview-05-20", metadata={}
         )
         mock_get_provider.return_value = mock_provider
@@ -98,9 +98,9 @@ class TestThinkingModes:
 
         # Verify create_model was called with correct thinking_mode
         assert mock_get_provider.called
-        # Verify generate_content was called with thinking_mode
-        mock_provider.generate_content.assert_called_once()
-        call_kwargs = mock_provider.generate_content.call_args[1]
+        # Verify agenerate_content was called with thinking_mode
+        mock_provider.agenerate_content.assert_called_once()
+        call_kwargs = mock_provider.agenerate_content.call_args[1]
         assert call_kwargs.get("thinking_mode") == "low" or (
             not mock_provider.supports_thinking_mode.return_value and call_kwargs.get("thinking_mode") is None
         )
@@ -114,7 +114,7 @@ class TestThinkingModes:
         mock_provider = create_mock_provider()
         mock_provider.get_provider_type.return_value = Mock(value="google")
         mock_provider.supports_thinking_mode.return_value = True
-        mock_provider.generate_content.return_value = Mock(
+        mock_provider.agenerate_content.return_value = Mock(
             content="Medium thinking response", usage={}, model_name="gemini-2.5-flash-preview-05-20", metadata={}
         )
         mock_get_provider.return_value = mock_provider
@@ -129,9 +129,9 @@ class TestThinkingModes:
 
         # Verify create_model was called with default thinking_mode
         assert mock_get_provider.called
-        # Verify generate_content was called with thinking_mode
-        mock_provider.generate_content.assert_called_once()
-        call_kwargs = mock_provider.generate_content.call_args[1]
+        # Verify agenerate_content was called with thinking_mode
+        mock_provider.agenerate_content.assert_called_once()
+        call_kwargs = mock_provider.agenerate_content.call_args[1]
         assert call_kwargs.get("thinking_mode") == "medium" or (
             not mock_provider.supports_thinking_mode.return_value and call_kwargs.get("thinking_mode") is None
         )
@@ -145,7 +145,7 @@ class TestThinkingModes:
         mock_provider = create_mock_provider()
         mock_provider.get_provider_type.return_value = Mock(value="google")
         mock_provider.supports_thinking_mode.return_value = True
-        mock_provider.generate_content.return_value = Mock(
+        mock_provider.agenerate_content.return_value = Mock(
             content="High thinking response", usage={}, model_name="gemini-2.5-flash-preview-05-20", metadata={}
         )
         mock_get_provider.return_value = mock_provider
@@ -161,9 +161,9 @@ class TestThinkingModes:
 
         # Verify create_model was called with correct thinking_mode
         assert mock_get_provider.called
-        # Verify generate_content was called with thinking_mode
-        mock_provider.generate_content.assert_called_once()
-        call_kwargs = mock_provider.generate_content.call_args[1]
+        # Verify agenerate_content was called with thinking_mode
+        mock_provider.agenerate_content.assert_called_once()
+        call_kwargs = mock_provider.agenerate_content.call_args[1]
         assert call_kwargs.get("thinking_mode") == "high" or (
             not mock_provider.supports_thinking_mode.return_value and call_kwargs.get("thinking_mode") is None
         )
@@ -176,7 +176,7 @@ class TestThinkingModes:
         mock_provider = create_mock_provider()
         mock_provider.get_provider_type.return_value = Mock(value="google")
         mock_provider.supports_thinking_mode.return_value = True
-        mock_provider.generate_content.return_value = Mock(
+        mock_provider.agenerate_content.return_value = Mock(
             content="Max thinking response", usage={}, model_name="gemini-2.5-flash-preview-05-20", metadata={}
         )
         mock_get_provider.return_value = mock_provider
@@ -191,9 +191,9 @@ class TestThinkingModes:
 
         # Verify create_model was called with default thinking_mode
         assert mock_get_provider.called
-        # Verify generate_content was called with thinking_mode
-        mock_provider.generate_content.assert_called_once()
-        call_kwargs = mock_provider.generate_content.call_args[1]
+        # Verify agenerate_content was called with thinking_mode
+        mock_provider.agenerate_content.assert_called_once()
+        call_kwargs = mock_provider.agenerate_content.call_args[1]
         assert call_kwargs.get("thinking_mode") == "high" or (
             not mock_provider.supports_thinking_mode.return_value and call_kwargs.get("thinking_mode") is None
         )
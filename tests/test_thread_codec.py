@@ -0,0 +1,80 @@
+"""Tests for the JSON codec used to store conversation threads."""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from tests.mock_helpers import FakeRedis
+from utils import conversation_codec
+from utils.conversation_memory import ConversationTurn, ThreadContext, add_turn, create_thread, get_thread
+from utils.conversation_store import RedisConversationStore
+
+pytestmark = pytest.mark.skipif(conversation_codec.orjson is None, reason="orjson not installed")
+
+
+def sample_thread() -> ThreadContext:
+    return ThreadContext(
+        thread_id="00000000-0000-0000-0000-000000000000",
+        created_at="2025-01-01T00:00:00+00:00",
+        last_updated_at="2025-01-01T00:00:00+00:00",
+        tool_name="chat",
+        turns=[
+            ConversationTurn(
+                role="assistant",
+                content='Ünïcode, "quotes" and\nnewlines',
+                timestamp="2025-01-01T00:00:00+00:00",
+                files=["/workspace/a.py"],
+                model_metadata={"usage": {"input_tokens": 10, "ratio": 0.5}},
+                token_count=12,
+                file_hashes={"/workspace/a.py": "ab" * 32},
+            )
+        ],
+        initial_context={"prompt": "hello", "temperature": 0.2},
+        summary=ConversationTurn(role="assistant", content="- earlier", timestamp="t", summarized_turns=3),
+        version=4,
+    )
+
+
+class TestThreadCodec:
+    """Test that orjson and Pydantic read and write the same documents."""
+
+    def test_writes_same_json_as_pydantic(self):
+        context = sample_thread()
+        assert conversation_codec.dump_json(context) == context.model_dump_json()
+        assert conversation_codec.dump_json(context.turns[0]) == context.turns[0].model_dump_json()
+
+    def test_round_trip(self):
+        context = sample_thread()
+        assert conversation_codec.load_json(ThreadContext, conversation_codec.dump_json(context)) == context
+
+    def test_reads_threads_written_without_orjson(self):
+        context = sample_thread()
+        with patch.object(conversation_codec, "orjson", None):
+            stored = conversation_codec.encode_model(context)
+            assert conversation_codec.get_json_codec() == "pydantic"
+
+        assert conversation_codec.decode_model(ThreadContext, stored) == context
+
+    def test_unsupported_values_fall_back_to_pydantic(self):
+        turn = ConversationTurn(role="user", content="hi", timestamp="t", model_metadata={"tags": {"a"}})
+        assert conversation_codec.dump_json(turn) == turn.model_dump_json()
+
+    def test_validation_still_applies(self):
+        with pytest.raises(ValueError):
+            conversation_codec.load_json(ConversationTurn, '{"role": "user"}')
+
+    @pytest.mark.parametrize("layout", ["blob", "append"])
+    def test_threads_stored_in_redis(self, layout):
+        with (
+            patch("utils.conversation_memory.get_redis_client", return_value=FakeRedis()),
+            patch.dict(os.environ, {"CONVERSATION_STORAGE_LAYOUT": layout}),
+            patch("utils.conversation_store.get_conversation_store", return_value=RedisConversationStore()),
+        ):
+            thread_id = create_thread("chat", {"prompt": "hello"})
+            add_turn(thread_id, "user", "Question", files=["/workspace/a.py"], tool_name="chat")
+            context = get_thread(thread_id)
+
+        assert context.initial_context == {"prompt": "hello"}
+        assert context.turns[0].content == "Question"
+        assert context.turns[0].files == ["/workspace/a.py"]
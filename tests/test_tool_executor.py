@@ -0,0 +1,160 @@
+"""Tests for the bounded tool executor."""
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from tests.mock_helpers import create_mock_provider
+from tools.chat import ChatTool
+from utils.tool_executor import ToolExecutor, parse_tool_limits
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+class TestToolLimitParsing:
+    """Test TOOL_CONCURRENCY_LIMITS parsing and defaults."""
+
+    def test_parse_valid_limits(self):
+        assert parse_tool_limits("precommit=1, Chat=12") == {"precommit": 1, "chat": 12}
+
+    def test_parse_skips_invalid_entries(self):
+        assert parse_tool_limits("precommit=abc,chat,debug=0,analyze=3,") == {"analyze": 3}
+
+    def test_builtin_and_env_limits(self):
+        env = {"TOOL_CONCURRENCY_LIMITS": "chat=3", "TOOL_DEFAULT_CONCURRENCY": "5"}
+        with patch.dict(os.environ, env, clear=True):
+            executor = ToolExecutor()
+        try:
+            assert executor.get_limit("precommit") == 2
+            assert executor.get_limit("chat") == 3
+            assert executor.get_limit("analyze") == 5
+        finally:
+            executor.shutdown()
+
+    def test_invalid_worker_count_falls_back(self):
+        with patch.dict(os.environ, {"TOOL_EXECUTOR_MAX_WORKERS": "-2"}, clear=True):
+            executor = ToolExecutor()
+        try:
+            assert executor.max_workers == 16
+        finally:
+            executor.shutdown()
+
+
+class TestToolExecutor:
+    """Test job dispatch, limits and stats."""
+
+    @pytest.fixture
+    def executor(self):
+        executor = ToolExecutor(max_workers=8, tool_limits={"precommit": 2}, default_limit=4)
+        yield executor
+        executor.shutdown()
+
+    async def test_runs_off_event_loop(self, executor):
+        loop_thread = threading.get_ident()
+        worker_thread = await executor.run("chat", threading.get_ident)
+        assert worker_thread != loop_thread
+
+    async def test_propagates_exceptions(self, executor):
+        def fail():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError, match="boom"):
+            await executor.run("chat", fail)
+        assert executor.get_stats()["tools"]["chat"]["active"] == 0
+
+    async def test_copies_context_variables(self, executor):
+        request_id.set("abc-123")
+        assert await executor.run("chat", request_id.get) == "abc-123"
+
+    async def test_enforces_per_tool_limit(self, executor):
+        lock = threading.Lock()
+        running = 0
+        peak = 0
+
+        def job():
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.05)
+            with lock:
+                running -= 1
+
+        async def observe_queue():
+            await asyncio.sleep(0.02)
+            return executor.get_stats()
+
+        results = await asyncio.gather(*(executor.run("precommit", job) for _ in range(5)), observe_queue())
+        stats_during = results[-1]
+
+        assert peak == 2
+        assert stats_during["tools"]["precommit"]["active"] == 2
+        assert stats_during["tools"]["precommit"]["queued"] == 3
+
+        stats_after = executor.get_stats()
+        assert stats_after["queued"] == 0
+        assert stats_after["tools"]["precommit"]["completed"] == 5
+
+    async def test_tools_do_not_share_limits(self, executor):
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(2)
+
+        slow_jobs = [asyncio.ensure_future(executor.run("precommit", slow)) for _ in range(3)]
+        await asyncio.sleep(0.02)
+
+        # precommit is saturated, chat still runs immediately
+        assert await asyncio.wait_for(executor.run("chat", lambda: "ok"), timeout=1) == "ok"
+
+        release.set()
+        await asyncio.gather(*slow_jobs)
+        assert started.is_set()
+
+
+class TestConcurrentToolExecution:
+    """Test that overlapping calls on one tool instance keep their own request state."""
+
+    async def test_overlapping_execute_calls_keep_their_files(self, project_path):
+        first = project_path / "first.py"
+        first.write_text("FIRST = 1\n")
+        second = project_path / "second.py"
+        second.write_text("SECOND = 2\n")
+
+        provider = create_mock_provider()
+        both_started = asyncio.Event()
+        calls = []
+
+        async def generate(**kwargs):
+            # Hold each model call until both requests have prepared their prompts
+            calls.append(kwargs["model_name"])
+            if len(calls) == 2:
+                both_started.set()
+            await asyncio.wait_for(both_started.wait(), timeout=2)
+            return provider.generate_content.return_value
+
+        provider.agenerate_content.side_effect = generate
+        tool = ChatTool()
+
+        offer = {"remaining_turns": 5, "tool_name": "chat"}
+
+        with (
+            patch("providers.ModelProviderRegistry.get_provider_for_model", return_value=provider),
+            patch.object(tool, "_check_continuation_opportunity", return_value=offer),
+            patch("tools.base.create_thread", side_effect=["thread-1", "thread-2"]),
+            patch("tools.base.add_turn") as add_turn,
+        ):
+            await asyncio.gather(
+                tool.execute({"prompt": "first", "files": [str(first)], "model": "flash"}),
+                tool.execute({"prompt": "second", "files": [str(second)], "model": "pro"}),
+            )
+
+        recorded = {call.kwargs["model_name"]: call.kwargs["files"] for call in add_turn.call_args_list}
+        assert recorded == {"flash": [str(first)], "pro": [str(second)]}
@@ -13,29 +13,39 @@ Key responsibilities:
 - Support for clarification requests when more information is needed
 """
 
+import functools
 import json
 import logging
 import os
+import time
 from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING, Any, Literal, Optional
 
 from mcp.types import TextContent
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 if TYPE_CHECKING:
     from tools.models import ToolModelCategory
 
-from config import MCP_PROMPT_SIZE_LIMIT
+from config import MCP_PROMPT_SIZE_LIMIT, STREAM_PROGRESS_INTERVAL_SECONDS
 from providers import ModelProvider, ModelProviderRegistry
+from providers.base import ModelResponse, StreamChunk
+from providers.health import get_health_monitor
+from providers.response_cache import get_response_cache, make_cache_key
 from utils import check_token_limit
 from utils.conversation_memory import (
     MAX_CONVERSATION_TURNS,
     add_turn,
     create_thread,
+    get_changed_files,
     get_conversation_file_list,
     get_thread,
 )
 from utils.file_utils import read_file_content, read_files, translate_path_for_environment
+from utils.rate_limiter import limited_model_call
+from utils.request_hedging import get_request_hedger
+from utils.token_utils import estimate_tokens
+from utils.tool_executor import run_blocking
 
 from .models import SPECIAL_STATUS_MODELS, ContinuationOffer, ToolOutput
 
@@ -75,6 +85,13 @@ class ToolRequest(BaseModel):
             "would enhance the analysis."
         ),
     )
+    use_cache: Optional[bool] = Field(
+        True,
+        description=(
+            "Reuse the cached response to an identical earlier request when the server's response cache is "
+            "enabled. Set to false to force a fresh answer."
+        ),
+    )
     continuation_id: Optional[str] = Field(
         None,
         description=(
@@ -85,6 +102,11 @@ class ToolRequest(BaseModel):
         ),
     )
 
+    # Per-call state kept on the request rather than the shared tool instance, so
+    # overlapping executions of the same tool cannot see each other's values
+    _arguments: dict[str, Any] = PrivateAttr(default_factory=dict)
+    _processed_files: list[str] = PrivateAttr(default_factory=list)
+
 
 class BaseTool(ABC):
     """
@@ -472,14 +494,34 @@ class BaseTool(ABC):
         logger.debug(f"[FILES] {self.name}: Found {len(embedded_files)} embedded files")
         return embedded_files
 
+    def get_changed_embedded_files(self, file_paths: list[str], continuation_id: Optional[str]) -> list[str]:
+        """
+        Get files embedded earlier in the conversation whose content has changed since.
+
+        Compares each file's current content hash with the newest snapshot
+        recorded in the thread. Files without a recorded snapshot are treated
+        as unchanged.
+
+        Args:
+            file_paths: Files already embedded in conversation history
+            continuation_id: Thread continuation ID
+
+        Returns:
+            list[str]: Files from file_paths that need embedding again
+        """
+        thread_context = get_thread(continuation_id) if continuation_id else None
+        if not thread_context:
+            return []
+        return get_changed_files(thread_context, file_paths)
+
     def filter_new_files(self, requested_files: list[str], continuation_id: Optional[str]) -> list[str]:
         """
         Filter out files that are already embedded in conversation history.
 
         This method prevents duplicate file embeddings by filtering out files that have
-        already been embedded in the conversation history. This optimizes token usage
-        while ensuring tools still have logical access to all requested files through
-        conversation history references.
+        already been embedded in the conversation history and have not changed since.
+        This optimizes token usage while ensuring tools still have logical access to all
+        requested files through conversation history references.
 
         Args:
             requested_files: List of files requested for current tool execution
@@ -508,8 +550,11 @@ class BaseTool(ABC):
                 )
                 return requested_files
 
-            # Return only files that haven't been embedded yet
-            new_files = [f for f in requested_files if f not in embedded_files]
+            # Return only files that haven't been embedded yet, or have changed since
+            changed_files = set(
+                self.get_changed_embedded_files([f for f in requested_files if f in embedded_files], continuation_id)
+            )
+            new_files = [f for f in requested_files if f not in embedded_files or f in changed_files]
             logger.debug(
                 f"[FILES] {self.name}: After filtering: {len(new_files)} new files, {len(requested_files) - len(new_files)} already embedded"
             )
@@ -517,7 +562,7 @@ class BaseTool(ABC):
 
             # Log filtering results for debugging
             if len(new_files) < len(requested_files):
-                skipped = [f for f in requested_files if f in embedded_files]
+                skipped = [f for f in requested_files if f in embedded_files and f not in changed_files]
                 logger.debug(
                     f"{self.name} tool: Filtering {len(skipped)} files already in conversation history: {', '.join(skipped)}"
                 )
@@ -535,6 +580,27 @@ class BaseTool(ABC):
             )
             return requested_files
 
+    def _get_request_model_name(self, request) -> Optional[str]:
+        """
+        Get the model that will serve this request.
+
+        Prefers the model context resolved by server.py, then the model named in the
+        request. Returns None when the model is not known yet (auto mode or no model).
+
+        Args:
+            request: The validated request object
+
+        Returns:
+            Optional[str]: The model name, or None if it has not been resolved
+        """
+        model_context = getattr(request, "_arguments", {}).get("_model_context")
+        if model_context:
+            return model_context.model_name
+        model_name = getattr(request, "model", None)
+        if model_name and model_name.lower() != "auto":
+            return model_name
+        return None
+
     def _prepare_file_content_for_prompt(
         self,
         request_files: list[str],
@@ -560,7 +626,8 @@ class BaseTool(ABC):
             max_tokens: Maximum tokens to use (defaults to remaining budget or model-specific content allocation)
             reserve_tokens: Tokens to reserve for additional prompt content (default 1K)
             remaining_budget: Remaining token budget after conversation history (from server.py)
-            arguments: Original tool arguments (used to extract _remaining_tokens if available)
+            arguments: Original tool arguments, usually request._arguments (used to extract
+                       _remaining_tokens, _model_context and model if available)
 
         Returns:
             tuple[str, list[str]]: (formatted_file_content, actually_processed_files)
@@ -577,9 +644,7 @@ class BaseTool(ABC):
 
         # Extract remaining budget from arguments if available
         if remaining_budget is None:
-            # Use provided arguments or fall back to stored arguments from execute()
-            args_to_use = arguments or getattr(self, "_current_arguments", {})
-            remaining_budget = args_to_use.get("_remaining_tokens")
+            remaining_budget = (arguments or {}).get("_remaining_tokens")
 
         # Use remaining budget if provided, otherwise fall back to max_tokens or model-specific default
         if remaining_budget is not None:
@@ -591,9 +656,7 @@ class BaseTool(ABC):
             # First check if model_context was passed from server.py
             model_context = None
             if arguments:
-                model_context = arguments.get("_model_context") or getattr(self, "_current_arguments", {}).get(
-                    "_model_context"
-                )
+                model_context = arguments.get("_model_context")
 
             if model_context:
                 # Use the passed model context
@@ -613,7 +676,7 @@ class BaseTool(ABC):
                 # Manual calculation as fallback
                 from config import DEFAULT_MODEL
 
-                model_name = getattr(self, "_current_model_name", None) or DEFAULT_MODEL
+                model_name = (arguments or {}).get("model") or DEFAULT_MODEL
 
                 # Handle auto mode gracefully
                 if model_name.lower() == "auto":
@@ -758,7 +821,8 @@ class BaseTool(ABC):
         # Generate note about files already in conversation history
         if continuation_id and len(files_to_embed) < len(request_files):
             embedded_files = self.get_conversation_embedded_files(continuation_id)
-            skipped_files = [f for f in request_files if f in embedded_files]
+            # Changed files were embedded again above; the history copy is stale
+            skipped_files = [f for f in request_files if f in embedded_files and f not in files_to_embed]
             if skipped_files:
                 logger.debug(
                     f"{self.name} tool skipping {len(skipped_files)} files already in conversation history: {', '.join(skipped_files)}"
@@ -1000,6 +1064,23 @@ When recommending searches, be specific about what information you need and why
 
         return prompt_content, updated_files if updated_files else None
 
+    async def run_blocking(self, func, *args, **kwargs):
+        """
+        Run blocking work (file reads, git calls, conversation storage) off the event loop.
+
+        Work is dispatched to the shared tool executor under this tool's concurrency
+        limit, so heavy requests queue instead of stalling other MCP requests.
+
+        Args:
+            func: Blocking callable to run
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Whatever func returns
+        """
+        return await run_blocking(self.name, func, *args, **kwargs)
+
     async def execute(self, arguments: dict[str, Any]) -> list[TextContent]:
         """
         Execute the tool with the provided arguments.
@@ -1019,9 +1100,6 @@ When recommending searches, be specific about what information you need and why
             List[TextContent]: Formatted response as MCP TextContent objects
         """
         try:
-            # Store arguments for access by helper methods (like _prepare_file_content_for_prompt)
-            self._current_arguments = arguments
-
             # Set up logger for this tool execution
             logger = logging.getLogger(f"tools.{self.name}")
             logger.info(f"🔧 {self.name} tool called with arguments: {list(arguments.keys())}")
@@ -1030,6 +1108,9 @@ When recommending searches, be specific about what information you need and why
             # This ensures all required fields are present and properly typed
             request_model = self.get_request_model()
             request = request_model(**arguments)
+            # Keep the raw arguments (remaining token budget, model context) with the request
+            # for helpers like _prepare_file_content_for_prompt
+            request._arguments = arguments
             logger.debug(f"Request validation successful for {self.name}")
 
             # Validate file paths for security
@@ -1052,9 +1133,6 @@ When recommending searches, be specific about what information you need and why
                 # the prompt already contains conversation history marker.
                 logger.debug(f"Continuing {self.name} conversation with thread {continuation_id}")
 
-                # Store the original arguments to detect enhanced prompts
-                self._has_embedded_history = False
-
                 # Check if conversation history is already embedded in the prompt field
                 field_value = getattr(request, "prompt", "")
                 field_name = "prompt"
@@ -1062,7 +1140,6 @@ When recommending searches, be specific about what information you need and why
                 if "=== CONVERSATION HISTORY ===" in field_value:
                     # Conversation history is already embedded, use it directly
                     prompt = field_value
-                    self._has_embedded_history = True
                     logger.debug(f"{self.name}: Using pre-embedded conversation history from {field_name}")
                 else:
                     # No embedded history, prepare prompt normally
@@ -1123,10 +1200,6 @@ When recommending searches, be specific about what information you need and why
                 )
                 return [TextContent(type="text", text=error_output.model_dump_json())]
 
-            # Store model name for use by helper methods like _prepare_file_content_for_prompt
-            # Only set this after auto mode validation to prevent "auto" being used as a model name
-            self._current_model_name = model_name
-
             temperature = getattr(request, "temperature", None)
             if temperature is None:
                 temperature = self.get_default_temperature()
@@ -1153,12 +1226,17 @@ When recommending searches, be specific about what information you need and why
             logger.debug(f"Prompt length: {len(prompt)} characters")
 
             # Generate content with provider abstraction
-            model_response = provider.generate_content(
+            # Awaiting the async API keeps the event loop free for other tool calls
+            model_response = await self._generate_model_response(
+                provider,
+                model_name,
+                progress_callback=arguments.get("_progress_callback"),
+                use_cache=getattr(request, "use_cache", True) is not False,
                 prompt=prompt,
-                model_name=model_name,
                 system_prompt=system_prompt,
                 temperature=temperature,
                 thinking_mode=thinking_mode if provider.supports_thinking_mode(model_name) else None,
+                conversation_id=continuation_id,
             )
 
             logger.info(f"Received response from {provider.get_provider_type().value} API for {self.name}")
@@ -1170,7 +1248,7 @@ When recommending searches, be specific about what information you need and why
                 # Parse response to check for clarification requests or format output
                 # Pass model info for conversation tracking
                 model_info = {"provider": provider, "model_name": model_name, "model_response": model_response}
-                tool_output = self._parse_response(raw_text, request, model_info)
+                tool_output = await self.run_blocking(self._parse_response, raw_text, request, model_info)
                 logger.info(f"✅ {self.name} tool completed successfully")
 
             else:
@@ -1199,33 +1277,6 @@ When recommending searches, be specific about what information you need and why
                 tool_output_json = error_msg[15:]  # Remove "MCP_SIZE_CHECK:" prefix
                 return [TextContent(type="text", text=tool_output_json)]
 
-            # Check if this is a 500 INTERNAL error that asks for retry
-            if "500 INTERNAL" in error_msg and "Please retry" in error_msg:
-                logger.warning(f"500 INTERNAL error in {self.name} - attempting retry")
-                try:
-                    # Single retry attempt using provider
-                    retry_response = provider.generate_content(
-                        prompt=prompt,
-                        model_name=model_name,
-                        system_prompt=system_prompt,
-                        temperature=temperature,
-                        thinking_mode=thinking_mode if provider.supports_thinking_mode(model_name) else None,
-                    )
-
-                    if retry_response.content:
-                        # If successful, process normally
-                        retry_model_info = {
-                            "provider": provider,
-                            "model_name": model_name,
-                            "model_response": retry_response,
-                        }
-                        tool_output = self._parse_response(retry_response.content, request, retry_model_info)
-                        return [TextContent(type="text", text=tool_output.model_dump_json())]
-
-                except Exception as retry_e:
-                    logger.error(f"Retry failed for {self.name} tool: {str(retry_e)}")
-                    error_msg = f"Tool failed after retry: {str(retry_e)}"
-
             logger.error(f"Error in {self.name} tool execution: {error_msg}", exc_info=True)
 
             error_output = ToolOutput(
@@ -1235,6 +1286,282 @@ When recommending searches, be specific about what information you need and why
             )
             return [TextContent(type="text", text=error_output.model_dump_json())]
 
+    async def _generate_model_response(
+        self,
+        provider: ModelProvider,
+        model_name: str,
+        progress_callback=None,
+        use_cache: bool = True,
+        **generate_kwargs,
+    ) -> ModelResponse:
+        """
+        Generate the model response, streaming it when the client can receive progress.
+
+        The server passes a progress callback (via the private _progress_callback
+        argument) only when the MCP client sent a progressToken. Without one, or
+        when the model can't stream, this is a plain agenerate_content call.
+
+        The call first waits for the client-side rate limiter; the prompt-based
+        token estimate is corrected from the reported usage afterwards.
+
+        If the provider's circuit breaker is open the call goes to an equivalent
+        model on another provider (recorded in metadata["provider_substitution"])
+        or fails immediately instead of waiting out the retry budget. The outcome
+        and latency are recorded for the provider's breaker.
+
+        Tools listed in HEDGE_TOOLS hedge slow calls (see utils.request_hedging).
+
+        Identical low-temperature requests are answered from the response cache
+        when one is configured (see providers.response_cache).
+
+        Args:
+            provider: Provider serving the model
+            model_name: Model to use
+            progress_callback: Optional async callable(progress, message) for MCP progress
+            use_cache: False to bypass the response cache for this request
+            **generate_kwargs: prompt, system_prompt, temperature, thinking_mode, conversation_id
+
+        Returns:
+            ModelResponse: The complete response
+        """
+        cache = get_response_cache()
+        cache_key = None
+        if cache.is_cacheable(generate_kwargs.get("temperature"), use_cache):
+            cache_key = make_cache_key(
+                provider.get_provider_type(),
+                self._resolve_model_name(provider, model_name),
+                generate_kwargs.get("prompt") or "",
+                generate_kwargs.get("system_prompt"),
+                generate_kwargs.get("temperature"),
+                generate_kwargs.get("thinking_mode"),
+            )
+            cached_response = await self._run_cache_operation(cache, cache.get, cache_key)
+            if cached_response is not None:
+                logging.getLogger(f"tools.{self.name}").info(f"{self.name}: served {model_name} response from cache")
+                return cached_response
+
+        provider, model_name, generate_kwargs, substitution = self._route_around_open_circuit(
+            provider, model_name, generate_kwargs
+        )
+
+        if get_request_hedger().is_enabled(self.name):
+            model_response = await self._hedged_model_response(provider, model_name, progress_callback, generate_kwargs)
+        else:
+            model_response = await self._call_model(provider, model_name, progress_callback, generate_kwargs)
+
+        # Only cache answers from the model that was asked for
+        answered_by_requested_model = (
+            not substitution and model_response.metadata.get("hedge", {}).get("winner") != "hedge"
+        )
+        if cache_key and model_response.content and answered_by_requested_model:
+            await self._run_cache_operation(cache, cache.set, cache_key, model_response)
+
+        if substitution:
+            model_response.metadata["provider_substitution"] = substitution
+        return model_response
+
+    async def _run_cache_operation(self, cache, func, *args):
+        """Run a response cache operation, off the event loop if the backend does disk I/O."""
+        if cache.backend.blocking:
+            return await self.run_blocking(func, *args)
+        return func(*args)
+
+    async def _call_model(
+        self,
+        provider: ModelProvider,
+        model_name: str,
+        progress_callback,
+        generate_kwargs: dict[str, Any],
+    ) -> ModelResponse:
+        """Make one rate-limited model call and record its outcome for the provider's circuit breaker."""
+        if progress_callback is None or not self._model_supports_streaming(provider, model_name):
+            call = functools.partial(provider.agenerate_content, model_name=model_name, **generate_kwargs)
+        else:
+            call = functools.partial(
+                self._stream_model_response, provider, model_name, progress_callback, **generate_kwargs
+            )
+        return await limited_model_call(
+            provider.get_provider_type(),
+            self._resolve_model_name(provider, model_name),
+            self._estimate_request_tokens(generate_kwargs),
+            call,
+        )
+
+    async def _hedged_model_response(
+        self,
+        provider: ModelProvider,
+        model_name: str,
+        progress_callback,
+        generate_kwargs: dict[str, Any],
+    ) -> ModelResponse:
+        """
+        Race the model call against a hedged copy sent once the primary is slow.
+
+        Latencies are tracked per tool and model since prompt sizes differ widely
+        between tools. The hedged copy does not stream progress; its details are
+        recorded in metadata["hedge"].
+        """
+        hedger = get_request_hedger()
+        model_key = f"{self.name}:{provider.get_provider_type().value}/{self._resolve_model_name(provider, model_name)}"
+        hedge_target = {}
+
+        async def primary() -> ModelResponse:
+            return await self._call_model(provider, model_name, progress_callback, generate_kwargs)
+
+        async def secondary() -> ModelResponse:
+            hedge_provider, hedge_model = self._select_hedge_model(provider, model_name)
+            hedge_target.update(provider=hedge_provider.get_provider_type().value, model=hedge_model)
+            hedge_kwargs = self._adapt_generate_kwargs(hedge_provider, hedge_model, generate_kwargs)
+            return await self._call_model(hedge_provider, hedge_model, None, hedge_kwargs)
+
+        model_response, hedge_info = await hedger.race(
+            self.name, model_key, primary, secondary, extra_tokens=self._estimate_request_tokens(generate_kwargs)
+        )
+        if hedge_info:
+            model_response.metadata["hedge"] = {**hedge_info, **hedge_target}
+        return model_response
+
+    @staticmethod
+    def _select_hedge_model(provider: ModelProvider, model_name: str) -> tuple[ModelProvider, str]:
+        """Pick where a hedged request goes: HEDGE_MODEL, an equivalent on another provider, or the same model."""
+        hedge_model = get_request_hedger().hedge_model
+        if hedge_model:
+            hedge_provider = ModelProviderRegistry.get_provider_for_model(hedge_model)
+            if hedge_provider:
+                return hedge_provider, hedge_model
+            logging.getLogger(__name__).warning(f"HEDGE_MODEL '{hedge_model}' is not available, using default")
+
+        failover = ModelProviderRegistry.get_failover_model(model_name, provider.get_provider_type())
+        return failover or (provider, model_name)
+
+    @staticmethod
+    def _estimate_request_tokens(generate_kwargs: dict[str, Any]) -> int:
+        """Estimate the input tokens of a request from its prompt and system prompt."""
+        return estimate_tokens(generate_kwargs.get("prompt") or "") + estimate_tokens(
+            generate_kwargs.get("system_prompt") or ""
+        )
+
+    def _route_around_open_circuit(
+        self, provider: ModelProvider, model_name: str, generate_kwargs: dict[str, Any]
+    ) -> tuple[ModelProvider, str, dict[str, Any], Optional[dict[str, str]]]:
+        """
+        Pick a healthy provider for the call.
+
+        Returns the inputs unchanged while the provider's circuit admits calls.
+        Otherwise returns an equivalent model on another provider, with the
+        temperature and thinking mode adjusted to its capabilities, plus a
+        description of the substitution.
+
+        Raises:
+            RuntimeError: If the circuit is open and no substitute is configured
+        """
+        health = get_health_monitor()
+        provider_type = provider.get_provider_type()
+        if health.allow_request(provider_type):
+            return provider, model_name, generate_kwargs, None
+
+        failover = ModelProviderRegistry.get_failover_model(model_name, provider_type)
+        if failover is None or not health.allow_request(failover[0].get_provider_type()):
+            raise RuntimeError(
+                f"{provider_type.value} is unavailable after repeated failures (circuit open, next attempt in "
+                f"{health.retry_in(provider_type):.0f}s) and no other configured provider offers {model_name}"
+            )
+
+        substitute, substitute_model = failover
+        substitute_kwargs = self._adapt_generate_kwargs(substitute, substitute_model, generate_kwargs)
+
+        substitution = {
+            "reason": "circuit_open",
+            "requested_provider": provider_type.value,
+            "requested_model": model_name,
+            "provider": substitute.get_provider_type().value,
+            "model": substitute_model,
+        }
+        logging.getLogger(f"tools.{self.name}").warning(
+            f"{provider_type.value} circuit is open, routing {model_name} to "
+            f"{substitution['provider']} model {substitute_model}"
+        )
+        return substitute, substitute_model, substitute_kwargs, substitution
+
+    @staticmethod
+    def _adapt_generate_kwargs(
+        provider: ModelProvider, model_name: str, generate_kwargs: dict[str, Any]
+    ) -> dict[str, Any]:
+        """Adjust temperature and thinking mode of a request for a different model."""
+        adapted = dict(generate_kwargs)
+        try:
+            constraint = provider.get_capabilities(model_name).temperature_constraint
+            temperature = adapted.get("temperature")
+            if temperature is not None and not constraint.validate(temperature):
+                adapted["temperature"] = constraint.get_corrected_value(temperature)
+        except Exception:
+            pass
+        if adapted.get("thinking_mode") and not provider.supports_thinking_mode(model_name):
+            adapted["thinking_mode"] = None
+        return adapted
+
+    @staticmethod
+    def _resolve_model_name(provider: ModelProvider, model_name: str) -> str:
+        """Resolve an alias to the provider's canonical model name (used as the rate limit key)."""
+        try:
+            resolved = provider.get_capabilities(model_name).model_name
+        except Exception:
+            return model_name
+        return resolved if isinstance(resolved, str) else model_name
+
+    @staticmethod
+    def _model_supports_streaming(provider: ModelProvider, model_name: str) -> bool:
+        try:
+            return provider.get_capabilities(model_name).supports_streaming
+        except Exception:
+            return False
+
+    async def _stream_model_response(
+        self, provider: ModelProvider, model_name: str, progress_callback, **generate_kwargs
+    ) -> ModelResponse:
+        """
+        Assemble a streamed response, reporting progress as chunks arrive.
+
+        Notifications are throttled to STREAM_PROGRESS_INTERVAL_SECONDS. If the
+        client cancels the request, the stream is closed as the task unwinds.
+        """
+        logger = logging.getLogger(f"tools.{self.name}")
+        parts = []
+        received_chars = 0
+        final_chunk = None
+        last_report = time.monotonic()
+
+        async for chunk in provider.astream_content(model_name=model_name, **generate_kwargs):
+            if chunk.final:
+                final_chunk = chunk
+            if not chunk.content:
+                continue
+
+            parts.append(chunk.content)
+            received_chars += len(chunk.content)
+
+            now = time.monotonic()
+            if now - last_report >= STREAM_PROGRESS_INTERVAL_SECONDS:
+                last_report = now
+                try:
+                    await progress_callback(
+                        received_chars, f"{self.name}: received {received_chars:,} characters from {model_name}"
+                    )
+                except Exception as e:
+                    logger.debug(f"Failed to send progress notification for {self.name}: {e}")
+
+        final_chunk = final_chunk or StreamChunk()
+        logger.debug(f"Streamed {received_chars:,} characters in {len(parts)} chunks from {model_name}")
+
+        return ModelResponse(
+            content="".join(parts),
+            usage=final_chunk.usage,
+            model_name=final_chunk.model_name or model_name,
+            friendly_name=final_chunk.friendly_name or model_name,
+            provider=provider.get_provider_type(),
+            metadata={**final_chunk.metadata, "streamed": True},
+        )
+
     def _parse_response(self, raw_text: str, request, model_info: Optional[dict] = None) -> ToolOutput:
         """
         Parse the raw response and check for clarification requests.
@@ -1430,7 +1757,7 @@ When recommending searches, be specific about what information you need and why
             # Add this response as the first turn (assistant turn)
             # Use actually processed files from file preparation instead of original request files
             # This ensures directories are tracked as their individual expanded files
-            request_files = getattr(self, "_actually_processed_files", []) or getattr(request, "files", []) or []
+            request_files = getattr(request, "_processed_files", []) or getattr(request, "files", []) or []
             # Extract model metadata
             model_provider = None
             model_name = None
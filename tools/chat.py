@@ -75,6 +75,11 @@ class ChatTool(BaseTool):
                     "description": "Enable web search for documentation, best practices, and current information. Particularly useful for: brainstorming sessions, architectural design discussions, exploring industry best practices, working with specific frameworks/technologies, researching solutions to complex problems, or when current documentation and community insights would enhance the analysis.",
                     "default": True,
                 },
+                "use_cache": {
+                    "type": "boolean",
+                    "description": "Reuse the cached response to an identical earlier request when the server's response cache is enabled. Set to false to force a fresh answer.",
+                    "default": True,
+                },
                 "continuation_id": {
                     "type": "string",
                     "description": "Thread continuation ID for multi-turn conversations. Can be used to continue conversations across different tools. Only provide this if continuing a previous conversation thread.",
@@ -124,10 +129,14 @@ class ChatTool(BaseTool):
 
         # Add context files if provided (using centralized file handling with filtering)
         if request.files:
-            file_content, processed_files = self._prepare_file_content_for_prompt(
-                request.files, request.continuation_id, "Context files"
+            file_content, processed_files = await self.run_blocking(
+                self._prepare_file_content_for_prompt,
+                request.files,
+                request.continuation_id,
+                "Context files",
+                arguments=request._arguments,
             )
-            self._actually_processed_files = processed_files
+            request._processed_files = processed_files
             if file_content:
                 user_content = f"{user_content}\n\n=== CONTEXT FILES ===\n{file_content}\n=== END CONTEXT ===="
 
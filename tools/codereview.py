@@ -130,6 +130,11 @@ class CodeReviewTool(BaseTool):
                     "description": "Enable web search for documentation, best practices, and current information. Particularly useful for: brainstorming sessions, architectural design discussions, exploring industry best practices, working with specific frameworks/technologies, researching solutions to complex problems, or when current documentation and community insights would enhance the analysis.",
                     "default": True,
                 },
+                "use_cache": {
+                    "type": "boolean",
+                    "description": "Reuse the cached response to an identical earlier request when the server's response cache is enabled. Set to false to force a fresh answer.",
+                    "default": True,
+                },
                 "continuation_id": {
                     "type": "string",
                     "description": "Thread continuation ID for multi-turn conversations. Can be used to continue conversations across different tools. Only provide this if continuing a previous conversation thread.",
@@ -196,8 +201,10 @@ class CodeReviewTool(BaseTool):
 
         # Use centralized file processing logic
         continuation_id = getattr(request, "continuation_id", None)
-        file_content, processed_files = self._prepare_file_content_for_prompt(request.files, continuation_id, "Code")
-        self._actually_processed_files = processed_files
+        file_content, processed_files = await self.run_blocking(
+            self._prepare_file_content_for_prompt, request.files, continuation_id, "Code", arguments=request._arguments
+        )
+        request._processed_files = processed_files
 
         # Build customized review instructions based on review type
         review_focus = []
@@ -175,6 +175,11 @@ class Precommit(BaseTool):
                     "description": "Enable web search for documentation, best practices, and current information. Particularly useful for: brainstorming sessions, architectural design discussions, exploring industry best practices, working with specific frameworks/technologies, researching solutions to complex problems, or when current documentation and community insights would enhance the analysis.",
                     "default": True,
                 },
+                "use_cache": {
+                    "type": "boolean",
+                    "description": "Reuse the cached response to an identical earlier request when the server's response cache is enabled. Set to false to force a fresh answer.",
+                    "default": True,
+                },
                 "continuation_id": {
                     "type": "string",
                     "description": "Thread continuation ID for multi-turn conversations. Can be used to continue conversations across different tools. Only provide this if continuing a previous conversation thread.",
@@ -202,50 +207,28 @@ class Precommit(BaseTool):
 
         return ToolModelCategory.EXTENDED_REASONING
 
-    async def prepare_prompt(self, request: PrecommitRequest) -> str:
-        """Prepare the prompt with git diff information."""
-        # Check for prompt.txt in files
-        prompt_content, updated_files = self.handle_prompt_file(request.files)
-
-        # If prompt.txt was found, use it as prompt
-        if prompt_content:
-            request.prompt = prompt_content
-
-        # Update request files list
-        if updated_files is not None:
-            request.files = updated_files
+    def _collect_git_changes(
+        self, request: PrecommitRequest, translated_path: str, max_tokens: int
+    ) -> tuple[list[str], list[str], list[dict], int]:
+        """
+        Discover repositories and collect their diffs.
 
-        # Check user input size at MCP transport boundary (before adding internal content)
-        user_content = request.prompt if request.prompt else ""
-        size_check = self.check_prompt_size(user_content)
-        if size_check:
-            from tools.models import ToolOutput
-
-            raise ValueError(f"MCP_SIZE_CHECK:{ToolOutput(**size_check).model_dump_json()}")
-
-        # Translate the path and files if running in Docker
-        translated_path = translate_path_for_environment(request.path)
-        translated_files = translate_file_paths(request.files)
-
-        # Check if the path translation resulted in an error path
-        if translated_path.startswith("/inaccessible/"):
-            raise ValueError(
-                f"The path '{request.path}' is not accessible from within the Docker container. "
-                f"The Docker container can only access files within the mounted workspace. "
-                f"Please ensure the path is within the mounted directory or adjust your Docker volume mounts."
-            )
+        Runs git subprocesses and reads untracked files, so prepare_prompt calls it
+        through the tool executor rather than on the event loop.
 
+        Returns:
+            tuple: (repositories, formatted diffs, repository summaries, diff tokens)
+        """
         # Find all git repositories
         repositories = find_git_repositories(translated_path, request.max_depth)
 
         if not repositories:
-            return "No git repositories found in the specified path."
+            return repositories, [], [], 0
 
         # Collect all diffs directly
         all_diffs = []
         repo_summaries = []
         total_tokens = 0
-        max_tokens = DEFAULT_CONTEXT_WINDOW - 50000  # Reserve tokens for prompt and response
 
         for repo_path in repositories:
             repo_name = os.path.basename(repo_path) or "root"
@@ -399,6 +382,51 @@ class Precommit(BaseTool):
                     }
                 )
 
+        return repositories, all_diffs, repo_summaries, total_tokens
+
+    async def prepare_prompt(self, request: PrecommitRequest) -> str:
+        """Prepare the prompt with git diff information."""
+        # Check for prompt.txt in files
+        prompt_content, updated_files = self.handle_prompt_file(request.files)
+
+        # If prompt.txt was found, use it as prompt
+        if prompt_content:
+            request.prompt = prompt_content
+
+        # Update request files list
+        if updated_files is not None:
+            request.files = updated_files
+
+        # Check user input size at MCP transport boundary (before adding internal content)
+        user_content = request.prompt if request.prompt else ""
+        size_check = self.check_prompt_size(user_content)
+        if size_check:
+            from tools.models import ToolOutput
+
+            raise ValueError(f"MCP_SIZE_CHECK:{ToolOutput(**size_check).model_dump_json()}")
+
+        # Translate the path and files if running in Docker
+        translated_path = translate_path_for_environment(request.path)
+        translated_files = translate_file_paths(request.files)
+
+        # Check if the path translation resulted in an error path
+        if translated_path.startswith("/inaccessible/"):
+            raise ValueError(
+                f"The path '{request.path}' is not accessible from within the Docker container. "
+                f"The Docker container can only access files within the mounted workspace. "
+                f"Please ensure the path is within the mounted directory or adjust your Docker volume mounts."
+            )
+
+        max_tokens = DEFAULT_CONTEXT_WINDOW - 50000  # Reserve tokens for prompt and response
+
+        # Git discovery and diffing spawn subprocesses - keep them off the event loop
+        repositories, all_diffs, repo_summaries, total_tokens = await self.run_blocking(
+            self._collect_git_changes, request, translated_path, max_tokens
+        )
+
+        if not repositories:
+            return "No git repositories found in the specified path."
+
         if not all_diffs:
             return "No pending changes found in any of the git repositories."
 
@@ -411,14 +439,16 @@ class Precommit(BaseTool):
             remaining_tokens = max_tokens - total_tokens
 
             # Use centralized file handling with filtering for duplicate prevention
-            file_content, processed_files = self._prepare_file_content_for_prompt(
+            file_content, processed_files = await self.run_blocking(
+                self._prepare_file_content_for_prompt,
                 translated_files,
                 request.continuation_id,
                 "Context files",
                 max_tokens=remaining_tokens + 1000,  # Add back the reserve that was calculated
                 reserve_tokens=1000,  # Small reserve for formatting
+                arguments=request._arguments,
             )
-            self._actually_processed_files = processed_files
+            request._processed_files = processed_files
 
             if file_content:
                 context_tokens = estimate_tokens(file_content)
@@ -122,6 +122,11 @@ class RefactorTool(BaseTool):
                     "enum": ["minimal", "low", "medium", "high", "max"],
                     "description": "Thinking depth: minimal (0.5% of model max), low (8%), medium (33%), high (67%), max (100% of model max)",
                 },
+                "use_cache": {
+                    "type": "boolean",
+                    "description": "Reuse the cached response to an identical earlier request when the server's response cache is enabled. Set to false to force a fresh answer.",
+                    "default": True,
+                },
                 "continuation_id": {
                     "type": "string",
                     "description": (
@@ -409,7 +414,7 @@ class RefactorTool(BaseTool):
         continuation_id = getattr(request, "continuation_id", None)
 
         # Get model context for token budget calculation
-        model_name = getattr(self, "_current_model_name", None)
+        model_name = self._get_request_model_name(request)
         available_tokens = None
 
         if model_name:
@@ -433,8 +438,8 @@ class RefactorTool(BaseTool):
 
         if request.style_guide_examples:
             logger.debug(f"[REFACTOR] Processing {len(request.style_guide_examples)} style guide examples")
-            style_examples_content, style_examples_note = self._process_style_guide_examples(
-                request.style_guide_examples, continuation_id, available_tokens
+            style_examples_content, style_examples_note = await self.run_blocking(
+                self._process_style_guide_examples, request.style_guide_examples, continuation_id, available_tokens
             )
             if style_examples_content:
                 logger.info("[REFACTOR] Style guide examples processed successfully for pattern reference")
@@ -479,10 +484,16 @@ class RefactorTool(BaseTool):
 
         # Use centralized file processing logic for main code files (with line numbers enabled)
         logger.debug(f"[REFACTOR] Preparing {len(code_files_to_process)} code files for analysis")
-        code_content, processed_files = self._prepare_file_content_for_prompt(
-            code_files_to_process, continuation_id, "Code to analyze", max_tokens=remaining_tokens, reserve_tokens=2000
+        code_content, processed_files = await self.run_blocking(
+            self._prepare_file_content_for_prompt,
+            code_files_to_process,
+            continuation_id,
+            "Code to analyze",
+            max_tokens=remaining_tokens,
+            reserve_tokens=2000,
+            arguments=request._arguments,
         )
-        self._actually_processed_files = processed_files
+        request._processed_files = processed_files
 
         if code_content:
             from utils.token_utils import estimate_tokens
@@ -113,6 +113,11 @@ class TestGenTool(BaseTool):
                     "enum": ["minimal", "low", "medium", "high", "max"],
                     "description": "Thinking depth: minimal (0.5% of model max), low (8%), medium (33%), high (67%), max (100% of model max)",
                 },
+                "use_cache": {
+                    "type": "boolean",
+                    "description": "Reuse the cached response to an identical earlier request when the server's response cache is enabled. Set to false to force a fresh answer.",
+                    "default": True,
+                },
                 "continuation_id": {
                     "type": "string",
                     "description": (
@@ -290,7 +295,7 @@ class TestGenTool(BaseTool):
         continuation_id = getattr(request, "continuation_id", None)
 
         # Get model context for token budget calculation
-        model_name = getattr(self, "_current_model_name", None)
+        model_name = self._get_request_model_name(request)
         available_tokens = None
 
         if model_name:
@@ -314,8 +319,8 @@ class TestGenTool(BaseTool):
 
         if request.test_examples:
             logger.debug(f"[TESTGEN] Processing {len(request.test_examples)} test examples")
-            test_examples_content, test_examples_note = self._process_test_examples(
-                request.test_examples, continuation_id, available_tokens
+            test_examples_content, test_examples_note = await self.run_blocking(
+                self._process_test_examples, request.test_examples, continuation_id, available_tokens
             )
             if test_examples_content:
                 logger.info("[TESTGEN] Test examples processed successfully for pattern reference")
@@ -359,10 +364,16 @@ class TestGenTool(BaseTool):
 
         # Use centralized file processing logic for main code files (after deduplication)
         logger.debug(f"[TESTGEN] Preparing {len(code_files_to_process)} code files for analysis")
-        code_content, processed_files = self._prepare_file_content_for_prompt(
-            code_files_to_process, continuation_id, "Code to test", max_tokens=remaining_tokens, reserve_tokens=2000
+        code_content, processed_files = await self.run_blocking(
+            self._prepare_file_content_for_prompt,
+            code_files_to_process,
+            continuation_id,
+            "Code to test",
+            max_tokens=remaining_tokens,
+            reserve_tokens=2000,
+            arguments=request._arguments,
         )
-        self._actually_processed_files = processed_files
+        request._processed_files = processed_files
 
         if code_content:
             from utils.token_utils import estimate_tokens
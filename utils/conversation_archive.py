@@ -0,0 +1,209 @@
+"""
+Conversation archive
+
+Threads expire CONVERSATION_TIMEOUT_HOURS after their last write. With an
+archive configured, threads idle for CONVERSATION_ARCHIVE_IDLE_MINUTES are
+moved out of the conversation store into a SQLite file on local disk, each
+thread and its file snapshots as one zlib-compressed row. Continuing an
+archived thread restores it to the store on demand, so an investigation can
+be picked up the next day while Redis only holds the threads in use.
+
+The server sweeps for idle threads in the background. A thread written
+while it is being archived stays in the store and its archived copy is
+dropped.
+
+Environment Variables:
+- CONVERSATION_ARCHIVE_PATH: SQLite file for archived threads; unset disables archiving (default: unset)
+- CONVERSATION_ARCHIVE_IDLE_MINUTES: Idle time before a thread is archived; capped at half the
+    conversation timeout so threads are archived before they expire (default: 60)
+- CONVERSATION_ARCHIVE_RETENTION_DAYS: Days an archived thread is kept (default: 7)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Optional
+
+from utils import conversation_memory
+from utils.conversation_codec import dump_json, load_json
+from utils.conversation_memory import ThreadContext
+from utils.env import get_env_number
+
+logger = logging.getLogger(__name__)
+
+# Longest wait between background sweeps, in seconds
+ARCHIVE_SWEEP_INTERVAL = 300
+
+# Most threads moved by one sweep; the rest wait for the next
+ARCHIVE_BATCH_SIZE = 100
+
+
+class ConversationArchive:
+    """Archived threads in a SQLite file, one compressed row per thread."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS archived_threads ("
+            "thread_id TEXT PRIMARY KEY, thread BLOB NOT NULL, files BLOB NOT NULL, archived_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS archived_threads_at ON archived_threads (archived_at)")
+
+    def put(self, context: ThreadContext, files: dict[str, str]) -> None:
+        """Archive a thread with the file snapshots (SHA-256 -> content) it references."""
+        thread = zlib.compress(dump_json(context).encode("utf-8"), 6)
+        snapshots = zlib.compress(json.dumps(files).encode("utf-8"), 6)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO archived_threads (thread_id, thread, files, archived_at) VALUES (?, ?, ?, ?)",
+                (context.thread_id, thread, snapshots, time.time()),
+            )
+
+    def get(self, thread_id: str) -> Optional[tuple[ThreadContext, dict[str, str]]]:
+        """Load an archived thread and its file snapshots, or None if it is not archived."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT thread, files FROM archived_threads WHERE thread_id = ?", (thread_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        context = load_json(ThreadContext, zlib.decompress(row[0]).decode("utf-8"))
+        return context, json.loads(zlib.decompress(row[1]))
+
+    def remove(self, thread_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM archived_threads WHERE thread_id = ?", (thread_id,))
+
+    def purge(self, archived_before: float) -> int:
+        """Drop threads archived before the given Unix time; returns how many."""
+        with self._lock:
+            return self._conn.execute("DELETE FROM archived_threads WHERE archived_at < ?", (archived_before,)).rowcount
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM archived_threads").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# One archive per path; the path is read from the environment on each call
+_archives: dict[str, ConversationArchive] = {}
+_archives_lock = threading.Lock()
+
+
+def get_archive() -> Optional[ConversationArchive]:
+    """
+    Get the archive at CONVERSATION_ARCHIVE_PATH.
+
+    Returns:
+        ConversationArchive, or None if archiving is disabled
+    """
+    path = os.getenv("CONVERSATION_ARCHIVE_PATH")
+    if not path:
+        return None
+    with _archives_lock:
+        if path not in _archives:
+            _archives[path] = ConversationArchive(path)
+        return _archives[path]
+
+
+def get_idle_seconds() -> float:
+    """Seconds without a write after which a thread is archived."""
+    idle = get_env_number("CONVERSATION_ARCHIVE_IDLE_MINUTES", 60) * 60
+    timeout = conversation_memory.CONVERSATION_TIMEOUT_SECONDS
+    if idle > timeout / 2:
+        # Leave time for a sweep to run before the thread expires
+        logger.debug(f"[ARCHIVE] Idle time {idle:.0f}s is too close to the {timeout}s thread timeout, using half")
+        return timeout / 2
+    return idle
+
+
+def archive_idle_threads() -> int:
+    """
+    Move threads idle for longer than the idle time from the store to the archive.
+
+    Each thread is archived first and then removed from the store only if it
+    has not been written since it was read; otherwise the archived copy is
+    dropped. Archived threads past their retention are purged.
+
+    Returns:
+        int: Number of threads archived
+    """
+    archive = get_archive()
+    if archive is None:
+        return 0
+
+    from utils.conversation_store import file_hashes, get_conversation_store
+
+    store = get_conversation_store()
+    now = time.time()
+    thread_ids = store.idle_threads(now - get_idle_seconds(), ARCHIVE_BATCH_SIZE)
+    archived = 0
+    for thread_id, context in zip(thread_ids, store.get_many(thread_ids)):
+        if context is None:
+            continue
+        hashes = sorted(file_hashes(context.turns))
+        archive.put(context, store.get_files(hashes) if hashes else {})
+        if store.delete(thread_id, context.version):
+            archived += 1
+        else:
+            archive.remove(thread_id)
+            logger.debug(f"[ARCHIVE] Thread {thread_id} was written while being archived; keeping it in the store")
+
+    retention = get_env_number("CONVERSATION_ARCHIVE_RETENTION_DAYS", 7) * 86400
+    purged = archive.purge(now - retention)
+    if archived or purged:
+        logger.info(f"[ARCHIVE] Archived {archived} idle threads, purged {purged} past retention")
+    return archived
+
+
+def restore_thread(thread_id: str) -> Optional[ThreadContext]:
+    """
+    Move an archived thread back to the conversation store.
+
+    Returns:
+        ThreadContext: The restored thread, or None if it is not archived
+    """
+    archive = get_archive()
+    if archive is None:
+        return None
+    archived = archive.get(thread_id)
+    if archived is None:
+        return None
+
+    from utils.conversation_store import get_conversation_store
+
+    context, files = archived
+    store = get_conversation_store()
+    store.create(context)
+    if files:
+        store.put_files(thread_id, files)
+    archive.remove(thread_id)
+    logger.info(f"[ARCHIVE] Restored thread {thread_id} ({len(context.turns)} turns) from the archive")
+    return context
+
+
+async def run_archiver() -> None:
+    """Archive idle threads periodically until cancelled."""
+    from utils.tool_executor import run_blocking
+
+    while True:
+        timeout = conversation_memory.CONVERSATION_TIMEOUT_SECONDS
+        await asyncio.sleep(min(ARCHIVE_SWEEP_INTERVAL, (timeout - get_idle_seconds()) / 2))
+        try:
+            await run_blocking("conversation", archive_idle_threads)
+        except Exception as e:
+            logger.warning(f"Conversation archive sweep failed: {type(e).__name__}: {e}")
@@ -0,0 +1,215 @@
+"""
+Conversation compaction
+
+When a conversation outgrows the model's history budget,
+build_conversation_history has to leave out its oldest turns. Compaction
+summarises those turns with a fast, inexpensive model instead. The summary is
+stored on the thread as a synthetic turn (ThreadContext.summary) and replaces
+the turns it covers in every later render, so a long session keeps its early
+decisions at a fraction of the tokens.
+
+Compaction runs when the share of turns that fit the budget falls below the
+threshold. It summarises enough old turns that the rest fill about half the
+budget, leaving room for the conversation to grow before the next summary.
+A later summary absorbs the previous one. The summary request goes through
+the same rate limiter, circuit breaker and retry policy as tool calls, and is
+skipped while the compaction model's provider circuit is open.
+
+build_compacted_history renders history on the tool executor and awaits the
+summary on the event loop, so no executor worker or tool slot is held while
+the compaction model answers. History built directly with
+build_conversation_history drops the turns that do not fit instead.
+
+Environment Variables:
+- CONVERSATION_COMPACTION_THRESHOLD: Compact when fewer than this fraction of turns fit; 0 disables (default: 0.5)
+- CONVERSATION_COMPACTION_MODEL: Model that writes summaries (default: the fast-response fallback, e.g. flash or o4-mini)
+"""
+
+import functools
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+from utils import conversation_memory
+from utils.conversation_memory import ConversationTurn, ThreadContext
+from utils.token_utils import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Share of the turn budget left to unsummarised turns after compacting
+COMPACTION_TARGET_FRACTION = 0.5
+
+SUMMARY_SYSTEM_PROMPT = """You condense the early part of a conversation between Claude and other AI models \
+so the conversation can continue within a limited context window.
+
+Keep every decision, conclusion, agreed plan, rejected option (and why), open question, requirement and \
+constraint. Keep file paths, function names, identifiers and numbers exactly as written. Drop pleasantries, \
+repetition and reasoning that led nowhere. If an earlier summary is included, fold it into yours.
+
+Reply with the summary only, as concise bullet points grouped by topic."""
+
+
+def get_compaction_threshold() -> float:
+    """Retained-turn fraction below which history is compacted (0 disables compaction)."""
+    value = os.getenv("CONVERSATION_COMPACTION_THRESHOLD", "0.5")
+    try:
+        threshold = float(value)
+    except ValueError:
+        logger.warning(f"Invalid CONVERSATION_COMPACTION_THRESHOLD value ('{value}'), using default of 0.5")
+        return 0.5
+    return min(max(threshold, 0.0), 1.0)
+
+
+@dataclass
+class CompactionPlan:
+    """Old turns of a thread to be replaced by a summary."""
+
+    thread_id: str
+    entries: list[tuple[int, ConversationTurn]]  # (turn number, turn), oldest first; 0 is the previous summary
+    covered: int  # Turns the summary will stand in for
+
+
+def plan_compaction(
+    context: ThreadContext,
+    entries: list[tuple[int, ConversationTurn]],
+    included: int,
+    turn_budget: int,
+    model_context,
+) -> Optional[CompactionPlan]:
+    """
+    Decide whether too few turns fit the history budget, and which to summarise.
+
+    Args:
+        context: Thread whose history is being built; the summary is stored on it
+        entries: (turn number, turn) for every turn that would be rendered, oldest
+            first; number 0 is the current summary
+        included: How many of the newest entries fit the budget
+        turn_budget: Tokens available for turns
+        model_context: ModelContext used to measure turns
+
+    Returns:
+        CompactionPlan: The turns to summarise, or None if compaction is not needed
+    """
+    threshold = get_compaction_threshold()
+    if threshold <= 0 or included / len(entries) >= threshold:
+        return None
+
+    keep = conversation_memory._fill_turn_budget(entries, model_context, int(turn_budget * COMPACTION_TARGET_FRACTION))
+    older = entries[: len(entries) - len(keep)]
+    covered = max(turn_num for turn_num, _ in older)
+    if not covered:
+        # Only the previous summary is too old; nothing new to fold in
+        return None
+    logger.info(f"[HISTORY] Compacting turns 1-{covered} of thread {context.thread_id} ({included}/{len(entries)} fit)")
+    return CompactionPlan(context.thread_id, older, covered)
+
+
+async def build_compacted_history(
+    context: ThreadContext, model_context, executor_key: str = "conversation"
+) -> tuple[str, int]:
+    """
+    Build conversation history, summarising old turns that no longer fit.
+
+    History is rendered on the tool executor. If compaction is due, the summary
+    is awaited here on the event loop, stored on the thread, and the history
+    rendered again with it. Without a summary (not needed, circuit open or the
+    request failed) the first rendering, which drops the oldest turns, is kept.
+
+    Args:
+        context: Thread being continued
+        model_context: ModelContext for token allocation
+        executor_key: Tool name whose executor limit the rendering counts against
+
+    Returns:
+        tuple[str, int]: (formatted_conversation_history, total_tokens_used)
+    """
+    from utils.tool_executor import run_blocking
+
+    plans: list[CompactionPlan] = []
+    history = await run_blocking(
+        executor_key,
+        conversation_memory.build_conversation_history,
+        context,
+        model_context,
+        on_compaction=plans.append,
+    )
+    if not plans:
+        return history
+
+    summary = await summarize(plans[0])
+    if summary is None:
+        return history
+
+    if not await run_blocking(executor_key, conversation_memory.set_thread_summary, context.thread_id, summary):
+        logger.debug(
+            f"[HISTORY] Could not store summary for thread {context.thread_id}; using it for this request only"
+        )
+    return await run_blocking(
+        executor_key, conversation_memory.build_conversation_history, context, model_context, summary=summary
+    )
+
+
+async def summarize(plan: CompactionPlan) -> Optional[ConversationTurn]:
+    """
+    Ask the compaction model for a summary of the planned turns.
+
+    Returns:
+        ConversationTurn: The summary, or None if the model is unavailable or the request failed
+    """
+    from providers.health import get_health_monitor
+    from providers.registry import ModelProviderRegistry
+    from tools.models import ToolModelCategory
+    from utils.rate_limiter import limited_model_call
+
+    model_name = os.getenv("CONVERSATION_COMPACTION_MODEL") or ModelProviderRegistry.get_preferred_fallback_model(
+        ToolModelCategory.FAST_RESPONSE
+    )
+    transcript = "\n".join(
+        f"{conversation_memory._turn_heading(turn, turn_num)}\n{conversation_memory._turn_body(turn)}"
+        for turn_num, turn in plan.entries
+    )
+
+    try:
+        provider = ModelProviderRegistry.get_provider_for_model(model_name)
+        if provider is None:
+            logger.debug(f"[HISTORY] No provider for compaction model {model_name}")
+            return None
+        if not get_health_monitor().allow_request(provider.get_provider_type()):
+            logger.debug(f"[HISTORY] Circuit open for {provider.get_provider_type().value}, not compacting")
+            return None
+        capabilities = provider.get_capabilities(model_name)
+        prompt = f"Summarise these conversation turns:\n{transcript}"
+        # Same rate limits, circuit breaker records and retries as tool calls
+        response = await limited_model_call(
+            provider.get_provider_type(),
+            capabilities.model_name,
+            estimate_tokens(prompt) + estimate_tokens(SUMMARY_SYSTEM_PROMPT),
+            functools.partial(
+                provider.agenerate_content,
+                prompt=prompt,
+                model_name=model_name,
+                system_prompt=SUMMARY_SYSTEM_PROMPT,
+                temperature=capabilities.temperature_constraint.get_corrected_value(0.2),
+            ),
+        )
+    except Exception as e:
+        logger.warning(f"Conversation compaction with {model_name} failed: {type(e).__name__}: {e}")
+        return None
+
+    if not response.content or not response.content.strip():
+        return None
+
+    summary = ConversationTurn(
+        role="assistant",
+        content=response.content.strip(),
+        timestamp=datetime.now(timezone.utc).isoformat(),
+        model_provider=provider.get_provider_type().value,
+        model_name=response.model_name or model_name,
+        model_metadata={"usage": response.usage},
+        summarized_turns=plan.covered,
+    )
+    summary.rendered_header = conversation_memory._turn_header(summary)
+    summary.token_count = conversation_memory._estimate_tokens(conversation_memory._turn_body(summary))
+    return summary
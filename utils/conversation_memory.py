@@ -44,15 +44,54 @@ USAGE EXAMPLE:
 5. Tool B adds its response: add_turn(UUID, "assistant", response, tool_name="codereview")
 
 This enables true AI-to-AI collaboration across the entire tool ecosystem.
+
+Threads are persisted by the backend selected with CONVERSATION_STORE (redis,
+memory or sqlite; see utils.conversation_store). Redis is the default.
+Threads idle for a while can be moved to an on-disk archive and are restored
+when continued (see utils.conversation_archive).
+Stored threads and turns are JSON, written and parsed with orjson when it is
+installed and with Pydantic otherwise; both produce the same documents.
+
+Redis Environment Variables:
+- REDIS_URL: Redis connection URL (default: redis://localhost:6379/0)
+- REDIS_MAX_CONNECTIONS: Size of the shared connection pool (default: 50)
+- REDIS_SOCKET_TIMEOUT: Seconds to wait for a Redis reply (default: 5)
+- REDIS_SOCKET_CONNECT_TIMEOUT: Seconds to wait when connecting (default: 5)
+- REDIS_HEALTH_CHECK_INTERVAL: Seconds before an idle connection is pinged on reuse (default: 30)
+- CONVERSATION_STORAGE_LAYOUT: How threads are stored in Redis (default: blob)
+    blob:   one JSON document per thread at thread:{id}; every append rewrites it
+    append: metadata hash at thread:{id}:meta plus a turn list at thread:{id}:turns;
+            appends are O(1) and atomic. Blob-format threads are still readable
+            and are migrated on their next append.
+- CONVERSATION_COMPRESSION: zlib or none - compress stored threads and turns (default: zlib)
+- CONVERSATION_COMPRESSION_MIN_BYTES: Smallest payload worth compressing (default: 1024)
+- CONVERSATION_FILE_SNAPSHOTS: true or false - snapshot files when a turn is added, so
+    history shows the content that was discussed and rebuilds without disk reads (default: true)
+- CONVERSATION_WRITE_RETRIES: Times a write that lost a race with a concurrent write to the
+    same thread is retried on fresh data before it is given up (default: 5)
 """
 
+import asyncio
+import difflib
 import logging
 import os
+import re
+import threading
 import uuid
 from datetime import datetime, timezone
 from typing import Any, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
+
+from .conversation_codec import (  # noqa: F401 - re-exported for callers of this module
+    COMPRESSED_PAYLOAD_PREFIX,
+    ConversationRequestScope,
+    conversation_request_scope,
+    get_json_codec,
+    get_request_scope,
+    get_write_stats,
+)
+from .env import get_env_number
 
 logger = logging.getLogger(__name__)
 
@@ -85,6 +124,15 @@ except ValueError:
 
 CONVERSATION_TIMEOUT_SECONDS = CONVERSATION_TIMEOUT_HOURS * 3600
 
+# Longest parent chain followed when reconstructing a conversation
+MAX_THREAD_CHAIN_DEPTH = 20
+
+# Delimiters of the file block embedded in conversation history. The block is the
+# stable part of a continuation prompt; providers that cache context
+# (see providers.gemini_context_cache) locate it by these markers.
+FILES_SECTION_START = "=== FILES REFERENCED IN THIS CONVERSATION ==="
+FILES_SECTION_END = "=== END REFERENCED FILES ==="
+
 
 class ConversationTurn(BaseModel):
     """
@@ -102,6 +150,10 @@ class ConversationTurn(BaseModel):
         model_provider: Provider used (e.g., "google", "openai")
         model_name: Specific model used (e.g., "gemini-2.5-flash-preview-05-20", "o3-mini")
         model_metadata: Additional model-specific metadata (e.g., thinking mode, token usage)
+        rendered_header: Attribution shown in the history header (e.g. "Gemini using chat via google/flash")
+        token_count: Estimated tokens of the turn as rendered in conversation history
+        file_hashes: SHA-256 of the content snapshot taken for each file, by path
+        summarized_turns: Set on synthetic summary turns - how many of the oldest turns it replaces
     """
 
     role: str  # "user" or "assistant"
@@ -112,6 +164,13 @@ class ConversationTurn(BaseModel):
     model_provider: Optional[str] = None  # Model provider (google, openai, etc)
     model_name: Optional[str] = None  # Specific model used
     model_metadata: Optional[dict[str, Any]] = None  # Additional model info
+    # Set when the turn is written so history building need not re-render or re-measure it.
+    # Turns stored before these fields existed are rendered on demand.
+    rendered_header: Optional[str] = None
+    token_count: Optional[int] = None
+    # Files as they were when the turn was written; history embeds these snapshots
+    file_hashes: Optional[dict[str, str]] = None
+    summarized_turns: Optional[int] = None
 
 
 class ThreadContext(BaseModel):
@@ -130,6 +189,9 @@ class ThreadContext(BaseModel):
         tool_name: Name of the tool that initiated this thread
         turns: List of all conversation turns in chronological order
         initial_context: Original request data that started the conversation
+        ancestor_ids: Parent chain recorded at creation, nearest first
+        summary: Synthetic turn summarising the oldest turns of the chain (see utils.conversation_compaction)
+        version: Number of writes since creation; stores use it to detect concurrent writes
     """
 
     thread_id: str
@@ -139,14 +201,52 @@ class ThreadContext(BaseModel):
     tool_name: str  # Tool that created this thread (preserved for attribution)
     turns: list[ConversationTurn]
     initial_context: dict[str, Any]  # Original request parameters
+    ancestor_ids: list[str] = []  # Parent, grandparent, ... for one-round-trip chain loads
+    summary: Optional[ConversationTurn] = None  # Replaces the first summary.summarized_turns turns when rendered
+    version: int = 0  # Bumped by every append_turn/set_summary
+
+    # Storage layout the thread was read from or written to, if the store
+    # records one; not serialised. Kept by model_copy, so request snapshots carry it.
+    _layout: Optional[str] = PrivateAttr(default=None)
+
+
+def _remember(thread_id: str, context: Optional[ThreadContext], written: bool = False) -> None:
+    scope = get_request_scope()
+    if scope is not None:
+        scope.store(thread_id, context, written)
+
+
+def _redis_client_options() -> dict[str, Any]:
+    """Connection pool options shared by the sync and async Redis clients."""
+    return {
+        "decode_responses": True,
+        "max_connections": int(get_env_number("REDIS_MAX_CONNECTIONS", 50)),
+        "socket_timeout": get_env_number("REDIS_SOCKET_TIMEOUT", 5.0),
+        "socket_connect_timeout": get_env_number("REDIS_SOCKET_CONNECT_TIMEOUT", 5.0),
+        "health_check_interval": int(get_env_number("REDIS_HEALTH_CHECK_INTERVAL", 30)),
+        "retry_on_timeout": True,
+    }
+
+
+# Process-wide clients, created lazily. Each owns a connection pool, so every
+# thread operation reuses warm connections instead of dialling Redis again.
+_redis_client = None
+_redis_client_url: Optional[str] = None
+_redis_client_lock = threading.Lock()
+# The async pool's connections belong to the event loop that opened them
+_async_redis_client = None
+_async_redis_client_url: Optional[str] = None
+_async_redis_loop: Optional[asyncio.AbstractEventLoop] = None
 
 
 def get_redis_client():
     """
-    Get Redis client from environment configuration
+    Get the shared Redis client from environment configuration
 
-    Creates a Redis client using the REDIS_URL environment variable.
-    Defaults to localhost:6379/0 if not specified.
+    Returns a process-wide client backed by one connection pool, created on
+    first use from the REDIS_URL environment variable (default:
+    localhost:6379/0). The client is thread-safe and is rebuilt if REDIS_URL
+    changes.
 
     Returns:
         redis.Redis: Configured Redis client with decode_responses=True
@@ -154,14 +254,75 @@ def get_redis_client():
     Raises:
         ValueError: If redis package is not installed
     """
+    global _redis_client, _redis_client_url
     try:
         import redis
+    except ImportError:
+        raise ValueError("redis package required. Install with: pip install redis")
 
-        redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-        return redis.from_url(redis_url, decode_responses=True)
+    redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    with _redis_client_lock:
+        if _redis_client is None or _redis_client_url != redis_url:
+            _redis_client = redis.from_url(redis_url, **_redis_client_options())
+            _redis_client_url = redis_url
+            logger.debug(f"Created shared Redis client for {redis_url}")
+        return _redis_client
+
+
+def get_async_redis_client():
+    """
+    Get the shared asyncio Redis client for the running event loop
+
+    Same configuration as get_redis_client(), for coroutines that talk to Redis
+    directly instead of going through the tool executor. A new client is
+    created if the event loop changed, since pooled connections cannot be
+    reused across loops.
+
+    Returns:
+        redis.asyncio.Redis: Configured async Redis client with decode_responses=True
+
+    Raises:
+        ValueError: If redis package is not installed
+    """
+    global _async_redis_client, _async_redis_client_url, _async_redis_loop
+    try:
+        import redis.asyncio as aioredis
     except ImportError:
         raise ValueError("redis package required. Install with: pip install redis")
 
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    if (
+        _async_redis_client is None
+        or _async_redis_client_url != redis_url
+        or (loop is not None and _async_redis_loop is not None and loop is not _async_redis_loop)
+    ):
+        _async_redis_client = aioredis.from_url(redis_url, **_redis_client_options())
+        _async_redis_client_url = redis_url
+        _async_redis_loop = loop
+        logger.debug(f"Created shared async Redis client for {redis_url}")
+    elif _async_redis_loop is None:
+        _async_redis_loop = loop
+    return _async_redis_client
+
+
+def _get_store():
+    """The configured ConversationStore (imported lazily: the store module imports this one)."""
+    from utils.conversation_store import get_conversation_store
+
+    return get_conversation_store()
+
+
+def _restore_archived(thread_id: str) -> Optional[ThreadContext]:
+    """Restore a thread from the archive, if one is configured (see utils.conversation_archive)."""
+    from utils.conversation_archive import restore_thread
+
+    return restore_thread(thread_id)
+
 
 def create_thread(tool_name: str, initial_request: dict[str, Any], parent_thread_id: Optional[str] = None) -> str:
     """
@@ -195,6 +356,13 @@ def create_thread(tool_name: str, initial_request: dict[str, Any], parent_thread
         if k not in ["temperature", "thinking_mode", "model", "continuation_id"]
     }
 
+    # Record the whole ancestor chain so get_thread_chain can load it in one round-trip
+    ancestor_ids = []
+    if parent_thread_id:
+        parent = get_thread(parent_thread_id)
+        ancestor_ids = [parent_thread_id] + (parent.ancestor_ids if parent else [])
+        ancestor_ids = ancestor_ids[: MAX_THREAD_CHAIN_DEPTH - 1]
+
     context = ThreadContext(
         thread_id=thread_id,
         parent_thread_id=parent_thread_id,  # Link to parent for conversation chains
@@ -203,12 +371,12 @@ def create_thread(tool_name: str, initial_request: dict[str, Any], parent_thread
         tool_name=tool_name,  # Track which tool initiated this conversation
         turns=[],  # Empty initially, turns added via add_turn()
         initial_context=filtered_context,
+        ancestor_ids=ancestor_ids,
     )
 
-    # Store in Redis with configurable TTL to prevent indefinite accumulation
-    client = get_redis_client()
-    key = f"thread:{thread_id}"
-    client.setex(key, CONVERSATION_TIMEOUT_SECONDS, context.model_dump_json())
+    # Store with configurable TTL to prevent indefinite accumulation
+    _get_store().create(context)
+    _remember(thread_id, context, written=True)
 
     logger.debug(f"[THREAD] Created new thread {thread_id} with parent {parent_thread_id}")
 
@@ -238,16 +406,18 @@ def get_thread(thread_id: str) -> Optional[ThreadContext]:
     if not thread_id or not _is_valid_uuid(thread_id):
         return None
 
-    try:
-        client = get_redis_client()
-        key = f"thread:{thread_id}"
-        data = client.get(key)
+    scope = get_request_scope()
+    if scope is not None:
+        found, context = scope.lookup(thread_id)
+        if found:
+            return context
 
-        if data:
-            return ThreadContext.model_validate_json(data)
-        return None
+    try:
+        context = _get_store().get(thread_id) or _restore_archived(thread_id)
+        _remember(thread_id, context)
+        return context
     except Exception:
-        # Silently handle errors to avoid exposing Redis details
+        # Silently handle errors to avoid exposing storage details
         return None
 
 
@@ -294,16 +464,6 @@ def add_turn(
     """
     logger.debug(f"[FLOW] Adding {role} turn to {thread_id} ({tool_name})")
 
-    context = get_thread(thread_id)
-    if not context:
-        logger.debug(f"[FLOW] Thread {thread_id} not found for turn addition")
-        return False
-
-    # Check turn limit to prevent runaway conversations
-    if len(context.turns) >= MAX_CONVERSATION_TURNS:
-        logger.debug(f"[FLOW] Thread {thread_id} at max turns ({MAX_CONVERSATION_TURNS})")
-        return False
-
     # Create new turn with complete metadata
     turn = ConversationTurn(
         role=role,
@@ -315,28 +475,114 @@ def add_turn(
         model_name=model_name,  # Track specific model
         model_metadata=model_metadata,  # Additional model info
     )
+    turn.rendered_header = _turn_header(turn)
+    turn.token_count = _estimate_tokens(_turn_body(turn))
+    snapshots = _snapshot_files(files) if files else {}
+    if snapshots:
+        turn.file_hashes = {path: digest for path, (digest, _) in snapshots.items()}
+
+    # The request's snapshot saves the store a read (and tells it the turn count)
+    store = _get_store()
+    scope = get_request_scope()
+    found, snapshot = scope.lookup(thread_id) if scope is not None else (False, None)
+    if snapshot is None and store.rewrites_thread:
+        # The whole thread is written back, so it has to be loaded first
+        snapshot = get_thread(thread_id)
+        if not snapshot:
+            logger.debug(f"[FLOW] Thread {thread_id} not found for turn addition")
+            return False
+    elif not thread_id or not _is_valid_uuid(thread_id):
+        logger.debug(f"[FLOW] Thread {thread_id} not found for turn addition")
+        return False
 
-    context.turns.append(turn)
-    context.last_updated_at = datetime.now(timezone.utc).isoformat()
+    if snapshot is not None:
+        # Content an earlier turn already stored (e.g. the user turn of this
+        # request) only needs its expiry refreshed, which append_turn does
+        stored = {digest for earlier in snapshot.turns for digest in (earlier.file_hashes or {}).values()}
+        new_files = {digest: text for digest, text in snapshots.values() if digest not in stored}
+    else:
+        new_files = dict(snapshots.values())
+    if new_files:
+        # Stored first so the turn never references a missing snapshot
+        try:
+            store.put_files(thread_id, new_files)
+        except Exception as e:
+            # History will read these files from disk instead
+            logger.debug(f"[FILES] Failed to store file snapshots: {type(e).__name__}")
+            turn.file_hashes = None
 
-    # Save back to Redis and refresh TTL
     try:
-        client = get_redis_client()
-        key = f"thread:{thread_id}"
-        client.setex(key, CONVERSATION_TIMEOUT_SECONDS, context.model_dump_json())  # Refresh TTL to configured timeout
-        return True
+        if not store.append_turn(thread_id, turn, MAX_CONVERSATION_TURNS, snapshot):
+            return False
+    except Exception as e:
+        logger.debug(f"[FLOW] Failed to save turn: {type(e).__name__}")
+        return False
+
+    if snapshot is not None:
+        # Copy rather than mutate: other stages of the request hold the snapshot
+        _remember(
+            thread_id,
+            snapshot.model_copy(
+                update={
+                    "turns": [*snapshot.turns, turn],
+                    "last_updated_at": turn.timestamp,
+                    "version": snapshot.version + 1,
+                }
+            ),
+            written=True,
+        )
+    elif found:
+        # Cached as missing (e.g. before a layout migration); load it fresh next time
+        scope.forget(thread_id)
+    return True
+
+
+def set_thread_summary(thread_id: str, summary: ConversationTurn) -> bool:
+    """
+    Store a compaction summary on a thread
+
+    The summary replaces the first summary.summarized_turns turns of the
+    thread's chain whenever its history is rendered; the turns themselves are
+    kept. See utils.conversation_compaction.
+
+    Args:
+        thread_id: UUID of the conversation thread
+        summary: Synthetic turn with summarized_turns set
+
+    Returns:
+        bool: True if the summary was stored, False otherwise
+    """
+    if not thread_id or not _is_valid_uuid(thread_id):
+        return False
+
+    scope = get_request_scope()
+    _, snapshot = scope.lookup(thread_id) if scope is not None else (False, None)
+    try:
+        if not _get_store().set_summary(thread_id, summary, snapshot):
+            return False
     except Exception as e:
-        logger.debug(f"[FLOW] Failed to save turn to Redis: {type(e).__name__}")
+        logger.debug(f"[FLOW] Failed to save summary: {type(e).__name__}")
         return False
 
+    if snapshot is not None:
+        _remember(
+            thread_id, snapshot.model_copy(update={"summary": summary, "version": snapshot.version + 1}), written=True
+        )
+    return True
 
-def get_thread_chain(thread_id: str, max_depth: int = 20) -> list[ThreadContext]:
+
+def get_thread_chain(thread_id: str, max_depth: int = MAX_THREAD_CHAIN_DEPTH) -> list[ThreadContext]:
     """
     Traverse the parent chain to get all threads in conversation sequence.
 
     Retrieves the complete conversation chain by following parent_thread_id
     links. Returns threads in chronological order (oldest first).
 
+    Threads record their ancestor IDs when created, so after loading the
+    starting thread the rest of the chain is fetched in one round-trip. Links
+    are still checked against each thread's parent_thread_id; threads created
+    before ancestor tracking, or links that don't match, are loaded hop by hop.
+
     Args:
         thread_id: Starting thread ID
         max_depth: Maximum chain depth to prevent infinite loops
@@ -344,26 +590,36 @@ def get_thread_chain(thread_id: str, max_depth: int = 20) -> list[ThreadContext]
     Returns:
         list[ThreadContext]: All threads in chain, oldest first
     """
+    context = get_thread(thread_id)
+    if not context:
+        logger.debug(f"[THREAD] Thread {thread_id} not found in chain traversal")
+        return []
+
+    ancestors: dict[str, Optional[ThreadContext]] = {}
+    if context.parent_thread_id and context.ancestor_ids[:1] == [context.parent_thread_id]:
+        ancestor_ids = context.ancestor_ids[: max_depth - 1]
+        ancestors = dict(zip(ancestor_ids, _load_threads(ancestor_ids)))
+
     chain = []
-    current_id = thread_id
+    current = context
     seen_ids = set()
 
     # Build chain from current to oldest
-    while current_id and len(chain) < max_depth:
+    while current and len(chain) < max_depth:
         # Prevent circular references
-        if current_id in seen_ids:
-            logger.warning(f"[THREAD] Circular reference detected in thread chain at {current_id}")
+        if current.thread_id in seen_ids:
+            logger.warning(f"[THREAD] Circular reference detected in thread chain at {current.thread_id}")
             break
 
-        seen_ids.add(current_id)
+        seen_ids.add(current.thread_id)
+        chain.append(current)
 
-        context = get_thread(current_id)
-        if not context:
-            logger.debug(f"[THREAD] Thread {current_id} not found in chain traversal")
+        parent_id = current.parent_thread_id
+        if not parent_id:
             break
-
-        chain.append(context)
-        current_id = context.parent_thread_id
+        current = ancestors[parent_id] if parent_id in ancestors else get_thread(parent_id)
+        if not current:
+            logger.debug(f"[THREAD] Thread {parent_id} not found in chain traversal")
 
     # Reverse to get chronological order (oldest first)
     chain.reverse()
@@ -372,6 +628,38 @@ def get_thread_chain(thread_id: str, max_depth: int = 20) -> list[ThreadContext]
     return chain
 
 
+def _load_threads(thread_ids: list[str]) -> list[Optional[ThreadContext]]:
+    """
+    Load several threads in a single storage round-trip.
+
+    Returns:
+        list: ThreadContext (or None if missing/invalid) for each ID, in order
+    """
+    loaded: dict[str, Optional[ThreadContext]] = {}
+    scope = get_request_scope()
+    valid_ids = []
+    for thread_id in thread_ids:
+        if not _is_valid_uuid(thread_id):
+            continue
+        found, context = scope.lookup(thread_id) if scope is not None else (False, None)
+        if found:
+            loaded[thread_id] = context
+        else:
+            valid_ids.append(thread_id)
+    if not valid_ids:
+        return [loaded.get(thread_id) for thread_id in thread_ids]
+
+    try:
+        for thread_id, context in zip(valid_ids, _get_store().get_many(valid_ids)):
+            loaded[thread_id] = context or _restore_archived(thread_id)
+        for thread_id in valid_ids:
+            _remember(thread_id, loaded.get(thread_id))
+    except Exception as e:
+        logger.debug(f"[THREAD] Batched thread load failed: {type(e).__name__}")
+
+    return [loaded.get(thread_id) for thread_id in thread_ids]
+
+
 def get_conversation_file_list(context: ThreadContext) -> list[str]:
     """
     Get all unique files referenced across all turns in a conversation.
@@ -413,7 +701,14 @@ def get_conversation_file_list(context: ThreadContext) -> list[str]:
     return unique_files
 
 
-def build_conversation_history(context: ThreadContext, model_context=None, read_files_func=None) -> tuple[str, int]:
+def build_conversation_history(
+    context: ThreadContext,
+    model_context=None,
+    read_files_func=None,
+    *,
+    summary: Optional[ConversationTurn] = None,
+    on_compaction=None,
+) -> tuple[str, int]:
     """
     Build formatted conversation history for tool prompts with embedded file contents.
 
@@ -429,6 +724,10 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
         context: ThreadContext containing the complete conversation
         model_context: ModelContext for token allocation (optional, uses DEFAULT_MODEL if not provided)
         read_files_func: Optional function to read files (for testing)
+        summary: Compaction summary to render instead of the newest one stored on the chain
+        on_compaction: Called with a CompactionPlan when too few turns fit and old
+            turns should be summarised (see utils.conversation_compaction); turns
+            that do not fit are dropped from this rendering either way
 
     Returns:
         tuple[str, int]: (formatted_conversation_history, total_tokens_used)
@@ -469,6 +768,7 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
         logger.debug(f"[THREAD] Built history from {len(chain)} threads with {total_turns} total turns")
     else:
         # Single thread, no parent chain
+        chain = [context]
         all_turns = context.turns
         total_turns = len(context.turns)
         all_files = get_conversation_file_list(context)
@@ -512,11 +812,12 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
     ]
 
     # Embed all files referenced in this conversation once at the start
+    files_part_index, files_part_tokens = None, 0
     if all_files:
         logger.debug(f"[FILES] Starting embedding for {len(all_files)} files")
         history_parts.extend(
             [
-                "=== FILES REFERENCED IN THIS CONVERSATION ===",
+                FILES_SECTION_START,
                 "The following files have been shared and analyzed during our conversation.",
                 "Refer to these when analyzing the context and requests below:",
                 "",
@@ -525,6 +826,11 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
 
         if read_files_func is None:
             from utils.file_utils import read_file_content
+            from utils.token_utils import estimate_tokens
+
+            # Prefer the snapshots taken when the files were discussed; read the
+            # rest (turns stored without snapshots) from disk
+            snapshots = _load_file_snapshots(all_turns)
 
             # Optimized: read files incrementally with token tracking
             file_contents = []
@@ -535,8 +841,12 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
             for file_path in all_files:
                 try:
                     logger.debug(f"[FILES] Processing file {file_path}")
-                    # Correctly unpack the tuple returned by read_file_content
-                    formatted_content, content_tokens = read_file_content(file_path)
+                    if file_path in snapshots:
+                        formatted_content = snapshots[file_path]
+                        content_tokens = estimate_tokens(formatted_content)
+                    else:
+                        # Correctly unpack the tuple returned by read_file_content
+                        formatted_content, content_tokens = read_file_content(file_path)
                     if formatted_content:
                         # read_file_content already returns formatted content, use it directly
                         # Check if adding this file would exceed the limit
@@ -577,6 +887,8 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
                     files_content += (
                         f"\n[NOTE: {files_truncated} additional file(s) were truncated due to token limit]\n"
                     )
+                # Already measured file by file while reading
+                files_part_index, files_part_tokens = len(history_parts), total_tokens
                 history_parts.append(files_content)
                 logger.debug(
                     f"Conversation history file embedding complete: {files_included} files embedded, {files_truncated} truncated, {total_tokens:,} total tokens"
@@ -610,78 +922,37 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
         history_parts.extend(
             [
                 "",
-                "=== END REFERENCED FILES ===",
+                FILES_SECTION_END,
                 "",
             ]
         )
 
     history_parts.append("Previous conversation turns:")
+    file_embedding_tokens = files_part_tokens + sum(
+        model_context.estimate_tokens(part) for i, part in enumerate(history_parts) if i != files_part_index
+    )
 
-    # Build conversation turns bottom-up (most recent first) but present chronologically
-    # This ensures we include as many recent turns as possible within the token budget
-    turn_entries = []  # Will store (index, formatted_turn_content) for chronological ordering
-    total_turn_tokens = 0
-    file_embedding_tokens = sum(model_context.estimate_tokens(part) for part in history_parts)
-
-    # Process turns in reverse order (most recent first) to prioritize recent context
-    for idx in range(len(all_turns) - 1, -1, -1):
-        turn = all_turns[idx]
-        turn_num = idx + 1
-        role_label = "Claude" if turn.role == "user" else "Gemini"
-
-        # Build the complete turn content
-        turn_parts = []
-
-        # Add turn header with tool attribution for cross-tool tracking
-        turn_header = f"\n--- Turn {turn_num} ({role_label}"
-        if turn.tool_name:
-            turn_header += f" using {turn.tool_name}"
-
-        # Add model info if available
-        if turn.model_provider and turn.model_name:
-            turn_header += f" via {turn.model_provider}/{turn.model_name}"
-
-        turn_header += ") ---"
-        turn_parts.append(turn_header)
-
-        # Add files context if present - but just reference which files were used
-        # (the actual contents are already embedded above)
-        if turn.files:
-            turn_parts.append(f"Files used in this turn: {', '.join(turn.files)}")
-            turn_parts.append("")  # Empty line for readability
-
-        # Add the actual content
-        turn_parts.append(turn.content)
-
-        # Calculate tokens for this turn
-        turn_content = "\n".join(turn_parts)
-        turn_tokens = model_context.estimate_tokens(turn_content)
-
-        # Check if adding this turn would exceed history budget
-        if file_embedding_tokens + total_turn_tokens + turn_tokens > max_history_tokens:
-            # Stop adding turns - we've reached the limit
-            logger.debug(f"[HISTORY] Stopping at turn {turn_num} - would exceed history budget")
-            logger.debug(f"[HISTORY]   File tokens: {file_embedding_tokens:,}")
-            logger.debug(f"[HISTORY]   Turn tokens so far: {total_turn_tokens:,}")
-            logger.debug(f"[HISTORY]   This turn: {turn_tokens:,}")
-            logger.debug(f"[HISTORY]   Would total: {file_embedding_tokens + total_turn_tokens + turn_tokens:,}")
-            logger.debug(f"[HISTORY]   Budget: {max_history_tokens:,}")
-            break
+    # The newest compaction summary in the chain stands in for the oldest turns
+    if summary is None:
+        summary = next((thread.summary for thread in reversed(chain) if thread.summary), None)
+    entries = _history_entries(all_turns, summary)
+    turn_budget = max_history_tokens - file_embedding_tokens
+    turn_entries = _fill_turn_budget(entries, model_context, turn_budget)
 
-        # Add this turn to our list (we'll reverse it later for chronological order)
-        turn_entries.append((idx, turn_content))
-        total_turn_tokens += turn_tokens
+    if len(turn_entries) < len(entries) and on_compaction is not None:
+        from utils.conversation_compaction import plan_compaction
 
-    # Reverse to get chronological order (oldest first)
-    turn_entries.reverse()
+        plan = plan_compaction(context, entries, len(turn_entries), turn_budget, model_context)
+        if plan is not None:
+            on_compaction(plan)
 
     # Add the turns in chronological order
-    for _, turn_content in turn_entries:
-        history_parts.append(turn_content)
+    for turn_num, turn in turn_entries:
+        history_parts.append(f"{_turn_heading(turn, turn_num)}\n{_turn_body(turn)}")
 
     # Log what we included
     included_turns = len(turn_entries)
-    total_turns = len(all_turns)
+    total_turns = len(entries)
     if included_turns < total_turns:
         logger.info(f"[HISTORY] Included {included_turns}/{total_turns} turns due to token limit")
         history_parts.append(f"\n[Note: Showing {included_turns} most recent turns out of {total_turns} total]")
@@ -718,6 +989,241 @@ def build_conversation_history(context: ThreadContext, model_context=None, read_
     return complete_history, total_conversation_tokens
 
 
+def _history_entries(
+    turns: list[ConversationTurn], summary: Optional[ConversationTurn]
+) -> list[tuple[int, ConversationTurn]]:
+    """(turn number, turn) for each turn to render; a summary (number 0) replaces the turns it covers."""
+    entries = [(idx + 1, turn) for idx, turn in enumerate(turns)]
+    if summary and summary.summarized_turns and summary.summarized_turns <= len(turns):
+        return [(0, summary), *entries[summary.summarized_turns :]]
+    return entries
+
+
+def _fill_turn_budget(
+    entries: list[tuple[int, ConversationTurn]], model_context, budget: int
+) -> list[tuple[int, ConversationTurn]]:
+    """
+    Select the most recent turns that fit the token budget.
+
+    Turns carry their token count from when they were written, so only the
+    short headings are measured here.
+
+    Returns:
+        list: The included (turn number, turn) entries, oldest first
+    """
+    included = []
+    total_tokens = 0
+
+    # Process turns in reverse order (most recent first) to prioritize recent context
+    for turn_num, turn in reversed(entries):
+        body_tokens = turn.token_count
+        if body_tokens is None:
+            body_tokens = model_context.estimate_tokens(_turn_body(turn))
+        turn_tokens = model_context.estimate_tokens(_turn_heading(turn, turn_num) + "\n") + body_tokens
+
+        # Check if adding this turn would exceed history budget
+        if total_tokens + turn_tokens > budget:
+            # Stop adding turns - we've reached the limit
+            logger.debug(f"[HISTORY] Stopping at turn {turn_num} - would exceed history budget")
+            logger.debug(f"[HISTORY]   Turn tokens so far: {total_tokens:,}")
+            logger.debug(f"[HISTORY]   This turn: {turn_tokens:,}")
+            logger.debug(f"[HISTORY]   Budget left after files: {budget:,}")
+            break
+
+        included.append((turn_num, turn))
+        total_tokens += turn_tokens
+
+    # Reverse to get chronological order (oldest first)
+    included.reverse()
+    return included
+
+
+def _turn_header(turn: ConversationTurn) -> str:
+    """Attribution for a turn's history heading: who spoke, with which tool and model."""
+    header = "Claude" if turn.role == "user" else "Gemini"
+    if turn.tool_name:
+        header += f" using {turn.tool_name}"
+    if turn.model_provider and turn.model_name:
+        header += f" via {turn.model_provider}/{turn.model_name}"
+    return header
+
+
+def _turn_heading(turn: ConversationTurn, turn_num: int) -> str:
+    # The number depends on the turn's position in the chain, so it is never stored
+    if turn.summarized_turns:
+        return f"\n--- Summary of turns 1-{turn.summarized_turns} ---"
+    return f"\n--- Turn {turn_num} ({turn.rendered_header or _turn_header(turn)}) ---"
+
+
+def _turn_body(turn: ConversationTurn) -> str:
+    """A turn as shown in history, below its heading."""
+    parts = []
+    # Just reference which files were used (the actual contents are embedded once, above)
+    if turn.files:
+        parts.append(f"Files used in this turn: {', '.join(turn.files)}")
+        parts.append("")  # Empty line for readability
+    parts.append(turn.content)
+    return "\n".join(parts)
+
+
+def _snapshots_enabled() -> bool:
+    return os.getenv("CONVERSATION_FILE_SNAPSHOTS", "true").lower() == "true"
+
+
+def _snapshot_files(files: list[str]) -> dict[str, tuple[str, str]]:
+    """
+    Read files as conversation history embeds them, for content-addressed storage.
+
+    Goes through the file content cache, so files the prompt was just built
+    from are neither read nor hashed again.
+
+    Returns:
+        dict: path -> (SHA-256 of the formatted content, formatted content) for
+        each file that could be read. Unreadable paths are left to be re-read
+        when history is built, in case they become readable.
+    """
+    if not _snapshots_enabled():
+        return {}
+
+    from utils.file_utils import read_file_snapshot
+
+    snapshots = {}
+    for file_path in files:
+        try:
+            snapshot = read_file_snapshot(file_path)
+        except Exception as e:
+            logger.debug(f"[FILES] Could not snapshot {file_path}: {type(e).__name__}")
+            continue
+        if snapshot is not None:
+            snapshots[file_path] = snapshot
+    return snapshots
+
+
+def get_changed_files(context: ThreadContext, file_paths: list[str]) -> list[str]:
+    """
+    Files whose content no longer matches the newest snapshot recorded in the thread.
+
+    A file referenced earlier in the conversation only counts as already
+    embedded while it is unchanged. Paths the thread holds no snapshot of
+    (snapshots disabled, unreadable at the time, or turns stored before
+    snapshots) are not reported.
+
+    Args:
+        context: Thread the files were referenced in
+        file_paths: Paths to check
+
+    Returns:
+        list[str]: Paths from file_paths whose content changed, in order
+    """
+    latest: dict[str, str] = {}
+    for turn in context.turns:
+        latest.update(turn.file_hashes or {})
+    recorded = [file_path for file_path in file_paths if file_path in latest]
+    if not recorded or not _snapshots_enabled():
+        return []
+
+    current = _snapshot_files(recorded)
+    changed = [path for path in recorded if path not in current or current[path][0] != latest[path]]
+    if changed:
+        logger.debug(f"[FILES] Changed since last embedded: {changed}")
+    return changed
+
+
+def _file_versions(turns: list[ConversationTurn]) -> dict[str, list[tuple[int, str]]]:
+    """Each file's snapshots as (turn number, hash), in turn order, skipping unchanged repeats."""
+    versions: dict[str, list[tuple[int, str]]] = {}
+    for turn_num, turn in enumerate(turns, 1):
+        for path, digest in (turn.file_hashes or {}).items():
+            history = versions.setdefault(path, [])
+            if not history or history[-1][1] != digest:
+                history.append((turn_num, digest))
+    return versions
+
+
+# The "  45│ " prefix added by utils.file_utils._add_line_numbers
+_LINE_NUMBER_PREFIX = re.compile(r"^ *\d+│ ")
+
+
+def _snapshot_lines(snapshot: str) -> list[str]:
+    """A snapshot's file lines without the BEGIN/END markers or line numbers, for diffing."""
+    lines = snapshot.strip("\n").split("\n")[1:-1]
+    if lines and all(_LINE_NUMBER_PREFIX.match(line) for line in lines):
+        # Numbers shift with every inserted line; diff the code itself
+        lines = [_LINE_NUMBER_PREFIX.sub("", line, count=1) for line in lines]
+    return lines
+
+
+def _render_file_versions(path: str, versions: list[tuple[int, str]], contents: dict[str, str]) -> Optional[str]:
+    """
+    Render a file's snapshots for conversation history.
+
+    A file that changed during the conversation is shown as the version first
+    discussed, followed by a unified diff for each later change, so small
+    edits cost a few lines rather than another copy of the file. When the
+    diffs are not smaller than the newest version, that version alone is
+    shown instead.
+
+    Returns:
+        str: Text to embed, or None if no snapshot of the file is available
+    """
+    available = [(turn_num, contents[digest]) for turn_num, digest in versions if digest in contents]
+    if not available:
+        return None
+    newest = available[-1][1]
+    if len(available) == 1:
+        return newest
+
+    changes = []
+    for (before_turn, before), (after_turn, after) in zip(available, available[1:]):
+        diff = difflib.unified_diff(
+            _snapshot_lines(before),
+            _snapshot_lines(after),
+            fromfile=f"{path} (turn {before_turn})",
+            tofile=f"{path} (turn {after_turn})",
+            lineterm="",
+        )
+        changes.append(
+            f"\n--- BEGIN CHANGES: {path} (turn {after_turn}) ---\n"
+            + "\n".join(diff)
+            + f"\n--- END CHANGES: {path} ---\n"
+        )
+    if sum(len(change) for change in changes) >= len(newest):
+        return newest
+    return available[0][1] + "".join(changes)
+
+
+def _load_file_snapshots(turns: list[ConversationTurn]) -> dict[str, str]:
+    """
+    Load the snapshots of each file referenced by the turns, rendered for history.
+
+    Returns:
+        dict: path -> text to embed (see _render_file_versions); files without a
+        stored snapshot are absent
+    """
+    versions = _file_versions(turns)
+    if not versions:
+        return {}
+
+    try:
+        contents = _get_store().get_files(sorted({digest for history in versions.values() for _, digest in history}))
+    except Exception as e:
+        logger.debug(f"[FILES] Failed to load file snapshots: {type(e).__name__}")
+        return {}
+
+    rendered = {}
+    for path, history in versions.items():
+        text = _render_file_versions(path, history, contents)
+        if text is not None:
+            rendered[path] = text
+    return rendered
+
+
+def _estimate_tokens(text: str) -> int:
+    from utils.model_context import ModelContext
+
+    return ModelContext.estimate_tokens(text)
+
+
 def _is_valid_uuid(val: str) -> bool:
     """
     Validate UUID format for security
@@ -0,0 +1,1119 @@
+"""
+Conversation storage backends
+
+utils.conversation_memory decides what a conversation thread contains;
+a ConversationStore decides where it lives. Three backends are provided:
+
+- redis:  Shared Redis server (default). Threads survive server restarts and
+          are visible to every server process using the same Redis.
+- memory: In-process LRU with TTL. For single-client stdio deployments that
+          should not need a Redis container; threads are lost on restart.
+- sqlite: SQLite database in WAL mode. Durable threads on a single host
+          without running a separate service.
+
+Stores hand out ThreadContext objects that callers must treat as immutable:
+conversation_memory builds a new context instead of mutating a loaded one.
+
+Environment Variables:
+- CONVERSATION_STORE: redis, memory or sqlite (default: redis)
+- CONVERSATION_STORE_PATH: SQLite database file (default: <tmp>/zen_mcp_conversations.db)
+- CONVERSATION_MEMORY_MAX_THREADS: Threads kept by the memory store before LRU eviction (default: 1000)
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from utils import conversation_memory
+from utils.conversation_codec import (
+    decode_model,
+    decode_payload,
+    dump_json,
+    encode_model,
+    encode_payload,
+    record_round_trip,
+    record_write,
+)
+from utils.conversation_memory import ConversationTurn, ThreadContext
+from utils.env import get_env_number
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationStore(ABC):
+    """Persistence for conversation threads."""
+
+    name = "base"
+
+    @property
+    def rewrites_thread(self) -> bool:
+        """True if append_turn writes the whole thread and so needs a snapshot of it."""
+        return False
+
+    @abstractmethod
+    def create(self, context: ThreadContext) -> None:
+        """Store a new thread. Errors propagate to the caller."""
+
+    @abstractmethod
+    def get(self, thread_id: str) -> Optional[ThreadContext]:
+        """Load a thread, or None if it does not exist or has expired."""
+
+    def get_many(self, thread_ids: list[str]) -> list[Optional[ThreadContext]]:
+        """Load several threads; backends override this to batch the reads."""
+        return [self.get(thread_id) for thread_id in thread_ids]
+
+    @abstractmethod
+    def append_turn(
+        self, thread_id: str, turn: ConversationTurn, max_turns: int, snapshot: Optional[ThreadContext] = None
+    ) -> bool:
+        """
+        Append a turn and refresh the thread's expiry.
+
+        Args:
+            thread_id: Thread to append to
+            turn: The new turn
+            max_turns: Reject the turn if the thread already has this many
+            snapshot: The thread as already loaded by the caller, if available
+
+        Returns:
+            bool: False if the thread is missing or full
+        """
+
+    @abstractmethod
+    def set_summary(self, thread_id: str, summary: ConversationTurn, snapshot: Optional[ThreadContext] = None) -> bool:
+        """
+        Replace the thread's compaction summary (see utils.conversation_compaction).
+
+        Returns:
+            bool: False if the thread is missing
+        """
+
+    def put_files(self, thread_id: str, files: dict[str, str]) -> None:
+        """
+        Store file snapshots (SHA-256 -> formatted content) referenced by a thread.
+
+        Snapshots are shared by every thread that references the same content
+        and live as long as the longest-lived of those threads. The default
+        keeps nothing, so history falls back to reading files from disk.
+        """
+        return None
+
+    def get_files(self, hashes: list[str]) -> dict[str, str]:
+        """Load file snapshots by hash; missing or expired ones are left out."""
+        return {}
+
+    @abstractmethod
+    def idle_threads(self, idle_since: float, limit: int) -> list[str]:
+        """Ids of unexpired threads not written since idle_since (Unix time), at most limit."""
+
+    @abstractmethod
+    def delete(self, thread_id: str, version: int) -> bool:
+        """
+        Remove a thread unless it has been written since it was read.
+
+        Used to move threads to the archive (see utils.conversation_archive).
+
+        Args:
+            thread_id: Thread to remove
+            version: ThreadContext.version of the copy the caller holds
+
+        Returns:
+            bool: True if removed; False if missing or at a different version
+        """
+
+    @abstractmethod
+    def thread_stats(self, limit: int) -> dict[str, Any]:
+        """
+        Summarise the active threads, dropping expired ones from any index first.
+
+        Args:
+            limit: How many of the largest threads to list
+
+        Returns:
+            dict: threads (active count), bytes (their stored size) and heaviest,
+                the largest threads as dicts of thread_id, bytes, turns and
+                last_updated_at, largest first
+        """
+
+
+def _stats(sizes: list[tuple[str, int, int, str]], limit: int) -> dict[str, Any]:
+    """Build thread_stats() output from (thread_id, bytes, turns, last_updated_at) rows."""
+    heaviest = sorted(sizes, key=lambda row: row[1], reverse=True)[:limit]
+    return {
+        "threads": len(sizes),
+        "bytes": sum(row[1] for row in sizes),
+        "heaviest": [
+            {"thread_id": thread_id, "bytes": size, "turns": turns, "last_updated_at": updated}
+            for thread_id, size, turns, updated in heaviest
+        ],
+    }
+
+
+def file_hashes(turns: list[ConversationTurn]) -> set[str]:
+    """Hashes of every file snapshot referenced by the given turns."""
+    return {digest for turn in turns for digest in (turn.file_hashes or {}).values()}
+
+
+class RedisConversationStore(ConversationStore):
+    """
+    Threads in Redis, in one of two layouts (CONVERSATION_STORAGE_LAYOUT):
+
+    blob:   one JSON document per thread at thread:{id}; every append rewrites it
+    append: metadata hash at thread:{id}:meta plus a turn list at thread:{id}:turns;
+            appends are O(1) and atomic. Blob-format threads are still readable
+            and are migrated on their next append.
+
+    Blob writes are compare-and-set: thread:{id}:version holds the thread's
+    version (absent means 0) and a Lua script replaces the blob only if the
+    version is still the one the writer read. A writer that loses the race
+    re-reads the thread and tries again, up to CONVERSATION_WRITE_RETRIES
+    times, so parallel tool calls on one continuation_id never drop each
+    other's turns. The append layout needs no such check: RPUSH is atomic.
+
+    Active threads are indexed without scanning keys: threads:index is a
+    sorted set of thread ids by last write time, threads:bytes a sorted set of
+    their stored sizes and threads:turns a hash of their turn counts. Each
+    write updates the index in the same round trip. Entries older than the
+    thread TTL belong to expired threads and are swept by thread_stats().
+    idle_threads() reads the same index to find threads to archive.
+
+    File snapshots live at file:{sha256}. Redis expires keys on its own, so
+    instead of counting references each thread lists its snapshots in
+    thread:{id}:files, and every write to a thread extends the TTL of the
+    snapshots it lists. A snapshot therefore outlives all threads using it.
+    """
+
+    name = "redis"
+
+    INDEX_KEY = "threads:index"
+    BYTES_KEY = "threads:bytes"
+    TURNS_KEY = "threads:turns"
+
+    # KEYS: thread blob, version, index, bytes, turns.
+    # ARGV: expected version, new blob, new version, TTL, thread id, time, turn count.
+    # Returns 1 if written, 0 on a version conflict, -1 if the thread has expired.
+    CAS_SCRIPT = """
+local current = redis.call('GET', KEYS[2]) or '0'
+if current ~= ARGV[1] then
+    return 0
+end
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return -1
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[4])
+redis.call('SET', KEYS[2], ARGV[3], 'EX', ARGV[4])
+redis.call('ZADD', KEYS[3], ARGV[6], ARGV[5])
+redis.call('ZADD', KEYS[4], #ARGV[2], ARGV[5])
+redis.call('HSET', KEYS[5], ARGV[5], ARGV[7])
+return 1
+"""
+
+    @property
+    def rewrites_thread(self) -> bool:
+        return self._layout() == "blob"
+
+    def _client(self):
+        return conversation_memory.get_redis_client()
+
+    @staticmethod
+    def _layout() -> str:
+        layout = os.getenv("CONVERSATION_STORAGE_LAYOUT", "blob").lower()
+        return layout if layout in ("blob", "append") else "blob"
+
+    @staticmethod
+    def _meta_key(thread_id: str) -> str:
+        return f"thread:{thread_id}:meta"
+
+    @staticmethod
+    def _turns_key(thread_id: str) -> str:
+        return f"thread:{thread_id}:turns"
+
+    @staticmethod
+    def _files_key(thread_id: str) -> str:
+        return f"thread:{thread_id}:files"
+
+    @staticmethod
+    def _version_key(thread_id: str) -> str:
+        return f"thread:{thread_id}:version"
+
+    @classmethod
+    def _index(cls, pipe, thread_id: str, size: int, turns: int) -> None:
+        """Queue an index update recording a write to the thread now."""
+        pipe.zadd(cls.INDEX_KEY, {thread_id: time.time()})
+        pipe.zadd(cls.BYTES_KEY, {thread_id: size})
+        pipe.hset(cls.TURNS_KEY, thread_id, turns)
+
+    @classmethod
+    def _expire_files(cls, pipe, thread_id: str, hashes: set[str], ttl: int) -> None:
+        """Queue TTL refreshes for a thread's file snapshots."""
+        if hashes:
+            pipe.expire(cls._files_key(thread_id), ttl)
+            for digest in hashes:
+                pipe.expire(f"file:{digest}", ttl)
+
+    @staticmethod
+    def _meta_mapping(context: ThreadContext) -> dict[str, str]:
+        """Flatten thread metadata (everything except turns) into Redis hash fields."""
+        data = context.model_dump(mode="json", exclude={"turns", "summary"})
+        return {
+            "thread_id": data["thread_id"],
+            "parent_thread_id": data["parent_thread_id"] or "",
+            "created_at": data["created_at"],
+            "last_updated_at": data["last_updated_at"],
+            "tool_name": data["tool_name"],
+            "initial_context": encode_payload(json.dumps(data["initial_context"])),
+            "ancestor_ids": json.dumps(data["ancestor_ids"]),
+            "version": str(context.version),
+            "summary": encode_model(context.summary) if context.summary else "",
+        }
+
+    @staticmethod
+    def _context_from_layout(meta: dict[str, str], turns: list[str]) -> ThreadContext:
+        """Reassemble a ThreadContext from the metadata hash and turn list."""
+        decode = decode_payload
+        context = ThreadContext(
+            thread_id=meta["thread_id"],
+            parent_thread_id=meta.get("parent_thread_id") or None,
+            created_at=meta["created_at"],
+            last_updated_at=meta["last_updated_at"],
+            tool_name=meta["tool_name"],
+            turns=[decode_model(ConversationTurn, turn) for turn in turns],
+            initial_context=json.loads(decode(meta.get("initial_context") or "{}")),
+            ancestor_ids=json.loads(meta.get("ancestor_ids") or "[]"),
+            summary=(decode_model(ConversationTurn, meta["summary"]) if meta.get("summary") else None),
+            version=int(meta.get("version") or 0),
+        )
+        context._layout = "append"
+        return context
+
+    def create(self, context: ThreadContext) -> None:
+        client = self._client()
+        ttl = conversation_memory.CONVERSATION_TIMEOUT_SECONDS
+        if self._layout() == "append":
+            meta_key = self._meta_key(context.thread_id)
+            mapping = self._meta_mapping(context)
+            size = sum(len(value) for value in mapping.values())
+            pipe = client.pipeline(transaction=True)
+            pipe.hset(meta_key, mapping=mapping)
+            pipe.expire(meta_key, ttl)
+            if context.turns:
+                # A thread restored from the archive brings its turns
+                turns_key = self._turns_key(context.thread_id)
+                payloads = [encode_model(turn) for turn in context.turns]
+                pipe.delete(turns_key)
+                pipe.rpush(turns_key, *payloads)
+                pipe.expire(turns_key, ttl)
+                size += sum(len(payload) for payload in payloads)
+            self._index(pipe, context.thread_id, size, len(context.turns))
+            context._layout = "append"
+        else:
+            data = encode_model(context)
+            pipe = client.pipeline(transaction=True)
+            pipe.setex(f"thread:{context.thread_id}", ttl, data)
+            if context.version:
+                # A thread restored from the archive keeps its version
+                pipe.setex(self._version_key(context.thread_id), ttl, str(context.version))
+            self._index(pipe, context.thread_id, len(data), len(context.turns))
+        pipe.execute()
+        record_round_trip()
+
+    def get(self, thread_id: str) -> Optional[ThreadContext]:
+        client = self._client()
+        if self._layout() == "append":
+            # Metadata and turns in one round-trip
+            pipe = client.pipeline(transaction=False)
+            pipe.hgetall(self._meta_key(thread_id))
+            pipe.lrange(self._turns_key(thread_id), 0, -1)
+            meta, turns = pipe.execute()
+            record_round_trip()
+            if meta:
+                return self._context_from_layout(meta, turns)
+            # Otherwise not migrated yet - fall through to the blob format
+
+        data = client.get(f"thread:{thread_id}")
+        record_round_trip()
+        return decode_model(ThreadContext, data) if data else None
+
+    def get_many(self, thread_ids: list[str]) -> list[Optional[ThreadContext]]:
+        if not thread_ids:
+            return []
+        client = self._client()
+        if self._layout() == "append":
+            pipe = client.pipeline(transaction=False)
+            for thread_id in thread_ids:
+                pipe.hgetall(self._meta_key(thread_id))
+                pipe.lrange(self._turns_key(thread_id), 0, -1)
+                pipe.get(f"thread:{thread_id}")  # Not yet migrated
+            results = pipe.execute()
+            record_round_trip()
+            loaded = []
+            for i in range(len(thread_ids)):
+                meta, turns, blob = results[3 * i : 3 * i + 3]
+                if meta:
+                    loaded.append(self._context_from_layout(meta, turns))
+                else:
+                    loaded.append(decode_model(ThreadContext, blob) if blob else None)
+            return loaded
+
+        blobs = client.mget([f"thread:{thread_id}" for thread_id in thread_ids])
+        record_round_trip()
+        return [decode_model(ThreadContext, blob) if blob else None for blob in blobs]
+
+    def append_turn(
+        self, thread_id: str, turn: ConversationTurn, max_turns: int, snapshot: Optional[ThreadContext] = None
+    ) -> bool:
+        if self._layout() == "append":
+            return self._append_to_list(thread_id, turn, max_turns, snapshot)
+
+        def update(context: ThreadContext) -> Optional[ThreadContext]:
+            # Check turn limit to prevent runaway conversations
+            if len(context.turns) >= max_turns:
+                logger.debug(f"[FLOW] Thread {thread_id} at max turns ({max_turns})")
+                return None
+            return context.model_copy(update={"turns": [*context.turns, turn], "last_updated_at": turn.timestamp})
+
+        written = self._compare_and_set(thread_id, snapshot, update)
+        if written is None:
+            return False
+
+        hashes = file_hashes(written.turns)
+        if hashes:
+            pipe = self._client().pipeline(transaction=False)
+            self._expire_files(pipe, thread_id, hashes, conversation_memory.CONVERSATION_TIMEOUT_SECONDS)
+            pipe.execute()
+            record_round_trip()
+        return True
+
+    def _compare_and_set(self, thread_id: str, snapshot: Optional[ThreadContext], update) -> Optional[ThreadContext]:
+        """
+        Apply update to a blob-layout thread unless another writer got there first.
+
+        Starts from the caller's snapshot when there is one. On a version
+        conflict the thread is re-read and update applied again.
+
+        Args:
+            thread_id: Thread to write
+            snapshot: The thread as already loaded by the caller, if available
+            update: Called with the current thread; returns the new thread, or
+                None to abandon the write (e.g. the thread is full)
+
+        Returns:
+            ThreadContext: The thread as written, or None if nothing was written
+        """
+        client = self._client()
+        cas = client.register_script(self.CAS_SCRIPT)
+        ttl = conversation_memory.CONVERSATION_TIMEOUT_SECONDS
+        retries = int(get_env_number("CONVERSATION_WRITE_RETRIES", 5))
+        context = snapshot
+
+        for _attempt in range(retries + 1):
+            if context is None:
+                context = self.get(thread_id)
+                if not context:
+                    logger.debug(f"[FLOW] Thread {thread_id} not found for update")
+                    return None
+
+            updated = update(context)
+            if updated is None:
+                return None
+            updated = updated.model_copy(update={"version": context.version + 1})
+
+            result = cas(
+                keys=[
+                    f"thread:{thread_id}",
+                    self._version_key(thread_id),
+                    self.INDEX_KEY,
+                    self.BYTES_KEY,
+                    self.TURNS_KEY,
+                ],
+                args=[
+                    str(context.version),
+                    encode_model(updated),
+                    str(updated.version),
+                    ttl,
+                    thread_id,
+                    time.time(),
+                    len(updated.turns),
+                ],
+            )
+            record_round_trip()
+            if result == 1:
+                record_write("writes")
+                return updated
+            if result == -1:
+                logger.debug(f"[FLOW] Thread {thread_id} expired before update")
+                return None
+
+            # Another request wrote the thread since it was read
+            record_write("conflicts")
+            logger.debug(f"[FLOW] Version conflict on thread {thread_id} at version {context.version}, retrying")
+            context = None
+
+        record_write("exhausted")
+        logger.warning(f"Gave up writing thread {thread_id} after {retries} version conflicts")
+        return None
+
+    def _append_to_list(
+        self, thread_id: str, turn: ConversationTurn, max_turns: int, snapshot: Optional[ThreadContext]
+    ) -> bool:
+        """
+        Append a turn in the append layout.
+
+        The push, the last_updated_at update and both TTL refreshes run in one
+        MULTI block, so concurrent appends never lose each other's turns. The
+        list is trimmed to max_turns in the same block; a push that landed past
+        the limit is reported as rejected.
+        """
+        client = self._client()
+        ttl = conversation_memory.CONVERSATION_TIMEOUT_SECONDS
+        meta_key, turns_key = self._meta_key(thread_id), self._turns_key(thread_id)
+
+        # Only a snapshot read from the append layout proves the meta hash
+        # exists; one read from a blob still has to be migrated
+        if snapshot is not None and snapshot._layout == "append":
+            exists, turn_count = True, len(snapshot.turns)
+            hashes = file_hashes([*snapshot.turns, turn])
+        else:
+            pipe = client.pipeline(transaction=False)
+            pipe.exists(meta_key)
+            pipe.llen(turns_key)
+            pipe.smembers(self._files_key(thread_id))
+            exists, turn_count, hashes = pipe.execute()
+            record_round_trip()
+
+        if not exists:
+            if not self._migrate_blob_thread(client, thread_id):
+                logger.debug(f"[FLOW] Thread {thread_id} not found for turn addition")
+                return False
+            turn_count = client.llen(turns_key)
+            record_round_trip()
+
+        # Check turn limit to prevent runaway conversations
+        if turn_count >= max_turns:
+            logger.debug(f"[FLOW] Thread {thread_id} at max turns ({max_turns})")
+            return False
+
+        payload = encode_model(turn)
+        pipe = client.pipeline(transaction=True)
+        pipe.rpush(turns_key, payload)
+        pipe.ltrim(turns_key, 0, max_turns - 1)
+        pipe.llen(turns_key)
+        pipe.hset(meta_key, "last_updated_at", turn.timestamp)
+        pipe.hincrby(meta_key, "version", 1)
+        pipe.expire(meta_key, ttl)
+        pipe.expire(turns_key, ttl)
+        pipe.zadd(self.INDEX_KEY, {thread_id: time.time()})
+        pipe.zincrby(self.BYTES_KEY, len(payload), thread_id)
+        pipe.hincrby(self.TURNS_KEY, thread_id, 1)
+        self._expire_files(pipe, thread_id, hashes, ttl)
+        new_length, _, stored_turns = pipe.execute()[:3]
+        record_round_trip()
+
+        if new_length > max_turns:
+            # A concurrent append took the last slot; ours was trimmed off, so
+            # take it back out of the index
+            pipe = client.pipeline(transaction=True)
+            pipe.zincrby(self.BYTES_KEY, -len(payload), thread_id)
+            pipe.hset(self.TURNS_KEY, thread_id, stored_turns)
+            pipe.execute()
+            record_round_trip()
+            logger.debug(f"[FLOW] Thread {thread_id} reached max turns during append")
+            return False
+        return True
+
+    def set_summary(self, thread_id: str, summary: ConversationTurn, snapshot: Optional[ThreadContext] = None) -> bool:
+        if self._layout() == "blob":
+
+            def update(context: ThreadContext) -> ThreadContext:
+                return context.model_copy(update={"summary": summary})
+
+            return self._compare_and_set(thread_id, snapshot, update) is not None
+
+        client = self._client()
+        ttl = conversation_memory.CONVERSATION_TIMEOUT_SECONDS
+        meta_key = self._meta_key(thread_id)
+        if snapshot is None or snapshot._layout != "append":
+            exists = client.exists(meta_key)
+            record_round_trip()
+            if not exists and not self._migrate_blob_thread(client, thread_id):
+                return False
+        pipe = client.pipeline(transaction=True)
+        pipe.hset(meta_key, "summary", encode_model(summary))
+        pipe.hincrby(meta_key, "version", 1)
+        pipe.expire(meta_key, ttl)
+        pipe.zadd(self.INDEX_KEY, {thread_id: time.time()})
+        pipe.execute()
+        record_round_trip()
+        return True
+
+    def put_files(self, thread_id: str, files: dict[str, str]) -> None:
+        if not files:
+            return
+        ttl = conversation_memory.CONVERSATION_TIMEOUT_SECONDS
+        pipe = self._client().pipeline(transaction=False)
+        for digest, content in files.items():
+            pipe.set(f"file:{digest}", encode_payload(content), ex=ttl)
+        pipe.sadd(self._files_key(thread_id), *files)
+        pipe.expire(self._files_key(thread_id), ttl)
+        pipe.execute()
+        record_round_trip()
+
+    def get_files(self, hashes: list[str]) -> dict[str, str]:
+        if not hashes:
+            return {}
+        values = self._client().mget([f"file:{digest}" for digest in hashes])
+        record_round_trip()
+        return {digest: decode_payload(value) for digest, value in zip(hashes, values) if value}
+
+    def idle_threads(self, idle_since: float, limit: int) -> list[str]:
+        expired_before = time.time() - conversation_memory.CONVERSATION_TIMEOUT_SECONDS
+        idle = self._client().zrangebyscore(self.INDEX_KEY, expired_before, idle_since)
+        record_round_trip()
+        return idle[:limit]
+
+    def delete(self, thread_id: str, version: int) -> bool:
+        import redis
+
+        client = self._client()
+        blob_key, version_key = f"thread:{thread_id}", self._version_key(thread_id)
+        meta_key, turns_key = self._meta_key(thread_id), self._turns_key(thread_id)
+        with client.pipeline(transaction=True) as pipe:
+            try:
+                # Same check as the CAS script: a write in between bumps the version
+                pipe.watch(blob_key, version_key, meta_key)
+                if pipe.exists(meta_key):
+                    current = int(pipe.hget(meta_key, "version") or 0)
+                elif pipe.exists(blob_key):
+                    current = int(pipe.get(version_key) or 0)
+                else:
+                    pipe.unwatch()
+                    return False
+                if current != version:
+                    pipe.unwatch()
+                    return False
+                pipe.multi()
+                pipe.delete(blob_key, version_key, meta_key, turns_key, self._files_key(thread_id))
+                pipe.zrem(self.INDEX_KEY, thread_id)
+                pipe.zrem(self.BYTES_KEY, thread_id)
+                pipe.hdel(self.TURNS_KEY, thread_id)
+                pipe.execute()
+                record_round_trip(2)
+            except redis.WatchError:
+                return False
+        return True
+
+    def thread_stats(self, limit: int) -> dict[str, Any]:
+        client = self._client()
+        cutoff = time.time() - conversation_memory.CONVERSATION_TIMEOUT_SECONDS
+
+        expired = client.zrangebyscore(self.INDEX_KEY, "-inf", cutoff)
+        if expired:
+            pipe = client.pipeline(transaction=True)
+            pipe.zrem(self.INDEX_KEY, *expired)
+            pipe.zrem(self.BYTES_KEY, *expired)
+            pipe.hdel(self.TURNS_KEY, *expired)
+            pipe.execute()
+            logger.debug(f"[THREAD] Swept {len(expired)} expired threads from the index")
+
+        pipe = client.pipeline(transaction=False)
+        pipe.zrange(self.INDEX_KEY, 0, -1, withscores=True)
+        pipe.zrange(self.BYTES_KEY, 0, -1, withscores=True)
+        pipe.hgetall(self.TURNS_KEY)
+        updated, sizes, turns = pipe.execute()
+        record_round_trip(3 if expired else 2)
+
+        sizes = dict(sizes)
+        return _stats(
+            [
+                (
+                    thread_id,
+                    int(sizes.get(thread_id, 0)),
+                    int(turns.get(thread_id, 0)),
+                    datetime.fromtimestamp(score, timezone.utc).isoformat(),
+                )
+                for thread_id, score in updated
+            ],
+            limit,
+        )
+
+    def _migrate_blob_thread(self, client, thread_id: str) -> bool:
+        """
+        Convert a blob-format thread to the append layout.
+
+        Watches the blob key so two writers migrating the same thread cannot
+        clobber each other; the loser sees the migrated layout and proceeds.
+
+        Returns:
+            bool: True if the thread now exists in the append layout
+        """
+        import redis
+
+        ttl = conversation_memory.CONVERSATION_TIMEOUT_SECONDS
+        blob_key = f"thread:{thread_id}"
+        meta_key, turns_key = self._meta_key(thread_id), self._turns_key(thread_id)
+        with client.pipeline(transaction=True) as pipe:
+            try:
+                pipe.watch(blob_key)
+                data = pipe.get(blob_key)
+                if not data:
+                    pipe.unwatch()
+                    return bool(client.exists(meta_key))
+
+                context = decode_model(ThreadContext, data)
+                pipe.multi()
+                pipe.hset(meta_key, mapping=self._meta_mapping(context))
+                pipe.delete(turns_key)
+                if context.turns:
+                    encode = encode_model
+                    pipe.rpush(turns_key, *[encode(turn) for turn in context.turns])
+                    pipe.expire(turns_key, ttl)
+                pipe.expire(meta_key, ttl)
+                pipe.delete(blob_key, self._version_key(thread_id))
+                pipe.execute()
+                record_round_trip(2)
+            except redis.WatchError:
+                return bool(client.exists(meta_key))
+
+        logger.debug(f"[THREAD] Migrated thread {thread_id} to append layout ({len(context.turns)} turns)")
+        return True
+
+
+class InMemoryConversationStore(ConversationStore):
+    """
+    Threads in process memory with TTL expiry and LRU eviction.
+
+    File snapshots are reference counted by the threads that use them and
+    dropped with the last one.
+    """
+
+    name = "memory"
+
+    def __init__(self, ttl: float, max_threads: int):
+        self.ttl = ttl
+        self.max_threads = max_threads
+        self._threads: OrderedDict[str, tuple[ThreadContext, float]] = OrderedDict()
+        self._files: dict[str, str] = {}
+        self._file_refs: dict[str, set[str]] = {}
+        self._thread_files: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+
+    def _drop_locked(self, thread_id: str) -> None:
+        """Remove a thread and release its file snapshots."""
+        self._threads.pop(thread_id, None)
+        for digest in self._thread_files.pop(thread_id, ()):
+            refs = self._file_refs.get(digest, set())
+            refs.discard(thread_id)
+            if not refs:
+                self._file_refs.pop(digest, None)
+                self._files.pop(digest, None)
+
+    def _get_locked(self, thread_id: str) -> Optional[ThreadContext]:
+        entry = self._threads.get(thread_id)
+        if entry is None:
+            return None
+        context, expires_at = entry
+        if expires_at <= time.time():
+            self._drop_locked(thread_id)
+            return None
+        self._threads.move_to_end(thread_id)
+        return context
+
+    def _put_locked(self, context: ThreadContext) -> None:
+        self._threads[context.thread_id] = (context, time.time() + self.ttl)
+        self._threads.move_to_end(context.thread_id)
+        while len(self._threads) > self.max_threads:
+            evicted = next(iter(self._threads))
+            self._drop_locked(evicted)
+            logger.debug(f"[THREAD] Evicted least recently used thread {evicted} from memory store")
+
+    def create(self, context: ThreadContext) -> None:
+        now = time.time()
+        with self._lock:
+            # Expired threads are otherwise only noticed when read again
+            for thread_id in [thread_id for thread_id, (_, expires_at) in self._threads.items() if expires_at <= now]:
+                self._drop_locked(thread_id)
+            self._put_locked(context)
+
+    def get(self, thread_id: str) -> Optional[ThreadContext]:
+        with self._lock:
+            return self._get_locked(thread_id)
+
+    def set_summary(self, thread_id: str, summary: ConversationTurn, snapshot: Optional[ThreadContext] = None) -> bool:
+        with self._lock:
+            context = self._get_locked(thread_id)
+            if context is None:
+                return False
+            self._put_locked(context.model_copy(update={"summary": summary, "version": context.version + 1}))
+            return True
+
+    def put_files(self, thread_id: str, files: dict[str, str]) -> None:
+        with self._lock:
+            if self._get_locked(thread_id) is None:
+                return
+            for digest, content in files.items():
+                self._files.setdefault(digest, content)
+                self._file_refs.setdefault(digest, set()).add(thread_id)
+            self._thread_files.setdefault(thread_id, set()).update(files)
+
+    def get_files(self, hashes: list[str]) -> dict[str, str]:
+        with self._lock:
+            return {digest: self._files[digest] for digest in hashes if digest in self._files}
+
+    def idle_threads(self, idle_since: float, limit: int) -> list[str]:
+        now = time.time()
+        with self._lock:
+            # Every write resets expires_at to the write time plus the TTL
+            idle = [
+                thread_id
+                for thread_id, (_, expires_at) in self._threads.items()
+                if now < expires_at <= idle_since + self.ttl
+            ]
+        return idle[:limit]
+
+    def delete(self, thread_id: str, version: int) -> bool:
+        with self._lock:
+            context = self._get_locked(thread_id)
+            if context is None or context.version != version:
+                return False
+            self._drop_locked(thread_id)
+            return True
+
+    def thread_stats(self, limit: int) -> dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            for thread_id in [thread_id for thread_id, (_, expires_at) in self._threads.items() if expires_at <= now]:
+                self._drop_locked(thread_id)
+            contexts = [context for context, _ in self._threads.values()]
+        return _stats(
+            [
+                (
+                    context.thread_id,
+                    len(dump_json(context)),
+                    len(context.turns),
+                    context.last_updated_at,
+                )
+                for context in contexts
+            ],
+            limit,
+        )
+
+    def append_turn(
+        self, thread_id: str, turn: ConversationTurn, max_turns: int, snapshot: Optional[ThreadContext] = None
+    ) -> bool:
+        with self._lock:
+            context = self._get_locked(thread_id)
+            if context is None:
+                logger.debug(f"[FLOW] Thread {thread_id} not found for turn addition")
+                return False
+            if len(context.turns) >= max_turns:
+                logger.debug(f"[FLOW] Thread {thread_id} at max turns ({max_turns})")
+                return False
+            self._put_locked(
+                context.model_copy(
+                    update={
+                        "turns": [*context.turns, turn],
+                        "last_updated_at": turn.timestamp,
+                        "version": context.version + 1,
+                    }
+                )
+            )
+            return True
+
+
+class SQLiteConversationStore(ConversationStore):
+    """
+    Threads in a SQLite database (WAL mode).
+
+    Thread metadata and turns are separate tables, so appending a turn is one
+    row insert rather than a rewrite of the whole thread. File snapshots are
+    kept while any unexpired thread references them.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, ttl: float):
+        self.path = path
+        self.ttl = ttl
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS threads ("
+            "thread_id TEXT PRIMARY KEY, parent_thread_id TEXT, created_at TEXT NOT NULL, "
+            "last_updated_at TEXT NOT NULL, tool_name TEXT NOT NULL, initial_context TEXT NOT NULL, "
+            "ancestor_ids TEXT NOT NULL, turn_count INTEGER NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS turns ("
+            "thread_id TEXT NOT NULL, seq INTEGER NOT NULL, payload TEXT NOT NULL, PRIMARY KEY (thread_id, seq))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS threads_expires ON threads (expires_at)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS files (hash TEXT PRIMARY KEY, content TEXT NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS file_refs ("
+            "thread_id TEXT NOT NULL, hash TEXT NOT NULL, PRIMARY KEY (thread_id, hash))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS file_refs_hash ON file_refs (hash)")
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(threads)")}
+        if "summary" not in columns:
+            # Databases created before compaction summaries
+            self._conn.execute("ALTER TABLE threads ADD COLUMN summary TEXT")
+        if "version" not in columns:
+            self._conn.execute("ALTER TABLE threads ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+    def _transaction(self, work):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        record_round_trip()
+        return result
+
+    def _purge_expired(self, now: float) -> None:
+        for table in ("turns", "file_refs"):
+            self._conn.execute(
+                f"DELETE FROM {table} WHERE thread_id IN (SELECT thread_id FROM threads WHERE expires_at <= ?)",
+                (now,),
+            )
+        self._conn.execute("DELETE FROM threads WHERE expires_at <= ?", (now,))
+        self._conn.execute("DELETE FROM files WHERE hash NOT IN (SELECT hash FROM file_refs)")
+
+    def create(self, context: ThreadContext) -> None:
+        data = context.model_dump(mode="json")
+        now = time.time()
+
+        def work():
+            self._purge_expired(now)
+            self._conn.execute("DELETE FROM turns WHERE thread_id = ?", (context.thread_id,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO threads (thread_id, parent_thread_id, created_at, last_updated_at, "
+                "tool_name, initial_context, ancestor_ids, turn_count, expires_at, summary, version) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    data["thread_id"],
+                    data["parent_thread_id"],
+                    data["created_at"],
+                    data["last_updated_at"],
+                    data["tool_name"],
+                    encode_payload(json.dumps(data["initial_context"])),
+                    json.dumps(data["ancestor_ids"]),
+                    len(context.turns),
+                    now + self.ttl,
+                    encode_model(context.summary) if context.summary else None,
+                    context.version,
+                ),
+            )
+            self._conn.executemany(
+                "INSERT INTO turns (thread_id, seq, payload) VALUES (?, ?, ?)",
+                [(context.thread_id, seq, encode_model(turn)) for seq, turn in enumerate(context.turns)],
+            )
+
+        self._transaction(work)
+
+    def get(self, thread_id: str) -> Optional[ThreadContext]:
+        return self.get_many([thread_id])[0]
+
+    def get_many(self, thread_ids: list[str]) -> list[Optional[ThreadContext]]:
+        if not thread_ids:
+            return []
+        placeholders = ",".join("?" * len(thread_ids))
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT thread_id, parent_thread_id, created_at, last_updated_at, tool_name, initial_context, "
+                f"ancestor_ids, summary, version FROM threads WHERE thread_id IN ({placeholders}) AND expires_at > ?",
+                (*thread_ids, time.time()),
+            ).fetchall()
+            turn_rows = self._conn.execute(
+                f"SELECT thread_id, payload FROM turns WHERE thread_id IN ({placeholders}) ORDER BY thread_id, seq",
+                thread_ids,
+            ).fetchall()
+        record_round_trip()
+
+        decode = decode_payload
+        turns: dict[str, list[ConversationTurn]] = {}
+        for thread_id, payload in turn_rows:
+            turns.setdefault(thread_id, []).append(decode_model(ConversationTurn, payload))
+
+        loaded = {}
+        for (
+            thread_id,
+            parent_id,
+            created_at,
+            last_updated_at,
+            tool_name,
+            initial_context,
+            ancestor_ids,
+            summary,
+            version,
+        ) in rows:
+            loaded[thread_id] = ThreadContext(
+                thread_id=thread_id,
+                parent_thread_id=parent_id,
+                created_at=created_at,
+                last_updated_at=last_updated_at,
+                tool_name=tool_name,
+                turns=turns.get(thread_id, []),
+                initial_context=json.loads(decode(initial_context)),
+                ancestor_ids=json.loads(ancestor_ids),
+                summary=decode_model(ConversationTurn, summary) if summary else None,
+                version=version,
+            )
+        return [loaded.get(thread_id) for thread_id in thread_ids]
+
+    def append_turn(
+        self, thread_id: str, turn: ConversationTurn, max_turns: int, snapshot: Optional[ThreadContext] = None
+    ) -> bool:
+        now = time.time()
+
+        def work() -> bool:
+            row = self._conn.execute(
+                "SELECT turn_count FROM threads WHERE thread_id = ? AND expires_at > ?", (thread_id, now)
+            ).fetchone()
+            if row is None:
+                logger.debug(f"[FLOW] Thread {thread_id} not found for turn addition")
+                return False
+            if row[0] >= max_turns:
+                logger.debug(f"[FLOW] Thread {thread_id} at max turns ({max_turns})")
+                return False
+            self._conn.execute(
+                "INSERT INTO turns (thread_id, seq, payload) VALUES (?, ?, ?)",
+                (thread_id, row[0], encode_model(turn)),
+            )
+            self._conn.execute(
+                "UPDATE threads SET turn_count = turn_count + 1, version = version + 1, last_updated_at = ?, "
+                "expires_at = ? "
+                "WHERE thread_id = ?",
+                (turn.timestamp, now + self.ttl, thread_id),
+            )
+            return True
+
+        return self._transaction(work)
+
+    def set_summary(self, thread_id: str, summary: ConversationTurn, snapshot: Optional[ThreadContext] = None) -> bool:
+        payload = encode_model(summary)
+        now = time.time()
+
+        def work() -> bool:
+            cursor = self._conn.execute(
+                "UPDATE threads SET summary = ?, version = version + 1, expires_at = ? "
+                "WHERE thread_id = ? AND expires_at > ?",
+                (payload, now + self.ttl, thread_id, now),
+            )
+            return cursor.rowcount > 0
+
+        return self._transaction(work)
+
+    def put_files(self, thread_id: str, files: dict[str, str]) -> None:
+        if not files:
+            return
+
+        def work():
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO files (hash, content) VALUES (?, ?)",
+                [(digest, encode_payload(content)) for digest, content in files.items()],
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO file_refs (thread_id, hash) VALUES (?, ?)",
+                [(thread_id, digest) for digest in files],
+            )
+
+        self._transaction(work)
+
+    def get_files(self, hashes: list[str]) -> dict[str, str]:
+        if not hashes:
+            return {}
+        placeholders = ",".join("?" * len(hashes))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT hash, content FROM files WHERE hash IN ({placeholders})", hashes
+            ).fetchall()
+        record_round_trip()
+        return {digest: decode_payload(content) for digest, content in rows}
+
+    def idle_threads(self, idle_since: float, limit: int) -> list[str]:
+        with self._lock:
+            # Every turn resets expires_at to the write time plus the TTL
+            rows = self._conn.execute(
+                "SELECT thread_id FROM threads WHERE expires_at > ? AND expires_at <= ? ORDER BY expires_at LIMIT ?",
+                (time.time(), idle_since + self.ttl, limit),
+            ).fetchall()
+        record_round_trip()
+        return [row[0] for row in rows]
+
+    def delete(self, thread_id: str, version: int) -> bool:
+        def work() -> bool:
+            cursor = self._conn.execute("DELETE FROM threads WHERE thread_id = ? AND version = ?", (thread_id, version))
+            if not cursor.rowcount:
+                return False
+            for table in ("turns", "file_refs"):
+                self._conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            self._conn.execute("DELETE FROM files WHERE hash NOT IN (SELECT hash FROM file_refs)")
+            return True
+
+        return self._transaction(work)
+
+    def thread_stats(self, limit: int) -> dict[str, Any]:
+        now = time.time()
+        self._transaction(lambda: self._purge_expired(now))
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT threads.thread_id, LENGTH(threads.initial_context) + COALESCE(LENGTH(threads.summary), 0) "
+                "+ COALESCE(SUM(LENGTH(turns.payload)), 0), threads.turn_count, threads.last_updated_at "
+                "FROM threads LEFT JOIN turns ON turns.thread_id = threads.thread_id "
+                "WHERE threads.expires_at > ? GROUP BY threads.thread_id",
+                (now,),
+            ).fetchall()
+        record_round_trip()
+        return _stats(rows, limit)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _create_store(backend: str) -> ConversationStore:
+    ttl = conversation_memory.CONVERSATION_TIMEOUT_SECONDS
+    if backend == "memory":
+        max_threads = int(get_env_number("CONVERSATION_MEMORY_MAX_THREADS", 1000))
+        return InMemoryConversationStore(ttl, max_threads)
+    if backend == "sqlite":
+        path = os.getenv("CONVERSATION_STORE_PATH") or os.path.join(tempfile.gettempdir(), "zen_mcp_conversations.db")
+        return SQLiteConversationStore(path, ttl)
+    if backend != "redis":
+        logger.warning(f"Unknown CONVERSATION_STORE '{backend}', using redis")
+    return RedisConversationStore()
+
+
+# One instance per backend; the backend is read from the environment on each call
+_stores: dict[str, ConversationStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_conversation_store() -> ConversationStore:
+    """
+    Get the conversation store selected by CONVERSATION_STORE.
+
+    Returns:
+        The ConversationStore instance for the configured backend
+    """
+    backend = os.getenv("CONVERSATION_STORE", "redis").lower()
+    with _stores_lock:
+        if backend not in _stores:
+            _stores[backend] = _create_store(backend)
+        return _stores[backend]
@@ -0,0 +1,37 @@
+"""
+Environment variable helpers shared by the tunable components of the server
+"""
+
+import logging
+import os
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def get_env_number(name: str, default: Optional[float], allow_zero: bool = False) -> Optional[float]:
+    """
+    Read a positive number from the environment.
+
+    Args:
+        name: Environment variable to read
+        default: Value returned when the variable is unset, empty or invalid
+        allow_zero: Whether 0 is accepted as a valid value
+
+    Returns:
+        The parsed number, or default
+    """
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        parsed = float(value)
+        if parsed < 0 or (parsed == 0 and not allow_zero):
+            raise ValueError
+        return parsed
+    except ValueError:
+        if default is None:
+            logger.warning(f"Invalid {name} value ('{value}'), ignoring it")
+        else:
+            logger.warning(f"Invalid {name} value ('{value}'), using default of {default}")
+        return default
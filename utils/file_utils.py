@@ -16,13 +16,29 @@ Security Model:
 - All file access is restricted to PROJECT_ROOT and its subdirectories
 - Absolute paths are required to prevent ambiguity
 - Symbolic links are resolved to ensure they stay within bounds
+
+File Content Cache:
+read_file_content keeps formatted files in a process-wide LRU keyed by the
+resolved path, modification time (ns), size and line-number setting, so files
+that have not changed since the last read are not read and formatted again.
+A file rewritten in place within the filesystem's timestamp resolution and
+at the same size can be served stale; any other edit is a miss. Entries also
+keep the SHA-256 of the formatted content, which read_file_snapshot returns
+so conversation file snapshots of unchanged files are not hashed again.
+
+Environment Variables:
+- FILE_CONTENT_CACHE_MAX_MB: Memory budget for cached file content; 0 disables the cache (default: 64)
 """
 
+import hashlib
 import logging
 import os
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
+from .env import get_env_number
 from .file_types import BINARY_EXTENSIONS, CODE_EXTENSIONS, IMAGE_EXTENSIONS, TEXT_EXTENSIONS
 from .security_config import CONTAINER_WORKSPACE, EXCLUDED_DIRS, MCP_SIGNATURE_FILES, SECURITY_ROOT, WORKSPACE_ROOT
 from .token_utils import DEFAULT_CONTEXT_WINDOW, estimate_tokens
@@ -486,6 +502,99 @@ def expand_paths(paths: list[str], extensions: Optional[set[str]] = None) -> lis
     return expanded_files
 
 
+class FileContentCache:
+    """In-process LRU of formatted file content, bounded by total size."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        # key -> (formatted content, tokens, SHA-256, size); most recently used last
+        self._entries: OrderedDict[tuple, tuple[str, int, str, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: tuple) -> Optional[tuple[str, int, str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[:3]
+
+    def set(self, key: tuple, content: str, tokens: int, digest: str) -> None:
+        size = len(content.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[3]
+            self._entries[key] = (content, tokens, digest, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, _, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> dict[str, Any]:
+        return {
+            "enabled": True,
+            "max_bytes": self.max_bytes,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+# Global instance, created on first use; None when the cache is disabled
+_file_cache: Optional[FileContentCache] = None
+_file_cache_lock = threading.Lock()
+_file_cache_configured = False
+
+
+def get_file_cache() -> Optional[FileContentCache]:
+    """
+    Get the global file content cache.
+
+    Returns:
+        The singleton FileContentCache, or None if FILE_CONTENT_CACHE_MAX_MB is 0
+    """
+    global _file_cache, _file_cache_configured
+    if _file_cache_configured:
+        return _file_cache
+    with _file_cache_lock:
+        if not _file_cache_configured:
+            max_mb = get_env_number("FILE_CONTENT_CACHE_MAX_MB", 64.0, allow_zero=True)
+            _file_cache = FileContentCache(int(max_mb * 1024 * 1024)) if max_mb else None
+            _file_cache_configured = True
+    return _file_cache
+
+
+def get_file_cache_stats() -> dict[str, Any]:
+    """Hit/miss and size statistics of the file content cache."""
+    cache = get_file_cache()
+    return cache.get_stats() if cache else {"enabled": False}
+
+
+def reset_file_cache() -> None:
+    """Drop cached files and re-read FILE_CONTENT_CACHE_MAX_MB on next use."""
+    global _file_cache, _file_cache_configured
+    with _file_cache_lock:
+        _file_cache = None
+        _file_cache_configured = False
+
+
 def read_file_content(
     file_path: str, max_size: int = 1_000_000, *, include_line_numbers: Optional[bool] = None
 ) -> tuple[str, int]:
@@ -505,6 +614,31 @@ def read_file_content(
         Tuple of (formatted_content, estimated_tokens)
         Content is wrapped with clear delimiters for AI parsing
     """
+    content, tokens, _ = _read_file(file_path, max_size, include_line_numbers)
+    return content, tokens
+
+
+def read_file_snapshot(file_path: str) -> Optional[tuple[str, str]]:
+    """
+    Read a file as read_file_content formats it, with the SHA-256 of that content.
+
+    Unchanged files are served from the file content cache together with their
+    hash, so neither is computed again.
+
+    Args:
+        file_path: Path to file (must be absolute)
+
+    Returns:
+        (SHA-256 hex digest, formatted content), or None if the file could not be read
+    """
+    content, _, digest = _read_file(file_path, 1_000_000, None)
+    if digest is None:
+        return None
+    return digest, content
+
+
+def _read_file(file_path: str, max_size: int, include_line_numbers: Optional[bool]) -> tuple[str, int, Optional[str]]:
+    """read_file_content, plus the SHA-256 of the content (None for error content)."""
     logger.debug(f"[FILES] read_file_content called for: {file_path}")
     try:
         # Validate path security before any file operations
@@ -526,32 +660,43 @@ def read_file_content(
         content = f"\n--- ERROR ACCESSING FILE: {file_path} ---\nError: {error_msg}\n--- END FILE ---\n"
         tokens = estimate_tokens(content)
         logger.debug(f"[FILES] Returning error content for {file_path}: {tokens} tokens")
-        return content, tokens
+        return content, tokens, None
 
     try:
         # Validate file existence and type
         if not path.exists():
             logger.debug(f"[FILES] File does not exist: {file_path}")
             content = f"\n--- FILE NOT FOUND: {file_path} ---\nError: File does not exist\n--- END FILE ---\n"
-            return content, estimate_tokens(content)
+            return content, estimate_tokens(content), None
 
         if not path.is_file():
             logger.debug(f"[FILES] Path is not a file: {file_path}")
             content = f"\n--- NOT A FILE: {file_path} ---\nError: Path is not a file\n--- END FILE ---\n"
-            return content, estimate_tokens(content)
+            return content, estimate_tokens(content), None
 
         # Check file size to prevent memory exhaustion
-        file_size = path.stat().st_size
+        stat = path.stat()
+        file_size = stat.st_size
         logger.debug(f"[FILES] File size for {file_path}: {file_size:,} bytes")
         if file_size > max_size:
             logger.debug(f"[FILES] File too large: {file_path} ({file_size:,} > {max_size:,} bytes)")
             content = f"\n--- FILE TOO LARGE: {file_path} ---\nFile size: {file_size:,} bytes (max: {max_size:,})\n--- END FILE ---\n"
-            return content, estimate_tokens(content)
+            return content, estimate_tokens(content), None
 
         # Determine if we should add line numbers
         add_line_numbers = should_add_line_numbers(file_path, include_line_numbers)
         logger.debug(f"[FILES] Line numbers for {file_path}: {'enabled' if add_line_numbers else 'disabled'}")
 
+        # Serve unchanged files from the cache; the display path is part of
+        # the key because it is embedded in the BEGIN/END markers
+        cache = get_file_cache()
+        cache_key = (str(path), stat.st_mtime_ns, file_size, add_line_numbers, file_path)
+        if cache is not None:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                logger.debug(f"[FILES] Using cached content for {file_path}: {cached[1]} tokens")
+                return cached
+
         # Read the file with UTF-8 encoding, replacing invalid characters
         # This ensures we can handle files with mixed encodings
         logger.debug(f"[FILES] Reading file content for {file_path}")
@@ -576,14 +721,17 @@ def read_file_content(
         formatted = f"\n--- BEGIN FILE: {file_path} ---\n{file_content}\n--- END FILE: {file_path} ---\n"
         tokens = estimate_tokens(formatted)
         logger.debug(f"[FILES] Formatted content for {file_path}: {len(formatted)} chars, {tokens} tokens")
-        return formatted, tokens
+        digest = hashlib.sha256(formatted.encode("utf-8")).hexdigest()
+        if cache is not None:
+            cache.set(cache_key, formatted, tokens, digest)
+        return formatted, tokens, digest
 
     except Exception as e:
         logger.debug(f"[FILES] Exception reading file {file_path}: {type(e).__name__}: {e}")
         content = f"\n--- ERROR READING FILE: {file_path} ---\nError: {str(e)}\n--- END FILE ---\n"
         tokens = estimate_tokens(content)
         logger.debug(f"[FILES] Returning error content for {file_path}: {tokens} tokens")
-        return content, tokens
+        return content, tokens, None
 
 
 def read_files(
@@ -113,12 +113,15 @@ class ModelContext:
 
         return allocation
 
-    def estimate_tokens(self, text: str) -> int:
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
         """
         Estimate token count for text using model-specific tokenizer.
 
         For now, uses simple estimation. Can be enhanced with model-specific
-        tokenizers (tiktoken for OpenAI, etc.) in the future.
+        tokenizers (tiktoken for OpenAI, etc.) in the future. Conversation turns
+        cache this estimate when they are written (see utils.conversation_memory),
+        so a model-specific tokenizer would need to stop trusting the cached counts.
         """
         # TODO: Integrate model-specific tokenizers
         # For now, use conservative estimation
@@ -0,0 +1,348 @@
+"""
+Client-side Rate Limiter
+
+This module throttles model API calls before they leave the server, so that
+several Claude sessions sharing one API key queue locally instead of burning
+quota on requests the provider would reject with 429.
+
+Limits are token buckets for requests/minute (RPM) and tokens/minute (TPM),
+tracked separately for each provider and resolved model name. Callers that
+exceed a limit wait in FIFO order. The input token cost is estimated from the
+prompt before dispatch and corrected from ModelResponse.usage afterwards.
+
+Every model call the server makes goes through limited_model_call(), which
+also records the call's outcome for the provider circuit breaker
+(providers.health), so tool calls and conversation compaction share the same
+limits and health records.
+
+Environment Variables (configured per provider, like {PROVIDER}_ALLOWED_MODELS):
+- {PROVIDER}_RATE_LIMIT_RPM: Default requests/minute for each model of the provider
+- {PROVIDER}_RATE_LIMIT_TPM: Default tokens/minute for each model of the provider
+- {PROVIDER}_MODEL_RATE_LIMITS: Per-model overrides as model=rpm/tpm pairs
+  (either side may be left empty)
+
+Example:
+    OPENAI_RATE_LIMIT_RPM=60
+    OPENAI_MODEL_RATE_LIMITS=o3=20/200000,o4-mini=/1000000
+    GOOGLE_RATE_LIMIT_TPM=1000000
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections.abc import Awaitable
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from providers.base import ModelResponse, ProviderType
+from providers.health import get_health_monitor
+
+from .env import get_env_number
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Requests/minute and tokens/minute limits; None means unlimited."""
+
+    rpm: Optional[int] = None
+    tpm: Optional[int] = None
+
+    @property
+    def is_unlimited(self) -> bool:
+        return self.rpm is None and self.tpm is None
+
+
+@dataclass
+class RateLimitReservation:
+    """Capacity taken for one request, used to correct the estimate afterwards."""
+
+    provider_type: ProviderType
+    model_name: str
+    estimated_tokens: int = 0
+    waited: float = 0.0
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at capacity per minute."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.rate = capacity / 60.0  # per second
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until_available(self, amount: float) -> float:
+        """Seconds until amount can be taken (0 if available now)."""
+        self._refill()
+        # A single request larger than the bucket only has to wait for a full bucket
+        amount = min(amount, self.capacity)
+        deficit = amount - self.tokens
+        return 0.0 if deficit <= 0 else deficit / self.rate
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, delta: float) -> None:
+        """Apply a usage correction; tokens may go negative (debt repaid by refill)."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+
+class _ModelLimiter:
+    """Buckets plus a FIFO queue for one provider/model pair."""
+
+    def __init__(self, limit: RateLimit):
+        self.limit = limit
+        self.requests = TokenBucket(limit.rpm) if limit.rpm else None
+        self.tokens = TokenBucket(limit.tpm) if limit.tpm else None
+        self.lock: Optional[asyncio.Lock] = None
+        self.waiting = 0
+
+    def wait_time(self, tokens: int) -> float:
+        delays = [0.0]
+        if self.requests:
+            delays.append(self.requests.time_until_available(1))
+        if self.tokens:
+            delays.append(self.tokens.time_until_available(tokens))
+        return max(delays)
+
+    def consume(self, tokens: int) -> None:
+        if self.requests:
+            self.requests.consume(1)
+        if self.tokens:
+            self.tokens.consume(tokens)
+
+
+def parse_model_rate_limits(value: str) -> dict[str, RateLimit]:
+    """
+    Parse a {PROVIDER}_MODEL_RATE_LIMITS string.
+
+    Args:
+        value: Comma-separated model=rpm/tpm entries (e.g. "o3=20/200000,o4-mini=/1000000")
+
+    Returns:
+        dict[str, RateLimit]: Lowercased model name to limits, skipping malformed entries
+    """
+    limits = {}
+    for entry in value.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        model, sep, spec = entry.partition("=")
+        rpm_str, _, tpm_str = spec.partition("/")
+        try:
+            if not sep or not model.strip():
+                raise ValueError
+            rpm = int(rpm_str) if rpm_str.strip() else None
+            tpm = int(tpm_str) if tpm_str.strip() else None
+            if (rpm is not None and rpm <= 0) or (tpm is not None and tpm <= 0):
+                raise ValueError
+        except ValueError:
+            logger.warning(f"Ignoring invalid model rate limit entry '{entry}'")
+            continue
+        limits[model.strip().lower()] = RateLimit(rpm=rpm, tpm=tpm)
+    return limits
+
+
+def _get_limit(name: str) -> Optional[int]:
+    limit = get_env_number(name, None)
+    return int(limit) if limit else None
+
+
+class RateLimiter:
+    """
+    Token-bucket RPM/TPM limiter keyed by provider type and resolved model name.
+
+    Usage:
+        reservation = await limiter.acquire(ProviderType.OPENAI, "o3", estimated_tokens)
+        response = await provider.agenerate_content(...)
+        limiter.record_usage(reservation, response.usage.get("total_tokens"))
+    """
+
+    def __init__(self):
+        self.provider_defaults: dict[ProviderType, RateLimit] = {}
+        self.model_limits: dict[ProviderType, dict[str, RateLimit]] = {}
+        self._limiters: dict[tuple[ProviderType, str], _ModelLimiter] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._load_from_env()
+
+    def _load_from_env(self) -> None:
+        """Load limits for every provider from environment variables."""
+        for provider_type in ProviderType:
+            prefix = provider_type.value.upper()
+
+            default = RateLimit(
+                rpm=_get_limit(f"{prefix}_RATE_LIMIT_RPM"),
+                tpm=_get_limit(f"{prefix}_RATE_LIMIT_TPM"),
+            )
+            if not default.is_unlimited:
+                self.provider_defaults[provider_type] = default
+                logger.info(f"{provider_type.value} rate limit per model: rpm={default.rpm}, tpm={default.tpm}")
+
+            overrides = parse_model_rate_limits(os.getenv(f"{prefix}_MODEL_RATE_LIMITS", ""))
+            if overrides:
+                self.model_limits[provider_type] = overrides
+                logger.info(f"{provider_type.value} model rate limits: {overrides}")
+
+    def get_limit(self, provider_type: ProviderType, model_name: str) -> RateLimit:
+        """Get the effective limits for a provider/model pair."""
+        override = self.model_limits.get(provider_type, {}).get(model_name.lower())
+        if override is not None:
+            return override
+        return self.provider_defaults.get(provider_type, RateLimit())
+
+    def _get_model_limiter(self, provider_type: ProviderType, model_name: str) -> Optional[_ModelLimiter]:
+        key = (provider_type, model_name.lower())
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            limit = self.get_limit(provider_type, model_name)
+            if limit.is_unlimited:
+                return None
+            limiter = _ModelLimiter(limit)
+            self._limiters[key] = limiter
+
+        # Locks belong to the event loop that created them; rebuilt if the loop changes
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            for existing in self._limiters.values():
+                existing.lock = None
+        if limiter.lock is None:
+            limiter.lock = asyncio.Lock()
+        return limiter
+
+    async def acquire(
+        self, provider_type: ProviderType, model_name: str, estimated_tokens: int = 0
+    ) -> RateLimitReservation:
+        """
+        Wait until the request fits both buckets, then take its capacity.
+
+        Waiters are served in arrival order: the head of the queue sleeps while
+        holding the model's lock, so later callers cannot overtake it.
+
+        Args:
+            provider_type: Provider serving the request
+            model_name: Resolved model name
+            estimated_tokens: Estimated token cost (prompt) for the TPM bucket
+
+        Returns:
+            RateLimitReservation to pass to record_usage()
+        """
+        reservation = RateLimitReservation(provider_type, model_name, estimated_tokens)
+        if not self.provider_defaults and not self.model_limits:
+            return reservation
+
+        limiter = self._get_model_limiter(provider_type, model_name)
+        if limiter is None:
+            return reservation
+
+        started = time.monotonic()
+        limiter.waiting += 1
+        try:
+            async with limiter.lock:
+                while True:
+                    delay = limiter.wait_time(estimated_tokens)
+                    if delay <= 0:
+                        break
+                    logger.info(
+                        f"[RATE_LIMIT] {provider_type.value}/{model_name} limit reached, waiting {delay:.1f}s "
+                        f"({limiter.waiting} request(s) queued)"
+                    )
+                    await asyncio.sleep(delay)
+                limiter.consume(estimated_tokens)
+        finally:
+            limiter.waiting -= 1
+
+        reservation.waited = time.monotonic() - started
+        return reservation
+
+    def record_usage(self, reservation: RateLimitReservation, actual_tokens: Optional[int]) -> None:
+        """
+        Correct the TPM bucket with the tokens the provider actually reported.
+
+        Args:
+            reservation: Reservation returned by acquire()
+            actual_tokens: Total tokens from ModelResponse.usage, or None if unknown
+        """
+        if not actual_tokens:
+            return
+        limiter = self._limiters.get((reservation.provider_type, reservation.model_name.lower()))
+        if limiter is None or limiter.tokens is None:
+            return
+        limiter.tokens.adjust(actual_tokens - reservation.estimated_tokens)
+
+    def get_stats(self) -> dict[str, dict]:
+        """Get current bucket levels and queue lengths per provider/model."""
+        stats = {}
+        for (provider_type, model_name), limiter in self._limiters.items():
+            entry = {"rpm": limiter.limit.rpm, "tpm": limiter.limit.tpm, "waiting": limiter.waiting}
+            if limiter.requests:
+                limiter.requests._refill()
+                entry["requests_available"] = int(limiter.requests.tokens)
+            if limiter.tokens:
+                limiter.tokens._refill()
+                entry["tokens_available"] = int(limiter.tokens.tokens)
+            stats[f"{provider_type.value}/{model_name}"] = entry
+        return stats
+
+
+# Global instance (singleton pattern)
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Get the global rate limiter instance.
+
+    Returns:
+        The singleton RateLimiter instance
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter()
+    return _rate_limiter
+
+
+async def limited_model_call(
+    provider_type: ProviderType,
+    model_name: str,
+    estimated_tokens: int,
+    call: Callable[[], Awaitable[ModelResponse]],
+) -> ModelResponse:
+    """
+    Await a model call under its rate limit, recording the outcome for the circuit breaker.
+
+    Args:
+        provider_type: Provider the call is made to
+        model_name: Resolved model name (the rate limit key)
+        estimated_tokens: Estimated input tokens of the request
+        call: Starts the model call
+
+    Returns:
+        The model response; metadata["rate_limit_wait"] is set if the call had to wait
+    """
+    rate_limiter = get_rate_limiter()
+    reservation = await rate_limiter.acquire(provider_type, model_name, estimated_tokens)
+
+    health = get_health_monitor()
+    started = time.monotonic()
+    try:
+        model_response = await call()
+    except Exception as e:
+        health.record_failure(provider_type, time.monotonic() - started, e)
+        raise
+    health.record_success(provider_type, time.monotonic() - started)
+
+    rate_limiter.record_usage(reservation, model_response.usage.get("total_tokens"))
+    if reservation.waited >= 0.001:
+        model_response.metadata["rate_limit_wait"] = round(reservation.waited, 3)
+    return model_response
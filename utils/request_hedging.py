@@ -0,0 +1,232 @@
+"""
+Hedged model requests for latency-sensitive tools
+
+Model latency has a long tail: most calls return in seconds but a few stall
+for much longer. For interactive tools it is often cheaper to send a second
+copy of a slow request than to wait for it.
+
+When hedging is enabled for a tool, the primary call is started as usual. If
+it has not answered within the configured percentile of the latencies
+observed for that provider/model, the same request is sent to a secondary
+model. Whichever answers first wins and the other call is cancelled.
+
+The secondary is HEDGE_MODEL if set, otherwise an equivalent model on another
+healthy provider (see ModelProviderRegistry.get_failover_model), otherwise the
+same model again.
+
+The trigger percentile is taken over the primary calls raced so far. A
+primary cancelled before answering - because the hedge won or the request
+was abandoned - is sampled at the time it was cancelled, a lower bound on its
+latency. Sampling only the calls that finished would leave out the slowest
+ones and pull the trigger down, so hedges would fire more and more often.
+
+Hedge rate, wins and the extra tokens sent are kept per tool (get_stats()) so
+the trigger percentile can be tuned.
+
+Environment Variables:
+- HEDGE_TOOLS: Comma-separated tools to hedge, e.g. "chat" (default: none - hedging is opt-in)
+- HEDGE_LATENCY_PERCENTILE: Observed latency percentile that triggers a hedge (default: 95)
+- HEDGE_MIN_SAMPLES: Completed calls needed for a model before it is hedged (default: 20)
+- HEDGE_MIN_DELAY: Lower bound on the hedge trigger in seconds (default: 1.0)
+- HEDGE_MODEL: Model to send hedged requests to (default: auto)
+"""
+
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+from collections.abc import Awaitable
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, TypeVar
+
+from .env import get_env_number
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Latencies remembered per provider/model
+LATENCY_WINDOW = 200
+
+
+@dataclass
+class HedgeStats:
+    """Hedging counters for one tool."""
+
+    requests: int = 0
+    hedged: int = 0
+    hedge_wins: int = 0
+    primary_wins: int = 0
+    extra_tokens: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_rate": round(self.hedged / self.requests, 3) if self.requests else 0.0,
+            "hedge_wins": self.hedge_wins,
+            "primary_wins": self.primary_wins,
+            "hedge_win_rate": round(self.hedge_wins / self.hedged, 3) if self.hedged else 0.0,
+            "extra_tokens": self.extra_tokens,
+        }
+
+
+class RequestHedger:
+    """Races a slow primary model call against a delayed secondary call."""
+
+    def __init__(self):
+        self.tools = {name.strip().lower() for name in os.getenv("HEDGE_TOOLS", "").split(",") if name.strip()}
+        self.percentile = min(100.0, get_env_number("HEDGE_LATENCY_PERCENTILE", 95.0))
+        self.min_samples = int(get_env_number("HEDGE_MIN_SAMPLES", 20))
+        self.min_delay = get_env_number("HEDGE_MIN_DELAY", 1.0)
+        self.hedge_model = os.getenv("HEDGE_MODEL", "").strip() or None
+
+        self._latencies: dict[str, deque[float]] = {}
+        self._stats: dict[str, HedgeStats] = {}
+
+        if self.tools:
+            logger.info(
+                f"Request hedging enabled for {', '.join(sorted(self.tools))} "
+                f"at p{self.percentile:g} latency (secondary: {self.hedge_model or 'auto'})"
+            )
+
+    def is_enabled(self, tool_name: str) -> bool:
+        return tool_name.lower() in self.tools
+
+    def record_latency(self, model_key: str, latency: float) -> None:
+        """Record the latency (or its lower bound) of a call for provider/model model_key."""
+        samples = self._latencies.get(model_key)
+        if samples is None:
+            samples = self._latencies[model_key] = deque(maxlen=LATENCY_WINDOW)
+        samples.append(latency)
+
+    def get_trigger_delay(self, model_key: str) -> Optional[float]:
+        """
+        Seconds to wait for the primary before hedging.
+
+        Returns:
+            Optional[float]: The configured latency percentile (at least HEDGE_MIN_DELAY),
+            or None while fewer than HEDGE_MIN_SAMPLES latencies are known
+        """
+        samples = self._latencies.get(model_key)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(self.percentile / 100 * len(ordered)) - 1))
+        return max(self.min_delay, ordered[index])
+
+    def _get_tool_stats(self, tool_name: str) -> HedgeStats:
+        stats = self._stats.get(tool_name)
+        if stats is None:
+            stats = self._stats[tool_name] = HedgeStats()
+        return stats
+
+    async def race(
+        self,
+        tool_name: str,
+        model_key: str,
+        primary: Callable[[], Awaitable[T]],
+        secondary: Callable[[], Awaitable[T]],
+        extra_tokens: int = 0,
+    ) -> tuple[T, Optional[dict[str, Any]]]:
+        """
+        Run primary, hedging with secondary if it is slower than the trigger delay.
+
+        Args:
+            tool_name: Tool making the call (stats are kept per tool)
+            model_key: provider/model key of the primary; its latency is recorded under this key
+            primary: Factory for the primary call
+            secondary: Factory for the hedged call, only invoked if the hedge fires
+            extra_tokens: Estimated tokens a hedge sends (counted as extra cost)
+
+        Returns:
+            (result, hedge_info): hedge_info is None if no hedge was sent, otherwise
+            {"delay": seconds, "winner": "primary" | "hedge"}
+
+        Raises:
+            Exception: The primary's error if both calls fail
+        """
+        stats = self._get_tool_stats(tool_name)
+        stats.requests += 1
+
+        started = time.monotonic()
+
+        async def timed_primary() -> T:
+            result = await primary()
+            self.record_latency(model_key, time.monotonic() - started)
+            return result
+
+        delay = self.get_trigger_delay(model_key)
+        primary_task = asyncio.ensure_future(timed_primary())
+        hedge_task = None
+        try:
+            if delay is None:
+                return await primary_task, None
+
+            done, _ = await asyncio.wait({primary_task}, timeout=delay)
+            if done:
+                return primary_task.result(), None
+
+            logger.info(f"[HEDGE] {tool_name}: {model_key} has not answered after {delay:.1f}s, sending hedge")
+            stats.hedged += 1
+            stats.extra_tokens += extra_tokens
+            hedge_task = asyncio.ensure_future(secondary())
+
+            pending = {primary_task, hedge_task}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # Prefer the primary if both finished in the same iteration
+                for task in sorted(done, key=lambda t: t is not primary_task):
+                    if task.exception() is not None:
+                        label = "primary" if task is primary_task else "hedge"
+                        logger.debug(f"[HEDGE] {tool_name}: {label} call failed: {task.exception()}")
+                        continue
+                    if task is primary_task:
+                        stats.primary_wins += 1
+                        return task.result(), {"delay": round(delay, 3), "winner": "primary"}
+                    stats.hedge_wins += 1
+                    return task.result(), {"delay": round(delay, 3), "winner": "hedge"}
+
+            # Both failed - surface the primary's error
+            raise primary_task.exception()
+        finally:
+            if not primary_task.done() or primary_task.cancelled():
+                # Cancelled before answering: sample how long it ran as a lower bound
+                self.record_latency(model_key, time.monotonic() - started)
+            for task in (primary_task, hedge_task):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def get_stats(self) -> dict[str, Any]:
+        """Get hedging configuration, per-tool counters and current trigger delays."""
+        triggers = {}
+        for model_key in self._latencies:
+            delay = self.get_trigger_delay(model_key)
+            if delay is not None:
+                triggers[model_key] = round(delay, 3)
+        return {
+            "tools": sorted(self.tools),
+            "percentile": self.percentile,
+            "hedge_model": self.hedge_model,
+            "stats": {tool_name: stats.as_dict() for tool_name, stats in self._stats.items()},
+            "trigger_delays": triggers,
+        }
+
+
+# Global instance (singleton pattern)
+_request_hedger: Optional[RequestHedger] = None
+
+
+def get_request_hedger() -> RequestHedger:
+    """
+    Get the global request hedger instance.
+
+    Returns:
+        The singleton RequestHedger instance
+    """
+    global _request_hedger
+    if _request_hedger is None:
+        _request_hedger = RequestHedger()
+    return _request_hedger
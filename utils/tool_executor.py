@@ -0,0 +1,213 @@
+"""
+Bounded executor for blocking tool work
+
+Tool execution is async, but much of the work a tool does is not: reading and
+formatting files, expanding directories, conversation storage round-trips and
+git subprocess calls in precommit. Running those directly on the event loop
+means one slow request stalls every other MCP request behind it.
+
+This module moves that work onto a shared, bounded thread pool. Each tool gets
+its own concurrency limit so a burst of heavy requests for one tool (e.g. a
+precommit over many repositories) cannot starve lighter tools like chat.
+
+Environment Variables:
+- TOOL_EXECUTOR_MAX_WORKERS: Size of the shared worker thread pool (default: 16)
+- TOOL_DEFAULT_CONCURRENCY: Concurrent blocking jobs per tool when not listed (default: 4)
+- TOOL_CONCURRENCY_LIMITS: Per-tool overrides as comma-separated name=limit pairs
+
+Example:
+    TOOL_CONCURRENCY_LIMITS=precommit=2,chat=8,codereview=4
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from .env import get_env_number
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Built-in per-tool limits, overridable via TOOL_CONCURRENCY_LIMITS
+# precommit spawns git subprocesses per changed file, chat is light and interactive
+DEFAULT_TOOL_LIMITS = {
+    "precommit": 2,
+    "chat": 8,
+}
+
+DEFAULT_MAX_WORKERS = 16
+DEFAULT_TOOL_CONCURRENCY = 4
+
+
+def parse_tool_limits(value: str) -> dict[str, int]:
+    """
+    Parse a TOOL_CONCURRENCY_LIMITS string into a mapping.
+
+    Args:
+        value: Comma-separated name=limit pairs (e.g. "precommit=2,chat=8")
+
+    Returns:
+        dict[str, int]: Tool name to limit, skipping malformed entries
+    """
+    limits = {}
+    for entry in value.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, sep, limit = entry.partition("=")
+        try:
+            parsed = int(limit)
+            if not sep or parsed <= 0:
+                raise ValueError
+        except ValueError:
+            logger.warning(f"Ignoring invalid TOOL_CONCURRENCY_LIMITS entry '{entry}'")
+            continue
+        limits[name.strip().lower()] = parsed
+    return limits
+
+
+class ToolExecutor:
+    """
+    Shared thread pool with per-tool concurrency limits.
+
+    Jobs for a tool wait on that tool's semaphore before they are handed to the
+    pool, so queue depth is tracked per tool and reported by get_stats().
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        tool_limits: Optional[dict[str, int]] = None,
+        default_limit: Optional[int] = None,
+    ):
+        self.max_workers = max_workers or int(get_env_number("TOOL_EXECUTOR_MAX_WORKERS", DEFAULT_MAX_WORKERS))
+        self.default_limit = default_limit or int(get_env_number("TOOL_DEFAULT_CONCURRENCY", DEFAULT_TOOL_CONCURRENCY))
+
+        self.tool_limits = dict(DEFAULT_TOOL_LIMITS)
+        if tool_limits is None:
+            tool_limits = parse_tool_limits(os.getenv("TOOL_CONCURRENCY_LIMITS", ""))
+        self.tool_limits.update({name.lower(): limit for name, limit in tool_limits.items()})
+
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="zen-tool")
+
+        # Semaphores belong to the event loop that created them; rebuilt if the loop changes
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+
+        self._active: dict[str, int] = defaultdict(int)
+        self._queued: dict[str, int] = defaultdict(int)
+        self._completed: dict[str, int] = defaultdict(int)
+
+    def get_limit(self, tool_name: str) -> int:
+        """Get the concurrency limit for a tool."""
+        return self.tool_limits.get(tool_name.lower(), self.default_limit)
+
+    def _get_semaphore(self, tool_name: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphores = {}
+
+        semaphore = self._semaphores.get(tool_name)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.get_limit(tool_name))
+            self._semaphores[tool_name] = semaphore
+        return semaphore
+
+    async def run(self, tool_name: str, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run a blocking callable on the pool, respecting the tool's concurrency limit.
+
+        Context variables are copied into the worker thread, matching asyncio.to_thread().
+
+        Args:
+            tool_name: Tool the work belongs to (selects the concurrency limit)
+            func: Blocking callable to run
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Whatever func returns; exceptions propagate to the caller
+        """
+        semaphore = self._get_semaphore(tool_name)
+
+        self._queued[tool_name] += 1
+        if semaphore.locked():
+            logger.debug(
+                f"[EXECUTOR] {tool_name} at concurrency limit {self.get_limit(tool_name)}, "
+                f"{self._queued[tool_name]} job(s) queued"
+            )
+        try:
+            await semaphore.acquire()
+        finally:
+            self._queued[tool_name] -= 1
+
+        self._active[tool_name] += 1
+        try:
+            loop = asyncio.get_running_loop()
+            context = contextvars.copy_context()
+            call = functools.partial(context.run, func, *args, **kwargs)
+            return await loop.run_in_executor(self._pool, call)
+        finally:
+            self._active[tool_name] -= 1
+            self._completed[tool_name] += 1
+            semaphore.release()
+
+    def get_stats(self) -> dict[str, Any]:
+        """
+        Get executor statistics for monitoring.
+
+        Returns:
+            Dict with pool size, total active/queued jobs and per-tool breakdown.
+            pool_backlog counts admitted jobs still waiting for a free worker thread.
+        """
+        tool_names = sorted(set(self._active) | set(self._queued) | set(self._completed))
+        total_active = sum(self._active.values())
+        return {
+            "max_workers": self.max_workers,
+            "default_limit": self.default_limit,
+            "active": total_active,
+            "queued": sum(self._queued.values()),
+            "pool_backlog": max(0, total_active - self.max_workers),
+            "tools": {
+                name: {
+                    "limit": self.get_limit(name),
+                    "active": self._active[name],
+                    "queued": self._queued[name],
+                    "completed": self._completed[name],
+                }
+                for name in tool_names
+            },
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shut down the worker pool."""
+        self._pool.shutdown(wait=wait)
+
+
+# Global instance (singleton pattern)
+_tool_executor: Optional[ToolExecutor] = None
+
+
+def get_tool_executor() -> ToolExecutor:
+    """
+    Get the global tool executor instance.
+
+    Returns:
+        The singleton ToolExecutor instance
+    """
+    global _tool_executor
+    if _tool_executor is None:
+        _tool_executor = ToolExecutor()
+    return _tool_executor
+
+
+async def run_blocking(tool_name: str, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run blocking work for a tool on the global executor."""
+    return await get_tool_executor().run(tool_name, func, *args, **kwargs)